@@ -0,0 +1,285 @@
+"""クリティカルチェーン算出（calculate_critical_chain）の計測。
+
+合成した CCPM ネットワーク（層状のランダム DAG、タスク 25 件あたり 1 リソース）で、
+リソース平準化（_level_resources）単体の時間、推移的簡約を含むクリティカルチェーン算出全体の時間、
+平準化後に残った競合数を計測する。
+
+コンパイル済み DAG（src.ccpm_dag.CompiledDag）については、NetworkX を直接たどる実装と、
+コンパイル1回＋前進・後退計算（クリティカルパス・最早スケジュール・残パス長）の時間を比較する。
+
+あわせて、1 つのリソースに 2,000 タスクが集中したネットワークで、競合検出
+（_detect_resource_conflicts）のスイープライン方式と全ペア比較方式を比較する。
+
+仮想エッジの推移的簡約は、作業用グラフ全体に nx.transitive_reduction をかける方式と、
+仮想エッジごとに到達可能性インデックスで迂回ルートを調べる方式（_reduce_virtual_edges）を比較する。
+
+ガントチャート生成（make_gantt_puml）は、バー文字列のキャッシュが空の場合と、
+1 タスクの進捗だけを更新して再生成した場合の時間を計測する。
+
+モンテカルロ・シミュレーション（simulate_schedule）は、1,000 タスクのネットワークで
+10,000 回の試行を同じプロセスで行った場合とプロセスプールを使った場合の時間を計測する。
+
+What-if シナリオ（ScenarioEngine）は、ランダムに選んだ 1 タスクの日数を変えたシナリオについて、
+仮想エッジを固定した差分再計算と平準化を含む全体の再計算（calculate_critical_chain）の時間を比較する。
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_ccpm_engine.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx  # noqa: E402
+
+from src.ccpm_analysis import CCPMAnalysis  # noqa: E402
+from src.ccpm_dag import CompiledDag  # noqa: E402
+from src.ccpm_engine import (  # noqa: E402
+    _ReachabilityIndex,
+    _level_critical_chain,
+    _reduce_virtual_edges,
+    _story_bar,
+    _compute_earliest_schedule,
+    _get_effective_days,
+    _detect_resource_conflicts,
+    _level_resources,
+    calculate_critical_chain,
+    make_gantt_puml,
+)
+from src.ccpm_scenario import Scenario  # noqa: E402
+from src.ccpm_simulation import simulate_schedule  # noqa: E402
+
+SIZES = (500, 1_000, 2_000, 5_000)
+CONCURRENCY = (0, 20)
+REPEAT = 3
+LAYER_WIDTH = 50
+OVERLOADED_TASKS = 2_000
+
+
+def make_network(task_count: int, seed: int = 0, resource_count: int = 0) -> nx.DiGraph:
+    """層状のランダム DAG を作る（各タスクは直前の層の 1〜3 タスクに依存）。"""
+    rng = random.Random(seed)
+    resources = [f"R{i}" for i in range(resource_count or max(1, task_count // 25))]
+    g = nx.DiGraph()
+    previous: list = []
+    layer: list = []
+    for i in range(task_count):
+        node = f"T{i:05d}"
+        g.add_node(
+            node,
+            title=node,
+            days=rng.randint(1, 10),
+            resource=rng.choice(resources),
+            start="",
+            end="",
+            remains=0,
+            finished=False,
+            type="task",
+        )
+        for pred in rng.sample(previous, min(len(previous), rng.randint(1, 3))):
+            g.add_edge(pred, node)
+        layer.append(node)
+        if len(layer) == LAYER_WIDTH:
+            previous, layer = layer, []
+    return g
+
+
+def _median_ms(func) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _residual_conflicts(graph: nx.DiGraph, virtual_edges, max_concurrency: int) -> int:
+    leveled = graph.copy()
+    leveled.add_edges_from((src, dst) for src, dst, _ in virtual_edges)
+    schedule = _compute_earliest_schedule(leveled)
+    return len(_detect_resource_conflicts(leveled, schedule, max_concurrency))
+
+
+def _all_pairs_conflicts(graph: nx.DiGraph, schedule, reachability) -> int:
+    """全ペア比較による名前付きリソースの競合検出（比較用）。"""
+    resource_tasks: dict = {}
+    for node in graph.nodes:
+        resource_tasks.setdefault(graph.nodes[node]["resource"], []).append(node)
+    count = 0
+    for tasks in resource_tasks.values():
+        for i in range(len(tasks)):
+            for j in range(i + 1, len(tasks)):
+                a, b = tasks[i], tasks[j]
+                a_start, a_end = schedule[a]
+                b_start, b_end = schedule[b]
+                if a_start < b_end and b_start < a_end and not reachability.connected(a, b):
+                    count += 1
+    return count
+
+
+def _networkx_passes(graph: nx.DiGraph):
+    """NetworkX のグラフを直接たどる前進・後退計算（比較用）。"""
+    order = list(nx.topological_sort(graph))
+    dist, finish, remaining = {}, {}, {}
+    for node in order:
+        days = _get_effective_days(graph, node)
+        preds = list(graph.predecessors(node))
+        dist[node] = max((dist[p] for p in preds), default=0.0) + days
+        finish[node] = max((finish[p] for p in preds), default=0.0) + days
+    for node in reversed(order):
+        succs = [remaining[s] for s in graph.successors(node)]
+        remaining[node] = _get_effective_days(graph, node) + max(succs, default=0.0)
+    return dist, finish, remaining
+
+
+def _compiled_passes(dag: CompiledDag, durations):
+    dag.longest_paths(durations)
+    dag.earliest_schedule(durations)
+    dag.remaining_lengths(durations)
+
+
+def bench_compiled_dag():
+    print("\ncompiled DAG: CP + ASAP + remaining lengths")
+    print(f"{'tasks':>6} {'networkx':>10} {'compile':>10} {'passes':>10} {'speedup':>8}")
+    for size in SIZES + (20_000,):
+        graph = make_network(size)
+        walk = _median_ms(lambda: _networkx_passes(graph))
+        compile_ms = _median_ms(lambda: CompiledDag(graph))
+        dag = CompiledDag(graph)
+        durations = dag.durations("remaining", lambda n: _get_effective_days(graph, n))
+        passes = _median_ms(lambda: _compiled_passes(dag, durations))
+        print(f"{size:>6} {walk:>8.1f}ms {compile_ms:>8.1f}ms {passes:>8.1f}ms {walk / passes:>7.0f}x")
+
+
+def bench_overloaded_resource():
+    graph = make_network(OVERLOADED_TASKS, resource_count=1)
+    _, _, virtual_edges = calculate_critical_chain(graph)
+    leveled = graph.copy()
+    leveled.add_edges_from((src, dst) for src, dst, _ in virtual_edges)
+
+    print(f"\noverloaded resource: {OVERLOADED_TASKS} tasks on one resource")
+    print(f"{'schedule':<10} {'pairs':>8} {'sweep':>10} {'all pairs':>10}")
+    for label, target in (("ASAP", graph), ("leveled", leveled)):
+        schedule = _compute_earliest_schedule(target)
+        reachability = _ReachabilityIndex(target)
+        pairs = len(_detect_resource_conflicts(target, schedule, 0, reachability))
+        sweep = _median_ms(lambda: _detect_resource_conflicts(target, schedule, 0, reachability))
+        all_pairs = _median_ms(lambda: _all_pairs_conflicts(target, schedule, reachability))
+        print(f"{label:<10} {pairs:>8} {sweep:>8.0f}ms {all_pairs:>8.0f}ms")
+
+
+def bench_virtual_edge_reduction():
+    print()
+    print(f"{'tasks':>6} {'max_conc':>8} {'virtual':>8} {'kept':>6} {'networkx':>10} {'targeted':>10}")
+    for size in (2_000,):
+        graph = make_network(size)
+        for max_concurrency in CONCURRENCY:
+            _, _, virtual_edges, work_graph, dag = _level_critical_chain(graph, max_concurrency)
+            # 簡約前の仮想エッジ（作業用グラフ上で virtual 属性を持つもの）
+            virtual_edges = [(u, v, "") for u, v, d in work_graph.edges(data=True) if d.get("virtual")]
+
+            def _networkx():
+                reduced = nx.transitive_reduction(work_graph)
+                return [edge for edge in virtual_edges if reduced.has_edge(edge[0], edge[1])]
+
+            def _targeted():
+                # 残存競合の確認でインデックスを作らなかった場合と同じく、作成時間も含める
+                reachability = _ReachabilityIndex(work_graph, dag.nodes)
+                return _reduce_virtual_edges(work_graph, virtual_edges, reachability)
+
+            kept = len(_targeted())
+            networkx_ms = _median_ms(_networkx)
+            targeted_ms = _median_ms(_targeted)
+            print(
+                f"{size:>6} {max_concurrency:>8} {len(virtual_edges):>8} {kept:>6} "
+                f"{networkx_ms:>8.0f}ms {targeted_ms:>8.1f}ms"
+            )
+
+
+def bench_gantt():
+    print()
+    print(f"{'tasks':>6} {'cold':>10} {'one task':>10}")
+    project = {"start": "2025/07/01", "end": "2026/12/31", "today": "2025/09/01", "holidays": ["2025/09/15"]}
+    for size in SIZES:
+        graph = make_network(size)
+        rng = random.Random(size)
+        for node, attrs in graph.nodes(data=True):
+            if rng.random() < 0.3:
+                attrs.update(start="2025/08/01", remains=rng.randint(1, 5))
+        _, cc, virtual_edges = calculate_critical_chain(graph, 20)
+
+        def _cold():
+            _story_bar.cache_clear()
+            make_gantt_puml(graph, project, cc, virtual_edges)
+
+        cold = _median_ms(_cold)
+        node = next(iter(graph.nodes))
+
+        def _one_task():
+            graph.nodes[node]["remains"] += 1
+            make_gantt_puml(graph, project, cc, virtual_edges)
+
+        one_task = _median_ms(_one_task)
+        print(f"{size:>6} {cold:>8.1f}ms {one_task:>8.1f}ms")
+
+
+def bench_simulation():
+    print()
+    print(f"{'tasks':>6} {'iterations':>10} {'serial':>10} {'pool':>10} {'P50':>7} {'P90':>7} {'CC':>7}")
+    size, iterations = 1_000, 10_000
+    graph = make_network(size)
+    cc_length, _, virtual_edges = calculate_critical_chain(graph, 20)
+    result = []
+    serial = _median_ms(lambda: result.append(simulate_schedule(graph, virtual_edges, iterations, seed=0, max_workers=1)))
+    pool = _median_ms(lambda: simulate_schedule(graph, virtual_edges, iterations, seed=0))
+    percentiles = result[-1].percentiles
+    print(
+        f"{size:>6} {iterations:>10} {serial:>8.0f}ms {pool:>8.0f}ms "
+        f"{percentiles[50]:>7.1f} {percentiles[90]:>7.1f} {cc_length:>7.0f}"
+    )
+
+
+def bench_scenario():
+    print()
+    print(f"{'tasks':>6} {'full':>10} {'scenario':>10} {'recomputed':>10}")
+    for size in SIZES:
+        graph = make_network(size)
+        engine = CCPMAnalysis(graph, 20).scenarios()
+        rng = random.Random(0)
+        scenarios = [Scenario("変更", extra_days={rng.choice(list(graph)): 3}) for _ in range(50)]
+        recomputed = [engine.evaluate(scenario).recomputed for scenario in scenarios]
+        full = _median_ms(lambda: calculate_critical_chain(graph, 20))
+        incremental = _median_ms(lambda: [engine.evaluate(scenario) for scenario in scenarios]) / len(scenarios)
+        print(f"{size:>6} {full:>8.0f}ms {incremental:>8.2f}ms {statistics.mean(recomputed):>10.0f}")
+
+
+def main():
+    print(
+        f"{'tasks':>6} {'edges':>7} {'max_conc':>8} {'leveling':>10} {'total':>10} "
+        f"{'CC':>7} {'virtual':>8} {'residual':>8}"
+    )
+    for size in SIZES:
+        graph = make_network(size)
+        for max_concurrency in CONCURRENCY:
+            leveling = _median_ms(lambda: _level_resources(graph.copy(), max_concurrency))
+            result = []
+            total = _median_ms(lambda: result.append(calculate_critical_chain(graph, max_concurrency)))
+            cc_length, _, virtual_edges = result[-1]
+            residual = _residual_conflicts(graph, virtual_edges, max_concurrency)
+            print(
+                f"{size:>6} {graph.number_of_edges():>7} {max_concurrency:>8} {leveling:>8.0f}ms "
+                f"{total:>8.0f}ms {cc_length:>7.0f} {len(virtual_edges):>8} {residual:>8}"
+            )
+    bench_compiled_dag()
+    bench_overloaded_resource()
+    bench_virtual_edge_reduction()
+    bench_gantt()
+    bench_simulation()
+    bench_scenario()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""データファイル形式（data_file_format）ごとの書き込み・読み込み時間とファイルサイズの計測。
+
+`sample/` の各モデル（旧形式は読み込み時に変換）のエンティティ・接続を 100 倍に複製したデータを、
+`atomic_write_json` で hjson / json / json_compact の各形式に書き込み、
+`read_data_file` で読み戻す。
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_data_format.py
+"""
+import copy
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.file_io import (  # noqa: E402
+    DATA_FILE_FORMATS,
+    atomic_write_json,
+    load_source_data,
+    read_data_file,
+)
+
+SCALE = 100
+REPEAT = 3
+SAMPLES = ("requirement", "crt", "pfd", "ccpm")
+
+
+def _scale_model(data: dict, scale: int) -> dict:
+    """ノード・接続を unique_id に連番を付けて scale 倍に複製する。"""
+    nodes, edges = [], []
+    for i in range(scale):
+        suffix = f"_{i}"
+        for node in data.get("nodes", []):
+            node = copy.deepcopy(node)
+            node["unique_id"] = f"{node['unique_id']}{suffix}"
+            nodes.append(node)
+        for edge in data.get("edges", []):
+            edge = copy.deepcopy(edge)
+            edge["source"] = f"{edge['source']}{suffix}"
+            edge["destination"] = f"{edge['destination']}{suffix}"
+            edges.append(edge)
+    scaled = {key: value for key, value in data.items() if key not in ("nodes", "edges")}
+    scaled["nodes"] = nodes
+    scaled["edges"] = edges
+    return scaled
+
+
+def _median_ms(func) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    print(f"scale: x{SCALE}")
+    print(f"{'model':<12} {'nodes':>7} {'format':<13} {'write':>10} {'read':>10} {'size':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in SAMPLES:
+            data = _scale_model(load_source_data(os.path.join(ROOT, "sample", f"{name}.hjson")), SCALE)
+            for file_format in DATA_FILE_FORMATS:
+                path = os.path.join(tmp, f"{name}_{file_format}.hjson")
+                write = _median_ms(lambda: atomic_write_json(path, data, file_format))
+                read = _median_ms(lambda: read_data_file(path))
+                size = os.path.getsize(path) / 1024
+                print(
+                    f"{name:<12} {len(data['nodes']):>7} {file_format:<13} "
+                    f"{write:>8.1f}ms {read:>8.1f}ms {size:>8.0f}KB"
+                )
+
+
+if __name__ == "__main__":
+    main()
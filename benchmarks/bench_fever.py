@@ -0,0 +1,91 @@
+"""複数プロジェクトのフィーバーチャート計算の計測。
+
+200 プロジェクト × 100 進捗点のポートフォリオについて、進捗点ごとに
+`calculate_fever_data_from_progress` を呼ぶ場合と、`calculate_portfolio_fever` で
+一括計算する場合（初回・キャッシュ命中）を比較する。
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_fever.py
+"""
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import ccpm_engine  # noqa: E402
+from src.ccpm_engine import (  # noqa: E402
+    calculate_fever_data_from_progress,
+    calculate_portfolio_fever,
+)
+
+PROJECT_COUNT = 200
+POINT_COUNT = 100
+REPEAT = 3
+COMMON_HOLIDAYS = ["2025/01/01", "2025/05/05", "2025/08/13", "2025/12/31"]
+
+
+def make_portfolio(project_count: int, point_count: int, seed: int = 0) -> list:
+    """週次で進捗を記録したプロジェクトを作る。"""
+    rng = random.Random(seed)
+    projects = []
+    for i in range(project_count):
+        start = datetime.date(2025, 1, 6) + datetime.timedelta(days=rng.randint(0, 60))
+        end = start + datetime.timedelta(days=point_count * 7)
+        progress = []
+        value = 0.0
+        for k in range(point_count):
+            value = min(100.0, value + rng.uniform(0.0, 2.0))
+            day = start + datetime.timedelta(days=k * 7)
+            progress.append({"date": day.strftime("%Y/%m/%d"), "progress": round(value, 1), "memo": ""})
+        projects.append(
+            {
+                "id": f"P{i}",
+                "name": f"プロジェクト{i}",
+                "start": start.strftime("%Y/%m/%d"),
+                "end": end.strftime("%Y/%m/%d"),
+                "buffer_percent": rng.choice([20.0, 30.0, 40.0]),
+                "progress": progress,
+            }
+        )
+    return projects
+
+
+def _median_ms(func) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _per_point(projects: list):
+    for project in projects:
+        for point in project["progress"]:
+            calculate_fever_data_from_progress(
+                project, point["progress"], point["date"], common_holidays=COMMON_HOLIDAYS
+            )
+
+
+def _batch_uncached(projects: list):
+    ccpm_engine._portfolio_fever_cache.clear()
+    calculate_portfolio_fever(projects, COMMON_HOLIDAYS)
+
+
+def main():
+    projects = make_portfolio(PROJECT_COUNT, POINT_COUNT)
+    print(f"projects: {PROJECT_COUNT}, points/project: {POINT_COUNT}")
+    print(f"{'per point':<16} {_median_ms(lambda: _per_point(projects)):>8.1f}ms")
+    print(f"{'batch':<16} {_median_ms(lambda: _batch_uncached(projects)):>8.1f}ms")
+    calculate_portfolio_fever(projects, COMMON_HOLIDAYS)
+    cached = _median_ms(lambda: calculate_portfolio_fever(projects, COMMON_HOLIDAYS))
+    print(f"{'batch (cached)':<16} {cached:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""保存処理（update_source_data）のレイテンシ計測。
+
+モデルの規模（ノード数）ごとに以下を計測する。
+
+- dedup: 接続の重複除去のみ（旧: deepcopy + make_hashable / 新: edge_key）
+- save: update_source_data 全体（本体ファイル・バックアップの書き込みを含む）
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_file_io.py
+"""
+import copy
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import file_io  # noqa: E402
+from src.data_helpers import dedup_edges, make_hashable  # noqa: E402
+
+SIZES = (100, 1_000, 5_000)
+REPEAT = 5
+
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def _make_model(node_count: int) -> dict:
+    nodes = [
+        {"unique_id": f"n{i:06d}", "id": f"REQ-{i}", "title": f"要求 {i}", "text": "本文" * 5}
+        for i in range(node_count)
+    ]
+    edges = [
+        {"source": f"n{i:06d}", "destination": f"n{(i * 7 + 1) % node_count:06d}", "type": "deriveReqt"}
+        for i in range(node_count * 2)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def _legacy_dedup(edges: list) -> list:
+    """変更前の重複除去（全接続の deepcopy + 再帰的なタプル化）。"""
+    seen = set()
+    result = []
+    for edge in copy.deepcopy(edges):
+        key = make_hashable(edge)
+        if key not in seen:
+            seen.add(key)
+            result.append(edge)
+    return result
+
+
+def _measure(func, repeat: int = REPEAT) -> float:
+    """中央値（ミリ秒）を返す。"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    app_name = "Requirement Diagram Viewer"
+    file_io.st = types.SimpleNamespace(session_state=_SessionState())
+    state = file_io.st.session_state
+    state.app_name = app_name
+    state.app_data = {app_name: {"postfix": "bench"}}
+    state.config_data = {"last_used_page": app_name}
+
+    print(f"{'nodes':>8} {'edges':>8} {'dedup legacy':>14} {'dedup new':>11} {'save':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for size in SIZES:
+                model = _make_model(size)
+                legacy = _measure(lambda: _legacy_dedup(model["edges"]))
+                new = _measure(lambda: dedup_edges(model["edges"]))
+
+                file_path = os.path.join(tmp, f"bench_{size}.hjson")
+
+                def _save():
+                    # 毎回内容を変えて、同一内容による保存省略を避ける
+                    model["nodes"][0]["title"] = str(time.perf_counter())
+                    file_io.update_source_data(file_path, model)
+
+                save = _measure(_save)
+                print(
+                    f"{size:>8} {len(model['edges']):>8} {legacy:>12.2f}ms {new:>9.2f}ms {save:>8.1f}ms"
+                )
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
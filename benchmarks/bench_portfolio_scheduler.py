@@ -0,0 +1,93 @@
+"""プロジェクト間のリソース競合検出とドラム・スケジューリング（portfolio_scheduler）の計測。
+
+共有の担当者 10 人を持つ CCPM ファイル（層状のランダム DAG、1 ファイル 200 タスク）を
+一時ディレクトリに作り、プロジェクト数ごとに
+- 全ファイルの読み込み（CC の平準化を含む、バックグラウンドのスケジューラー経由）
+- 1 ファイルだけ変更した後の再計算
+- 読み込み済みのプロジェクトに対する競合検出とドラム・スケジューリング（build_portfolio_schedule）
+の時間と、ずらす前後の競合数を計測する。
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_portfolio_scheduler.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.portfolio_scheduler import PortfolioScheduler, build_portfolio_schedule  # noqa: E402
+
+PROJECT_COUNTS = (10, 30, 60)
+TASK_COUNT = 200
+LAYER_WIDTH = 10
+RESOURCES = [f"担当{i}" for i in range(10)]
+
+
+def make_ccpm_data(seed: int) -> dict:
+    """層状のランダム DAG の CCPM データを作る（各タスクは直前の層の 1〜2 タスクに依存）。"""
+    rng = random.Random(seed)
+    nodes, edges = [], []
+    previous: list = []
+    layer: list = []
+    for i in range(TASK_COUNT):
+        node_id = f"t{i}"
+        nodes.append(
+            {
+                "unique_id": node_id, "title": f"タスク{i}", "type": "process",
+                "days": rng.randint(1, 5), "remains": 0, "resource": rng.choice(RESOURCES),
+                "start": "", "end": "", "finished": False, "color": "None",
+            }
+        )
+        for src in rng.sample(previous, min(len(previous), rng.randint(1, 2))):
+            edges.append({"source": src, "destination": node_id, "type": "arrow", "comment": ""})
+        layer.append(node_id)
+        if len(layer) == LAYER_WIDTH:
+            previous, layer = layer, []
+    start = f"2025/{rng.randint(7, 9):02d}/{rng.randint(1, 28):02d}"
+    project = {
+        "name": f"P{seed}", "start": start, "end": "2026/12/31", "today": "2025/07/01",
+        "holidays": [], "resources": RESOURCES[:4],
+    }
+    return {"nodes": nodes, "edges": edges, "project": project, "progress": {}}
+
+
+def main():
+    print(f"{'projects':>8} {'tasks':>7} {'load':>10} {'one file':>10} {'schedule':>10} {'before':>8} {'after':>8}")
+    for count in PROJECT_COUNTS:
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(count):
+                with open(os.path.join(directory, f"p{i:03d}_ccpm.hjson"), "w", encoding="utf-8") as f:
+                    json.dump(make_ccpm_data(i), f, ensure_ascii=False)
+            scheduler = PortfolioScheduler(directory)
+
+            started = time.perf_counter()
+            scheduler.start()
+            scheduler.wait()
+            load = (time.perf_counter() - started) * 1000
+
+            data = make_ccpm_data(0)
+            data["nodes"][0]["days"] += 1
+            with open(os.path.join(directory, "p000_ccpm.hjson"), "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            started = time.perf_counter()
+            scheduler.start()
+            scheduler.wait()
+            one_file = (time.perf_counter() - started) * 1000
+
+            result = scheduler.result
+            started = time.perf_counter()
+            build_portfolio_schedule(result.projects)
+            schedule = (time.perf_counter() - started) * 1000
+            print(
+                f"{count:>8} {result.graph.number_of_nodes():>7} {load:>8.0f}ms {one_file:>8.0f}ms "
+                f"{schedule:>8.0f}ms {len(result.conflicts_before):>8} {len(result.conflicts_after):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,13 @@ from src.utility import (
     show_backup_diff_preview,
 )
 from src.ccpm_engine import (
-    get_in_out_edge_list,
-    calculate_critical_path,
-    calculate_critical_chain,
     make_gantt_puml,
     calculate_fever_data,
-    calculate_priority_table,
 )
+from src.ccpm_analysis import CCPMAnalysis, get_ccpm_analysis, seed_priority_table
+from src.ccpm_scenario import Scenario
+from src.ccpm_simulation import DEFAULT_SAFE_RATIO, completion_workdays, simulate_schedule
+from src.workday_calendar import get_workday_calendar
 from src.plantuml_service import get_diagram
 import uuid
 import copy
@@ -177,12 +177,23 @@ def _render_entity_settings(selected_entity: dict, selected_unique_id: str, ccpm
     if end_key not in st.session_state:
         st.session_state[end_key] = _get_entity_date(tmp_entity.get("end", ""))
 
-    col_days, col_remains, col_finished = st.columns([2, 2, 1])
+    col_days, col_safe, col_remains, col_finished = st.columns([2, 2, 2, 1])
     with col_days:
         tmp_entity["days"] = st.number_input(
             "見積り日数", min_value=0.0, value=float(tmp_entity.get("days", 1)),
             step=0.5, key=f"ccpm_days_{selected_unique_id}",
         )
+    with col_safe:
+        # リスクシミュレーション用の 90% 見積り（0 なら既定の倍率を使うため保存しない）
+        safe_days = st.number_input(
+            "安全見積り日数", min_value=0.0, value=float(tmp_entity.get("safe_days", 0.0) or 0.0),
+            step=0.5, key=f"ccpm_safe_days_{selected_unique_id}",
+            help="90% の確率で終わる日数。リスクタブのシミュレーションで使います（0 の場合は見積り日数 × 倍率）。",
+        )
+        if safe_days > 0:
+            tmp_entity["safe_days"] = safe_days
+        else:
+            tmp_entity.pop("safe_days", None)
     with col_remains:
         tmp_entity["remains"] = st.number_input(
             "残日数", min_value=0.0, step=0.5, key=remains_key,
@@ -242,7 +253,6 @@ def _render_entity_settings(selected_entity: dict, selected_unique_id: str, ccpm
         st.write("")
         if raw_estart:
             from datetime import datetime
-            import workdays
             
             calc_today = datetime.now().date()
             holidays = []
@@ -255,11 +265,10 @@ def _render_entity_settings(selected_entity: dict, selected_unique_id: str, ccpm
                     except ValueError:
                         pass
                 
-                h_strs = p_conf.get("holidays", [])
-                holidays = [datetime.strptime(h, "%Y/%m/%d").date() for h in h_strs]
+                holidays = p_conf.get("holidays", [])
             
             calc_end = raw_eend if raw_eend else calc_today
-            actual_days = workdays.networkdays(raw_estart, calc_end, holidays=holidays)
+            actual_days = get_workday_calendar(holidays).networkdays(raw_estart, calc_end)
             st.markdown(f"<div style='margin-top: 14px;'>実績: <b>{actual_days}日</b></div>", unsafe_allow_html=True)
 
     tmp_entity["resource"] = st.text_input(
@@ -425,12 +434,12 @@ def _render_project_settings(
         # クリティカルチェーン長の事前計算
         nx_graph = graph_data.graph
         try:
-            inputs, outputs = get_in_out_edge_list(nx_graph)
-            cp_length, cp = calculate_critical_path(nx_graph, inputs, outputs)
-            max_concurrency = len(project.get("resources", []))
-            cc_length, cc, _ = calculate_critical_chain(nx_graph, max_concurrency=max_concurrency)
-            active_chain = cc if cc else cp
-            active_length = cc_length if cc else cp_length
+            analysis = get_ccpm_analysis(
+                nx_graph, max_concurrency=len(project.get("resources", [])),
+                revision=graph_data.revision,
+            )
+            active_chain = analysis.active_chain
+            active_length = analysis.active_length
         except Exception:
             active_chain = []
             active_length = 0
@@ -438,7 +447,6 @@ def _render_project_settings(
         # 日数計算と表示
         try:
             if project.get("start") and project.get("end") and project.get("today"):
-                import workdays as wd
                 s_date = datetime.strptime(project["start"], "%Y/%m/%d")
                 e_date = datetime.strptime(project["end"], "%Y/%m/%d")
                 t_date = datetime.strptime(project["today"], "%Y/%m/%d")
@@ -448,22 +456,17 @@ def _render_project_settings(
                     total_days = (e_date - s_date).days + 1
                     
                     # 2. 土日抜きの日数
-                    weekdays_only = wd.networkdays(s_date, e_date)
+                    weekdays_only = get_workday_calendar().networkdays(s_date, e_date)
                     
-                    # 3. 土日祝抜きの実稼働日数
-                    holidays_list = []
-                    for h_str in project.get("holidays", []):
-                        try:
-                            holidays_list.append(datetime.strptime(h_str, "%Y/%m/%d"))
-                        except ValueError:
-                            pass
-                    actual_workdays = wd.networkdays(s_date, e_date, holidays_list)
+                    # 3. 土日祝抜きの実稼働日数（不正な祝日は無視）
+                    calendar = get_workday_calendar(project.get("holidays", []))
+                    actual_workdays = calendar.networkdays(s_date, e_date)
                     
                     # 今日の日付からの残日数（土日祝抜）
                     if t_date <= e_date:
                         # 今日が開始日より前なら、開始日からの日数と同じにする
                         calc_start = max(s_date, t_date)
-                        remain_workdays = wd.networkdays(calc_start, e_date, holidays_list)
+                        remain_workdays = calendar.networkdays(calc_start, e_date)
                         remain_text = f"(残り {remain_workdays} 日)"
                     else:
                         remain_text = "(終了済み)"
@@ -521,12 +524,11 @@ def _render_project_settings(
                     st.warning("開始日・終了日・今日の日付を設定してから登録してください。")
                 elif active_length > 0:
                     try:
-                        import workdays as wd
                         s_date = datetime.strptime(project["start"], "%Y/%m/%d")
                         e_date = datetime.strptime(project["end"], "%Y/%m/%d")
-                        holidays_list = [datetime.strptime(h, "%Y/%m/%d") for h in project.get("holidays", []) if h]
+                        calendar = get_workday_calendar(project.get("holidays", []))
                         
-                        total_workdays = wd.networkdays(s_date, e_date, holidays_list)
+                        total_workdays = calendar.networkdays(s_date, e_date)
                         total_buffer = total_workdays - active_length
                         
                         project["baseline"] = {
@@ -862,17 +864,34 @@ def _render_fever_tab(
         st.info("クリティカルパスが計算できません。")
 
 
-def _render_priority_tab(active_chain: list, nx_graph, virtual_edges: list = None):
+def _finished_task_attrs(finished: bool) -> dict:
+    """完了チェックの変更時に更新するタスク属性（編集パネルの完了チェックと同じ連動）。"""
+    if not finished:
+        # 完了 OFF -> 終了日をクリア
+        return {"finished": False, "end": ""}
+    # 完了 ON -> 終了日にプロジェクト設定の今日をセット、残日数を0に
+    from datetime import datetime
+
+    today_str = requirement_data.get("project", {}).get("today", "")
+    try:
+        datetime.strptime(today_str, "%Y/%m/%d")
+    except ValueError:
+        today_str = datetime.now().strftime("%Y/%m/%d")
+    return {"finished": True, "end": today_str, "remains": 0.0}
+
+
+def _render_priority_tab(analysis: CCPMAnalysis, nx_graph, requirement_manager, file_path: str):
     """優先度タブの UI (優先度テーブル) を描画する"""
-    if active_chain:
-        priority = calculate_priority_table(nx_graph, active_chain, virtual_edges)
+    if analysis.active_chain:
+        priority = analysis.priority_table()
         if priority:
             import pandas as pd
             df = pd.DataFrame(priority)
             
             # 表示の整理と日本語ヘッダーへのリネーム
-            df = df[["status", "title", "resource", "days", "total_remains", "buffer", "task"]]
+            df = df[["is_finished", "status", "title", "resource", "days", "total_remains", "buffer", "task"]]
             df = df.rename(columns={
+                "is_finished": "完了",
                 "status": "状態",
                 "title": "タスク名",
                 "resource": "担当",
@@ -882,27 +901,281 @@ def _render_priority_tab(active_chain: list, nx_graph, virtual_edges: list = Non
                 "task": "ID"
             })
             
-            # ID列などを見やすく調整しつつ出力
-            st.dataframe(df, width="stretch", hide_index=True)
+            # 完了列のみ編集可能（リビジョンごとに編集状態をリセットする）
+            edited_df = st.data_editor(
+                df,
+                width="stretch",
+                hide_index=True,
+                disabled=[column for column in df.columns if column != "完了"],
+                key=f"ccpm_priority_editor_{analysis.revision[:16]}",
+            )
+            changed = [
+                (row["ID"], bool(row["完了"]))
+                for (_, row), was_finished in zip(edited_df.iterrows(), df["完了"])
+                if bool(row["完了"]) != bool(was_finished)
+            ]
+            if changed:
+                # 共有の分析結果は変更せず、複製に変更のあったタスクのみ反映して次の描画に引き継ぐ
+                table = analysis.priority().copy()
+                nodes = {node["unique_id"]: node for node in requirement_data.get("nodes", [])}
+                for task, finished in changed:
+                    attrs = _finished_task_attrs(finished)
+                    table.update_task(task, **attrs)
+                    nodes[task].update(attrs)
+                    nx_graph.nodes[task].update(attrs)
+                    # 編集パネルのウィジェットが変更前の完了・終了日・残日数を表示し続けないよう破棄する
+                    for prefix in ("ccpm_finished_", "ccpm_end_", "ccpm_remains_"):
+                        st.session_state.pop(f"{prefix}{task}", None)
+                seed_priority_table(nx_graph, table)
+                update_source_data(file_path, requirement_manager.requirements)
+                st.query_params.view = "priority"
+                st.rerun()
         else:
             st.info("優先度を計算できるタスクがありません。")
     else:
         st.info("クリティカルパスが計算できません。")
 
 
+def _render_risk_tab(analysis: CCPMAnalysis, nx_graph, project: dict):
+    """リスクタブの UI (モンテカルロ・シミュレーション) を描画する"""
+    if not analysis.active_chain:
+        st.info("クリティカルパスが計算できません。")
+        return
+
+    col_iterations, col_ratio, col_run = st.columns([2, 2, 1])
+    with col_iterations:
+        iterations = st.number_input(
+            "試行回数", min_value=100, max_value=100000, value=10000, step=1000,
+            key="ccpm_risk_iterations",
+        )
+    with col_ratio:
+        safe_ratio = st.number_input(
+            "安全見積りの倍率", min_value=1.0, max_value=5.0, value=DEFAULT_SAFE_RATIO, step=0.1,
+            key="ccpm_risk_safe_ratio",
+            help="安全見積り日数が未設定のタスクは、見積り日数 × 倍率を 90% 見積りとして扱います。",
+        )
+    with col_run:
+        st.write("")
+        st.write("")
+        run = st.button("▶ 実行", key="ccpm_risk_run")
+
+    # 結果はグラフのリビジョンと条件ごとにセッションに保持する（同じ条件なら同じ乱数列で再現する）
+    params = (analysis.revision, analysis.max_concurrency, int(iterations), float(safe_ratio))
+    state = st.session_state.get("ccpm_risk_result")
+    if run:
+        with st.spinner("シミュレーション中..."):
+            simulation = simulate_schedule(
+                nx_graph, analysis.virtual_edges,
+                iterations=int(iterations), safe_ratio=float(safe_ratio), seed=0,
+            )
+        state = st.session_state["ccpm_risk_result"] = (params, simulation)
+    if state is None or state[0] != params:
+        st.info("「▶ 実行」で、タスク日数のばらつきを考慮した完了日の分布とクリティカル指数を計算します。")
+        return
+    simulation = state[1]
+    if simulation is None:
+        st.warning("依存関係に閉路があるため、シミュレーションできません。")
+        return
+
+    from datetime import datetime
+
+    today_str = project.get("today", "")
+    try:
+        today = datetime.strptime(today_str, "%Y/%m/%d").date()
+    except ValueError:
+        today = datetime.now().date()
+    calendar = get_workday_calendar(project.get("holidays", []))
+
+    # 決定論的な CC 長・納期と比べた完了確率
+    deadline_days = None
+    try:
+        end = datetime.strptime(project.get("end", ""), "%Y/%m/%d").date()
+        deadline_days = max(0, calendar.networkdays(today, end) - 1)
+    except ValueError:
+        pass
+    col_cc, col_deadline = st.columns(2)
+    with col_cc:
+        st.metric(
+            f"CC 長 ({analysis.active_length:g}日) 以内に完了",
+            f"{simulation.probability_within(analysis.active_length) * 100:.1f}%",
+        )
+    with col_deadline:
+        if deadline_days is not None:
+            st.metric(
+                f"終了日 ({project.get('end', '')}) までに完了",
+                f"{simulation.probability_within(deadline_days) * 100:.1f}%",
+            )
+
+    import pandas as pd
+
+    st.write("##### 📅 完了日のパーセンタイル")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "確率": f"P{percentile}",
+                "完了までの稼働日数": round(days, 1),
+                "完了予定日": calendar.workday(today, completion_workdays(days)).strftime("%Y/%m/%d"),
+            }
+            for percentile, days in simulation.percentiles.items()
+        ]),
+        width="stretch", hide_index=True,
+    )
+
+    if go is not None:
+        fig = go.Figure(go.Histogram(x=simulation.completion, nbinsx=50, name="完了日数"))
+        fig.add_vline(x=analysis.active_length, line_dash="dash", line_color="red", annotation_text="CC 長")
+        if deadline_days is not None:
+            fig.add_vline(x=deadline_days, line_dash="dot", line_color="green", annotation_text="終了日")
+        fig.update_layout(
+            xaxis_title="完了までの稼働日数", yaxis_title="試行数",
+            height=350, margin=dict(t=30, b=40, l=40, r=20), showlegend=False,
+        )
+        st.plotly_chart(fig, width="stretch")
+
+    # クリティカル指数（日数 0 のマイルストーンは除く）
+    st.write("##### 🔥 クリティカル指数")
+    chain = set(analysis.active_chain)
+    rows = [
+        {
+            "タスク名": nx_graph.nodes[node].get("title", node),
+            "担当": nx_graph.nodes[node].get("resource", ""),
+            "クリティカル指数(%)": round(index * 100, 1),
+            "CC": node in chain,
+            "ID": node,
+        }
+        for node, index in simulation.criticality.items()
+        if node in nx_graph and index > 0 and float(nx_graph.nodes[node].get("days", 0) or 0) > 0
+    ]
+    if rows:
+        df = pd.DataFrame(rows).sort_values("クリティカル指数(%)", ascending=False, kind="stable")
+        st.dataframe(df, width="stretch", hide_index=True)
+    else:
+        st.info("残作業のあるタスクがありません。")
+
+
+def _parse_scenarios(days_df, staff_df, task_ids: dict) -> list:
+    """シナリオ編集テーブルの行を、シナリオ名ごと（最初に出てきた順）の Scenario にまとめる。"""
+    import pandas as pd
+
+    scenarios = {}
+
+    def _scenario(name) -> Scenario:
+        name = str(name).strip() if isinstance(name, str) and name.strip() else "シナリオ"
+        return scenarios.setdefault(name, Scenario(name))
+
+    for _, row in days_df.iterrows():
+        task = task_ids.get(row["タスク"])
+        if task is None or pd.isna(row["増減日数"]):
+            continue
+        scenario = _scenario(row["シナリオ"])
+        scenario.extra_days[task] = scenario.extra_days.get(task, 0.0) + float(row["増減日数"])
+    for _, row in staff_df.iterrows():
+        if not isinstance(row["担当者"], str) or pd.isna(row["人数"]):
+            continue
+        _scenario(row["シナリオ"]).resource_capacity[row["担当者"]] = max(1, int(row["人数"]))
+    return list(scenarios.values())
+
+
+def _render_scenario_tab(analysis: CCPMAnalysis, nx_graph, project: dict):
+    """What-if タブの UI (シナリオの比較) を描画する"""
+    import pandas as pd
+
+    engine = analysis.scenarios(project)
+    if engine is None or not analysis.active_chain:
+        st.info("クリティカルチェーンが計算できません。")
+        return
+    st.caption("ファイルは変更せず、メモリ上の変更だけでチェーン長とバッファを比較します。同じシナリオ名の行は1つのシナリオとしてまとめます。")
+
+    # 完了済みのタスクは日数を変えられないため選択肢から除く
+    task_ids = {
+        f"{attrs.get('title', node)} [{node}]": node
+        for node, attrs in nx_graph.nodes(data=True)
+        if not attrs.get("finished", False) and attrs.get("type", "") != "note"
+    }
+    resources = sorted({attrs.get("resource", "") for _, attrs in nx_graph.nodes(data=True)} - {""})
+
+    days_col, staff_col = st.columns(2)
+    with days_col:
+        st.write("##### ⏱️ タスク日数の増減")
+        days_df = st.data_editor(
+            pd.DataFrame({
+                "シナリオ": pd.Series(dtype="str"),
+                "タスク": pd.Series(dtype="str"),
+                "増減日数": pd.Series(dtype="float"),
+            }),
+            num_rows="dynamic", width="stretch", hide_index=True,
+            column_config={
+                "タスク": st.column_config.SelectboxColumn(options=list(task_ids)),
+                "増減日数": st.column_config.NumberColumn(step=0.5),
+            },
+            key="ccpm_scenario_days",
+        )
+    with staff_col:
+        st.write("##### 👥 担当者の人数")
+        staff_df = st.data_editor(
+            pd.DataFrame({
+                "シナリオ": pd.Series(dtype="str"),
+                "担当者": pd.Series(dtype="str"),
+                "人数": pd.Series(dtype="int"),
+            }),
+            num_rows="dynamic", width="stretch", hide_index=True,
+            column_config={
+                "担当者": st.column_config.SelectboxColumn(options=resources),
+                "人数": st.column_config.NumberColumn(min_value=1, step=1),
+            },
+            key="ccpm_scenario_staff",
+        )
+
+    results = engine.compare(_parse_scenarios(days_df, staff_df, task_ids))
+    if len(results) == 1:
+        st.info("上の表に変更を入力すると、基準と並べて比較します。")
+
+    # 基準と各シナリオを横に並べる（1行に最大4列）
+    for offset in range(0, len(results), 4):
+        columns = st.columns(4)
+        for column, result in zip(columns, results[offset:offset + 4]):
+            is_base = result is engine.base
+            with column:
+                st.write(f"**{result.name}**")
+                st.metric(
+                    "チェーン長", f"{result.chain_length:g}日",
+                    delta=None if is_base else f"{result.delta_length:+g}日", delta_color="inverse",
+                )
+                st.metric("完了見込み", result.projected_end or "-")
+                st.metric(
+                    "バッファ残り", f"{result.buffer_remaining:.1f}日",
+                    delta=None if is_base else f"{result.delta_buffer:+.1f}日",
+                )
+                st.metric("バッファ消費率", f"{result.buffer_used:.1f}%")
+                if result.releveled:
+                    st.caption(f"リソースを再平準化（仮想エッジ {len(result.virtual_edges)}件）")
+                elif not is_base:
+                    st.caption(f"再計算したタスク: {result.recomputed}件")
+
+    with st.expander("チェーンの比較", expanded=False):
+        for result in results:
+            titles = [
+                nx_graph.nodes[n].get("title", n) for n in result.chain
+                if n in nx_graph and nx_graph.nodes[n].get("days", 0) > 0
+            ]
+            st.write(f"**{result.name}** ({result.chain_length:g}日): {' → '.join(titles)}")
+
+
 def render_ccpm_analysis():
     """左カラムに CCPM 分析セクションを描画する。"""
     st.write("### 📊 CCPM 分析")
 
     # グラフからクリティカルパスとクリティカルチェーンを算出
+    # （ネットワーク図・ガント・フィーバー・優先度で同じ分析結果を共有する）
     nx_graph = graph_data.graph
-    inputs, outputs = get_in_out_edge_list(nx_graph)
-    cp_length, cp = calculate_critical_path(nx_graph, inputs, outputs)
-    
     # プロジェクト設定から同時実行上限を取得
     project = requirement_data.get("project", {})
     max_concurrency = len(project.get("resources", []))
-    cc_length, cc, virtual_edges = calculate_critical_chain(nx_graph, max_concurrency=max_concurrency)
+    analysis = get_ccpm_analysis(
+        nx_graph, max_concurrency=max_concurrency, revision=graph_data.revision
+    )
+    cp_length, cp = analysis.cp_length, analysis.cp
+    cc_length, cc, virtual_edges = analysis.cc_length, analysis.cc, analysis.virtual_edges
 
     def _format_chain(graph, chain):
         """チェーンのタスク名リストを作成する（days>0のみ）。"""
@@ -959,19 +1232,23 @@ def render_ccpm_analysis():
         )
 
     # 分析で使うチェーン（CC があればそちらを優先）
-    active_chain = cc if cc else cp
-    active_length = cc_length if cc else cp_length
+    active_chain = analysis.active_chain
+    active_length = analysis.active_length
 
     # URLパラメータに基づく初期表示タブの切り替え設定
     view_mode = st.query_params.get("view", "")
-    sub_titles = ["🌡️ フィーバーチャート", "📅 ガントチャート", "📋 優先度"]
+    sub_titles = ["🌡️ フィーバーチャート", "📅 ガントチャート", "🎲 リスク", "🧪 What-if", "📋 優先度"]
     if view_mode == "gantt":
         # ガントチャートをデフォルトにするため先頭に移動
-        sub_titles = ["📅 ガントチャート", "🌡️ フィーバーチャート", "📋 優先度"]
+        sub_titles = ["📅 ガントチャート", "🌡️ フィーバーチャート", "🎲 リスク", "🧪 What-if", "📋 優先度"]
+    elif view_mode == "priority":
+        sub_titles = ["📋 優先度", "🌡️ フィーバーチャート", "📅 ガントチャート", "🎲 リスク", "🧪 What-if"]
 
     sub_tabs = st.tabs(sub_titles)
     tab_fever = sub_tabs[sub_titles.index("🌡️ フィーバーチャート")]
     tab_gantt = sub_tabs[sub_titles.index("📅 ガントチャート")]
+    tab_risk = sub_tabs[sub_titles.index("🎲 リスク")]
+    tab_scenario = sub_tabs[sub_titles.index("🧪 What-if")]
     tab_priority = sub_tabs[sub_titles.index("📋 優先度")]
 
     with tab_gantt:
@@ -993,12 +1270,14 @@ def render_ccpm_analysis():
             file_path=file_path,
         )
 
+    with tab_risk:
+        _render_risk_tab(analysis, nx_graph, project)
+
+    with tab_scenario:
+        _render_scenario_tab(analysis, nx_graph, project)
+
     with tab_priority:
-        _render_priority_tab(
-            active_chain=active_chain,
-            nx_graph=nx_graph,
-            virtual_edges=virtual_edges,
-        )
+        _render_priority_tab(analysis, nx_graph, requirement_manager, file_path)
 
 
 with edit_column:
@@ -1008,7 +1287,7 @@ with edit_column:
 with diagram_column:
     view_mode = st.query_params.get("view", "")
     main_titles = ["🗗️ ネットワーク図", "📊 CCPM 分析"]
-    if view_mode in ["gantt", "fever"]:
+    if view_mode in ["gantt", "fever", "priority"]:
         main_titles = ["📊 CCPM 分析", "🗗️ ネットワーク図"]
         
     main_tabs = st.tabs(main_titles)
@@ -2,23 +2,35 @@ import copy
 import datetime
 import os
 
-import hjson
 import pandas as pd
 import streamlit as st
 
-from src.ccpm_engine import calculate_fever_data_from_progress, calculate_working_days
-from src.file_io import atomic_write_json, save_config, list_hjson_files
+from src.ccpm_engine import calculate_working_days
+from src.ccpm_portfolio import get_ccpm_portfolio
+from src.file_io import (
+    atomic_write_json,
+    get_data_file_format,
+    list_hjson_files,
+    read_data_file,
+    save_backup_data,
+    save_config,
+)
+from src.fever_chart import (
+    LARGE_PORTFOLIO_MAX_POINTS,
+    LARGE_PORTFOLIO_THRESHOLD,
+    build_fever_figure,
+    go,
+)
+from src.fever_metrics import get_project_metrics
 from src.page_setup import initialize_page
-
-try:
-    import plotly.graph_objects as go
-except ImportError:
-    go = None
+from src.portfolio_scheduler import DEFAULT_CAPACITY_BUFFER, get_portfolio_scheduler
 
 
 APP_NAME = "Multi Project Fever Chart Viewer"
 WORKING_DATA_KEY = "multi_project_fever_working_data"
 WORKING_FILE_KEY = "multi_project_fever_working_file"
+# このセッションで最後に分析を依頼した (ドラム, キャパシティ・バッファ)
+SCHEDULER_PARAMS_KEY = "multi_project_fever_scheduler_params"
 
 PROGRESS_BASIS_OPTIONS = [
     "感覚に基づく",
@@ -32,21 +44,8 @@ BUFFER_BASIS_OPTIONS = [
     "CC/CPから計算",
 ]
 
-
-def _get_marker_symbol(basis: str) -> str:
-    if basis == "タスクの総量に基づく":
-        return "square"
-    if basis == "クリティカルパスに基づく":
-        return "diamond"
-    if basis == "クリティカルチェーンに基づく":
-        return "star"
-    return "circle"  # 感覚に基づく
-
-
-def _get_line_dash(basis: str) -> str:
-    if basis == "CC/CPから計算":
-        return "dash"
-    return "solid"  # プロジェクト期間から逆算
+# プロジェクト間のリソース競合の一覧に表示する最大件数
+MAX_CONFLICT_ROWS = 200
 
 
 def _default_data() -> dict:
@@ -91,7 +90,7 @@ def _render_file_operations(app_name: str, file_path: str):
                     else:
                         try:
                             default_content = _default_data()
-                            atomic_write_json(new_file_path, default_content)
+                            atomic_write_json(new_file_path, default_content, get_data_file_format())
                             data_file_key = st.session_state.app_data[app_name]["data"]
                             st.session_state.config_data[data_file_key] = new_file_path
                             save_config(st.session_state.config_data)
@@ -185,58 +184,26 @@ def _load_data(file_path: str) -> dict | None:
     if not os.path.exists(file_path):
         return _default_data()
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            loaded = hjson.load(f)
-        return _normalize_data(loaded)
+        return _normalize_data(read_data_file(file_path))
     except Exception:
         return None
 
 
 def _save_data(file_path: str, data: dict, postfix: str):
-    atomic_write_json(file_path, data)
-    os.makedirs("back", exist_ok=True)
-    backup_name = (
-        datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{postfix}.hjson"
-    )
-    atomic_write_json(os.path.join("back", backup_name), data)
+    atomic_write_json(file_path, data, get_data_file_format())
+    save_backup_data(postfix, data)
 
 
 def _calculate_project_metrics(project: dict, common_holidays: list) -> tuple[float, float]:
-    workdays = calculate_working_days(
-        project.get("start", ""),
-        project.get("end", ""),
-        common_holidays,
-    )
-    buffer_percent = float(project.get("buffer_percent", 30.0) or 30.0)
-    buffer_days = workdays * (buffer_percent / 100.0) if workdays > 0 else 0.0
-    return round(workdays, 1), round(buffer_days, 1)
-
-
-def _sorted_progress_points(project: dict, common_holidays: list) -> list:
-    points = []
-    for point in project.get("progress", []):
-        fever = calculate_fever_data_from_progress(
-            project,
-            point.get("progress", 0),
-            point.get("date", ""),
-            common_holidays=common_holidays,
-        )
-        points.append(
-            {
-                "date": str(point.get("date", "")),
-                "progress": float(point.get("progress", 0) or 0),
-                "memo": str(point.get("memo", "")),
-                "fever": fever,
-            }
-        )
-    return sorted(points, key=lambda item: item["date"])
+    metrics = get_project_metrics([project], common_holidays)[0]
+    return metrics.workdays, metrics.buffer_days
 
 
 def _build_projects_df(data: dict, common_holidays: list) -> pd.DataFrame:
     rows = []
-    for project in data["projects"]:
-        workdays, buffer_days = _calculate_project_metrics(project, common_holidays)
-        buffer_percent = float(project.get("buffer_percent", 30.0) or 30.0)
+    for project, metrics in zip(
+        data["projects"], get_project_metrics(data["projects"], common_holidays)
+    ):
         rows.append(
             {
                 "id": project.get("id", ""),
@@ -245,9 +212,9 @@ def _build_projects_df(data: dict, common_holidays: list) -> pd.DataFrame:
                 "end": project.get("end", ""),
                 "progress_basis": project.get("progress_basis", PROGRESS_BASIS_OPTIONS[0]),
                 "buffer_basis": project.get("buffer_basis", BUFFER_BASIS_OPTIONS[0]),
-                "buffer_percent": buffer_percent,
-                "workdays": workdays,
-                "buffer_days": buffer_days,
+                "buffer_percent": metrics.buffer_percent,
+                "workdays": metrics.workdays,
+                "buffer_days": metrics.buffer_days,
             }
         )
     return pd.DataFrame(
@@ -334,118 +301,27 @@ def _apply_progress_edits(data: dict, progress_frames: dict):
         project["progress"] = sorted(new_points, key=lambda item: item["date"])
 
 
-def _render_chart(projects: list, common_holidays: list, latest_n: int):
+def _render_chart(
+    projects: list, common_holidays: list, latest_n: int, ccpm_entries: list = ()
+):
     if go is None:
         st.warning("plotly がインストールされていません。")
         return
 
-    # ゾーン塗りつぶし（緑・黄・赤・グレー）と被らない配色
-    _PROJECT_COLORS = [
-        "#e6194b",  # 赤系
-        "#3cb44b",  # 緑系
-        "#4363d8",  # 青
-        "#f58231",  # オレンジ
-        "#911eb4",  # 紫
-        "#42d4f4",  # シアン
-        "#f032e6",  # マゼンタ
-        "#e6beff",  # ラベンダー
-        "#469990",  # ティール
-        "#dcbeff",  # ライトパープル
-        "#9a6324",  # ブラウン
-        "#800000",  # マルーン
-    ]
-
-    # 事前にデータを収集し、max_buffer を計算する
-    project_traces = []
-    max_buffer = 100.0
-    color_idx = 0
-    for project in projects:
-        points = _sorted_progress_points(project, common_holidays)
-        if latest_n > 0:
-            points = points[-latest_n:]
-        if not points:
-            continue
-        max_buffer = max(
-            max_buffer, max(point["fever"]["buffer_used"] for point in points)
-        )
-        project_traces.append((project, points, _PROJECT_COLORS[color_idx % len(_PROJECT_COLORS)]))
-        color_idx += 1
-
-    if not project_traces:
+    metrics = get_project_metrics(projects, common_holidays)
+    project_points = [(project, m.points) for project, m in zip(projects, metrics)]
+    # CCPM ファイルの結果は calculate_fever_data で計算済みの進捗点をそのまま使う
+    project_points += [(entry, entry["points"]) for entry in ccpm_entries]
+    fig = build_fever_figure(project_points, latest_n)
+    if fig is None:
         st.info("表示できる進捗データがありません。")
         return
 
-    y_range_max = int(max_buffer + 9) // 10 * 10 + 10 if max_buffer > 100 else 100
-
-    # ゾーン塗りつぶしを先にすべて描画（tonexty が連続するように）
-    fig = go.Figure()
-    x = list(range(0, 101))
-    y1 = [0.6 * xi + 10 for xi in x]
-    y2 = [0.6 * xi + 25 for xi in x]
-
-    # 緑ゾーン
-    fig.add_trace(go.Scatter(
-        x=x, y=y1, fill="tozeroy", fillcolor="rgba(144,238,144,0.3)",
-        line=dict(color="green", width=1), showlegend=False, hoverinfo="skip",
-    ))
-    # 黄ゾーン
-    fig.add_trace(go.Scatter(
-        x=x, y=y2, fill="tonexty", fillcolor="rgba(255,255,150,0.3)",
-        line=dict(color="orange", width=1), showlegend=False, hoverinfo="skip",
-    ))
-    # 赤ゾーン（100%まで）
-    fig.add_trace(go.Scatter(
-        x=x, y=[100] * len(x), fill="tonexty", fillcolor="rgba(255,160,160,0.3)",
-        line=dict(width=0), showlegend=False, hoverinfo="skip",
-    ))
-    # 100%超えグレーゾーン（必要な場合、赤ゾーンの直後に連続して描画）
-    if y_range_max > 100:
-        fig.add_trace(go.Scatter(
-            x=x, y=[y_range_max] * len(x), fill="tonexty", fillcolor="rgba(200,200,200,0.3)",
-            line=dict(width=0), showlegend=False, hoverinfo="skip",
-        ))
-
-    # プロジェクトのデータトレースを描画（ゾーンの上に重ねる）
-    for project, points, color in project_traces:
-        fig.add_trace(
-            go.Scatter(
-                x=[point["fever"]["progress"] for point in points],
-                y=[point["fever"]["buffer_used"] for point in points],
-                mode="lines+markers",
-                name=project.get("name", project.get("id", "")),
-                marker=dict(
-                    size=[11] * (len(points) - 1) + [18],
-                    color=color,
-                    symbol=_get_marker_symbol(project.get("progress_basis", "")),
-                ),
-                line=dict(
-                    width=3,
-                    color=color,
-                    dash=_get_line_dash(project.get("buffer_basis", "")),
-                ),
-                hovertext=[
-                    (
-                        f"{project.get('name', project.get('id', ''))}<br>"
-                        f"{point['date']}<br>"
-                        f"進捗率: {point['progress']:.1f}%<br>"
-                        f"バッファ消費率: {point['fever']['buffer_used']:.1f}%<br>"
-                        f"{point['memo']}"
-                    )
-                    for point in points
-                ],
-                hoverinfo="text",
-            )
+    if sum(1 for _, points in project_points if points) > LARGE_PORTFOLIO_THRESHOLD:
+        st.caption(
+            f"プロジェクト数が {LARGE_PORTFOLIO_THRESHOLD} を超えるため、大規模表示（WebGL・"
+            f"1プロジェクトあたり最大 {LARGE_PORTFOLIO_MAX_POINTS} 点・凡例なし）で描画しています。"
         )
-
-    fig.update_layout(
-        xaxis_title="進捗率 (%)",
-        yaxis_title="バッファ消費率 (%)",
-        xaxis=dict(range=[0, 100]),
-        yaxis=dict(range=[0, y_range_max]),
-        width=980,
-        height=700,
-        margin=dict(t=20, b=40, l=40, r=20),
-    )
     st.plotly_chart(fig, width="stretch")
 
     st.markdown(
@@ -468,22 +344,34 @@ def _classify_zone(progress: float, buffer_used: float) -> str:
     return "🟢"
 
 
-def _render_summary(projects: list, common_holidays: list):
+def _render_summary(projects: list, common_holidays: list, ccpm_entries: list = ()):
     today = datetime.date.today()
     rows = []
-    for project in projects:
-        points = _sorted_progress_points(project, common_holidays)
-        if not points:
+    for entry in ccpm_entries:
+        if not entry["points"]:
             continue
-        latest = points[-1]
+        progress = round(entry["fever"]["progress"], 1)
+        buffer_used = round(entry["fever"]["buffer_used"], 1)
+        rows.append(
+            {
+                "状態": _classify_zone(progress, buffer_used),
+                "プロジェクト": f"{entry['name']} (CCPM)",
+                "最終記録日": entry["points"][-1]["date"],
+                "進捗率(%)": progress,
+                "バッファ消費率(%)": buffer_used,
+                "残日数": int(
+                    max(0, round(calculate_working_days(today, entry["end"], entry["holidays"]), 0))
+                ),
+                "稼働日数": round(entry["workdays"], 1),
+                "バッファ率(%)": None,
+            }
+        )
+    for project, metrics in zip(projects, get_project_metrics(projects, common_holidays)):
+        if not metrics.points:
+            continue
+        latest = metrics.points[-1]
         progress = round(latest["fever"]["progress"], 1)
         buffer_used = round(latest["fever"]["buffer_used"], 1)
-        total_workdays = calculate_working_days(
-            project.get("start", ""), project.get("end", ""), common_holidays
-        )
-        remaining_days = max(
-            0, round(calculate_working_days(today, project.get("end", ""), common_holidays), 0)
-        )
         zone = _classify_zone(progress, buffer_used)
         rows.append(
             {
@@ -492,11 +380,9 @@ def _render_summary(projects: list, common_holidays: list):
                 "最終記録日": latest["date"],
                 "進捗率(%)": progress,
                 "バッファ消費率(%)": buffer_used,
-                "残日数": int(remaining_days),
-                "稼働日数": round(total_workdays, 1),
-                "バッファ率(%)": round(
-                    float(project.get("buffer_percent", 30.0) or 30.0), 1
-                ),
+                "残日数": metrics.remaining_days(today),
+                "稼働日数": metrics.workdays,
+                "バッファ率(%)": round(metrics.buffer_percent, 1),
             }
         )
     if rows:
@@ -506,6 +392,116 @@ def _render_summary(projects: list, common_holidays: list):
         st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
 
 
+def _render_scheduler_progress(drum, capacity_buffer):
+    """バックグラウンド計算の進捗（完了したらページ全体を再描画して結果を表示する）。"""
+    scheduler = get_portfolio_scheduler()
+    if not scheduler.is_pending(drum, capacity_buffer):
+        st.rerun()
+    progress = scheduler.progress
+    st.progress(progress.fraction, text=f"{progress.message} ({progress.done}/{progress.total})")
+
+
+def _render_resource_contention():
+    """data/ の CCPM ファイル間のリソース競合と、ドラム・スケジューリングによる投入日の提案を描画する。"""
+    scheduler = get_portfolio_scheduler()
+    # スケジューラーは全セッションで共有するため、このセッションで依頼した設定の結果のみを表示する
+    params = st.session_state.get(SCHEDULER_PARAMS_KEY)
+    result = scheduler.result_for(*params) if params else None
+    auto_label = "自動（共有リソースで最も負荷が大きい担当者）"
+    drum_options = [auto_label] + (sorted(result.loads) if result else [])
+    drum_col, buffer_col, run_col = st.columns([2, 1, 1])
+    with drum_col:
+        drum = st.selectbox("ドラム（制約リソース）", drum_options, key="multi_project_fever_drum")
+    with buffer_col:
+        capacity_buffer = st.number_input(
+            "キャパシティ・バッファ(日)", min_value=0, value=DEFAULT_CAPACITY_BUFFER, step=1,
+            key="multi_project_fever_capacity_buffer",
+        )
+    with run_col:
+        st.write("")
+        st.write("")
+        if st.button("▶ 分析", width="stretch", key="multi_project_fever_run_scheduler"):
+            params = (None if drum == auto_label else drum, int(capacity_buffer))
+            st.session_state[SCHEDULER_PARAMS_KEY] = params
+            scheduler.start(*params)
+
+    if params and scheduler.is_pending(*params):
+        st.fragment(_render_scheduler_progress, run_every=1.0)(*params)
+        return
+    error = scheduler.error_for(*params) if params else ""
+    if error:
+        st.error(f"分析に失敗しました: {error}")
+    result = scheduler.result_for(*params) if params else None
+    if result is None:
+        st.info("「▶ 分析」で、CCPM ファイルをまたいだ担当者の重なりと、投入日をずらす提案を計算します。")
+        return
+
+    for project in result.skipped:
+        st.warning(f"{os.path.basename(project.file)}: {project.error}")
+    if result.drum is None:
+        st.info("複数のプロジェクトで共有されている担当者がいません。")
+        return
+    st.caption(
+        f"ドラム: **{result.drum}** / キャパシティ・バッファ: {result.capacity_buffer}日 / "
+        f"プロジェクト間の競合: **{len(result.conflicts_before)}件 → {len(result.conflicts_after)}件**"
+    )
+
+    project_rows = []
+    for project in result.projects:
+        proposed = result.proposed_release(project)
+        finish = result.proposed_finish(project)
+        project_rows.append(
+            {
+                "プロジェクト": project.name,
+                "投入日": project.release.strftime("%Y/%m/%d") if project.release else "",
+                "提案投入日": proposed.strftime("%Y/%m/%d") if proposed else "",
+                "ずらす日数": result.offsets.get(project.id, 0),
+                "CC長": project.chain_length,
+                "完了見込み": finish.strftime("%Y/%m/%d") if finish else "",
+            }
+        )
+    st.dataframe(pd.DataFrame(project_rows), width="stretch", hide_index=True)
+
+    before, after = {}, {}
+    for conflicts, counts in ((result.conflicts_before, before), (result.conflicts_after, after)):
+        for conflict in conflicts:
+            counts[conflict.resource] = counts.get(conflict.resource, 0) + 1
+    load_rows = [
+        {
+            "担当者": load.resource,
+            "ドラム": load.resource == result.drum,
+            "プロジェクト数": len(load.projects),
+            "残作業(日)": round(load.days, 1),
+            "競合(前)": before.get(load.resource, 0),
+            "競合(後)": after.get(load.resource, 0),
+        }
+        for load in sorted(result.loads.values(), key=lambda load: -load.days)
+    ]
+    with st.expander("担当者ごとの負荷と競合", expanded=False):
+        st.dataframe(pd.DataFrame(load_rows), width="stretch", hide_index=True)
+
+    if result.conflicts_after:
+        names = {project.id: project.name for project in result.projects}
+
+        def _task_label(node: str) -> str:
+            attrs = result.graph.nodes[node]
+            return f"{names.get(attrs.get('project'), '')}: {attrs.get('title', node)}"
+
+        with st.expander(f"ずらした後も残る競合 ({len(result.conflicts_after)}件)", expanded=False):
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "担当者": conflict.resource,
+                        "タスクA": _task_label(conflict.task_a),
+                        "タスクB": _task_label(conflict.task_b),
+                        "重なり(日)": round(conflict.overlap, 1),
+                    }
+                    for conflict in sorted(result.conflicts_after, key=lambda c: -c.overlap)[:MAX_CONFLICT_ROWS]
+                ]),
+                width="stretch", hide_index=True,
+            )
+
+
 def _add_project_to_working_data(
     data: dict,
     common_holidays: list,
@@ -580,6 +576,7 @@ chart_col, side_col = st.columns([2, 1])
 
 chart_container = chart_col.container()
 summary_container = chart_col.container()
+contention_container = chart_col.container()
 project_table_container = chart_col.container()
 
 with side_col:
@@ -598,6 +595,11 @@ with side_col:
         st.write("")
         st.write("")
         save_requested = st.button("保存", width="stretch")
+    include_ccpm_files = st.checkbox(
+        "data/ の CCPM ファイル (*_ccpm.hjson) も表示する",
+        value=False,
+        key="multi_project_fever_include_ccpm",
+    )
 
     with st.expander("祝日設定", expanded=False):
         holiday_text = st.text_area(
@@ -834,9 +836,22 @@ with side_col:
         st.success("データを保存しました。")
         st.rerun()
 
+ccpm_entries = []
+if include_ccpm_files:
+    # 内容が変わったファイルだけ再計算される
+    ccpm_entries = get_ccpm_portfolio().refresh()
+    for entry in ccpm_entries:
+        if entry["error"]:
+            st.warning(f"{os.path.basename(entry['file'])}: {entry['error']}")
+
 with chart_container:
-    _render_chart(edited_data["projects"], common_holidays, int(latest_n))
+    _render_chart(edited_data["projects"], common_holidays, int(latest_n), ccpm_entries)
 
 with summary_container:
     st.subheader("最新サマリー")
-    _render_summary(edited_data["projects"], common_holidays)
+    _render_summary(edited_data["projects"], common_holidays, ccpm_entries)
+
+if include_ccpm_files:
+    with contention_container:
+        st.subheader("プロジェクト間のリソース競合")
+        _render_resource_contention()
@@ -1,6 +1,6 @@
 import streamlit as st
 
-from src.file_io import save_config
+from src.file_io import get_last_backup_cleanup_report, save_config, is_config_enabled
 
 st.set_page_config(layout="wide")
 st.markdown(
@@ -19,6 +19,15 @@ PARAM_DESCRIPTIONS = {
     "upstream_filter_max": "上流ノードの最大表示数",
     "downstream_filter_max": "下流ノードの最大表示数",
     "backup_retention_days": "バックアップ保持日数",
+    "backup_max_count_per_postfix": "ページごとに残すバックアップの最大件数(0: 無制限)",
+    "backup_cleanup_interval_minutes": "古いバックアップを削除する間隔(分)",
+    "backup_mode": "バックアップ方式 (full: 保存ごとに全体コピー / journal: スナップショット＋差分)",
+    "backup_snapshot_interval": "journal方式でフルスナップショットを記録する間隔(保存回数)",
+    "data_cache": "データ読み込み用のキャッシュ(.rvcache)を利用する",
+    "data_file_format": "データ・バックアップの保存形式 (hjson / json / json_compact)",
+    "write_behind": "短時間の連続保存をまとめて書き込む(write-behind)",
+    "write_behind_delay_ms": "write-behind: 最後の保存から書き込むまでの待ち時間(ms)",
+    "write_behind_max_delay_ms": "write-behind: 最初の保存から書き込むまでの最大待ち時間(ms)",
     "requirement_data": "Requirement Diagram のデータファイル",
     "strategy_and_tactics_data": "Strategy and Tactics Tree のデータファイル",
     "current_reality_tree_data": "Current Reality Tree のデータファイル",
@@ -34,6 +43,16 @@ NUMERIC_KEYS = {
     "upstream_filter_max",
     "downstream_filter_max",
     "backup_retention_days",
+    "backup_max_count_per_postfix",
+    "backup_cleanup_interval_minutes",
+    "backup_snapshot_interval",
+    "write_behind_delay_ms",
+    "write_behind_max_delay_ms",
+}
+
+BOOL_KEYS = {
+    "data_cache",
+    "write_behind",
 }
 
 config_data = st.session_state.config_data
@@ -51,7 +70,14 @@ for key, value in config_data.items():
     with col_desc:
         st.caption(description)
     with col_value:
-        if key in NUMERIC_KEYS:
+        if key in BOOL_KEYS:
+            updated_config[key] = st.checkbox(
+                key,
+                value=is_config_enabled(config_data, key),
+                label_visibility="collapsed",
+                key=f"setting_{key}",
+            )
+        elif key in NUMERIC_KEYS:
             updated_config[key] = st.number_input(
                 key,
                 value=int(value) if value else 0,
@@ -80,6 +106,18 @@ if st.button("保存", key="save_settings"):
 
 st.divider()
 
+cleanup_report = get_last_backup_cleanup_report()
+if cleanup_report is None:
+    st.caption("バックアップのクリーンアップはまだ実行されていません。")
+elif cleanup_report.error:
+    st.caption(f"バックアップのクリーンアップに失敗しました: {cleanup_report.error}")
+else:
+    st.caption(
+        f"最終クリーンアップ: {cleanup_report.finished_at:%Y/%m/%d %H:%M:%S} / "
+        f"削除 {cleanup_report.removed_files}件・畳み込み {cleanup_report.compacted_entries}件 / "
+        f"{cleanup_report.reclaimed_bytes / 1024:.1f} KB 解放"
+    )
+
 data_key = st.session_state.app_data[st.session_state.app_name]["data"]
 data_file = config_data.get(data_key, "未設定")
 st.write(f"**現在のデータファイル:** `{data_file}`")
@@ -0,0 +1,364 @@
+"""バックアップの永続インデックス。
+
+`back/` 配下のバックアップ（hjsonファイル・ジャーナルのエントリ・png）を
+postfix ごとにタイムスタンプのソート済みリストとして `back/.index/manifest.json` に保持する。
+保存・削除のたびの変更は1行1操作のJSONとして `back/.index/manifest.log` に追記し、
+操作数が登録済みのバックアップ数（最低 LOG_COMPACT_MIN）を超えたらマニフェストに畳み込む。
+読み込み時はマニフェストに操作ログを再生する。保存・削除のたびに更新するため、一覧取得・Undo・PNGの対応付け・保持期間のクリーンアップで
+`os.listdir` とファイル名の `strptime` を毎回行う必要がなくなる。
+
+各hjsonバックアップには内容の正規化ハッシュ（`compute_content_hash`）を記録でき、
+同一内容のバックアップの重複保存や、Undo・差分表示での同一スナップショットの判定に用いる。
+
+`back/` ディレクトリ自体の更新時刻をマニフェストに記録しておき、
+アプリ外でファイルが追加・削除された（更新時刻が一致しない）場合は自動的に再構築する。
+インデックスは `back/` 直下ではなくサブディレクトリに置くため、
+マニフェストの書き込みで `back/` の更新時刻は変わらない。
+"""
+import bisect
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.backup_journal import BackupJournal, JOURNAL_EXTENSION, _ends_without_newline
+
+
+INDEX_DIR_NAME = ".index"
+MANIFEST_NAME = "manifest.json"
+LOG_NAME = "manifest.log"
+# 操作ログをマニフェストに畳み込むまでの最小の操作数
+LOG_COMPACT_MIN = 100
+MANIFEST_VERSION = 1
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# バックアップの種類
+KIND_HJSON = "hjson"
+KIND_PNG = "png"
+# hjsonバックアップの内容ハッシュ {timestamp: hash} を保持するキー
+HASHES_KEY = "hashes"
+
+
+def compute_content_hash(data: Any) -> str:
+    """データの正規化ハッシュ（キー順・空白に依存しないSHA-256）を返す。"""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_backup_filename(filename: str) -> Optional[Tuple[str, str, str]]:
+    """バックアップのファイル名を (タイムスタンプ, postfix, 種類) に分解する。
+
+    例: "20260228_180000_ccpm.hjson" -> ("20260228_180000", "ccpm", "hjson")
+    """
+    base, ext = os.path.splitext(filename)
+    kind = ext.lstrip(".")
+    if kind not in (KIND_HJSON, KIND_PNG):
+        return None
+    if len(base) < 17 or base[15] != "_":
+        return None
+    timestamp = base[:15]
+    try:
+        datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return timestamp, base[16:], kind
+
+
+class BackupIndex:
+    """postfix ごとのバックアップのタイムスタンプを保持するインデックス。"""
+
+    def __init__(self, back_dir: str = "back"):
+        self.back_dir = back_dir
+        self.index_dir = os.path.join(back_dir, INDEX_DIR_NAME)
+        self.manifest_path = os.path.join(self.index_dir, MANIFEST_NAME)
+        self.log_path = os.path.join(self.index_dir, LOG_NAME)
+        self._lock = threading.RLock()
+        # {postfix: {"hjson": [ts, ...], "png": [ts, ...], "hashes": {ts: hash}}}（各リストは昇順）
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        # マニフェストに畳み込んでいない操作ログの行数
+        self._log_count = 0
+
+    # --- 永続化 ---
+
+    def _current_dir_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.back_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        ops = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                # 書き込み途中でクラッシュした末尾行などは無視する
+                continue
+        return ops
+
+    def _save(self):
+        """マニフェストを書き込み、操作ログを空にする（呼び出し側でロックを保持すること）。"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._dir_mtime_ns = self._current_dir_mtime()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "dir_mtime_ns": self._dir_mtime_ns,
+            "entries": self._entries,
+        }
+        with tempfile.NamedTemporaryFile(
+            mode="w", dir=self.index_dir, delete=False, encoding="utf-8"
+        ) as tf:
+            temp_path = tf.name
+            json.dump(manifest, tf, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+        # 操作は冪等なため、削除前にクラッシュして古いログが残っても再生結果は変わらない
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._log_count = 0
+
+    def _apply(self, op: Dict[str, Any]):
+        """1操作をメモリ上のインデックスに反映する。"""
+        postfix, kind = op["postfix"], op["kind"]
+        if op["op"] == "add":
+            bucket = self._entries.setdefault(postfix, {KIND_HJSON: [], KIND_PNG: []})
+            timestamps = bucket.setdefault(kind, [])
+            timestamp = op["ts"]
+            pos = bisect.bisect_left(timestamps, timestamp)
+            if pos == len(timestamps) or timestamps[pos] != timestamp:
+                timestamps.insert(pos, timestamp)
+            if kind == KIND_HJSON:
+                hashes = bucket.setdefault(HASHES_KEY, {})
+                if op.get("hash"):
+                    hashes[timestamp] = op["hash"]
+                else:
+                    # 同一秒の上書きで内容が変わった可能性があるため古いハッシュは破棄する
+                    hashes.pop(timestamp, None)
+        elif op["op"] == "hash":
+            bucket = self._entries.get(postfix)
+            if bucket is not None and op["ts"] in bucket.get(KIND_HJSON, []):
+                bucket.setdefault(HASHES_KEY, {})[op["ts"]] = op["hash"]
+        elif op["op"] == "remove":
+            bucket = self._entries.get(postfix, {}).get(kind)
+            if bucket is not None:
+                drop = set(op["ts"])
+                self._entries[postfix][kind] = [ts for ts in bucket if ts not in drop]
+                if kind == KIND_HJSON:
+                    hashes = self._entries[postfix].get(HASHES_KEY, {})
+                    for ts in drop:
+                        hashes.pop(ts, None)
+
+    def _record(self, op: Dict[str, Any]):
+        """操作を反映して操作ログに追記する（呼び出し側でロックを保持すること）。
+
+        操作ログが登録済みのバックアップ数を超えたらマニフェストに畳み込むため、
+        1操作あたりの書き込み量は平均してバックアップ数によらない。
+        """
+        self._apply(op)
+        total = sum(
+            len(bucket.get(KIND_HJSON, [])) + len(bucket.get(KIND_PNG, []))
+            for bucket in self._entries.values()
+        )
+        if self._log_count + 1 > max(LOG_COMPACT_MIN, total):
+            self._save()
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._dir_mtime_ns = self._current_dir_mtime()
+        line = json.dumps({**op, "dir_mtime_ns": self._dir_mtime_ns}, ensure_ascii=False) + "\n"
+        if _ends_without_newline(self.log_path):
+            line = "\n" + line
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self._log_count += 1
+
+    def rebuild(self):
+        """`back/` を走査してインデックスを作り直す。"""
+        with self._lock:
+            entries: Dict[str, Dict[str, List[str]]] = {}
+            if os.path.isdir(self.back_dir):
+                for f in os.listdir(self.back_dir):
+                    if f.endswith(JOURNAL_EXTENSION):
+                        postfix = f[: -len(JOURNAL_EXTENSION)]
+                        journal = BackupJournal(self.back_dir, postfix)
+                        bucket = entries.setdefault(postfix, {KIND_HJSON: [], KIND_PNG: []})
+                        bucket[KIND_HJSON].extend(journal.timestamps())
+                        continue
+                    parsed = parse_backup_filename(f)
+                    if parsed is None:
+                        continue
+                    if not os.path.isfile(os.path.join(self.back_dir, f)):
+                        continue
+                    timestamp, postfix, kind = parsed
+                    bucket = entries.setdefault(postfix, {KIND_HJSON: [], KIND_PNG: []})
+                    bucket[kind].append(timestamp)
+            for postfix, bucket in entries.items():
+                for kind in (KIND_HJSON, KIND_PNG):
+                    bucket[kind] = sorted(set(bucket[kind]))
+                # 残っているバックアップのハッシュは引き継ぐ
+                known = self._entries.get(postfix, {}).get(HASHES_KEY, {})
+                bucket[HASHES_KEY] = {
+                    ts: known[ts] for ts in bucket[KIND_HJSON] if ts in known
+                }
+            self._entries = entries
+            if os.path.isdir(self.back_dir):
+                self._save()
+
+    def _ensure_fresh(self):
+        """`back/` がアプリ外で変更されていればインデックスを再読込・再構築する。"""
+        current = self._current_dir_mtime()
+        if current is not None and current == self._dir_mtime_ns:
+            return
+        manifest = self._read_manifest()
+        if manifest is not None and current is not None:
+            self._entries = manifest.get("entries", {})
+            dir_mtime_ns = manifest.get("dir_mtime_ns")
+            ops = self._read_log()
+            for op in ops:
+                self._apply(op)
+                dir_mtime_ns = op.get("dir_mtime_ns")
+            if dir_mtime_ns == current:
+                self._dir_mtime_ns = current
+                self._log_count = len(ops)
+                return
+        self.rebuild()
+
+    def refresh(self):
+        """アプリ外での変更を取り込む。
+
+        `add` / `remove` は自身の書き込み直後に呼ばれる前提で鮮度確認を行わないため、
+        `back/` を変更する前にこのメソッドで最新の状態にしておくこと。
+        """
+        with self._lock:
+            self._ensure_fresh()
+
+    # --- 参照 ---
+
+    def _bucket(self, postfix: str, kind: str) -> List[str]:
+        return self._entries.get(postfix, {}).get(kind, [])
+
+    def list_timestamps(self, postfix: str, kind: str = KIND_HJSON) -> List[str]:
+        """postfix のバックアップのタイムスタンプを新しい順に返す。"""
+        with self._lock:
+            self._ensure_fresh()
+            return list(reversed(self._bucket(postfix, kind)))
+
+    def list_names(self, postfix: str) -> List[str]:
+        """postfix のhjsonバックアップ名（例: "20260228_180000_ccpm.hjson"）を新しい順に返す。"""
+        return [f"{ts}_{postfix}.hjson" for ts in self.list_timestamps(postfix)]
+
+    def postfixes(self) -> List[str]:
+        """インデックスに登録されている postfix の一覧を返す。"""
+        with self._lock:
+            self._ensure_fresh()
+            return sorted(self._entries)
+
+    def get_hash(self, postfix: str, timestamp: str) -> Optional[str]:
+        """hjsonバックアップの内容ハッシュを返す（未記録なら None）。"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._entries.get(postfix, {}).get(HASHES_KEY, {}).get(timestamp)
+
+    def closest_png(self, postfix: str, timestamp: str, max_diff_seconds: int = 5) -> str:
+        """タイムスタンプが最も近いPNGバックアップのファイル名を返す（差が max_diff_seconds 超なら空文字）。"""
+        try:
+            target = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        except ValueError:
+            return ""
+        with self._lock:
+            self._ensure_fresh()
+            pngs = self._bucket(postfix, KIND_PNG)
+            pos = bisect.bisect_left(pngs, timestamp)
+            candidates = pngs[max(0, pos - 1):pos + 1]
+
+        best = ""
+        best_diff = datetime.timedelta(seconds=max_diff_seconds + 1)
+        for candidate in candidates:
+            diff = abs(datetime.datetime.strptime(candidate, TIMESTAMP_FORMAT) - target)
+            if diff < best_diff:
+                best_diff = diff
+                best = f"{candidate}_{postfix}.png"
+        return best
+
+    def expired(self, cutoff_timestamp: str) -> List[Tuple[str, str, str]]:
+        """cutoff より古いバックアップを [(postfix, 種類, タイムスタンプ), ...] で返す。"""
+        result = []
+        with self._lock:
+            self._ensure_fresh()
+            for postfix, bucket in self._entries.items():
+                for kind in (KIND_HJSON, KIND_PNG):
+                    timestamps = bucket.get(kind, [])
+                    end = bisect.bisect_left(timestamps, cutoff_timestamp)
+                    result.extend((postfix, kind, ts) for ts in timestamps[:end])
+        return result
+
+    # --- 更新 ---
+
+    def _ensure_loaded(self):
+        if self._dir_mtime_ns is None:
+            self._ensure_fresh()
+
+    def add(
+        self, postfix: str, kind: str, timestamp: str, content_hash: Optional[str] = None
+    ):
+        """バックアップを登録する。"""
+        op = {"op": "add", "postfix": postfix, "kind": kind, "ts": timestamp}
+        if content_hash:
+            op["hash"] = content_hash
+        with self._lock:
+            self._ensure_loaded()
+            self._record(op)
+
+    def set_hash(self, postfix: str, timestamp: str, content_hash: str):
+        """既存のhjsonバックアップに内容ハッシュを記録する。"""
+        with self._lock:
+            self._ensure_loaded()
+            bucket = self._entries.get(postfix)
+            if bucket is None or timestamp not in bucket.get(KIND_HJSON, []):
+                return
+            if bucket.get(HASHES_KEY, {}).get(timestamp) == content_hash:
+                return
+            self._record(
+                {"op": "hash", "postfix": postfix, "kind": KIND_HJSON, "ts": timestamp, "hash": content_hash}
+            )
+
+    def remove(self, postfix: str, kind: str, timestamps: List[str]):
+        """バックアップの登録を解除する。"""
+        with self._lock:
+            if not timestamps:
+                return
+            self._ensure_loaded()
+            self._record({"op": "remove", "postfix": postfix, "kind": kind, "ts": list(timestamps)})
+
+
+_indexes: Dict[str, BackupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_backup_index(back_dir: str = "back") -> BackupIndex:
+    """プロセス内で共有するバックアップインデックスを返す。"""
+    key = os.path.abspath(back_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = BackupIndex(back_dir)
+        return _indexes[key]
@@ -0,0 +1,181 @@
+"""バックアップの保持期間クリーンアップ（バックグラウンド実行）。
+
+保持日数を超えたバックアップと、postfix ごとの件数上限を超えた古いバックアップを削除する。
+画面の再描画のたびに同期実行するのではなく、プロセスごとに最大で
+`interval_minutes` 分に1回、デーモンスレッドで実行する。
+"""
+import datetime
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.backup_index import KIND_HJSON, KIND_PNG, get_backup_index
+from src.backup_journal import BackupJournal
+
+
+# 全エントリを削除する場合のジャーナル畳み込み基準（どのタイムスタンプよりも新しい）
+_DROP_ALL_CUTOFF = "99999999_999999"
+
+
+@dataclass
+class CleanupReport:
+    """クリーンアップ1回分の結果。"""
+
+    finished_at: datetime.datetime
+    removed_files: int = 0
+    compacted_entries: int = 0
+    reclaimed_bytes: int = 0
+    error: str = ""
+
+
+def _select_expired(
+    timestamps: List[str], cutoff_ts: str, max_count: int
+) -> List[str]:
+    """古い順のタイムスタンプから削除対象を選ぶ。"""
+    over = set()
+    if 0 < max_count < len(timestamps):
+        over = set(timestamps[: len(timestamps) - max_count])
+    return [ts for ts in timestamps if ts < cutoff_ts or ts in over]
+
+
+def _remove_file(path: str) -> int:
+    """ファイルを削除し、解放したバイト数を返す。"""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+def run_cleanup(
+    back_dir: str,
+    retention_days: int,
+    max_count_per_postfix: int = 0,
+    now: Optional[datetime.datetime] = None,
+) -> CleanupReport:
+    """バックアップのクリーンアップを1回実行する。
+
+    Args:
+        back_dir (str): バックアップディレクトリ
+        retention_days (int): 保持日数
+        max_count_per_postfix (int): postfix・種類ごとに残す最大件数（0以下で無制限）
+        now (datetime, optional): 基準時刻（テスト用）
+
+    Returns:
+        CleanupReport: 削除件数と解放したバイト数
+    """
+    now = now or datetime.datetime.now()
+    report = CleanupReport(finished_at=now)
+    if not os.path.isdir(back_dir):
+        return report
+
+    cutoff_ts = (now - datetime.timedelta(days=retention_days)).strftime("%Y%m%d_%H%M%S")
+    index = get_backup_index(back_dir)
+    index.refresh()
+
+    removed: Dict[tuple, List[str]] = {}
+    for postfix in index.postfixes():
+        for kind in (KIND_HJSON, KIND_PNG):
+            timestamps = list(reversed(index.list_timestamps(postfix, kind)))
+            expired = _select_expired(timestamps, cutoff_ts, max_count_per_postfix)
+            if not expired:
+                continue
+            for ts in expired:
+                path = os.path.join(back_dir, f"{ts}_{postfix}.{kind}")
+                if os.path.exists(path):
+                    report.reclaimed_bytes += _remove_file(path)
+                    report.removed_files += 1
+            removed[(postfix, kind)] = expired
+
+            if kind != KIND_HJSON:
+                continue
+            # ジャーナルは残す最古のエントリより前を先頭スナップショットへ畳み込む
+            journal = BackupJournal(back_dir, postfix)
+            if not os.path.exists(journal.path):
+                continue
+            drop = set(expired)
+            kept = [ts for ts in timestamps if ts not in drop]
+            before = os.path.getsize(journal.path)
+            report.compacted_entries += journal.compact(kept[0] if kept else _DROP_ALL_CUTOFF)
+            after = os.path.getsize(journal.path) if os.path.exists(journal.path) else 0
+            report.reclaimed_bytes += max(0, before - after)
+
+    for (postfix, kind), timestamps in removed.items():
+        index.remove(postfix, kind, timestamps)
+
+    report.finished_at = datetime.datetime.now()
+    return report
+
+
+class BackupJanitor:
+    """クリーンアップの実行間隔を管理し、バックグラウンドで実行する。"""
+
+    def __init__(self, back_dir: str = "back"):
+        self.back_dir = back_dir
+        self.last_report: Optional[CleanupReport] = None
+        self._last_started: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _run(self, retention_days: int, max_count: int):
+        try:
+            report = run_cleanup(self.back_dir, retention_days, max_count)
+        except Exception as e:  # バックグラウンド処理の失敗で画面を止めない
+            report = CleanupReport(finished_at=datetime.datetime.now(), error=str(e))
+        self.last_report = report
+
+    def run_now(self, retention_days: int, max_count: int = 0) -> CleanupReport:
+        """クリーンアップを同期的に実行する。"""
+        with self._lock:
+            self._last_started = time.monotonic()
+        self._run(retention_days, max_count)
+        return self.last_report
+
+    def schedule(
+        self, retention_days: int, max_count: int = 0, interval_minutes: float = 60
+    ) -> bool:
+        """前回の実行から interval_minutes 分以上経過していればバックグラウンドで実行する。
+
+        Returns:
+            bool: 今回実行を開始した場合 True
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            now = time.monotonic()
+            if (
+                self._last_started is not None
+                and now - self._last_started < interval_minutes * 60
+            ):
+                return False
+            self._last_started = now
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(retention_days, max_count),
+                name="backup-janitor",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None):
+        """実行中のクリーンアップの完了を待つ。"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+_janitors: Dict[str, BackupJanitor] = {}
+_janitors_lock = threading.Lock()
+
+
+def get_backup_janitor(back_dir: str = "back") -> BackupJanitor:
+    """プロセス内で共有するクリーンアップ管理オブジェクトを返す。"""
+    key = os.path.abspath(back_dir)
+    with _janitors_lock:
+        if key not in _janitors:
+            _janitors[key] = BackupJanitor(back_dir)
+        return _janitors[key]
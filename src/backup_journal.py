@@ -0,0 +1,334 @@
+"""追記型のバックアップジャーナル。
+
+保存のたびにデータ全体を `back/` へコピーする代わりに、
+定期的なフルスナップショットと保存ごとの差分（ノード/エッジの追加・削除・変更）を
+1行1エントリのJSONとして `back/<postfix>.journal` に追記する。
+
+任意時点のデータは、その時点以前の直近スナップショットから差分を再生して復元する。
+各エントリはバックアップファイルと同じタイムスタンプ（YYYYMMDD_HHMMSS）を持つため、
+UI上は従来の `<timestamp>_<postfix>.hjson` と同じ名前で一覧表示できる。
+"""
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+JOURNAL_EXTENSION = ".journal"
+DEFAULT_SNAPSHOT_INTERVAL = 20
+
+# 差分の対象外とするトップレベルキー（個別に差分を取る）
+_COLLECTION_KEYS = ("nodes", "edges")
+
+# ジャーナルの最新状態キャッシュ
+# {journal_path: (ファイルサイズ, エントリ数, 直近スナップショット以降の差分数, 最新データ)}
+_latest_state_cache: Dict[str, Tuple[int, int, int, Dict[str, Any]]] = {}
+
+# ジャーナルごとの書き込みロック（バックグラウンドのクリーンアップと保存の競合を防ぐ）
+_journal_locks: Dict[str, threading.RLock] = {}
+_journal_locks_guard = threading.Lock()
+
+
+def _journal_lock(path: str) -> threading.RLock:
+    path = os.path.abspath(path)
+    with _journal_locks_guard:
+        if path not in _journal_locks:
+            _journal_locks[path] = threading.RLock()
+        return _journal_locks[path]
+
+
+def _edge_key(edge: Dict[str, Any]) -> str:
+    """エッジの同一性判定に使う正規化キーを返す。"""
+    return json.dumps(edge, sort_keys=True, ensure_ascii=False)
+
+
+def compute_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """2つのデータ間の差分を計算する。
+
+    Returns:
+        {
+            "nodes": {"upsert": [node, ...], "remove": [unique_id, ...]},
+            "edges": {"add": [edge, ...], "remove": [edge, ...]},
+            "meta": {"set": {key: value}, "remove": [key, ...]},
+        }
+    """
+    old_nodes = {n.get("unique_id"): n for n in old.get("nodes", [])}
+    new_nodes = {n.get("unique_id"): n for n in new.get("nodes", [])}
+    upsert = [
+        node for uid, node in new_nodes.items()
+        if uid not in old_nodes or old_nodes[uid] != node
+    ]
+    removed_nodes = [uid for uid in old_nodes if uid not in new_nodes]
+
+    # エッジは一意なIDを持たないため、正規化キーによる多重集合として差分を取る
+    old_counts: Dict[str, int] = {}
+    for edge in old.get("edges", []):
+        key = _edge_key(edge)
+        old_counts[key] = old_counts.get(key, 0) + 1
+    added_edges = []
+    for edge in new.get("edges", []):
+        key = _edge_key(edge)
+        if old_counts.get(key, 0) > 0:
+            old_counts[key] -= 1
+        else:
+            added_edges.append(edge)
+    removed_edges = []
+    for edge in old.get("edges", []):
+        key = _edge_key(edge)
+        if old_counts.get(key, 0) > 0:
+            old_counts[key] -= 1
+            removed_edges.append(edge)
+
+    meta_set = {
+        key: value for key, value in new.items()
+        if key not in _COLLECTION_KEYS and (key not in old or old[key] != value)
+    }
+    meta_remove = [
+        key for key in old
+        if key not in _COLLECTION_KEYS and key not in new
+    ]
+
+    return {
+        "nodes": {"upsert": upsert, "remove": removed_nodes},
+        "edges": {"add": added_edges, "remove": removed_edges},
+        "meta": {"set": meta_set, "remove": meta_remove},
+    }
+
+
+def apply_diff(data: Dict[str, Any], diff: Dict[str, Any]) -> Dict[str, Any]:
+    """データに差分を適用した新しいデータを返す（引数は変更しない）。
+
+    保存時と同じく、ノードは unique_id 順、エッジは source 順に並べる。
+    """
+    result = {
+        key: copy.deepcopy(value)
+        for key, value in data.items()
+        if key not in _COLLECTION_KEYS
+    }
+
+    node_diff = diff.get("nodes", {})
+    nodes = {n.get("unique_id"): n for n in data.get("nodes", [])}
+    for uid in node_diff.get("remove", []):
+        nodes.pop(uid, None)
+    for node in node_diff.get("upsert", []):
+        nodes[node.get("unique_id")] = node
+    result["nodes"] = sorted(
+        (copy.deepcopy(n) for n in nodes.values()), key=lambda x: x["unique_id"]
+    )
+
+    edge_diff = diff.get("edges", {})
+    remove_counts: Dict[str, int] = {}
+    for edge in edge_diff.get("remove", []):
+        key = _edge_key(edge)
+        remove_counts[key] = remove_counts.get(key, 0) + 1
+    edges = []
+    for edge in data.get("edges", []):
+        key = _edge_key(edge)
+        if remove_counts.get(key, 0) > 0:
+            remove_counts[key] -= 1
+            continue
+        edges.append(copy.deepcopy(edge))
+    edges.extend(copy.deepcopy(edge_diff.get("add", [])))
+    edges.sort(key=lambda x: x["source"])
+    result["edges"] = edges
+
+    meta_diff = diff.get("meta", {})
+    for key in meta_diff.get("remove", []):
+        result.pop(key, None)
+    for key, value in meta_diff.get("set", {}).items():
+        result[key] = copy.deepcopy(value)
+
+    return result
+
+
+def _ends_without_newline(path: str) -> bool:
+    """ファイルが改行で終わっていない（途中書きの行がある）かどうかを返す。"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+class BackupJournal:
+    """1つの postfix（ページ）に対応するバックアップジャーナル。"""
+
+    def __init__(
+        self,
+        back_dir: str,
+        postfix: str,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    ):
+        self.back_dir = back_dir
+        self.postfix = postfix
+        self.snapshot_interval = max(1, int(snapshot_interval or 1))
+        self.path = os.path.join(back_dir, f"{postfix}{JOURNAL_EXTENSION}")
+
+    # --- 読み込み ---
+
+    def _read_entries(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # 書き込み途中でクラッシュした末尾行などは無視する
+                    continue
+        return entries
+
+    def timestamps(self) -> List[str]:
+        """全エントリのタイムスタンプを古い順に返す。"""
+        return [entry["ts"] for entry in self._read_entries()]
+
+    def backup_names(self) -> List[str]:
+        """UI表示用のバックアップ名（`<timestamp>_<postfix>.hjson`）を返す。"""
+        return [f"{ts}_{self.postfix}.hjson" for ts in self.timestamps()]
+
+    @staticmethod
+    def _replay(entries: List[Dict[str, Any]], index: int) -> Optional[Dict[str, Any]]:
+        """index 番目のエントリ時点のデータを復元する。"""
+        if index < 0 or index >= len(entries):
+            return None
+        # 直近のスナップショットを探す
+        start = index
+        while start >= 0 and entries[start].get("type") != "snapshot":
+            start -= 1
+        if start < 0:
+            return None
+        data = copy.deepcopy(entries[start]["data"])
+        for entry in entries[start + 1:index + 1]:
+            data = apply_diff(data, entry)
+        return data
+
+    def reconstruct(self, timestamp: str) -> Optional[Dict[str, Any]]:
+        """指定タイムスタンプ時点のデータを復元する。
+
+        同一秒に複数回保存された場合は、最後のエントリを採用する
+        （フルバックアップ方式で同名ファイルが上書きされるのと同じ挙動）。
+        """
+        entries = self._read_entries()
+        for index in range(len(entries) - 1, -1, -1):
+            if entries[index]["ts"] == timestamp:
+                return self._replay(entries, index)
+        return None
+
+    def _latest_state(self) -> Tuple[int, int, Optional[Dict[str, Any]]]:
+        """(エントリ数, 直近スナップショット以降の差分数, 最新データ) を返す。
+
+        ファイルサイズが変わっていなければキャッシュを使い、変わっていれば全エントリを読み直す。
+        返すデータはキャッシュと共有のため、変更しないこと。
+        """
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        cached = _latest_state_cache.get(self.path)
+        if cached and cached[0] == size:
+            return cached[1], cached[2], cached[3]
+        entries = self._read_entries()
+        since_snapshot = 0
+        for entry in reversed(entries):
+            if entry.get("type") == "snapshot":
+                break
+            since_snapshot += 1
+        data = self._replay(entries, len(entries) - 1)
+        if data is not None:
+            _latest_state_cache[self.path] = (size, len(entries), since_snapshot, data)
+        return len(entries), since_snapshot, data
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """最新エントリ時点のデータを返す。"""
+        _, _, data = self._latest_state()
+        return copy.deepcopy(data) if data is not None else None
+
+    # --- 書き込み ---
+
+    def append(self, timestamp: str, data: Dict[str, Any]):
+        """データを1エントリとして追記する。
+
+        直近スナップショットから snapshot_interval 件に達した場合はフルスナップショットを、
+        それ以外は直前の状態との差分を書き込む。
+        """
+        with _journal_lock(self.path):
+            self._append(timestamp, data)
+
+    def _append(self, timestamp: str, data: Dict[str, Any]):
+        os.makedirs(self.back_dir, exist_ok=True)
+        # エントリ数と差分数はキャッシュから取り、保存のたびにジャーナル全体を読み直さない
+        count, since_snapshot, previous = self._latest_state()
+        if previous is None or since_snapshot + 1 >= self.snapshot_interval:
+            entry = {"ts": timestamp, "type": "snapshot", "data": data}
+            since_snapshot = 0
+        else:
+            entry = {"ts": timestamp, "type": "diff", **compute_diff(previous, data)}
+            since_snapshot += 1
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        if _ends_without_newline(self.path):
+            # クラッシュで途中まで書かれた行があれば、新しいエントリと連結しないよう改行する
+            line = "\n" + line
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        size = os.path.getsize(self.path)
+        _latest_state_cache[self.path] = (size, count + 1, since_snapshot, copy.deepcopy(data))
+
+    def _rewrite(self, entries: List[Dict[str, Any]]):
+        """エントリ一覧でジャーナルをアトミックに書き直す。"""
+        _latest_state_cache.pop(self.path, None)
+        if not entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with tempfile.NamedTemporaryFile(
+            mode="w", dir=self.back_dir, delete=False, encoding="utf-8"
+        ) as tf:
+            temp_path = tf.name
+            for entry in entries:
+                tf.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            tf.flush()
+            os.fsync(tf.fileno())
+        os.replace(temp_path, self.path)
+
+    def remove_last(self) -> bool:
+        """最新のエントリを削除する（Undo用）。"""
+        with _journal_lock(self.path):
+            entries = self._read_entries()
+            if not entries:
+                return False
+            self._rewrite(entries[:-1])
+            return True
+
+    def compact(self, cutoff_timestamp: str) -> int:
+        """cutoff より古いエントリを削除し、残りの先頭をスナップショットに置き換える。
+
+        Returns:
+            削除したエントリ数
+        """
+        with _journal_lock(self.path):
+            return self._compact(cutoff_timestamp)
+
+    def _compact(self, cutoff_timestamp: str) -> int:
+        entries = self._read_entries()
+        first_kept = next(
+            (i for i, entry in enumerate(entries) if entry["ts"] >= cutoff_timestamp),
+            len(entries),
+        )
+        if first_kept == 0:
+            return 0
+        if first_kept == len(entries):
+            self._rewrite([])
+            return len(entries)
+
+        head = self._replay(entries, first_kept)
+        kept = [{"ts": entries[first_kept]["ts"], "type": "snapshot", "data": head}]
+        kept.extend(entries[first_kept + 1:])
+        self._rewrite(kept)
+        return first_kept
@@ -270,14 +270,18 @@ def _apply_changes(
             if e.get("source") not in del_entity_ids
             and e.get("destination") not in del_entity_ids
         ]
-    # 接続追加
-    reqs.setdefault("edges", []).extend(add_edges)
+    # 接続追加（同一内容の接続は追加しない）
+    reqs.setdefault("edges", [])
+    requirement_manager.sync_edge_keys()
+    for edge in add_edges:
+        requirement_manager.add_edge(edge)
     # 接続削除
     if rm_edge_keys:
         reqs["edges"] = [
             e for e in reqs.get("edges", [])
             if (e.get("source"), e.get("destination")) not in rm_edge_keys
         ]
+        requirement_manager.sync_edge_keys()
 
     update_source_data(file_path, reqs)
 
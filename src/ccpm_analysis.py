@@ -0,0 +1,229 @@
+"""CCPM 分析結果（CP・CC・スケジュール・残パス長・優先度）の共有キャッシュ。
+
+CCPM ページの1回の描画では、ネットワーク図・CCPM 分析・ガントチャート・フィーバーチャート・
+優先度タブがそれぞれ同じグラフに対して CP / CC を計算していた。
+グラフの内容（リビジョン）・プロジェクト設定・日数モードごとに分析結果を1回だけ計算し、
+プロセス内の LRU キャッシュで共有する。
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import networkx as nx
+
+from src.ccpm_engine import (
+    PriorityTable,
+    RemainingLengths,
+    _compute_earliest_schedule,
+    _level_critical_chain,
+    calculate_critical_path,
+    get_in_out_edge_list,
+)
+from src.ccpm_scenario import ScenarioEngine
+
+# 保持する分析結果の数（ページ・日数モード・設定の組み合わせ分）
+CACHE_SIZE = 16
+# 保持する引き継ぎ用の優先度テーブルの数
+PRIORITY_SEED_SIZE = 4
+
+
+def _canonical(value: Any) -> Any:
+    """ファイルへの保存・再読み込みで変わらない形にする（HJSON は 0.0 を 0 として読み込むため、整数値の float は int に）。"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def graph_revision(graph: nx.DiGraph) -> str:
+    """グラフのノード・属性・エッジの内容から決まるリビジョン（SHA-256）を返す。
+
+    画面上で更新したグラフと、保存して読み込み直したグラフが同じリビジョンになるよう、
+    整数値の float は int とみなす（seed_priority_table の引き継ぎに使うため）。
+    """
+    payload = {
+        "nodes": [[node, _canonical(attrs)] for node, attrs in graph.nodes(data=True)],
+        "edges": [[src, dst, _canonical(attrs)] for src, dst, attrs in graph.edges(data=True)],
+    }
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CCPMAnalysis:
+    """1つのグラフ・設定に対する CCPM 分析結果。
+
+    Attributes:
+        cp_length, cp: クリティカルパス長とノードリスト
+        cc_length, cc: クリティカルチェーン長とノードリスト
+        virtual_edges: リソース競合解消のための仮想エッジ [(src, dst, resource)]
+        schedule: 仮想エッジを含むグラフの ASAP スケジュール {node: (開始, 終了)}
+        remaining: 仮想エッジを含むグラフの残パス長（duration_mode による）
+
+    結果は複数の呼び出し元で共有されるため、変更しないこと。
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        max_concurrency: int = 0,
+        project: Optional[Dict[str, Any]] = None,
+        duration_mode: str = "remaining",
+        revision: Optional[str] = None,
+    ):
+        self.revision = revision if revision is not None else graph_revision(graph)
+        self.max_concurrency = max_concurrency
+        self.duration_mode = duration_mode
+        # 優先度テーブルを後から計算するため、呼び出し元での変更の影響を受けないようにコピーを持つ
+        self._graph = graph.copy()
+
+        inputs, outputs = get_in_out_edge_list(graph)
+        self.cp_length, self.cp = calculate_critical_path(
+            graph, inputs, outputs, project=project, duration_mode=duration_mode
+        )
+        (
+            self.cc_length,
+            self.cc,
+            self.virtual_edges,
+            self._work_graph,
+            self._dag,
+        ) = _level_critical_chain(
+            graph, max_concurrency, project=project, duration_mode=duration_mode
+        )
+
+        self.schedule: Dict[str, Tuple[float, float]] = {}
+        self.remaining: Optional[RemainingLengths] = None
+        if self._dag is not None:
+            self.schedule = _compute_earliest_schedule(self._work_graph, self._dag)
+            self.remaining = RemainingLengths(
+                self._work_graph, project=project, duration_mode=duration_mode, dag=self._dag
+            )
+        self._priority: Optional[PriorityTable] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active_chain(self) -> List[str]:
+        """分析で使うチェーン（CC があればそちらを優先）。"""
+        return self.cc if self.cc else self.cp
+
+    @property
+    def active_length(self) -> float:
+        return self.cc_length if self.cc else self.cp_length
+
+    def priority(self) -> PriorityTable:
+        """active_chain に対する優先度テーブル（初回のみ計算）。
+
+        seed_priority_table で同じリビジョン・チェーン・仮想エッジのテーブルが登録されていればそれを使う。
+        """
+        with self._lock:
+            if self._priority is None:
+                self._priority = _take_priority_seed(self)
+            if self._priority is None:
+                remaining = self.remaining if self.duration_mode == "remaining" else None
+                if remaining is None and self._dag is not None:
+                    remaining = RemainingLengths(self._work_graph, dag=self._dag)
+                # 推移的簡約で除いた仮想エッジは最長パスに影響しないため、残パス長はそのまま使える
+                self._priority = PriorityTable(
+                    self._graph, self.active_chain, self.virtual_edges, remaining=remaining
+                )
+            return self._priority
+
+    def priority_table(self) -> List[Dict[str, Any]]:
+        """active_chain に対する優先度テーブルの行。"""
+        return self.priority().rows()
+
+    def scenarios(self, project: Optional[Dict[str, Any]] = None) -> Optional[ScenarioEngine]:
+        """この分析の平準化済みネットワークを基準とする What-if シナリオの評価器（閉路がある場合は None）。"""
+        if self._dag is None:
+            return None
+        return ScenarioEngine(
+            self._graph, self._work_graph, self._dag, self.virtual_edges,
+            project=project, max_concurrency=self.max_concurrency,
+        )
+
+
+_priority_seeds: "OrderedDict[str, PriorityTable]" = OrderedDict()
+
+
+def seed_priority_table(graph: nx.DiGraph, table: PriorityTable):
+    """タスクの状態を update_task で反映済みの優先度テーブルを、更新後のグラフの分析に引き継ぐ。
+
+    更新後のグラフで求めたチェーン・仮想エッジが table と同じ場合のみ使われ、
+    異なる場合は通常どおり計算し直す。
+    """
+    with _cache_lock:
+        _priority_seeds[graph_revision(graph)] = table
+        while len(_priority_seeds) > PRIORITY_SEED_SIZE:
+            _priority_seeds.popitem(last=False)
+
+
+def _take_priority_seed(analysis: CCPMAnalysis) -> Optional[PriorityTable]:
+    with _cache_lock:
+        table = _priority_seeds.get(analysis.revision)
+    if (
+        table is not None
+        and table.critical_path == analysis.active_chain
+        and table.virtual_edges == list(analysis.virtual_edges)
+    ):
+        return table
+    return None
+
+
+_cache: "OrderedDict[Tuple[Any, ...], CCPMAnalysis]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(
+    graph: nx.DiGraph,
+    max_concurrency: int,
+    project: Optional[Dict[str, Any]],
+    duration_mode: str,
+    revision: Optional[str] = None,
+) -> Tuple[Any, ...]:
+    # プロジェクト設定のうち計算結果に影響するのは、表示モードでの祝日（完了タスクの実績日数）のみ
+    holidays = tuple((project or {}).get("holidays", [])) if duration_mode == "display" else ()
+    if revision is None:
+        revision = graph_revision(graph)
+    return (revision, int(max_concurrency or 0), duration_mode, holidays)
+
+
+def get_ccpm_analysis(
+    graph: nx.DiGraph,
+    max_concurrency: int = 0,
+    project: Optional[Dict[str, Any]] = None,
+    duration_mode: str = "remaining",
+    revision: Optional[str] = None,
+) -> CCPMAnalysis:
+    """グラフのリビジョン・設定ごとにキャッシュした CCPM 分析結果を返す。
+
+    Args:
+        revision: グラフの内容を表すリビジョン（読み込み時に計算済みのもの）。
+            省略時は graph_revision でグラフ全体をハッシュする
+    """
+    key = _cache_key(graph, max_concurrency, project, duration_mode, revision)
+    with _cache_lock:
+        analysis = _cache.get(key)
+        if analysis is not None:
+            _cache.move_to_end(key)
+            return analysis
+
+    analysis = CCPMAnalysis(
+        graph, max_concurrency, project=project, duration_mode=duration_mode, revision=key[0]
+    )
+    with _cache_lock:
+        _cache[key] = analysis
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return analysis
+
+
+def clear_ccpm_analysis_cache():
+    """キャッシュした分析結果をすべて破棄する。"""
+    with _cache_lock:
+        _cache.clear()
+        _priority_seeds.clear()
@@ -0,0 +1,170 @@
+"""CCPM スケジュール計算用のコンパイル済み DAG。
+
+NetworkX のグラフを、トポロジカル順の整数 ID・CSR 形式の先行／後続配列・
+レベル（深さ）ごとのバッチに変換しておき、前進計算（最早開始・最長パス）と
+後退計算（終端までの残パス長）を NumPy でレベル単位にまとめて実行する。
+日数に (ノード数, 試行数) の2次元配列を渡すと、複数の試行を列ごとに同時に計算する。
+
+グラフを変更した場合（仮想エッジの追加など）は作り直すこと。
+"""
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+class _LevelBatch:
+    """同じレベルのノードと、その隣接ノード（CSR の区間を連結したもの）。"""
+
+    __slots__ = ("nodes", "neighbors", "starts", "lengths")
+
+    def __init__(self, nodes: np.ndarray, indptr: np.ndarray, indices: np.ndarray):
+        lengths = indptr[nodes + 1] - indptr[nodes]
+        self.nodes = nodes
+        self.lengths = lengths
+        self.starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        self.neighbors = (
+            np.concatenate([indices[indptr[n]:indptr[n + 1]] for n in nodes.tolist()])
+            if len(nodes)
+            else np.empty(0, dtype=np.int64)
+        )
+
+
+def _csr(adjacency: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(a) for a in adjacency])
+    indices = np.fromiter(
+        (i for a in adjacency for i in a), dtype=np.int64, count=int(indptr[-1])
+    )
+    return indptr, indices
+
+
+def _level_batches(
+    adjacency: List[List[int]], indptr: np.ndarray, indices: np.ndarray, order: Sequence[int]
+) -> List[_LevelBatch]:
+    """adjacency 側のノードがすべて前のレベルに入るようにバッチを作る（レベル 0 は除く）。"""
+    level = [0] * len(adjacency)
+    for i in order:
+        if adjacency[i]:
+            level[i] = 1 + max(level[j] for j in adjacency[i])
+    buckets: Dict[int, List[int]] = {}
+    for i in order:
+        if level[i] > 0:
+            buckets.setdefault(level[i], []).append(i)
+    return [
+        _LevelBatch(np.array(buckets[lv], dtype=np.int64), indptr, indices)
+        for lv in sorted(buckets)
+    ]
+
+
+class CompiledDag:
+    """DAG の整数 ID・CSR 表現とレベルバッチ。
+
+    Attributes:
+        nodes: トポロジカル順のノードリスト（ID はこのリストの添字）
+        index: ノード → ID
+        pred_indptr, pred_indices: 先行ノードの CSR（graph.predecessors の順を保持）
+        succ_indptr, succ_indices: 後続ノードの CSR（graph.successors の順を保持）
+
+    Raises:
+        networkx.NetworkXUnfeasible: 閉路がある場合
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.nodes: List[Hashable] = list(nx.topological_sort(graph))
+        self.index: Dict[Hashable, int] = {n: i for i, n in enumerate(self.nodes)}
+        preds = [[self.index[p] for p in graph.predecessors(n)] for n in self.nodes]
+        succs = [[self.index[s] for s in graph.successors(n)] for n in self.nodes]
+        self.pred_indptr, self.pred_indices = _csr(preds)
+        self.succ_indptr, self.succ_indices = _csr(succs)
+        order = range(len(self.nodes))
+        # 前進計算: 深さ（入力端からの段数）ごと / 後退計算: 高さ（終端までの段数）ごと
+        self._forward = _level_batches(preds, self.pred_indptr, self.pred_indices, order)
+        self._backward = _level_batches(
+            succs, self.succ_indptr, self.succ_indices, order[::-1]
+        )
+        self._durations: Dict[Any, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def durations(self, key: Any, days_of: Callable[[Hashable], float]) -> np.ndarray:
+        """ノードごとの日数の配列を返す（key ごとに1回だけ days_of を呼んで作る）。"""
+        cached = self._durations.get(key)
+        if cached is None:
+            cached = np.fromiter(
+                (days_of(n) for n in self.nodes), dtype=np.float64, count=len(self.nodes)
+            )
+            self._durations[key] = cached
+        return cached
+
+    def earliest_schedule(self, durations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ASAP スケジュールの (最早開始, 最早終了) 配列を返す（durations と同じ形）。"""
+        start = np.zeros(durations.shape, dtype=np.float64)
+        finish = durations.astype(np.float64, copy=True)
+        for batch in self._forward:
+            es = np.maximum.reduceat(finish[batch.neighbors], batch.starts)
+            start[batch.nodes] = es
+            finish[batch.nodes] = es + durations[batch.nodes]
+        return start, finish
+
+    def longest_paths(self, durations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """各ノードの終了時点までの最長距離と、最長パス上の親ノード ID（なければ -1）を返す。
+
+        距離が同じ親が複数ある場合は graph.predecessors の順で最初のものを選ぶ。
+        """
+        dist = durations.astype(np.float64, copy=True)
+        parent = np.full(len(self.nodes), -1, dtype=np.int64)
+        for batch in self._forward:
+            values = dist[batch.neighbors]
+            best = np.maximum.reduceat(values, batch.starts)
+            dist[batch.nodes] = best + durations[batch.nodes]
+            positions = np.where(
+                values == np.repeat(best, batch.lengths),
+                np.arange(len(values)),
+                len(values),
+            )
+            parent[batch.nodes] = batch.neighbors[np.minimum.reduceat(positions, batch.starts)]
+        return dist, parent
+
+    def critical_path(
+        self, durations: np.ndarray, outputs: Sequence[Hashable]
+    ) -> Tuple[float, List[Hashable]]:
+        """outputs のうち最長距離が最大のノードまでの最長パスを返す（同値なら outputs の順で最初）。"""
+        dist, parent = self.longest_paths(durations)
+        best_node = None
+        best_dist = -1.0
+        for out in outputs:
+            i = self.index.get(out)
+            if i is not None and dist[i] > best_dist:
+                best_dist = float(dist[i])
+                best_node = i
+        if best_node is None:
+            return 0.0, []
+        path = []
+        curr = best_node
+        while curr >= 0:
+            path.append(self.nodes[curr])
+            curr = int(parent[curr])
+        path.reverse()
+        return best_dist, path
+
+    def remaining_lengths(self, durations: np.ndarray) -> np.ndarray:
+        """各ノードから終端までの最長残パス長（自身の日数を含む）を返す（durations と同じ形）。"""
+        remaining = durations.astype(np.float64, copy=True)
+        for batch in self._backward:
+            best = np.maximum.reduceat(remaining[batch.neighbors], batch.starts)
+            remaining[batch.nodes] = durations[batch.nodes] + best
+        return remaining
+
+    def as_dict(self, values: np.ndarray) -> Dict[Hashable, float]:
+        """ID 順の配列をノード → 値の辞書（トポロジカル順）に変換する。"""
+        return dict(zip(self.nodes, values.tolist()))
+
+
+def compile_dag(graph: nx.DiGraph) -> Optional[CompiledDag]:
+    """グラフをコンパイルする。閉路がある場合は None を返す。"""
+    try:
+        return CompiledDag(graph)
+    except nx.NetworkXUnfeasible:
+        return None
@@ -3,15 +3,28 @@
 CCPMPlanner_light.py のロジックを RequirementViewer 向けに整理したもの。
 クリティカルパス算出、ガントチャート PlantUML 生成、フィーバーチャートデータ計算を提供する。
 """
+import bisect
+import copy
+import functools
+import hashlib
+import heapq
+import json
+import threading
 import networkx as nx
 import math
+import numpy as np
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Tuple, Any, Optional
+from typing import List, Dict, Iterator, Tuple, Any, Optional, Sequence
+
+from src.ccpm_dag import CompiledDag, compile_dag
+from src.workday_calendar import (
+    DATE_FORMAT,
+    WorkdayCalendar,
+    get_workday_calendar,
+    to_day_array,
+)
 
-try:
-    import workdays
-except ImportError:
-    workdays = None
 
 
 # ---------------------------------------------------------------------------
@@ -39,23 +52,13 @@ def _calculate_actual_workdays(
     node_attrs: Dict[str, Any], project: Optional[Dict[str, Any]] = None
 ) -> Optional[float]:
     """Return actual workdays for a completed task when dates are available."""
-    if not workdays:
-        return None
-
     start_dt = _parse_project_date(node_attrs.get("start", ""))
     end_dt = _parse_project_date(node_attrs.get("end", ""))
     if not start_dt or not end_dt:
         return None
 
-    holidays = []
-    if project:
-        holidays = [
-            holiday_dt
-            for holiday in project.get("holidays", [])
-            if (holiday_dt := _parse_project_date(holiday)) is not None
-        ]
-
-    return float(workdays.networkdays(start_dt, end_dt, holidays=holidays))
+    calendar = get_workday_calendar((project or {}).get("holidays", []))
+    return float(calendar.networkdays(start_dt, end_dt))
 
 
 def _get_effective_days(
@@ -81,12 +84,29 @@ def _get_effective_days(
     return float(node_attrs.get("days", 0.0))
 
 
+def _dag_durations(
+    dag: CompiledDag,
+    graph: nx.DiGraph,
+    project: Optional[Dict[str, Any]] = None,
+    duration_mode: str = "remaining",
+):
+    """コンパイル済み DAG のノード順に並べた実質日数の配列を返す（モードごとにキャッシュ）。"""
+    holidays = tuple((project or {}).get("holidays", [])) if duration_mode == "display" else ()
+    return dag.durations(
+        (duration_mode, holidays),
+        lambda node: _get_effective_days(
+            graph, node, project=project, duration_mode=duration_mode
+        ),
+    )
+
+
 def calculate_critical_path(
     graph: nx.DiGraph,
     inputs: List[str],
     outputs: List[str],
     project: Optional[Dict[str, Any]] = None,
     duration_mode: str = "remaining",
+    dag: Optional[CompiledDag] = None,
 ) -> Tuple[float, List[str]]:
     """動的計画法 (DP) を用いて O(V+E) で最長パス（クリティカルパス）を返す。
 
@@ -94,6 +114,8 @@ def calculate_critical_path(
         graph: ノード属性に "days" を持つ有向グラフ
         inputs: 入力端ノードリスト
         outputs: 終端ノードリスト
+        dag: graph をコンパイルしたもの。省略時は NetworkX のグラフを直接たどる
+            （1回だけの計算ではコンパイルの方が遅いため）
 
     Returns:
         (クリティカルパス長, クリティカルパスのノードリスト)
@@ -101,6 +123,12 @@ def calculate_critical_path(
     if not graph.nodes:
         return 0.0, []
 
+    target_outputs = outputs if outputs else list(graph.nodes)
+    if dag is not None:
+        durations = _dag_durations(dag, graph, project=project, duration_mode=duration_mode)
+        # 親ノードの終了距離が最も大きいものを選び、outputs の中で最大の距離を持つノードから経路を復元
+        return dag.critical_path(durations, target_outputs)
+
     # トポロジカルソート（CCPMはDAG前提）
     try:
         topo_order = list(nx.topological_sort(graph))
@@ -108,50 +136,35 @@ def calculate_critical_path(
         # 閉路がある場合は空を返す
         return 0.0, []
 
-    # dist[node] = そのノードの終了時点での最長距離（入力からの距離 + 自身の日数）
-    # pred[node] = 最長パスを構成するための親ノード
+    # dist[node] = そのノードの終了時点での最長距離、pred[node] = 最長パス上の親ノード
+    # （距離が同じ親が複数ある場合は graph.predecessors の順で最初のもの。CompiledDag と同じ）
     dist: Dict[str, float] = {}
     pred: Dict[str, Optional[str]] = {}
-
     for node in topo_order:
-        days = _get_effective_days(
+        max_p = None
+        max_d = 0.0
+        for p in graph.predecessors(node):
+            if max_p is None or dist[p] > max_d:
+                max_p, max_d = p, dist[p]
+        dist[node] = max_d + _get_effective_days(
             graph, node, project=project, duration_mode=duration_mode
         )
-        dist[node] = days  # 親がない入端の場合
-        pred[node] = None
-        
-        # 親ノードの終了距離(dist)が最も大きいものを選ぶ
-        predecessors = list(graph.predecessors(node))
-        if predecessors:
-            max_p = None
-            max_d = -1.0
-            for p in predecessors:
-                if p in dist and dist[p] > max_d:
-                    max_d = dist[p]
-                    max_p = p
-            if max_p is not None:
-                dist[node] = dist[max_p] + days
-                pred[node] = max_p
-
-    # outputs の中で最大の dist を持つノードを見つける
-    target_outputs = outputs if outputs else list(graph.nodes)
+        pred[node] = max_p
+
     max_out_node = None
     max_out_dist = -1.0
     for out in target_outputs:
         if out in dist and dist[out] > max_out_dist:
             max_out_dist = dist[out]
             max_out_node = out
-
     if max_out_node is None:
         return 0.0, []
 
-    # 経路の復元（後ろから辿って反転）
     critical_path = []
     curr = max_out_node
     while curr is not None:
         critical_path.append(curr)
-        curr = pred.get(curr)
-    
+        curr = pred[curr]
     critical_path.reverse()
     return max_out_dist, critical_path
 
@@ -160,153 +173,430 @@ def calculate_critical_path(
 # クリティカルチェーン算出（リソース競合考慮）
 # ---------------------------------------------------------------------------
 
-def _compute_earliest_schedule(graph: nx.DiGraph) -> Dict[str, Tuple[float, float]]:
+def _compute_earliest_schedule(
+    graph: nx.DiGraph, dag: Optional[CompiledDag] = None
+) -> Dict[str, Tuple[float, float]]:
     """ASAP スケジューリングで各ノードの最早開始・最早終了時刻を計算する。
 
+    dag を省略した場合は NetworkX のグラフを直接たどる。
+
     Returns:
-        {node_id: (earliest_start, earliest_finish)}
+        {node_id: (earliest_start, earliest_finish)}（トポロジカル順、閉路がある場合は空）
     """
-    schedule: Dict[str, Tuple[float, float]] = {}
-    # トポロジカル順序で処理（DAG前提）
+    if dag is not None:
+        start, finish = dag.earliest_schedule(_dag_durations(dag, graph))
+        return dict(zip(dag.nodes, zip(start.tolist(), finish.tolist())))
+
     try:
         topo_order = list(nx.topological_sort(graph))
     except nx.NetworkXUnfeasible:
-        return schedule
-
+        return {}
+    schedule: Dict[str, Tuple[float, float]] = {}
     for node in topo_order:
-        days = _get_effective_days(graph, node)
-        predecessors = list(graph.predecessors(node))
-        if not predecessors:
-            es = 0.0
-        else:
-            es = max(schedule[p][1] for p in predecessors if p in schedule)
-        schedule[node] = (es, es + days)
-
+        es = max((schedule[p][1] for p in graph.predecessors(node)), default=0.0)
+        schedule[node] = (es, es + _get_effective_days(graph, node))
     return schedule
 
 
-def _compute_remaining_path_length(
+def _delay_schedule(
     graph: nx.DiGraph,
-    node: str,
-    memo: Dict[str, float],
-    project: Optional[Dict[str, Any]] = None,
-    duration_mode: str = "remaining",
-) -> float:
-    """ノードから終端までの最長残パス長を計算する（メモ化再帰）。"""
-    if node in memo:
-        return memo[node]
-    days = _get_effective_days(
-        graph, node, project=project, duration_mode=duration_mode
-    )
-    successors = list(graph.successors(node))
-    if not successors:
-        memo[node] = days
-        return days
-    max_child = max(
-        _compute_remaining_path_length(
-            graph, s, memo, project=project, duration_mode=duration_mode
-        )
-        for s in successors
+    schedule: Dict[str, Tuple[float, float]],
+    src: str,
+    dst: str,
+):
+    """graph に追加済みのエッジ src → dst を ASAP スケジュールに反映する（開始が遅れるノードのみ更新）。"""
+    stack = [(src, dst)]
+    while stack:
+        pred, node = stack.pop()
+        es = schedule[pred][1]
+        start, finish = schedule[node]
+        if es > start:
+            schedule[node] = (es, es + (finish - start))
+            stack.extend((node, succ) for succ in graph.successors(node))
+
+
+class RemainingLengths:
+    """各ノードから終端までの最長残パス長（自身の日数を含む）。
+
+    逆トポロジカル順の走査（再帰なし、O(V+E)）で全ノード分を一度に計算する
+    （dag を渡した場合はコンパイル済み DAG の後退計算を使う）。
+    仮想エッジを追加した場合は add_edge で影響する先行ノードのみを更新する。
+
+    Raises:
+        networkx.NetworkXUnfeasible: 閉路がある場合
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        project: Optional[Dict[str, Any]] = None,
+        duration_mode: str = "remaining",
+        dag: Optional[CompiledDag] = None,
+    ):
+        self._graph = graph
+        if dag is not None:
+            durations = _dag_durations(dag, graph, project=project, duration_mode=duration_mode)
+            self._days: Dict[str, float] = dag.as_dict(durations)
+            self._lengths: Dict[str, float] = dag.as_dict(dag.remaining_lengths(durations))
+            return
+        # DAG がない場合は1回だけの計算なので、コンパイルせずに逆トポロジカル順にたどる
+        order = list(nx.topological_sort(graph))
+        self._days = {
+            node: _get_effective_days(graph, node, project=project, duration_mode=duration_mode)
+            for node in order
+        }
+        self._lengths = {}
+        for node in reversed(order):
+            self._lengths[node] = self._days[node] + max(
+                (self._lengths[s] for s in graph.successors(node)), default=0.0
+            )
+
+    def __getitem__(self, node: str) -> float:
+        return self._lengths[node]
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._lengths
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(self._lengths)
+
+    def add_edge(self, src: str, dst: str):
+        """graph に追加済みのエッジ src → dst を反映する（残パス長が伸びるノードのみ更新）。"""
+        stack = [(src, dst)]
+        while stack:
+            node, succ = stack.pop()
+            candidate = self._days[node] + self._lengths[succ]
+            if candidate > self._lengths[node]:
+                self._lengths[node] = candidate
+                stack.extend((pred, node) for pred in self._graph.predecessors(node))
+
+
+class _ReachabilityIndex:
+    """DAG の到達可能性をノードごとの整数ビット集合で保持する。
+
+    desc[n] は n から到達できるノード（n 自身を含む）、anc[n] は n に到達できるノード
+    （n 自身を含む）のビット集合。判定は O(1)、エッジ追加時は影響するノードのみ更新する。
+    """
+
+    def __init__(self, graph: nx.DiGraph, topo_order: Optional[List[str]] = None):
+        if topo_order is None:
+            topo_order = list(nx.topological_sort(graph))
+        self._nodes: List[str] = list(topo_order)
+        self._index: Dict[str, int] = {n: i for i, n in enumerate(self._nodes)}
+        self._desc: List[int] = [0] * len(self._nodes)
+        self._anc: List[int] = [0] * len(self._nodes)
+        for i in range(len(self._nodes) - 1, -1, -1):
+            bits = 1 << i
+            for succ in graph.successors(self._nodes[i]):
+                bits |= self._desc[self._index[succ]]
+            self._desc[i] = bits
+        for i, node in enumerate(self._nodes):
+            bits = 1 << i
+            for pred in graph.predecessors(node):
+                bits |= self._anc[self._index[pred]]
+            self._anc[i] = bits
+
+    def has_path(self, a: str, b: str) -> bool:
+        """a から b へのパスがあるか（a == b も True）。"""
+        return bool(self._desc[self._index[a]] >> self._index[b] & 1)
+
+    def connected(self, a: str, b: str) -> bool:
+        """a, b の間にどちら向きかの依存関係があるか。"""
+        return self.has_path(a, b) or self.has_path(b, a)
+
+    @staticmethod
+    def _bit_indices(bits: int):
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def add_edge(self, u: str, v: str):
+        """エッジ u → v の追加を反映する（u の祖先に v の子孫を加える）。"""
+        ui, vi = self._index[u], self._index[v]
+        if self._desc[ui] >> vi & 1:
+            return
+        desc_v, anc_u = self._desc[vi], self._anc[ui]
+        for i in self._bit_indices(anc_u):
+            self._desc[i] |= desc_v
+        for i in self._bit_indices(desc_v):
+            self._anc[i] |= anc_u
+
+
+def _sweep_overlaps(
+    intervals: List[Tuple[float, float, str]],
+) -> Iterator[Tuple[str, List[str]]]:
+    """区間を開始時刻順に走査し、各タスクと、その開始時点で実行中のタスクを返す。
+
+    区間は半開区間 [start, end) として扱う（終了と同時の開始は重ならない）。
+    開始時刻が同じ場合は intervals の順で処理する。
+
+    Yields:
+        (task, 実行中のタスクのリスト（開始順）)
+    """
+    ordered = sorted(
+        ((start, seq, end, task) for seq, (start, end, task) in enumerate(intervals)),
+        key=lambda x: (x[0], x[1]),
     )
-    result = days + max_child
-    memo[node] = result
-    return result
+    active: Dict[str, None] = {}
+    ending: List[Tuple[float, int, str]] = []
+    for start, seq, end, task in ordered:
+        while ending and ending[0][0] <= start:
+            _, _, done = heapq.heappop(ending)
+            del active[done]
+        yield task, list(active)
+        active[task] = None
+        heapq.heappush(ending, (end, seq, task))
 
 
 def _detect_resource_conflicts(
     graph: nx.DiGraph,
     schedule: Dict[str, Tuple[float, float]],
-    max_concurrency: int = 0
+    max_concurrency: int = 0,
+    reachability: Optional[_ReachabilityIndex] = None,
 ) -> List[Tuple[str, str, str]]:
     """同一リソースで時間帯が重なるタスクペア、または同時実行上限を超えるタスクペアを検出する。
 
+    リソースごとに区間を開始時刻順に走査し（スイープライン）、重なるペアのみを調べる。
+
+    Args:
+        reachability: graph の到達可能性インデックス（省略時はここで構築する）
+
     Returns:
         [(task_a, task_b, resource), ...] task_a は開始が早い方
     """
     # リソースごとにタスクをグルーピング
-    resource_tasks: Dict[str, List[str]] = {}
+    resource_tasks: Dict[str, List[Tuple[float, float, str]]] = {}
+    concurrency_tasks: List[Tuple[float, float, str]] = []
     for node in graph.nodes:
-        if graph.nodes[node].get("finished", False):
+        if node not in schedule or graph.nodes[node].get("finished", False):
             continue
-        res = graph.nodes[node].get("resource", "")
-        days = _get_effective_days(graph, node)
-        if not res or days <= 0:
+        if _get_effective_days(graph, node) <= 0:
             continue
-        resource_tasks.setdefault(res, []).append(node)
+        start, end = schedule[node]
+        res = graph.nodes[node].get("resource", "")
+        if res:
+            resource_tasks.setdefault(res, []).append((start, end, node))
+        if graph.nodes[node].get("type", "") != "deliverable":
+            concurrency_tasks.append((start, end, node))
+
+    if reachability is None:
+        reachability = _ReachabilityIndex(graph)
 
     conflicts: List[Tuple[str, str, str]] = []
-    for resource, tasks in resource_tasks.items():
-        if len(tasks) < 2:
+    for resource, intervals in resource_tasks.items():
+        if len(intervals) < 2:
             continue
-        # 全ペアで重なりをチェック
-        for i in range(len(tasks)):
-            for j in range(i + 1, len(tasks)):
-                a, b = tasks[i], tasks[j]
-                if a not in schedule or b not in schedule:
-                    continue
-                a_start, a_end = schedule[a]
-                b_start, b_end = schedule[b]
-                # 時間帯が重なるか判定 (days > 0 のタスクのみ)
-                if a_start < b_end and b_start < a_end:
-                    # 既に依存関係があるペアはスキップ
-                    if nx.has_path(graph, a, b) or nx.has_path(graph, b, a):
-                        continue
-                    # 開始が早い方を先にする
-                    if a_start <= b_start:
-                        conflicts.append((a, b, resource))
-                    else:
-                        conflicts.append((b, a, resource))
+        # 開始順に走査するため、実行中のタスクが開始が早い方になる
+        for task, running in _sweep_overlaps(intervals):
+            for other in running:
+                # 既に依存関係があるペアはスキップ
+                if not reachability.connected(other, task):
+                    conflicts.append((other, task, resource))
 
     # 2. 全体での同時実行上限（無名リソース）の競合チェック
     if max_concurrency > 0:
-        events = []
-        for node, (start, end) in schedule.items():
-            if graph.nodes[node].get("finished", False):
+        existing = {(a, b) for a, b, _ in conflicts}
+        for task, running in _sweep_overlaps(concurrency_tasks):
+            if len(running) + 1 <= max_concurrency:
                 continue
-            node_type = graph.nodes[node].get("type", "")
-            if _get_effective_days(graph, node) > 0 and node_type != "deliverable":
-                events.append((start, "start", node))
-                events.append((end, "end", node))
-        
-        # 時間順でソート（同じ時刻なら終了 'end' を先に処理して重なりと判定させない）
-        events.sort(key=lambda x: (x[0], 0 if x[1] == "end" else 1))
-        
-        active_tasks = set()
-        for t, evt_type, node in events:
-            if evt_type == "start":
-                active_tasks.add(node)
-                if len(active_tasks) > max_concurrency:
-                    # 同時実行数の上限を超えた場合、走っているタスクの中から依存関係のない2つを選んで
-                    # 疑似的な競合ペアとして（短い方を遅らせるべく）追加する
-                    import itertools
-                    conflict_found = False
-                    for a, b in itertools.combinations(list(active_tasks), 2):
-                        if nx.has_path(graph, a, b) or nx.has_path(graph, b, a):
-                            continue
-                        
-                        a_start = schedule[a][0]
-                        b_start = schedule[b][0]
-                        if a_start <= b_start:
-                            pair = (a, b, "ConcurrencyLimit")
-                        else:
-                            pair = (b, a, "ConcurrencyLimit")
-                            
-                        # 既存の明示的競合ペアなどと重複していなければ追加
-                        already_exists = any((p[0] == pair[0] and p[1] == pair[1]) for p in conflicts)
-                        if not already_exists:
-                            conflicts.append(pair)
-                            conflict_found = True
-                            break # 1ループにつき1つの競合を解消させれば再スケジュールが走るので十分
-                            
-                    if conflict_found:
-                        break # 一度競合が見つかれば、最初の競合を返すだけでループを回せる
-            else:
-                if node in active_tasks:
-                    active_tasks.remove(node)
+            # 同時実行数の上限を超えた場合、走っているタスクの中から依存関係のない2つを選んで
+            # 疑似的な競合ペアとして（開始が遅い方を遅らせるべく）追加する。
+            # 1つ見つかれば再スケジュールが走るので十分
+            candidates = running + [task]
+            for i, a in enumerate(candidates):
+                for b in candidates[i + 1:]:
+                    if (a, b) in existing or reachability.connected(a, b):
+                        continue
+                    conflicts.append((a, b, "ConcurrencyLimit"))
+                    return conflicts
 
     return conflicts
 
 
+class _ResourceTimeline:
+    """容量1の名前付きリソースの占有区間（互いに重ならない半開区間）。"""
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.tasks: List[str] = []
+
+    def earliest_free(self, t: float, days: float) -> Tuple[float, Optional[str]]:
+        """t 以降で [start, start + days) が空いている最早時刻と、待たされた原因のタスクを返す。"""
+        blocker = None
+        i = bisect.bisect_right(self.ends, t)
+        while i < len(self.starts) and self.starts[i] < t + days:
+            t = self.ends[i]
+            blocker = self.tasks[i]
+            i += 1
+        return t, blocker
+
+    def reserve(self, task: str, start: float, end: float):
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.tasks.insert(i, task)
+
+
+class _ConcurrencyProfile:
+    """同時実行タスク数の階段関数（breakpoints[i] から次の breakpoint までが usage[i]）。"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.breakpoints: List[float] = [0.0]
+        self.usage: List[int] = [0]
+        self.ending_at: Dict[float, str] = {}
+
+    def _split(self, t: float) -> int:
+        i = bisect.bisect_right(self.breakpoints, t) - 1
+        if self.breakpoints[i] == t:
+            return i
+        self.breakpoints.insert(i + 1, t)
+        self.usage.insert(i + 1, self.usage[i])
+        return i + 1
+
+    def earliest_free(self, t: float, days: float) -> float:
+        """t から [t, t + days) の間に空きがなければ、上限に達している区間の終わりを返す。"""
+        i = bisect.bisect_right(self.breakpoints, t) - 1
+        while i < len(self.breakpoints) and self.breakpoints[i] < t + days:
+            if self.usage[i] >= self.capacity:
+                # 末尾の区間は usage 0 のため、上限に達した区間には必ず次の breakpoint がある
+                return self.breakpoints[i + 1]
+            i += 1
+        return t
+
+    def reserve(self, task: str, start: float, end: float):
+        first = self._split(start)
+        last = self._split(end)
+        for i in range(first, last):
+            self.usage[i] += 1
+        self.ending_at.setdefault(end, task)
+
+
+def _level_resources(
+    work_graph: nx.DiGraph,
+    max_concurrency: int = 0,
+    project: Optional[Dict[str, Any]] = None,
+    duration_mode: str = "remaining",
+    resource_capacity: Optional[Dict[str, int]] = None,
+) -> List[Tuple[str, str, str]]:
+    """優先度規則によるシリアル・スケジュール生成法 (Serial SGS) でリソースを平準化する。
+
+    残パス長が長いタスクから順に、先行タスクの完了後でリソースが空いている最早時刻に配置する。
+    リソースの空き待ちで開始が遅れたタスクには、待たされた原因のタスク
+    （その時刻に完了する同一リソースのタスク）からの仮想エッジを work_graph に追加する。
+    追加後の work_graph の ASAP スケジュールはこの配置と一致するため、1回の走査で競合がなくなる。
+
+    Args:
+        resource_capacity: リソースごとの同時に担当できるタスク数（省略したリソースは 1）
+
+    Returns:
+        追加した仮想エッジ [(src, dst, resource), ...]
+    """
+    dag = compile_dag(work_graph)
+    if dag is None:
+        return []
+
+    topo_order = dag.nodes
+    rank = dag.index
+    days_of = dag.as_dict(_dag_durations(dag, work_graph))
+    remaining = RemainingLengths(
+        work_graph, project=project, duration_mode=duration_mode, dag=dag
+    )
+
+    waiting = {node: work_graph.in_degree(node) for node in topo_order}
+    # 優先度: 残パス長の降順 → トポロジカル順
+    eligible = [(-remaining[n], rank[n], n) for n in topo_order if waiting[n] == 0]
+    heapq.heapify(eligible)
+
+    timelines: Dict[str, _ResourceTimeline] = {}
+    # 容量が 2 以上のリソースは同時実行数の階段関数で管理する
+    shared: Dict[str, _ConcurrencyProfile] = {}
+    capacity_of = {
+        resource: int(capacity)
+        for resource, capacity in (resource_capacity or {}).items()
+        if int(capacity) > 1
+    }
+    profile = _ConcurrencyProfile(max_concurrency) if max_concurrency > 0 else None
+    finish: Dict[str, float] = {}
+    virtual_edges: List[Tuple[str, str, str]] = []
+
+    while eligible:
+        _, _, node = heapq.heappop(eligible)
+        attrs = work_graph.nodes[node]
+        days = days_of[node]
+        earliest = max((finish[p] for p in work_graph.predecessors(node)), default=0.0)
+        start = earliest
+        blocker: Optional[Tuple[str, str]] = None
+
+        active = days > 0 and not attrs.get("finished", False)
+        resource = attrs.get("resource", "") if active else ""
+        use_profile = profile is not None and active and attrs.get("type", "") != "deliverable"
+        if resource or use_profile:
+            timeline = None
+            staff = None
+            if resource in capacity_of:
+                staff = shared.setdefault(resource, _ConcurrencyProfile(capacity_of[resource]))
+            elif resource:
+                timeline = timelines.setdefault(resource, _ResourceTimeline())
+            while True:
+                moved = False
+                if timeline is not None:
+                    t, task = timeline.earliest_free(start, days)
+                    if t > start:
+                        start, blocker, moved = t, (task, resource), True
+                if staff is not None:
+                    t = staff.earliest_free(start, days)
+                    if t > start:
+                        start, blocker, moved = t, (staff.ending_at[t], resource), True
+                if use_profile:
+                    t = profile.earliest_free(start, days)
+                    if t > start:
+                        start, blocker, moved = t, (profile.ending_at[t], "ConcurrencyLimit"), True
+                if not moved:
+                    break
+            if timeline is not None:
+                timeline.reserve(node, start, start + days)
+            if staff is not None:
+                staff.reserve(node, start, start + days)
+            if use_profile:
+                profile.reserve(node, start, start + days)
+
+        if start > earliest and blocker is not None:
+            src, label = blocker
+            work_graph.add_edge(src, node, virtual=True)
+            virtual_edges.append((src, node, label))
+        finish[node] = start + days
+
+        for succ in work_graph.successors(node):
+            waiting[succ] -= 1
+            if waiting[succ] == 0:
+                heapq.heappush(eligible, (-remaining[succ], rank[succ], succ))
+
+    return virtual_edges
+
+
+def _reduce_virtual_edges(
+    graph: nx.DiGraph,
+    virtual_edges: List[Tuple[str, str, str]],
+    reachability: _ReachabilityIndex,
+) -> List[Tuple[str, str, str]]:
+    """推移的簡約で残る仮想エッジのみを返す。
+
+    DAG のエッジ u → v は、u の他の後続 w から v に到達できる（迂回ルートがある）場合に冗長。
+    グラフ全体の推移的簡約は行わず、仮想エッジごとに u の後続を到達可能性インデックスで調べる。
+    """
+    reduced = []
+    for src, dst, res in virtual_edges:
+        redundant = any(
+            succ != dst and reachability.has_path(succ, dst) for succ in graph.successors(src)
+        )
+        if not redundant:
+            reduced.append((src, dst, res))
+    return reduced
+
+
 def calculate_critical_chain(
     graph: nx.DiGraph,
     max_concurrency: int = 0,
@@ -316,10 +606,11 @@ def calculate_critical_chain(
     """リソース競合および同時実行上限を考慮したクリティカルチェーンを算出する。
 
     ゴールドラット流ヒューリスティック:
-    1. ASAP スケジューリングで最早開始時刻を算出
-    2. リソース名による競合、および同時実行タスク数上限の超過を検出
-    3. 残路長が長い方を優先し、短い方を遅らせる仮想エッジを追加
-    4. 競合がなくなるまで繰り返し
+    1. 残パス長が長いタスクを優先するシリアル SGS でリソースを平準化し、
+       空き待ちで遅れたタスクに仮想エッジを追加（1回の走査で全競合を解消）
+    2. ASAP スケジュールで競合が残っていないか確認し、残っていれば
+       残路長が長い方を優先し、短い方を遅らせる仮想エッジを追加
+    3. 冗長な仮想エッジを推移的簡約で除去
 
     Args:
         graph: ノード属性に "days", "resource" を持つ有向グラフ
@@ -328,41 +619,57 @@ def calculate_critical_chain(
     Returns:
         (チェーン長, チェーンのノードリスト, 追加された仮想エッジ[(src, dst, resource)])
     """
+    cc_length, cc_path, virtual_edges, _, _ = _level_critical_chain(
+        graph, max_concurrency, project=project, duration_mode=duration_mode
+    )
+    return cc_length, cc_path, virtual_edges
+
+
+def _level_critical_chain(
+    graph: nx.DiGraph,
+    max_concurrency: int = 0,
+    project: Optional[Dict[str, Any]] = None,
+    duration_mode: str = "remaining",
+) -> Tuple[float, List[str], List[Tuple[str, str, str]], nx.DiGraph, Optional[CompiledDag]]:
+    """calculate_critical_chain の本体。
+
+    Returns:
+        (チェーン長, チェーンのノードリスト, 仮想エッジ,
+         仮想エッジを追加した作業用グラフ, そのコンパイル済み DAG（閉路がある場合は None）)
+    """
     # 作業用にグラフをコピー（仮想エッジを追加するため）
     work_graph = graph.copy()
-    virtual_edges: List[Tuple[str, str, str]] = []
-
-    max_iterations = 50  # 無限ループ防止
-    for _ in range(max_iterations):
-        schedule = _compute_earliest_schedule(work_graph)
-        if not schedule:
-            break
+    virtual_edges = _level_resources(
+        work_graph, max_concurrency, project=project, duration_mode=duration_mode
+    )
 
-        conflicts = _detect_resource_conflicts(work_graph, schedule, max_concurrency)
+    # 残存競合の確認（平準化後は通常空）。
+    # 依存関係のないペアにのみエッジを追加するため、反復は有限回で終わる。
+    # DAG は1回だけコンパイルし、仮想エッジを追加したらスケジュール・到達可能性・残パス長を差分で更新する
+    reachability: Optional[_ReachabilityIndex] = None
+    dag = compile_dag(work_graph)
+    schedule = _compute_earliest_schedule(work_graph, dag) if dag is not None else {}
+    added = False
+    while schedule:
+        if reachability is None:
+            reachability = _ReachabilityIndex(work_graph, dag.nodes)
+            remaining = RemainingLengths(
+                work_graph, project=project, duration_mode=duration_mode, dag=dag
+            )
+        conflicts = _detect_resource_conflicts(
+            work_graph, schedule, max_concurrency, reachability
+        )
         if not conflicts:
             break  # 競合がなくなったら終了
 
         # 最も影響の大きい競合を1つ解消
         # （残パス長が長い方を優先、短い方を遅らせる）
-        memo: Dict[str, float] = {}
         best_conflict = None
         best_priority_diff = -1
 
         for task_a, task_b, resource in conflicts:
-            rem_a = _compute_remaining_path_length(
-                work_graph,
-                task_a,
-                memo,
-                project=project,
-                duration_mode=duration_mode,
-            )
-            rem_b = _compute_remaining_path_length(
-                work_graph,
-                task_b,
-                memo,
-                project=project,
-                duration_mode=duration_mode,
-            )
+            rem_a = remaining[task_a]
+            rem_b = remaining[task_b]
             diff = abs(rem_a - rem_b)
             if diff > best_priority_diff:
                 best_priority_diff = diff
@@ -377,20 +684,25 @@ def calculate_critical_chain(
 
         first, second, resource = best_conflict
         # 仮想エッジを追加（first が先に実行 → second は first 完了後に開始）
-        if not work_graph.has_edge(first, second):
-            work_graph.add_edge(first, second, virtual=True)
-            virtual_edges.append((first, second, resource))
+        if work_graph.has_edge(first, second):
+            break
+        work_graph.add_edge(first, second, virtual=True)
+        reachability.add_edge(first, second)
+        remaining.add_edge(first, second)
+        _delay_schedule(work_graph, schedule, first, second)
+        virtual_edges.append((first, second, resource))
+        added = True
+
+    if added:
+        # 最終的なチェーンの算出と呼び出し元での再利用のため、追加後のグラフでコンパイルし直す
+        dag = compile_dag(work_graph)
 
     # --- 仮想エッジの推移的簡約（冗長な迂回ルートの除去） ---
-    try:
-        tr_graph = nx.transitive_reduction(work_graph)
-        reduced_virtual_edges = []
-        for src, dst, res in virtual_edges:
-            if tr_graph.has_edge(src, dst):
-                reduced_virtual_edges.append((src, dst, res))
-        virtual_edges = reduced_virtual_edges
-    except Exception:
-        pass  # 閉路などで推移的簡約が失敗した場合はそのまま
+    # 閉路がある場合（dag が None）はそのまま
+    if dag is not None and virtual_edges:
+        if reachability is None:
+            reachability = _ReachabilityIndex(work_graph, dag.nodes)
+        virtual_edges = _reduce_virtual_edges(work_graph, virtual_edges, reachability)
 
     # 最終的なクリティカルチェーンを算出
     inputs, outputs = get_in_out_edge_list(work_graph)
@@ -400,9 +712,10 @@ def calculate_critical_chain(
         outputs,
         project=project,
         duration_mode=duration_mode,
+        dag=dag,
     )
 
-    return cc_length, cc_path, virtual_edges
+    return cc_length, cc_path, virtual_edges, work_graph, dag
 
 
 # ---------------------------------------------------------------------------
@@ -428,6 +741,55 @@ def _make_project_header(project: Dict[str, str]) -> List[str]:
     return lines
 
 
+# バー文字列のキャッシュ件数（タスク属性ごと。進捗更新で変わったタスクのみ再生成する）
+STORY_BAR_CACHE_SIZE = 20000
+
+
+@functools.lru_cache(maxsize=STORY_BAR_CACHE_SIZE)
+def _story_bar(
+    node_id: Any,
+    title: str,
+    days: Any,
+    start: str,
+    end: str,
+    remains: Any,
+    finished: bool,
+    node_type: str,
+    on_critical_path: bool,
+    today: Optional[str],
+    calendar: Optional[WorkdayCalendar],
+) -> Tuple[str, str]:
+    """1タスク分の (バー, リンク) 行を作成する。today は着手済みタスクの終了日推定に使う（project がなければ None）。"""
+    # title内に改行が含まれる可能性を考慮し空白に置換
+    title = title.replace("\n", " ").replace("\r", "")
+
+    head = f"[{title}] as [{node_id}]"
+
+    if start and today is not None:
+        # 着手済み: 残日数ベースで終了日を推定
+        if remains > 0 and not finished:
+            end_date = _estimate_end_date({"today": today}, start, remains, calendar)
+            bar = f"{head} starts {start} and ends {end_date}"
+        elif finished and end:
+            bar = f"{head} starts {start} and ends {end}"
+        else:
+            bar = f"{head} lasts {math.ceil(float(days))} days"
+    else:
+        bar = f"{head} lasts {math.ceil(float(days))} days"
+
+    # 完了タスクの色
+    if finished:
+        bar += " and is colored in lightgray"
+    elif on_critical_path:
+        bar += " and is colored in pink"
+    elif node_type == "deliverable":
+        # 成果物で日数を持つものはフィードバッファとして青色で表示
+        bar += " and is colored in lightblue"
+
+    # ガントバーをクリックした際に、右側の編集パネル（selectedパラメータ）を連動させるためのリンク
+    return bar, f"[{node_id}] links to [[?selected={node_id}&view=gantt]]"
+
+
 def _make_story_bars(
     graph: nx.DiGraph,
     critical_path: List[str],
@@ -435,50 +797,35 @@ def _make_story_bars(
 ) -> List[str]:
     """各ノードのバー文字列を作成する。"""
     lines: List[str] = []
-    for node_id in graph.nodes:
-        attrs = graph.nodes[node_id]
-        days = attrs.get("days", 0)
-        start = attrs.get("start", "")
-        finished = attrs.get("finished", False)
+    critical = set(critical_path)
+    today = project.get("today", "") if project else None
+    calendar = get_workday_calendar(project.get("holidays", [])) if project else None
+    for node_id, attrs in graph.nodes(data=True):
         node_type = attrs.get("type", "")
-        
+
         # 描画対象の判定: メモやクラウドなどの図形はスキップする。
         # process や deliverable は日数が0でもマイルストーンとして描画し、依存関係を繋げる
         if node_type in ["note", "cloud"]:
             continue
-        title = attrs.get("title", node_id)
-        # title内に改行が含まれる可能性を考慮し空白に置換
-        title = title.replace("\n", " ").replace("\r", "")
-
-        head = f"[{title}] as [{node_id}]"
-
-        if start and project:
-            # 着手済み: 残日数ベースで終了日を推定
-            remains = attrs.get("remains", 0)
-            if remains > 0 and workdays and not finished:
-                end_date = _estimate_end_date(project, start, remains)
-                bar = f"{head} starts {start} and ends {end_date}"
-            elif finished and attrs.get("end", ""):
-                bar = f"{head} starts {start} and ends {attrs['end']}"
-            else:
-                bar = f"{head} lasts {math.ceil(float(days))} days"
-        else:
-            bar = f"{head} lasts {math.ceil(float(days))} days"
-
-        # 完了タスクの色
-        if finished:
-            bar += " and is colored in lightgray"
-        elif node_id in critical_path:
-            bar += " and is colored in pink"
-        elif node_type == "deliverable":
-            # 成果物で日数を持つものはフィードバッファとして青色で表示
-            bar += " and is colored in lightblue"
+        key = (
+            node_id,
+            attrs.get("title", node_id),
+            attrs.get("days", 0),
+            attrs.get("start", ""),
+            attrs.get("end", ""),
+            attrs.get("remains", 0),
+            attrs.get("finished", False),
+            node_type,
+            node_id in critical,
+            today,
+            calendar,
+        )
+        try:
+            lines.extend(_story_bar(*key))
+        except TypeError:
+            # ハッシュできない属性値を含む場合はキャッシュしない
+            lines.extend(_story_bar.__wrapped__(*key))
 
-        lines.append(bar)
-        
-        # ガントバーをクリックした際に、右側の編集パネル（selectedパラメータ）を連動させるためのリンク
-        lines.append(f"[{node_id}] links to [[?selected={node_id}&view=gantt]]")
-        
     return lines
 
 
@@ -487,18 +834,19 @@ def _make_dependency_arrows(
 ) -> List[str]:
     """エッジの依存関係文字列を作成する（クリティカルパス優先）。"""
     arrows: List[str] = []
+    seen = set()
 
     # ガントチャートにバーとして描画される対象のノード判定
     def _is_target(n_id):
         node_type = graph.nodes[n_id].get("type", "")
         return node_type not in ["note", "cloud"]
 
-    # 仮想エッジを含めた描画順序計算用のグラフを作成
-    render_graph = graph.copy()
+    # 仮想エッジを含めた描画順序計算用のグラフ（属性は不要なので構造のみ複製する）
+    render_graph = nx.DiGraph()
+    render_graph.add_nodes_from(graph)
+    render_graph.add_edges_from(graph.edges)
     if virtual_edges:
-        for src, dst, _ in virtual_edges:
-            if not render_graph.has_edge(src, dst):
-                render_graph.add_edge(src, dst, virtual=True)
+        render_graph.add_edges_from((src, dst) for src, dst, _ in virtual_edges)
 
     # 1. 各ノードの earliest_end を計算 (PlantUMLの複数合流バグ回避のため)
     # 複数先行タスクがある場合、最も遅く終わるタスクにのみ依存するようにフィルタする
@@ -512,37 +860,39 @@ def _make_dependency_arrows(
     for node in topo_nodes:
         if not _is_target(node):
             continue
-        
-        preds = list(render_graph.predecessors(node))
-        valid_preds = [p for p in preds if _is_target(p)]
-        
-        for p in valid_preds:
+
+        for p in render_graph.predecessors(node):
+            if not _is_target(p):
+                continue
             arrow = f"[{p}] -> [{node}]"
-            if arrow not in arrows:
+            if arrow not in seen:
+                seen.add(arrow)
                 arrows.append(arrow)
 
     return arrows
 
 
 def _estimate_end_date(
-    project: Dict[str, Any], start_date: str, remain_day: int
+    project: Dict[str, Any],
+    start_date: str,
+    remain_day: int,
+    calendar: Optional[WorkdayCalendar] = None,
 ) -> str:
     """稼働日ベースで完了予定日を計算する。
 
     CCPMでは着手済みタスクの完了見込みは「今日 + 残日数」で算出する。
+    calendar を省略した場合はプロジェクトの祝日から取得する。
     """
-    if not workdays:
-        return ""
-    holidays_str = project.get("holidays", [])
-    dt_holidays = [datetime.strptime(h, "%Y/%m/%d") for h in holidays_str]
     today_str = project.get("today", "")
     if not today_str:
         return ""
-    dt_today = datetime.strptime(today_str, "%Y/%m/%d")
+    dt_today = datetime.strptime(today_str, DATE_FORMAT)
 
     # 今日から残日数分だけ先の稼働日を完了予定日とする
-    dt_end = workdays.workday(dt_today, days=int(math.ceil(float(remain_day))), holidays=dt_holidays)
-    return dt_end.date().strftime("%Y/%m/%d")
+    if calendar is None:
+        calendar = get_workday_calendar(project.get("holidays", []))
+    end_date = calendar.workday(dt_today, int(math.ceil(float(remain_day))))
+    return end_date.strftime(DATE_FORMAT)
 
 
 def _make_project_buffer_bar(project: Dict[str, Any]) -> List[str]:
@@ -552,19 +902,16 @@ def _make_project_buffer_bar(project: Dict[str, Any]) -> List[str]:
     total_buffer = baseline.get("total_buffer", 0)
     start_str = project.get("start", "")
 
-    if not cc_length or not total_buffer or not start_str or not workdays:
+    if not cc_length or not total_buffer or not start_str:
         return []
 
-    import math
     try:
-        holidays_str = project.get("holidays", [])
-        dt_holidays = [datetime.strptime(h, "%Y/%m/%d") for h in holidays_str]
-        dt_start = datetime.strptime(start_str, "%Y/%m/%d")
-        
+        dt_start = datetime.strptime(start_str, DATE_FORMAT)
+        calendar = get_workday_calendar(project.get("holidays", []))
+
         # プロジェクト開始日から数えて CC長(稼働日) 経過した次の日をバッファ開始日とする
-        # workdays.workday(start, 1) は翌稼働日を返すため、cc_length を指定するとちょうどCC終了の次稼働日となる
-        buffer_start_dt = workdays.workday(dt_start, days=int(math.ceil(cc_length)), holidays=dt_holidays)
-        buffer_start_str = buffer_start_dt.date().strftime("%Y/%m/%d")
+        # workday(start, 1) は翌稼働日を返すため、cc_length を指定するとちょうどCC終了の次稼働日となる
+        buffer_start_str = calendar.workday(dt_start, int(math.ceil(cc_length))).strftime(DATE_FORMAT)
 
         lines = [
             f"[当初のプロジェクトバッファ] starts {buffer_start_str} and lasts {int(math.ceil(total_buffer))} days",
@@ -687,16 +1034,13 @@ def calculate_fever_data(
         }
 
     try:
-        holidays_str = project.get("holidays", [])
-        dt_holidays = [datetime.strptime(h, "%Y/%m/%d") for h in holidays_str]
-        dt_start = datetime.strptime(start_str, "%Y/%m/%d")
-        dt_end = datetime.strptime(end_str, "%Y/%m/%d")
-        dt_today = datetime.strptime(today_str, "%Y/%m/%d")
+        dt_start = datetime.strptime(start_str, DATE_FORMAT)
+        dt_end = datetime.strptime(end_str, DATE_FORMAT)
+        dt_today = datetime.strptime(today_str, DATE_FORMAT)
+        calendar = get_workday_calendar(project.get("holidays", []))
 
         # プロジェクト全体の稼働日数
-        total_workdays = workdays.networkdays(
-            dt_start, dt_end, holidays=dt_holidays
-        ) if workdays else (dt_end - dt_start).days
+        total_workdays = calendar.networkdays(dt_start, dt_end)
 
         # ベースラインが未登録の場合は稼働日数から逆算
         if baseline_total_buffer is None:
@@ -714,10 +1058,7 @@ def calculate_fever_data(
             }
 
         # 経過稼働日
-        elapsed = workdays.networkdays(
-            dt_start, dt_today, holidays=dt_holidays
-        ) - 1 if workdays else (dt_today - dt_start).days
-        elapsed = max(0, elapsed)
+        elapsed = max(0, calendar.networkdays(dt_start, dt_today) - 1)
 
         # 現在見込まれる総所要日数 = (今日までの経過稼働総日数) + (未完了のCC残日数合計)
         # 本来予定通りなら projected_total_duration は baseline_cc_length と一致するが、
@@ -764,14 +1105,7 @@ def calculate_working_days(
     if not dt_start or not dt_end or dt_end < dt_start:
         return 0.0
 
-    dt_holidays = [
-        holiday_dt
-        for holiday in (holidays or [])
-        if (holiday_dt := _coerce_datetime(holiday)) is not None
-    ]
-    if workdays:
-        return float(workdays.networkdays(dt_start, dt_end, holidays=dt_holidays))
-    return float((dt_end - dt_start).days + 1)
+    return float(get_workday_calendar(holidays).networkdays(dt_start, dt_end))
 
 
 def calculate_fever_data_from_progress(
@@ -843,108 +1177,340 @@ def calculate_fever_data_from_progress(
     }
 
 
+def calculate_fever_data_batch(
+    starts: Sequence[Any],
+    ends: Sequence[Any],
+    buffer_percents: Sequence[Any],
+    point_projects: Sequence[int],
+    point_dates: Sequence[Any],
+    point_progress: Sequence[Any],
+    holidays: Optional[Sequence[Any]] = None,
+) -> Dict[str, np.ndarray]:
+    """calculate_fever_data_from_progress の一括（列指向）版。
+
+    プロジェクトごとの開始日・終了日・バッファ率と、進捗点ごとのプロジェクト添字・記録日・進捗率を
+    配列で受け取り、全進捗点の値を NumPy でまとめて計算する。祝日は全プロジェクト共通。
+
+    Returns:
+        {calculate_fever_data_from_progress と同じキー: 進捗点ごとの配列}
+    """
+    calendar = get_workday_calendar(holidays)
+    index = np.asarray(point_projects, dtype=np.int64)
+    count = len(index)
+
+    start = to_day_array(starts)[index] if count else np.empty(0, dtype="datetime64[D]")
+    end = to_day_array(ends)[index] if count else np.empty(0, dtype="datetime64[D]")
+    point = to_day_array(point_dates)
+    percents = np.array([float(bp or 30.0) for bp in buffer_percents], dtype=np.float64)
+    buffer_percent = percents[index] if count else np.empty(0, dtype=np.float64)
+    progress = np.clip(
+        np.array([float(p or 0.0) for p in point_progress], dtype=np.float64), 0.0, 100.0
+    )
+
+    # 期間が不正な点は既定値（進捗率とバッファ率以外 0）
+    valid = ~(np.isnat(start) | np.isnat(end) | np.isnat(point))
+    valid[valid] = end[valid] >= start[valid]
+    total_workdays = np.zeros(count, dtype=np.float64)
+    total_workdays[valid] = calendar.networkdays_many(start[valid], end[valid])
+    valid &= total_workdays > 0
+
+    baseline_total_buffer = total_workdays * (buffer_percent / 100.0)
+    baseline_cc_length = total_workdays - baseline_total_buffer
+    has_cc = valid & (baseline_cc_length > 0)
+
+    elapsed_workdays = np.zeros(count, dtype=np.float64)
+    effective_point = np.minimum(point[has_cc], end[has_cc])
+    elapsed = calendar.networkdays_many(start[has_cc], effective_point).astype(np.float64)
+    # 記録日が開始日より前なら稼働日数 0 として扱う
+    elapsed[effective_point < start[has_cc]] = 0.0
+    elapsed_workdays[has_cc] = np.maximum(0.0, elapsed - 1.0)
+
+    finished_days_equivalent = baseline_cc_length * (progress / 100.0)
+    remaining_cc_length = np.maximum(0.0, baseline_cc_length - finished_days_equivalent)
+    projected_total_duration = elapsed_workdays + remaining_cc_length
+    consumed_buffer = np.maximum(0.0, projected_total_duration - baseline_cc_length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buffer_used = np.where(
+            baseline_total_buffer > 0,
+            (consumed_buffer / baseline_total_buffer) * 100.0,
+            np.where(remaining_cc_length > 0, 100.0, 0.0),
+        )
+
+    zero = np.zeros(count, dtype=np.float64)
+    return {
+        "progress": progress,
+        "buffer_used": np.where(has_cc, buffer_used, zero),
+        "remaining_cc_length": np.where(has_cc, remaining_cc_length, zero),
+        "consumed_buffer": np.where(has_cc, consumed_buffer, zero),
+        "baseline_cc_length": np.where(has_cc, baseline_cc_length, zero),
+        "baseline_total_buffer": np.where(
+            has_cc, baseline_total_buffer, np.where(valid, np.maximum(0.0, baseline_total_buffer), zero)
+        ),
+        "total_workdays": np.where(valid, total_workdays, zero),
+        "elapsed_workdays": elapsed_workdays,
+        "buffer_percent": buffer_percent,
+    }
+
+
+_portfolio_fever_cache: "OrderedDict[str, List[Dict[str, np.ndarray]]]" = OrderedDict()
+_portfolio_fever_lock = threading.Lock()
+PORTFOLIO_FEVER_CACHE_SIZE = 8
+
+
+def calculate_portfolio_fever(
+    projects: List[Dict[str, Any]],
+    common_holidays: Optional[List[Any]] = None,
+) -> List[Dict[str, np.ndarray]]:
+    """複数プロジェクトの全進捗点のフィーバー値を一括で計算する。
+
+    祝日（共通 + プロジェクト固有）が同じプロジェクトごとに calculate_fever_data_batch を1回呼ぶ。
+    結果はデータの内容（リビジョン）ごとにキャッシュするため、変更しないこと。
+
+    Returns:
+        プロジェクトごとの {キー: project["progress"] の順の配列}
+    """
+    revision = hashlib.sha256(
+        json.dumps(
+            [
+                [p.get("start", ""), p.get("end", ""), p.get("buffer_percent", 30.0),
+                 p.get("holidays", []), p.get("progress", [])]
+                for p in projects
+            ] + [common_holidays or []],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+    ).hexdigest()
+    with _portfolio_fever_lock:
+        cached = _portfolio_fever_cache.get(revision)
+        if cached is not None:
+            _portfolio_fever_cache.move_to_end(revision)
+            return cached
+
+    groups: Dict[Tuple[Any, ...], List[int]] = {}
+    for i, project in enumerate(projects):
+        holidays = tuple(common_holidays or []) + tuple(project.get("holidays", []))
+        groups.setdefault(holidays, []).append(i)
+
+    results: List[Dict[str, np.ndarray]] = [{} for _ in projects]
+    for holidays, members in groups.items():
+        point_projects, point_dates, point_progress = [], [], []
+        for local, i in enumerate(members):
+            for point in projects[i].get("progress", []):
+                point_projects.append(local)
+                point_dates.append(point.get("date", ""))
+                point_progress.append(point.get("progress", 0))
+        columns = calculate_fever_data_batch(
+            [projects[i].get("start", "") for i in members],
+            [projects[i].get("end", "") for i in members],
+            [projects[i].get("buffer_percent", 30.0) for i in members],
+            point_projects,
+            point_dates,
+            point_progress,
+            holidays=list(holidays),
+        )
+        bounds = np.searchsorted(
+            np.asarray(point_projects, dtype=np.int64), np.arange(len(members) + 1)
+        )
+        for local, i in enumerate(members):
+            lo, hi = bounds[local], bounds[local + 1]
+            results[i] = {key: values[lo:hi] for key, values in columns.items()}
+
+    with _portfolio_fever_lock:
+        _portfolio_fever_cache[revision] = results
+        while len(_portfolio_fever_cache) > PORTFOLIO_FEVER_CACHE_SIZE:
+            _portfolio_fever_cache.popitem(last=False)
+    return results
+
+
 # ---------------------------------------------------------------------------
 # 優先度テーブル
 # ---------------------------------------------------------------------------
 
+class PriorityTable:
+    """タスクのバッファ消費に基づく優先度テーブル。
+
+    初回に全タスクの残パス長（自身の日数を含む終端までの最長距離）と未完了の先行タスクを求めておき、
+    update_task でタスクの状態（完了など）が変わった場合は、残パス長が変わる先行タスクと
+    着手可否が変わる後続タスクのみを更新する。バッファ（CC 残り長 − 残パス長）は rows で求める。
+
+    Args:
+        graph: CCPM のグラフ（コピーして使う）
+        critical_path: バッファの基準とするチェーン（CC または CP）
+        virtual_edges: リソース競合解消のための仮想エッジ
+        remaining: 仮想エッジを含むグラフの残パス長（省略時はここで計算する）
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        critical_path: List[str],
+        virtual_edges: Optional[List[Tuple[str, str, str]]] = None,
+        remaining: Optional[RemainingLengths] = None,
+    ):
+        self.critical_path = list(critical_path)
+        self.virtual_edges = list(virtual_edges or [])
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        if not self.critical_path:
+            return
+
+        # 仮想エッジ（リソース待ち）を含めた作業用グラフを作成して計算する
+        self._graph = graph.copy()
+        for src, dst, _ in self.virtual_edges:
+            self._graph.add_edge(src, dst)
+
+        if remaining is None:
+            remaining = RemainingLengths(self._graph)
+        self._remaining: Dict[str, float] = remaining.as_dict()
+        self._days = {n: _get_effective_days(self._graph, n) for n in self._graph.nodes}
+        self._rank: Optional[Dict[str, int]] = None
+        self._chain = set(self.critical_path)
+        self._blocking = {n: self._blocking_titles(n) for n in self._graph.nodes}
+        self._cp_remains = self._unfinished_cp_length()
+
+    def copy(self) -> "PriorityTable":
+        """独立して更新できる複製を返す。"""
+        other = copy.copy(self)
+        if self.critical_path:
+            other._graph = self._graph.copy()
+            other._remaining = dict(self._remaining)
+            other._days = dict(self._days)
+            other._blocking = dict(self._blocking)
+        return other
+
+    def _finished(self, node: str) -> bool:
+        return self._graph.nodes[node].get("finished", False)
+
+    def _blocking_titles(self, node: str) -> List[str]:
+        """未完了の先行タスク名。"""
+        return [
+            self._graph.nodes[p].get("title", p)
+            for p in self._graph.predecessors(node)
+            if not self._finished(p)
+        ]
+
+    def _unfinished_cp_length(self) -> Optional[float]:
+        """未完了の最初のチェーンタスク以降の日数の合計（全て完了済みなら None）。"""
+        for i, task in enumerate(self.critical_path):
+            if not self._finished(task):
+                return sum(self._days[t] for t in self.critical_path[i:])
+        return None
+
+    def _propagate_remaining(self, node: str):
+        """node の残パス長を後続から求め直し、変化した分だけ先行タスクへ伝える（トポロジカル順の逆）。"""
+        if self._rank is None:
+            self._rank = {n: i for i, n in enumerate(nx.topological_sort(self._graph))}
+        heap = [(-self._rank[node], node)]
+        queued = {node}
+        while heap:
+            _, current = heapq.heappop(heap)
+            queued.discard(current)
+            value = self._days[current] + max(
+                (self._remaining[s] for s in self._graph.successors(current)), default=0.0
+            )
+            if value == self._remaining[current]:
+                continue
+            self._remaining[current] = value
+            for pred in self._graph.predecessors(current):
+                if pred not in queued:
+                    queued.add(pred)
+                    heapq.heappush(heap, (-self._rank[pred], pred))
+
+    def update_task(self, task: str, **attrs: Any):
+        """タスクの属性（finished・end・remains など）を更新し、影響するタスクのみ再計算する。"""
+        if not self.critical_path:
+            return
+        node_attrs = self._graph.nodes[task]
+        was_finished = self._finished(task)
+        old_title = node_attrs.get("title", task)
+        node_attrs.update(attrs)
+
+        days = _get_effective_days(self._graph, task)
+        if days != self._days[task]:
+            self._days[task] = days
+            self._propagate_remaining(task)
+        if was_finished != self._finished(task) or old_title != node_attrs.get("title", task):
+            for succ in self._graph.successors(task):
+                self._blocking[succ] = self._blocking_titles(succ)
+        if task in self._chain:
+            self._cp_remains = self._unfinished_cp_length()
+        self._rows = None
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """タスク情報の辞書リスト（着手可能な未完了 → 待機中 → 完了済み、それぞれバッファ昇順）。"""
+        if self._rows is not None:
+            return self._rows
+        if not self.critical_path or self._cp_remains is None:
+            self._rows = []
+            return self._rows
+
+        unfinished_cp_length = self._cp_remains
+        all_info: List[Dict[str, Any]] = []
+        for task, attrs in self._graph.nodes(data=True):
+            # メモやクラウドなどの図形はスキップ
+            if attrs.get("type", "") in ["note", "cloud"]:
+                continue
+
+            is_finished = attrs.get("finished", False)
+            # 着手可能判定: 全ての先行タスク（predecessors）が完了済みか
+            blocking = self._blocking[task]
+            actionable = not blocking if not is_finished else False
+
+            # 該当タスクから終端までの最長残パス長（自身の日数を含む）
+            remain_length = self._remaining[task]
+            buffer = unfinished_cp_length - remain_length
+
+            # 状態判定: バッファに基づく信号色を決定し、着手不可なら末尾に待機中を付与
+            if is_finished:
+                status = "⚫ 完了"
+            elif buffer <= (unfinished_cp_length * 0.1):
+                status = "🔴 警告"
+            elif buffer <= (unfinished_cp_length * 0.3):
+                status = "🟡 注意"
+            else:
+                status = "🟢 余裕あり"
+
+            if not is_finished:
+                if not actionable:
+                    status += f" (⏳ 待: {', '.join(blocking)})"
+                elif attrs.get("start", ""):
+                    # 着手可能で開始日が入力されている場合は実施中
+                    status += " (🏃 実施中)"
+
+            all_info.append({
+                "task": task,
+                "status": status,
+                "title": attrs.get("title", task),
+                "days": self._days[task],
+                "resource": attrs.get("resource", ""),
+                "total_remains": remain_length,
+                "cp_remains": unfinished_cp_length,
+                "buffer": buffer,
+                "is_finished": is_finished,
+                "actionable": actionable,
+            })
+
+        # ソート: 着手可能な未完了タスク(buffer昇順) → 待機中(buffer昇順) → 完了済み
+        self._rows = sorted(all_info, key=lambda x: (
+            x["is_finished"],       # 完了済みは最後
+            not x["actionable"],    # 着手可能タスクを先に
+            x["buffer"],            # バッファが少ない順
+        ))
+        return self._rows
+
+
 def calculate_priority_table(
     graph: nx.DiGraph,
     critical_path: List[str],
     virtual_edges: Optional[List[Tuple[str, str, str]]] = None,
+    remaining: Optional[RemainingLengths] = None,
 ) -> List[Dict[str, Any]]:
     """タスクのバッファ消費に基づく優先度テーブルを計算する。
 
+    Args:
+        remaining: 仮想エッジを含むグラフの残パス長（省略時はここで計算する）
+
     Returns:
         タスク情報の辞書リスト (バッファ昇順)
     """
-    if not critical_path:
-        return []
-
-    inputs, _ = get_in_out_edge_list(graph)
-    final_task = critical_path[-1]
-
-    # 仮想エッジ（リソース待ち）を含めた作業用グラフを作成して計算する
-    work_graph = graph.copy()
-    if virtual_edges:
-        for src, dst, _ in virtual_edges:
-            work_graph.add_edge(src, dst)
-
-    # 未完了のCPタスクから残りのCP長を算出
-    first_unfinished = None
-    for t in critical_path:
-        if not work_graph.nodes[t].get("finished", False):
-            first_unfinished = t
-            break
-    if not first_unfinished:
-        return []
-
-    unfinished_cp_length = sum(
-        _get_effective_days(work_graph, t)
-        for t in critical_path[critical_path.index(first_unfinished):]
-    )
-
-    # 全タスクの情報を収集（全経路探索を避けて DP で各ノードからゴールまでの最長距離を求める）
-    memo: Dict[str, float] = {}
-    all_info: Dict[str, Dict[str, Any]] = {}
-    
-    for task in work_graph.nodes:
-        # メモやクラウドなどの図形はスキップ
-        if work_graph.nodes[task].get("type", "") in ["note", "cloud"]:
-            continue
-
-        is_finished = work_graph.nodes[task].get("finished", False)
-
-        # 着手可能判定: 全ての先行タスク（predecessors）が完了済みか
-        actionable = all(
-            work_graph.nodes[p].get("finished", False)
-            for p in work_graph.predecessors(task)
-        ) if not is_finished else False
-            
-        # 該当タスクから終端までの最長残パス長（自身の日数を含む）
-        remain_length = _compute_remaining_path_length(work_graph, task, memo)
-        days = _get_effective_days(work_graph, task)
-        buffer = unfinished_cp_length - remain_length
-        
-        # 状態判定: バッファに基づく信号色を決定し、着手不可なら末尾に待機中を付与
-        if is_finished:
-            status = "⚫ 完了"
-        elif buffer <= (unfinished_cp_length * 0.1):
-            status = "🔴 警告"
-        elif buffer <= (unfinished_cp_length * 0.3):
-            status = "🟡 注意"
-        else:
-            status = "🟢 余裕あり"
-        
-        if not is_finished:
-            if not actionable:
-                # 未完了の先行タスク名を取得
-                blocking_titles = [
-                    work_graph.nodes[p].get("title", p)
-                    for p in work_graph.predecessors(task)
-                    if not work_graph.nodes[p].get("finished", False)
-                ]
-                blocking_str = ", ".join(blocking_titles)
-                status += f" (⏳ 待: {blocking_str})"
-            elif work_graph.nodes[task].get("start", ""):
-                # 着手可能で開始日が入力されている場合は実施中
-                status += " (🏃 実施中)"
-        
-        all_info[task] = {
-            "task": task,
-            "status": status,
-            "title": work_graph.nodes[task].get("title", task),
-            "days": days,
-            "resource": work_graph.nodes[task].get("resource", ""),
-            "total_remains": remain_length,
-            "cp_remains": unfinished_cp_length,
-            "buffer": buffer,
-            "is_finished": is_finished,
-            "actionable": actionable,
-        }
-
-    # ソート: 着手可能な未完了タスク(buffer昇順) → 待機中(buffer昇順) → 完了済み
-    return sorted(all_info.values(), key=lambda x: (
-        x["is_finished"],       # 完了済みは最後
-        not x["actionable"],    # 着手可能タスクを先に
-        x["buffer"],            # バッファが少ない順
-    ))
+    return PriorityTable(graph, critical_path, virtual_edges, remaining=remaining).rows()
@@ -0,0 +1,213 @@
+"""CCPM ファイル群からのポートフォリオ（複数プロジェクト）フィーバーデータの集計。
+
+`data/` 内の `*_ccpm.hjson` をすべて読み込み、ファイルごとに CC を求めて
+calculate_fever_data で現在のフィーバー値を計算し、記録済みの進捗履歴と合わせて
+複数プロジェクトフィーバーチャート用の系列にする。
+
+計算結果はファイル内容のハッシュごとに保持し、変更のあったファイルだけを再計算する。
+再計算するファイルが複数ある場合はプロセスプールで並列に計算する。
+write-behind で未書き込みの保存があれば、読み込む前に書き込んでおく（ワーカーはディスクから読むため）。
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.ccpm_analysis import CCPMAnalysis
+from src.ccpm_engine import calculate_fever_data, calculate_working_days
+from src.constants import AppName
+from src.file_io import flush_pending_writes, normalize_source_data, read_data_file
+from src.process_pool import create_process_pool
+from src.requirement_graph import RequirementGraph
+
+DATA_DIR = "data"
+CCPM_FILE_SUFFIX = "_ccpm.hjson"
+# この件数以上のファイルを再計算する場合にプロセスプールを使う
+PARALLEL_THRESHOLD = 2
+
+PROGRESS_BASIS = "クリティカルチェーンに基づく"
+BUFFER_BASIS = "CC/CPから計算"
+
+
+def list_ccpm_files(directory: str = DATA_DIR) -> List[str]:
+    """directory 内の CCPM データファイルのパスをファイル名順に返す。"""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(CCPM_FILE_SUFFIX) and os.path.isfile(os.path.join(directory, name))
+    ]
+
+
+def file_content_hash(file_path: str) -> str:
+    """ファイル内容の SHA-256 を返す。"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _progress_points(
+    history: Any, today: str, fever: Dict[str, float]
+) -> List[Dict[str, Any]]:
+    """記録済みの進捗履歴と現在値から、日付順の進捗点を作る（今日の記録は現在値で置き換える）。"""
+    points = []
+    for date, value in (history or {}).items():
+        if date == today:
+            continue
+        if isinstance(value, list):
+            progress = value[0] if len(value) > 0 else 0
+            buffer_used = value[1] if len(value) > 1 else 0
+            memo = str(value[2]) if len(value) > 2 else ""
+        else:
+            progress, buffer_used, memo = value, 0, ""
+        progress = float(progress or 0)
+        points.append(
+            {
+                "date": str(date),
+                "progress": progress,
+                "memo": memo,
+                "fever": {"progress": progress, "buffer_used": float(buffer_used or 0)},
+            }
+        )
+    points.sort(key=lambda item: item["date"])
+    points.append(
+        {
+            "date": today or "現在",
+            "progress": fever["progress"],
+            "memo": "現在",
+            "fever": {"progress": fever["progress"], "buffer_used": fever["buffer_used"]},
+        }
+    )
+    return points
+
+
+def analyze_ccpm_file(file_path: str) -> Dict[str, Any]:
+    """CCPM ファイル1つを読み込み、ポートフォリオの1プロジェクト分の結果を返す。
+
+    読み込みや計算に失敗した場合は "error" にメッセージを入れて返す（プロセスプールから呼ぶため例外を送出しない）。
+
+    Returns:
+        {"id", "name", "file", "start", "end", "today", "holidays", "workdays",
+         "progress_basis", "buffer_basis",
+         "fever": calculate_fever_data の結果, "points": 日付順の進捗点, "error"}
+    """
+    project_id = os.path.basename(file_path)[: -len(CCPM_FILE_SUFFIX)]
+    entry: Dict[str, Any] = {
+        "id": project_id,
+        "name": project_id,
+        "file": file_path,
+        "start": "",
+        "end": "",
+        "today": "",
+        "holidays": [],
+        "workdays": 0.0,
+        "progress_basis": PROGRESS_BASIS,
+        "buffer_basis": BUFFER_BASIS,
+        "fever": None,
+        "points": [],
+        "error": None,
+    }
+    try:
+        data = normalize_source_data(read_data_file(file_path))
+        project = data.get("project", {})
+        entry.update(
+            name=project.get("name", project_id) or project_id,
+            start=project.get("start", ""),
+            end=project.get("end", ""),
+            today=project.get("today", ""),
+            holidays=list(project.get("holidays", [])),
+        )
+        entry["workdays"] = calculate_working_days(entry["start"], entry["end"], entry["holidays"])
+        graph = RequirementGraph(data, AppName.CCPM).graph
+        # CCPM ページと同じく、リソース数を同時実行上限とした CC を使う
+        analysis = CCPMAnalysis(graph, max_concurrency=len(project.get("resources", [])))
+        if not analysis.active_chain:
+            entry["error"] = "クリティカルチェーンを計算できません"
+            return entry
+        fever = calculate_fever_data(graph, project, analysis.active_chain, analysis.active_length)
+        entry["fever"] = fever
+        entry["points"] = _progress_points(data.get("progress", {}), entry["today"], fever)
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+class CCPMPortfolio:
+    """directory 内の CCPM ファイルのフィーバーデータを、ファイル内容のハッシュごとにキャッシュして集計する。
+
+    Args:
+        directory: CCPM ファイルを探すディレクトリ
+        max_workers: プロセスプールのワーカー数（None なら CPU 数）
+    """
+
+    def __init__(self, directory: str = DATA_DIR, max_workers: Optional[int] = None):
+        self.directory = directory
+        self.max_workers = max_workers
+        # ファイルパス → (内容のハッシュ, 結果)
+        self._entries: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.last_recomputed: List[str] = []
+
+    def _compute(self, paths: List[str]) -> List[Dict[str, Any]]:
+        if len(paths) >= PARALLEL_THRESHOLD and (self.max_workers or 0) != 1:
+            try:
+                with create_process_pool(self.max_workers) as pool:
+                    return list(pool.map(analyze_ccpm_file, paths))
+            except (BrokenProcessPool, OSError):
+                # プロセスを起動できない環境では同じプロセスで計算する
+                pass
+        return [analyze_ccpm_file(path) for path in paths]
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """ファイル一覧を読み直し、内容が変わったファイルだけ再計算して全プロジェクトの結果を返す。
+
+        ロックはキャッシュとの比較・更新の間だけ保持し、ハッシュ計算と再計算は外で行う
+        （他のセッションの refresh を全体の走査の間待たせないため）。
+        結果は次回以降の refresh でも共有されるため、変更しないこと。
+        """
+        # 未書き込みの CCPM ファイルの編集を反映する（直前の編集が古い内容で表示されないように）
+        flush_pending_writes()
+        paths = list_ccpm_files(self.directory)
+        hashes = {}
+        for path in paths:
+            try:
+                hashes[path] = file_content_hash(path)
+            except OSError:
+                continue
+
+        with self._lock:
+            results = {
+                path: cached[1]
+                for path, cached in ((p, self._entries.get(p)) for p in hashes)
+                if cached is not None and cached[0] == hashes[path]
+            }
+        changed = [path for path in hashes if path not in results]
+        computed = self._compute(changed)
+
+        with self._lock:
+            for path, entry in zip(changed, computed):
+                self._entries[path] = (hashes[path], entry)
+                results[path] = entry
+            for path in list(self._entries):
+                if path not in hashes:
+                    del self._entries[path]
+            self.last_recomputed = changed
+        return [results[path] for path in paths if path in results]
+
+
+_portfolios: Dict[str, CCPMPortfolio] = {}
+_portfolios_lock = threading.Lock()
+
+
+def get_ccpm_portfolio(directory: str = DATA_DIR) -> CCPMPortfolio:
+    """ディレクトリごとに共有するポートフォリオを返す。"""
+    key = os.path.abspath(directory)
+    with _portfolios_lock:
+        portfolio = _portfolios.get(key)
+        if portfolio is None:
+            portfolio = _portfolios[key] = CCPMPortfolio(directory)
+        return portfolio
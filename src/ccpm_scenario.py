@@ -0,0 +1,249 @@
+"""CCPM の What-if シナリオ（タスク日数の増減・担当者の人数の変更）の比較。
+
+CCPMAnalysis で計算済みの平準化ネットワーク（仮想エッジを含むグラフ）を基準に、
+ファイルを書き換えずにメモリ上の変更だけを当てて、チェーン長とプロジェクトバッファの変化を求める。
+
+- タスク日数の増減だけのシナリオは、リソースの順序（仮想エッジ）を基準のまま固定し、
+  変更したタスクから後続方向にたどって最長距離が変わるノードだけを再計算する
+- 担当者の人数を変えるシナリオは、リソースの平準化からやり直す（容量 2 以上の担当者は同時に複数タスクを担当できる）
+
+日数はすべて残パス長と同じ実質日数（完了済みは 0、着手済みは残日数）で扱う。
+"""
+import heapq
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.ccpm_dag import CompiledDag, compile_dag
+from src.ccpm_engine import (
+    DATE_FORMAT,
+    _ReachabilityIndex,
+    _dag_durations,
+    _estimate_end_date,
+    _level_resources,
+    _reduce_virtual_edges,
+    calculate_critical_path,
+    get_in_out_edge_list,
+    get_workday_calendar,
+)
+
+
+@dataclass
+class Scenario:
+    """メモリ上でだけ当てる変更。
+
+    Attributes:
+        extra_days: タスク → 増減する日数（実質日数に加算し、0 未満にはしない）
+        resource_capacity: 担当者 → 人数（同時に担当できるタスク数）
+    """
+
+    name: str
+    extra_days: Dict[str, float] = field(default_factory=dict)
+    resource_capacity: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    """シナリオの計算結果（delta_* は基準との差）。
+
+    Attributes:
+        buffer_remaining: プロジェクトバッファの残り日数（全バッファ − 消費バッファ）
+        buffer_used: バッファ消費率 (%)
+        recomputed: 再計算したノード数（平準化からやり直した場合は全ノード数）
+    """
+
+    name: str
+    chain_length: float
+    chain: List[str]
+    virtual_edges: List[Tuple[str, str, str]]
+    projected_end: str
+    buffer_remaining: float
+    buffer_used: float
+    delta_length: float = 0.0
+    delta_buffer: float = 0.0
+    releveled: bool = False
+    recomputed: int = 0
+
+
+def project_buffer(project: Dict[str, Any], chain_length: float, baseline_cc_length: float) -> Tuple[float, float]:
+    """チェーンの残り長さから、フィーバーチャートと同じ式で (バッファ残り日数, バッファ消費率) を返す。
+
+    全バッファ = ベースラインの total_buffer（未登録ならプロジェクト稼働日数 − ベースライン CC 長）、
+    消費バッファ = 経過稼働日 + チェーン残り長さ − ベースライン CC 長。
+    日付が設定されていない場合は (0, 0)。
+    """
+    baseline = project.get("baseline", {})
+    baseline_cc_length = baseline.get("cc_length", baseline_cc_length)
+    try:
+        dt_start = datetime.strptime(project.get("start", ""), DATE_FORMAT)
+        dt_end = datetime.strptime(project.get("end", ""), DATE_FORMAT)
+        dt_today = datetime.strptime(project.get("today", ""), DATE_FORMAT)
+    except ValueError:
+        return 0.0, 0.0
+    calendar = get_workday_calendar(project.get("holidays", []))
+    total_buffer = baseline.get("total_buffer")
+    if total_buffer is None:
+        total_buffer = calendar.networkdays(dt_start, dt_end) - baseline_cc_length
+    elapsed = max(0, calendar.networkdays(dt_start, dt_today) - 1)
+    consumed = max(0.0, elapsed + chain_length - baseline_cc_length)
+    if total_buffer <= 0:
+        return 0.0, 100.0 if chain_length > 0 else 0.0
+    return total_buffer - consumed, consumed / total_buffer * 100
+
+
+class ScenarioEngine:
+    """平準化済みのネットワークを基準に、シナリオごとのチェーン長とバッファを求める。
+
+    Args:
+        graph: 元のグラフ（平準化からやり直す場合に使う）
+        work_graph: 仮想エッジを追加した作業用グラフ
+        dag: work_graph のコンパイル済み DAG
+        virtual_edges: 基準の仮想エッジ
+        project: プロジェクト設定（バッファ・完了見込み日の計算に使う）
+        max_concurrency: 同時実行上限（平準化からやり直す場合に使う）
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        work_graph: nx.DiGraph,
+        dag: CompiledDag,
+        virtual_edges: List[Tuple[str, str, str]],
+        project: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = 0,
+    ):
+        self._graph = graph
+        self._work_graph = work_graph
+        self._dag = dag
+        self._virtual_edges = list(virtual_edges)
+        self.project = dict(project or {})
+        self.max_concurrency = max_concurrency
+
+        self._durations = _dag_durations(dag, work_graph)
+        self._dist, self._parent = dag.longest_paths(self._durations)
+        _, outputs = get_in_out_edge_list(work_graph)
+        self._outputs = np.array([dag.index[n] for n in (outputs or dag.nodes)], dtype=np.int64)
+        self.base: Optional[ScenarioResult] = None
+        self.base = self._result("基準", self._dist, self._parent.__getitem__, self._virtual_edges)
+
+    def _chain(self, dist: np.ndarray, parent_of) -> Tuple[float, List[str]]:
+        """outputs のうち最長距離が最大のノード（同値なら outputs の順で最初）までのチェーン。"""
+        if not len(self._outputs):
+            return 0.0, []
+        values = dist[self._outputs]
+        best = int(self._outputs[int(np.argmax(values))])
+        path = []
+        curr = best
+        while curr >= 0:
+            path.append(self._dag.nodes[curr])
+            curr = int(parent_of(curr))
+        path.reverse()
+        return float(dist[best]), path
+
+    def _result(self, name, dist, parent_of, virtual_edges, releveled=False, recomputed=0) -> ScenarioResult:
+        length, chain = self._chain(dist, parent_of)
+        return self._summarize(name, length, chain, virtual_edges, releveled, recomputed)
+
+    def _summarize(self, name, length, chain, virtual_edges, releveled, recomputed) -> ScenarioResult:
+        baseline_length = self.base.chain_length if self.base is not None else length
+        buffer_remaining, buffer_used = project_buffer(self.project, length, baseline_length)
+        result = ScenarioResult(
+            name=name,
+            chain_length=length,
+            chain=chain,
+            virtual_edges=list(virtual_edges),
+            projected_end=_estimate_end_date(self.project, "", math.ceil(length)),
+            buffer_remaining=buffer_remaining,
+            buffer_used=buffer_used,
+            releveled=releveled,
+            recomputed=recomputed,
+        )
+        if self.base is not None:
+            result.delta_length = length - self.base.chain_length
+            result.delta_buffer = buffer_remaining - self.base.buffer_remaining
+        return result
+
+    def _override_durations(self, extra_days: Dict[str, float]) -> Dict[int, float]:
+        """変更するノード ID → 変更後の実質日数（完了済みのタスクは変更しない）。"""
+        changed = {}
+        for node, delta in extra_days.items():
+            i = self._dag.index.get(node)
+            if i is None or not delta or self._work_graph.nodes[node].get("finished", False):
+                continue
+            changed[i] = max(0.0, float(self._durations[i]) + float(delta))
+        return changed
+
+    def _evaluate_incremental(self, scenario: Scenario) -> ScenarioResult:
+        """仮想エッジを固定して、変更したタスクの後続方向の最長距離だけを再計算する。"""
+        durations = self._override_durations(scenario.extra_days)
+        dag = self._dag
+        dist: Dict[int, float] = {}
+        parent: Dict[int, int] = {}
+        # トポロジカル順（ID 順）に処理し、最長距離が変わったノードの後続だけをたどる
+        pending = list(durations)
+        heapq.heapify(pending)
+        queued = set(pending)
+        while pending:
+            i = heapq.heappop(pending)
+            days = durations.get(i, float(self._durations[i]))
+            best, best_parent = None, -1
+            for p in dag.pred_indices[dag.pred_indptr[i]:dag.pred_indptr[i + 1]].tolist():
+                value = dist.get(p, self._dist[p])
+                if best is None or value > best:
+                    best, best_parent = value, p
+            new_dist = days + (best if best is not None else 0.0)
+            if new_dist == self._dist[i] and best_parent == self._parent[i] and i not in durations:
+                continue
+            dist[i], parent[i] = new_dist, best_parent
+            if new_dist == self._dist[i]:
+                continue
+            for s in dag.succ_indices[dag.succ_indptr[i]:dag.succ_indptr[i + 1]].tolist():
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(pending, s)
+
+        full = self._dist.copy()
+        if dist:
+            full[list(dist)] = list(dist.values())
+        return self._result(
+            scenario.name, full, lambda i: parent.get(i, self._parent[i]), self._virtual_edges,
+            recomputed=len(queued),
+        )
+
+    def _evaluate_releveled(self, scenario: Scenario) -> ScenarioResult:
+        """変更した日数と担当者の人数でリソースの平準化からやり直す。"""
+        graph = self._graph.copy()
+        for node, delta in scenario.extra_days.items():
+            if node not in graph or not delta or graph.nodes[node].get("finished", False):
+                continue
+            attrs = graph.nodes[node]
+            # 実質日数（着手済みは残日数、未着手は見積り日数）に加算する
+            key = "remains" if attrs.get("start", "") else "days"
+            attrs[key] = max(0.0, float(attrs.get(key, 0.0) or 0.0) + float(delta))
+        virtual_edges = _level_resources(
+            graph, self.max_concurrency, resource_capacity=scenario.resource_capacity
+        )
+        dag = compile_dag(graph)
+        if dag is not None and virtual_edges:
+            virtual_edges = _reduce_virtual_edges(
+                graph, virtual_edges, _ReachabilityIndex(graph, dag.nodes)
+            )
+        inputs, outputs = get_in_out_edge_list(graph)
+        length, chain = calculate_critical_path(graph, inputs, outputs, dag=dag)
+        return self._summarize(
+            scenario.name, length, chain, virtual_edges, True, graph.number_of_nodes()
+        )
+
+    def evaluate(self, scenario: Scenario) -> ScenarioResult:
+        """シナリオを評価する（基準のグラフ・分析結果は変更しない）。"""
+        if any(int(capacity) != 1 for capacity in scenario.resource_capacity.values()):
+            return self._evaluate_releveled(scenario)
+        return self._evaluate_incremental(scenario)
+
+    def compare(self, scenarios: List[Scenario]) -> List[ScenarioResult]:
+        """基準と各シナリオの結果を並べて返す。"""
+        return [self.base] + [self.evaluate(scenario) for scenario in scenarios]
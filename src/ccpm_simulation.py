@@ -0,0 +1,167 @@
+"""CCPM スケジュールのモンテカルロ・リスクシミュレーション。
+
+タスクの所要日数を、見積り日数（50% 見積り）を中央値、安全見積り日数（90% 見積り）を
+90 パーセンタイルとする対数正規分布からサンプリングし、仮想エッジ（リソース待ち）を含むグラフで
+プロジェクト完了までの日数を多数回計算する。
+- 完了日数のパーセンタイル（P50 / P80 / P90 / P95）
+- タスクごとのクリティカル指数（その試行で最長パス上にあった割合）
+
+試行は (ノード数, 試行数) の2次元配列にまとめ、コンパイル済み DAG のレベル単位の前進・後退計算で一度に行う。
+CHUNK_SIZE 件ずつのチャンクに分け、チャンクが複数ある場合はプロセスプールで並列に計算する。
+乱数の種はチャンクごとに分けるため、同じ seed なら結果はワーカー数によらず同じになる。
+"""
+import math
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.ccpm_dag import CompiledDag
+from src.ccpm_engine import _get_effective_days
+from src.process_pool import create_process_pool
+
+# 1チャンクの試行数（1,000 タスクで1配列あたり約 4 MB）
+CHUNK_SIZE = 500
+# このチャンク数以上の場合にプロセスプールを使う
+PARALLEL_THRESHOLD = 2
+# 安全見積り日数が未設定のタスクに使う、見積り日数に対する 90% 見積りの倍率
+DEFAULT_SAFE_RATIO = 2.0
+PERCENTILES = (50, 80, 90, 95)
+# 標準正規分布の 90 パーセンタイル
+_Z90 = 1.2815515655446004
+# 最長パス上にあるかの判定に使う相対誤差
+_CRITICAL_RTOL = 1e-9
+
+
+def task_duration_params(
+    graph: nx.DiGraph, nodes: Sequence[Hashable], safe_ratio: float = DEFAULT_SAFE_RATIO
+) -> Tuple[np.ndarray, np.ndarray]:
+    """nodes の順に、所要日数の対数正規分布の (中央値, 対数の標準偏差) の配列を返す。
+
+    中央値は残パス長と同じ実質日数（完了済みは 0、着手済みは残日数）。
+    ばらつきは安全見積り日数 safe_days と見積り日数 days の比（未設定なら safe_ratio）で決め、
+    着手済みタスクの残日数にも同じ比を使う。比が 1 以下のタスクは日数を固定とする。
+    """
+    median = np.empty(len(nodes), dtype=np.float64)
+    ratio = np.empty(len(nodes), dtype=np.float64)
+    for i, node in enumerate(nodes):
+        attrs = graph.nodes[node]
+        median[i] = _get_effective_days(graph, node)
+        days = float(attrs.get("days", 0.0) or 0.0)
+        safe_days = float(attrs.get("safe_days", 0.0) or 0.0)
+        ratio[i] = safe_days / days if safe_days > 0 and days > 0 else safe_ratio
+    sigma = np.log(np.maximum(ratio, 1.0)) / _Z90
+    return median, sigma
+
+
+def _simulate_chunk(
+    args: Tuple[CompiledDag, np.ndarray, np.ndarray, np.random.SeedSequence, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """1チャンク分の試行を行い、(試行ごとの完了日数, タスクごとの最長パス上の回数) を返す。"""
+    dag, median, sigma, seed, iterations = args
+    rng = np.random.default_rng(seed)
+    durations = rng.standard_normal((len(median), iterations))
+    durations *= sigma[:, None]
+    np.exp(durations, out=durations)
+    durations *= median[:, None]
+
+    start, finish = dag.earliest_schedule(durations)
+    completion = finish.max(axis=0) if len(median) else np.zeros(iterations)
+    # 最早開始 + 残パス長が完了日数に等しいタスクは、その試行の最長パス上にある
+    through = start + dag.remaining_lengths(durations)
+    critical = through >= completion * (1 - _CRITICAL_RTOL)
+    return completion, critical.sum(axis=1)
+
+
+class ScheduleSimulation:
+    """モンテカルロ・シミュレーションの結果。
+
+    Attributes:
+        iterations: 試行数
+        completion: 試行ごとの完了までの日数（今日から、稼働日）
+        percentiles: {パーセンタイル: 完了までの日数}
+        criticality: {ノード: クリティカル指数 (0〜1)}（トポロジカル順）
+    """
+
+    def __init__(self, nodes: Sequence[Hashable], completion: np.ndarray, critical_counts: np.ndarray):
+        self.iterations = len(completion)
+        self.completion = completion
+        self.percentiles: Dict[int, float] = (
+            dict(zip(PERCENTILES, np.percentile(completion, PERCENTILES).tolist()))
+            if self.iterations
+            else {}
+        )
+        self.criticality: Dict[Hashable, float] = dict(
+            zip(nodes, (critical_counts / max(self.iterations, 1)).tolist())
+        )
+
+    def probability_within(self, days: float) -> float:
+        """days 日以内に完了する試行の割合。"""
+        if not self.iterations:
+            return 0.0
+        return float(np.count_nonzero(self.completion <= days + 1e-9)) / self.iterations
+
+
+def _chunk_sizes(iterations: int) -> List[int]:
+    full, rest = divmod(iterations, CHUNK_SIZE)
+    return [CHUNK_SIZE] * full + ([rest] if rest else [])
+
+
+def simulate_schedule(
+    graph: nx.DiGraph,
+    virtual_edges: Optional[List[Tuple[str, str, str]]] = None,
+    iterations: int = 10000,
+    safe_ratio: float = DEFAULT_SAFE_RATIO,
+    seed: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Optional[ScheduleSimulation]:
+    """グラフに仮想エッジを加えたネットワークでスケジュールのモンテカルロ・シミュレーションを行う。
+
+    Args:
+        graph: CCPM のグラフ（変更しない）
+        virtual_edges: リソース競合解消のための仮想エッジ（CCPMAnalysis.virtual_edges）
+        iterations: 試行数
+        safe_ratio: 安全見積り日数が未設定のタスクの 90% 見積り倍率
+        seed: 乱数の種（None なら毎回異なる）
+        max_workers: プロセスプールのワーカー数（None なら CPU 数、1 なら同じプロセスで計算）
+
+    Returns:
+        シミュレーション結果（閉路がある場合は None）
+    """
+    work_graph = graph.copy()
+    for src, dst, _ in virtual_edges or []:
+        work_graph.add_edge(src, dst)
+    try:
+        dag = CompiledDag(work_graph)
+    except nx.NetworkXUnfeasible:
+        return None
+
+    median, sigma = task_duration_params(work_graph, dag.nodes, safe_ratio)
+    sizes = _chunk_sizes(max(0, int(iterations)))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [(dag, median, sigma, s, size) for s, size in zip(seeds, sizes)]
+
+    results = None
+    if len(chunks) >= PARALLEL_THRESHOLD and (max_workers or 0) != 1:
+        try:
+            with create_process_pool(max_workers) as pool:
+                results = list(pool.map(_simulate_chunk, chunks))
+        except (BrokenProcessPool, OSError):
+            # プロセスを起動できない環境では同じプロセスで計算する
+            results = None
+    if results is None:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
+
+    completion = (
+        np.concatenate([c for c, _ in results]) if results else np.empty(0, dtype=np.float64)
+    )
+    counts = (
+        np.sum([k for _, k in results], axis=0) if results else np.zeros(len(dag), dtype=np.int64)
+    )
+    return ScheduleSimulation(dag.nodes, completion, counts)
+
+
+def completion_workdays(days: float) -> int:
+    """完了までの日数（小数）を、今日から数える稼働日数に切り上げる。"""
+    return int(math.ceil(days - 1e-9))
@@ -845,11 +845,7 @@ class ConvertPumlCode:
         CP の矢印を黄色、CC の矢印を赤で着色する。
         CP==CC の場合はすべて赤で表示する。
         """
-        from src.ccpm_engine import (
-            get_in_out_edge_list,
-            calculate_critical_path,
-            calculate_critical_chain,
-        )
+        from src.ccpm_analysis import get_ccpm_analysis
 
         # ノード変換（完了タスクに ☑ プレフィックス、詳細なら日数と担当者を追加）
         import copy
@@ -898,24 +894,15 @@ class ConvertPumlCode:
             ),
         ))
 
-        # CP / CC 算出
-        inputs, outputs = get_in_out_edge_list(graph)
-        project = parameters_dict.get("project", {})
-        cp_length, cp = calculate_critical_path(
-            graph,
-            inputs,
-            outputs,
-            project=project,
-            duration_mode="display",
-        )
-
-        max_concurrency = parameters_dict.get("max_concurrency", 0)
-        cc_length, cc, virtual_edges = calculate_critical_chain(
+        # CP / CC 算出（同じグラフ・設定の分析結果は共有キャッシュから取得）
+        analysis = get_ccpm_analysis(
             graph,
-            max_concurrency=max_concurrency,
-            project=project,
+            max_concurrency=parameters_dict.get("max_concurrency", 0),
+            project=parameters_dict.get("project", {}),
             duration_mode="display",
+            revision=parameters_dict.get("graph_revision"),
         )
+        cp, cc, virtual_edges = analysis.cp, analysis.cc, analysis.virtual_edges
 
         # CP / CC のエッジペアセットを構築
         cp_edges = set()
@@ -0,0 +1,127 @@
+"""ダイアグラムデータのバイナリサイドカーキャッシュ。
+
+`data/foo.hjson` の隣に `data/foo.rvcache` を置き、正規化済みのノード・エッジや
+表示ラベル・マッピング辞書などの前処理結果を pickle で保存する。
+HJSON のテキストパースを省略して、コールドロード時に一括で復元するためのもの。
+
+キャッシュは以下の場合に無効として扱い、呼び出し側で再構築する。
+  - スキーマバージョンが一致しない
+  - 元ファイルのハッシュ（SHA-256）が一致しない
+  - 構築時のキー（app_name など）が一致しない
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Optional
+
+
+# ペイロードの構造を変更した場合はインクリメントする
+CACHE_SCHEMA_VERSION = 1
+CACHE_EXTENSION = ".rvcache"
+
+
+def get_sidecar_path(file_path: str) -> str:
+    """データファイルに対応するサイドカーキャッシュのパスを返す。"""
+    base, _ = os.path.splitext(file_path)
+    return base + CACHE_EXTENSION
+
+
+def compute_file_hash(file_path: str) -> str:
+    """ファイル内容の SHA-256 ハッシュ（16進文字列）を返す。"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_sidecar(file_path: str, source_hash: str, cache_key: str) -> Optional[Dict[str, Any]]:
+    """サイドカーキャッシュを読み込む。無効・破損時は None を返す。
+
+    Args:
+        file_path (str): 元データファイルのパス
+        source_hash (str): 元データファイルの現在のハッシュ
+        cache_key (str): 構築条件を表すキー（app_name など）
+
+    Returns:
+        Optional[Dict[str, Any]]: キャッシュされたペイロード
+    """
+    sidecar_path = get_sidecar_path(file_path)
+    if not os.path.exists(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path, "rb") as f:
+            envelope = pickle.load(f)
+    except Exception:
+        # 破損・非互換なキャッシュは無視して再構築させる
+        return None
+
+    if not isinstance(envelope, dict):
+        return None
+    if envelope.get("schema_version") != CACHE_SCHEMA_VERSION:
+        return None
+    if envelope.get("source_hash") != source_hash:
+        return None
+    if envelope.get("cache_key") != cache_key:
+        return None
+    return envelope.get("payload")
+
+
+def write_sidecar(file_path: str, source_hash: str, cache_key: str, payload: Dict[str, Any]):
+    """サイドカーキャッシュをアトミックに書き込む。
+
+    キャッシュは補助的なものなので、書き込みに失敗しても例外は送出しない。
+    """
+    sidecar_path = get_sidecar_path(file_path)
+    envelope = {
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "source_hash": source_hash,
+        "cache_key": cache_key,
+        "payload": payload,
+    }
+    dir_name = os.path.dirname(sidecar_path) or "."
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(mode="wb", dir=dir_name, delete=False) as tf:
+            temp_path = tf.name
+            pickle.dump(envelope, tf, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, sidecar_path)
+    except Exception:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def load_with_sidecar(
+    file_path: str,
+    cache_key: str,
+    build_payload: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """サイドカーキャッシュが有効ならそれを返し、無効なら構築して保存する。
+
+    Args:
+        file_path (str): 元データファイルのパス
+        cache_key (str): 構築条件を表すキー（app_name など）
+        build_payload (Callable): キャッシュが無効な場合にペイロードを構築する関数
+
+    Returns:
+        Dict[str, Any]: ペイロード
+    """
+    if not os.path.exists(file_path):
+        return build_payload()
+
+    try:
+        source_hash = compute_file_hash(file_path)
+    except OSError:
+        return build_payload()
+
+    cached = read_sidecar(file_path, source_hash, cache_key)
+    if cached is not None:
+        return cached
+
+    payload = build_payload()
+    write_sidecar(file_path, source_hash, cache_key, payload)
+    return payload
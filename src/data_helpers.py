@@ -86,3 +86,29 @@ def make_hashable(data):
         return frozenset(make_hashable(element) for element in data)
     # 他のハッシュ可能な型 (int, str, tuple, frozensetなど) はそのまま返す
     return data
+
+
+def edge_key(edge: Dict[str, Any]):
+    """接続（edge）の重複判定に使う正規化キーを返す。
+
+    接続は通常スカラー値のみを持つため、キー順にソートした (key, value) のタプルで十分。
+    ハッシュ不可能な値（リスト・辞書）を含む場合のみ make_hashable で再帰的に変換する。
+    """
+    key = tuple(sorted(edge.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return make_hashable(edge)
+    return key
+
+
+def dedup_edges(edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """重複する接続を取り除いたリストを返す（最初の出現を残し、順序は維持する）。"""
+    seen = set()
+    result = []
+    for edge in edges:
+        key = edge_key(edge)
+        if key not in seen:
+            seen.add(key)
+            result.append(edge)
+    return result
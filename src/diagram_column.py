@@ -17,6 +17,8 @@ from src.utility import (
     embed_hjson_in_puml,
     extract_hjson_from_png,
     atomic_write_json,
+    save_backup_png,
+    get_data_file_format,
 )
 from src.requirement_graph import RequirementGraph
 from src.convert_puml_code import ConvertPumlCode
@@ -223,6 +225,11 @@ def _render_diagram(
     project = context.requirements.get("project", {})
     parameters_dict["max_concurrency"] = len(project.get("resources", []))
     parameters_dict["project"] = project
+    # CCPM 分析のキャッシュキー（仮IDを付加した場合はタイトルが変わるため区別する）
+    subgraph_revision = getattr(options.graph_data, "subgraph_revision", None)
+    if subgraph_revision is not None and getattr(options, "show_temp_id", False):
+        subgraph_revision += ":temp_id"
+    parameters_dict["graph_revision"] = subgraph_revision
 
     plantuml_code = ""
     # show_temp_id が ON の場合のみ、subgraphのエンティティに仮ID(#N)を付加
@@ -420,19 +427,13 @@ def _render_file_operations(
 
     if st.session_state.get("save_png", False):
         postfix_file = st.session_state.app_data[context.app_name]["postfix"]
-        os.makedirs("back", exist_ok=True)
         # hjsonデータをPlantUMLコメントとして埋め込んでからPNG生成
         source_data = load_source_data(st.session_state.get("file_path", ""))
         plantuml_code_with_hjson = embed_hjson_in_puml(plantuml_code, source_data)
         png_output = get_diagram(
             plantuml_code_with_hjson, context.config_data["plantuml"], png_out=True
         )
-        filename = (
-            datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            + f"_{postfix_file}.png"
-        )
-        with open(os.path.join("back", filename), "wb") as out:
-            out.write(png_output)
+        save_backup_png(postfix_file, png_output)
         st.session_state["save_png"] = False
 
     # --- PNGからインポート ---
@@ -470,7 +471,7 @@ def _render_file_operations(
                             f"{import_time_str}_{postfix}_imported.hjson"
                         )
                         import_path = os.path.join(DATA_DIR, import_filename)
-                        atomic_write_json(import_path, restored_data)
+                        atomic_write_json(import_path, restored_data, get_data_file_format())
 
                         # インポートしたファイルを開く
                         data_file_key = st.session_state.app_data[
@@ -0,0 +1,204 @@
+"""複数プロジェクトフィーバーチャートの Plotly 図の作成。
+
+プロジェクト数が多い場合（大規模ポートフォリオモード）は、図の JSON とブラウザの描画負荷を抑えるため
+- WebGL で描画する Scattergl を使う
+- 表示する進捗点（display_last_n_points 件）をサーバー側で間引いて LARGE_PORTFOLIO_MAX_POINTS 件以下にする
+- 値を小数1桁に丸め、凡例を省略する（プロジェクト名はホバーで表示）
+ゾーンの塗りつぶしは境界が直線のため、両端の2点だけのトレースをモジュール定数として1回だけ作る。
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import plotly.graph_objects as go
+except ImportError:
+    go = None
+
+# このプロジェクト数を超えると大規模ポートフォリオモードにする
+LARGE_PORTFOLIO_THRESHOLD = 50
+# 大規模ポートフォリオモードでの1プロジェクトあたりの最大表示点数
+LARGE_PORTFOLIO_MAX_POINTS = 12
+
+# ゾーン塗りつぶし（緑・黄・赤・グレー）と被らない配色
+PROJECT_COLORS = (
+    "#e6194b",  # 赤系
+    "#3cb44b",  # 緑系
+    "#4363d8",  # 青
+    "#f58231",  # オレンジ
+    "#911eb4",  # 紫
+    "#42d4f4",  # シアン
+    "#f032e6",  # マゼンタ
+    "#e6beff",  # ラベンダー
+    "#469990",  # ティール
+    "#dcbeff",  # ライトパープル
+    "#9a6324",  # ブラウン
+    "#800000",  # マルーン
+)
+
+_ZONE_X = (0, 100)
+# 緑/黄 境界: 0.6 * 進捗率 + 10、黄/赤 境界: 0.6 * 進捗率 + 25
+ZONE_TRACES: Tuple[Dict[str, Any], ...] = (
+    # 緑ゾーン
+    dict(
+        type="scatter", x=_ZONE_X, y=(10, 70), fill="tozeroy", fillcolor="rgba(144,238,144,0.3)",
+        line=dict(color="green", width=1), showlegend=False, hoverinfo="skip",
+    ),
+    # 黄ゾーン
+    dict(
+        type="scatter", x=_ZONE_X, y=(25, 85), fill="tonexty", fillcolor="rgba(255,255,150,0.3)",
+        line=dict(color="orange", width=1), showlegend=False, hoverinfo="skip",
+    ),
+    # 赤ゾーン（100%まで）
+    dict(
+        type="scatter", x=_ZONE_X, y=(100, 100), fill="tonexty", fillcolor="rgba(255,160,160,0.3)",
+        line=dict(width=0), showlegend=False, hoverinfo="skip",
+    ),
+)
+
+
+def _overflow_zone_trace(y_range_max: int) -> Dict[str, Any]:
+    """100%超えのグレーゾーン（赤ゾーンの直後に描画する）。"""
+    return dict(
+        type="scatter", x=_ZONE_X, y=(y_range_max, y_range_max), fill="tonexty",
+        fillcolor="rgba(200,200,200,0.3)", line=dict(width=0), showlegend=False, hoverinfo="skip",
+    )
+
+
+def get_marker_symbol(basis: str) -> str:
+    if basis == "タスクの総量に基づく":
+        return "square"
+    if basis == "クリティカルパスに基づく":
+        return "diamond"
+    if basis == "クリティカルチェーンに基づく":
+        return "star"
+    return "circle"  # 感覚に基づく
+
+
+def get_line_dash(basis: str) -> str:
+    if basis == "CC/CPから計算":
+        return "dash"
+    return "solid"  # プロジェクト期間から逆算
+
+
+def decimate_points(points: Sequence[Any], max_points: int) -> List[Any]:
+    """先頭と最新の点を残し、間の点をほぼ等間隔に間引いて max_points 件以下にする。"""
+    count = len(points)
+    if max_points <= 0 or count <= max_points:
+        return list(points)
+    if max_points == 1:
+        return [points[-1]]
+    step = (count - 1) / (max_points - 1)
+    indices = sorted({round(i * step) for i in range(max_points)})
+    return [points[i] for i in indices]
+
+
+def build_fever_figure(
+    project_points: Sequence[Tuple[Dict[str, Any], Sequence[Dict[str, Any]]]],
+    latest_n: int,
+    large: Optional[bool] = None,
+):
+    """フィーバーチャートの図を作成する。
+
+    Args:
+        project_points: (プロジェクト, 日付順の進捗点 {date, progress, memo, fever}) のリスト
+        latest_n: プロジェクトごとに表示する最新の点数（0 以下なら全件）
+        large: 大規模ポートフォリオモード（None ならプロジェクト数で自動判定）
+
+    Returns:
+        plotly の Figure（表示できる進捗点がなければ None）
+    """
+    if go is None:
+        raise ImportError("plotly がインストールされていません。")
+
+    # 事前にデータを収集し、max_buffer を計算する
+    series = []
+    max_buffer = 100.0
+    for project, points in project_points:
+        if latest_n > 0:
+            points = points[-latest_n:]
+        if not points:
+            continue
+        max_buffer = max(max_buffer, max(point["fever"]["buffer_used"] for point in points))
+        series.append((project, points))
+    if not series:
+        return None
+    if large is None:
+        large = len(series) > LARGE_PORTFOLIO_THRESHOLD
+
+    y_range_max = int(max_buffer + 9) // 10 * 10 + 10 if max_buffer > 100 else 100
+
+    # ゾーン塗りつぶしを先にすべて描画（tonexty が連続するように）
+    traces: List[Any] = list(ZONE_TRACES)
+    if y_range_max > 100:
+        traces.append(_overflow_zone_trace(y_range_max))
+
+    # プロジェクトのデータトレースを描画（ゾーンの上に重ねる）
+    for color_idx, (project, points) in enumerate(series):
+        name = project.get("name", project.get("id", ""))
+        color = PROJECT_COLORS[color_idx % len(PROJECT_COLORS)]
+        if large:
+            points = decimate_points(points, LARGE_PORTFOLIO_MAX_POINTS)
+        x = [point["fever"]["progress"] for point in points]
+        y = [point["fever"]["buffer_used"] for point in points]
+        marker = dict(
+            size=[11] * (len(points) - 1) + [18],
+            color=color,
+            symbol=get_marker_symbol(project.get("progress_basis", "")),
+        )
+        line = dict(
+            width=2 if large else 3,
+            color=color,
+            dash=get_line_dash(project.get("buffer_basis", "")),
+        )
+        if large:
+            # ホバー文字列は点ごとに持たず、トレース共通のテンプレートで組み立てる
+            traces.append(
+                go.Scattergl(
+                    x=[round(v, 1) for v in x],
+                    y=[round(v, 1) for v in y],
+                    mode="lines+markers",
+                    name=name,
+                    showlegend=False,
+                    marker=marker,
+                    line=line,
+                    text=[point["date"] for point in points],
+                    customdata=[point["memo"] for point in points],
+                    hovertemplate=(
+                        "%{fullData.name}<br>%{text}<br>進捗率: %{x:.1f}%<br>"
+                        "バッファ消費率: %{y:.1f}%<br>%{customdata}<extra></extra>"
+                    ),
+                )
+            )
+            continue
+        traces.append(
+            go.Scatter(
+                x=x,
+                y=y,
+                mode="lines+markers",
+                name=name,
+                marker=marker,
+                line=line,
+                hovertext=[
+                    (
+                        f"{name}<br>"
+                        f"{point['date']}<br>"
+                        f"進捗率: {point['progress']:.1f}%<br>"
+                        f"バッファ消費率: {point['fever']['buffer_used']:.1f}%<br>"
+                        f"{point['memo']}"
+                    )
+                    for point in points
+                ],
+                hoverinfo="text",
+            )
+        )
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        xaxis_title="進捗率 (%)",
+        yaxis_title="バッファ消費率 (%)",
+        xaxis=dict(range=[0, 100]),
+        yaxis=dict(range=[0, y_range_max]),
+        width=980,
+        height=700,
+        margin=dict(t=20, b=40, l=40, r=20),
+    )
+    return fig
@@ -0,0 +1,128 @@
+"""複数プロジェクトフィーバーチャート用の、プロジェクトごとの指標キャッシュ。
+
+プロジェクト一覧表・フィーバーチャート・サマリー表がそれぞれ同じプロジェクトの
+稼働日数と進捗点のフィーバー値を計算していた。
+プロジェクトの内容と共通祝日から決まるハッシュごとに1回だけ計算し、プロセス内の LRU キャッシュで共有する。
+変更のないプロジェクトは再計算しない。
+"""
+import datetime
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.ccpm_engine import calculate_portfolio_fever, calculate_working_days
+
+# 保持するプロジェクト指標の数
+CACHE_SIZE = 2048
+
+
+def project_revision(project: Dict[str, Any], common_holidays: Optional[List[Any]] = None) -> str:
+    """プロジェクトの内容と共通祝日から決まるリビジョン（SHA-256）を返す。"""
+    text = json.dumps(
+        [project, list(common_holidays or [])], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ProjectFeverMetrics:
+    """1つのプロジェクトの指標。
+
+    Attributes:
+        workdays: 開始日〜終了日の稼働日数（共通祝日のみ考慮、小数1桁に丸め）
+        buffer_days: バッファ日数（小数1桁に丸め）
+        buffer_percent: バッファ率
+        total_workdays: 開始日〜終了日の稼働日数（丸めなし）
+        points: 進捗点 {date, progress, memo, fever} の日付順リスト
+
+    結果は複数の呼び出し元で共有されるため、変更しないこと。
+    """
+
+    def __init__(
+        self,
+        project: Dict[str, Any],
+        common_holidays: Optional[List[Any]],
+        fever_columns: Dict[str, Any],
+    ):
+        self._end = project.get("end", "")
+        self._common_holidays = list(common_holidays or [])
+        self.total_workdays = calculate_working_days(
+            project.get("start", ""), self._end, self._common_holidays
+        )
+        self.buffer_percent = float(project.get("buffer_percent", 30.0) or 30.0)
+        buffer_days = (
+            self.total_workdays * (self.buffer_percent / 100.0) if self.total_workdays > 0 else 0.0
+        )
+        self.workdays = round(self.total_workdays, 1)
+        self.buffer_days = round(buffer_days, 1)
+
+        rows = zip(*(values.tolist() for values in fever_columns.values()))
+        points = [
+            {
+                "date": str(point.get("date", "")),
+                "progress": float(point.get("progress", 0) or 0),
+                "memo": str(point.get("memo", "")),
+                "fever": dict(zip(fever_columns.keys(), row)),
+            }
+            for point, row in zip(project.get("progress", []), rows)
+        ]
+        self.points: List[Dict[str, Any]] = sorted(points, key=lambda item: item["date"])
+        self._remaining_days: Dict[datetime.date, int] = {}
+
+    def remaining_days(self, today: Optional[datetime.date] = None) -> int:
+        """today から終了日までの稼働日数（0 以上、日付ごとに1回だけ計算）。"""
+        today = today or datetime.date.today()
+        days = self._remaining_days.get(today)
+        if days is None:
+            days = int(
+                max(0, round(calculate_working_days(today, self._end, self._common_holidays), 0))
+            )
+            self._remaining_days[today] = days
+        return days
+
+
+_cache: "OrderedDict[str, ProjectFeverMetrics]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_project_metrics(
+    projects: List[Dict[str, Any]],
+    common_holidays: Optional[List[Any]] = None,
+) -> List[ProjectFeverMetrics]:
+    """プロジェクトごとにキャッシュした指標を projects の順に返す。
+
+    キャッシュにないプロジェクトの進捗点は、まとめて calculate_portfolio_fever で計算する。
+    """
+    revisions = [project_revision(project, common_holidays) for project in projects]
+    metrics: List[Optional[ProjectFeverMetrics]] = []
+    with _cache_lock:
+        for revision in revisions:
+            cached = _cache.get(revision)
+            if cached is not None:
+                _cache.move_to_end(revision)
+            metrics.append(cached)
+
+    missing: List[Tuple[int, Dict[str, Any]]] = [
+        (i, project) for i, project in enumerate(projects) if metrics[i] is None
+    ]
+    if missing:
+        fevers = calculate_portfolio_fever([project for _, project in missing], common_holidays)
+        computed = {}
+        for (i, project), columns in zip(missing, fevers):
+            metrics[i] = computed[revisions[i]] = ProjectFeverMetrics(
+                project, common_holidays, columns
+            )
+        with _cache_lock:
+            _cache.update(computed)
+            for revision in computed:
+                _cache.move_to_end(revision)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return metrics
+
+
+def clear_project_metrics_cache():
+    """キャッシュしたプロジェクト指標をすべて破棄する。"""
+    with _cache_lock:
+        _cache.clear()
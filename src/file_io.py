@@ -1,13 +1,23 @@
 """ファイル入出力・設定管理。"""
 import streamlit as st
 import hjson
+import json
 import os
 import shutil
 import datetime
-import copy
 import tempfile
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+from src.backup_janitor import CleanupReport, get_backup_janitor
+from src.backup_index import (
+    KIND_HJSON,
+    KIND_PNG,
+    BackupIndex,
+    compute_content_hash,
+    get_backup_index,
+)
+from src.backup_journal import BackupJournal, DEFAULT_SNAPSHOT_INTERVAL
+from src.write_behind import WriteBehindWriter, get_active_writer, get_write_behind_writer
 
 
 
@@ -72,6 +82,18 @@ def save_config(config_data: dict):
         st.error(f"設定ファイルの保存に失敗しました: {e}")
 
 
+def is_config_enabled(config_data: dict, key: str, default: bool = False) -> bool:
+    """設定値を真偽値として解釈する。
+
+    Setting画面のテキスト入力経由で "True" / "false" などの文字列として
+    保存されている場合も考慮する。
+    """
+    value = config_data.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "on")
+    return bool(value)
+
+
 def get_default_data_structure() -> Dict:
     """新規データファイル用のデフォルト構造を返す。"""
     return {"nodes": [], "edges": []}
@@ -115,19 +137,28 @@ def load_source_data(file_path: str) -> Dict:
     Returns:
         Dict: 元データの辞書
     """
-    from src.text_helpers import recursive_unescape
+    # write-behind で未書き込みの保存があれば、ディスクより新しいのでそちらを返す
+    pending = _pending_source_data(file_path)
+    if pending is not None:
+        return pending
 
     if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            try:
-                source_data = hjson.load(f)
-            except Exception as e:
-                st.error(f"JSONファイルの読み込みに失敗しました: {file_path}\nError: {e}")
-                return []
+        try:
+            source_data = read_data_file(file_path)
+        except Exception as e:
+            st.error(f"JSONファイルの読み込みに失敗しました: {file_path}\nError: {e}")
+            return []
     else:
         # 存在しない場合は空で始める
         source_data = []
 
+    return normalize_source_data(source_data)
+
+
+def normalize_source_data(source_data: Any) -> Dict:
+    """読み込んだ元データを現行フォーマットに変換し、改行のエスケープを解除する。"""
+    from src.text_helpers import recursive_unescape
+
     # 古いフォーマットのデータを新しいフォーマットに変換
     if isinstance(source_data, list):
         temp_data = {"nodes": [], "edges": []}
@@ -145,9 +176,7 @@ def load_source_data(file_path: str) -> Dict:
         source_data = temp_data
 
     # データロード時に一括で改行のエスケープを解除する
-    source_data = recursive_unescape(source_data)
-
-    return source_data
+    return recursive_unescape(source_data)
 
 
 def update_source_data(file_path: str, source_data: Dict):
@@ -157,54 +186,127 @@ def update_source_data(file_path: str, source_data: Dict):
         file_path (str): 保存先ファイルのパス
         source_data (Dict): 保存する元データ
     """
-    from src.data_helpers import make_hashable
+    from src.data_helpers import dedup_edges
 
-    # --- 最後に使用したページをconfigに保存 ---
+    # --- 最後に使用したページをconfigに保存（値が変わった場合のみ書き込む） ---
     if "app_name" in st.session_state and "config_data" in st.session_state:
         current_app_name = st.session_state.app_name
         # config.hjsonに書き込むキーをapp.pyと合わせる
         LAST_USED_PAGE_KEY = "last_used_page"
-        st.session_state.config_data[LAST_USED_PAGE_KEY] = current_app_name
-        save_config(st.session_state.config_data)
+        if st.session_state.config_data.get(LAST_USED_PAGE_KEY) != current_app_name:
+            st.session_state.config_data[LAST_USED_PAGE_KEY] = current_app_name
+            save_config(st.session_state.config_data)
 
     # list内の辞書型データをunique_id順に並び替える
+    # （保存済みデータはほぼ整列済みのため、安定ソートはほぼ線形時間で終わる）
     source_data["nodes"].sort(key=lambda x: x["unique_id"])
     source_data["edges"].sort(key=lambda x: x["source"])
 
-    # Remove duplicated edges
-    seen_edges = set()
-    temp_edges = copy.deepcopy(source_data["edges"])
-    filtered_edges = []
-    for temp_edge in temp_edges:
-        # Convert edge dict to hashable tuple
-        edge_tuple = make_hashable(temp_edge)
-
-        if edge_tuple not in seen_edges:
-            seen_edges.add(edge_tuple)
-            filtered_edges.append(temp_edge)
+    # 重複した接続を取り除く
+    # （RequirementManager は追加時に重複を弾くため、ここは直接編集された場合の保険）
+    source_data["edges"] = dedup_edges(source_data["edges"])
 
-    source_data["edges"] = filtered_edges
+    postfix_file = st.session_state.app_data[st.session_state.app_name]["postfix"]
+    save_options = _save_options()
+
+    if _is_write_behind_mode():
+        # write-behind: メモリ上のデータを正とし、短時間の連続保存を1回の書き込みにまとめる
+        writer = _write_behind_writer()
+        error = writer.pop_error()
+        if error is not None:
+            st.error(f"データファイルの保存に失敗しました（再試行します）: {error}")
+        content_hash = compute_content_hash(source_data)
+        previous = writer.pending_context(file_path)
+        if previous is not None:
+            previous_hash = previous.get("content_hash")
+        else:
+            previous_hash = _latest_backup_hash(postfix_file)
+        writer.submit(
+            file_path,
+            source_data,
+            {"postfix": postfix_file, "content_hash": content_hash, **save_options},
+        )
+        if content_hash != previous_hash:
+            st.session_state["save_png"] = True
+        return
 
-    atomic_write_json(file_path, source_data)
+    atomic_write_json(file_path, source_data, save_options["file_format"])
 
     # for backup
-    postfix_file = st.session_state.app_data[st.session_state.app_name]["postfix"]
-    os.makedirs("back", exist_ok=True)
-    filename = (
-        datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{postfix_file}.hjson"
+    if _write_backup(postfix_file, source_data, **save_options):
+        # 変更に合わせてPNG画像を保存（内容が直前のバックアップと同一なら不要）
+        st.session_state["save_png"] = True
+
+
+def _persist_pending_source_data(file_path: str, source_data: Dict, context: Dict):
+    """write-behind で保留していた保存を書き込む（バックグラウンドスレッドから呼ばれる）。"""
+    file_format = context.get("file_format", "hjson")
+    atomic_write_json(file_path, source_data, file_format)
+    _write_backup(
+        context["postfix"],
+        source_data,
+        journal_mode=context.get("journal_mode", False),
+        snapshot_interval=context.get("snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL),
+        file_format=file_format,
+        content_hash=context.get("content_hash"),
     )
-    atomic_write_json(os.path.join("back", filename), source_data)
 
-    # 変更に合わせてPNG画像を保存
-    st.session_state["save_png"] = True
 
+def _is_write_behind_mode() -> bool:
+    """保存を write-behind でまとめて書き込む設定かどうかを返す。"""
+    return is_config_enabled(st.session_state.get("config_data", {}), "write_behind")
+
+
+def _write_behind_writer() -> WriteBehindWriter:
+    """設定の待ち時間を反映した write-behind ライターを返す。"""
+    config_data = st.session_state.get("config_data", {})
+    try:
+        delay = float(config_data.get("write_behind_delay_ms", 1000)) / 1000
+        max_delay = float(config_data.get("write_behind_max_delay_ms", 5000)) / 1000
+    except (TypeError, ValueError):
+        delay, max_delay = 1.0, 5.0
+    return get_write_behind_writer(_persist_pending_source_data, delay, max_delay)
+
+
+def _pending_source_data(file_path: str) -> Optional[Dict]:
+    """write-behind で未書き込みのデータがあれば返す。"""
+    writer = get_active_writer()
+    if writer is None:
+        return None
+    return writer.pending_data(file_path)
+
+
+def get_pending_write_revision(file_path: str) -> int:
+    """write-behind で未書き込みの保存のリビジョン番号を返す（なければ 0）。
+
+    データ読み込みのキャッシュキーに含め、未書き込みの変更を反映させるために使う。
+    """
+    writer = get_active_writer()
+    return writer.revision(file_path) if writer is not None else 0
+
+
+def flush_pending_writes(file_path: Optional[str] = None) -> bool:
+    """write-behind で未書き込みの保存を直ちに書き込む。
+
+    Args:
+        file_path (str, optional): 対象のファイル。None の場合はすべて。
 
-def atomic_write_json(file_path: str, data: Any):
+    Returns:
+        bool: すべて書き込みに成功した場合 True
+    """
+    writer = get_active_writer()
+    if writer is None:
+        return True
+    return writer.flush(file_path)
+
+
+def atomic_write_json(file_path: str, data: Any, file_format: str = "hjson"):
     """データをJSONファイルにアトミックに書き込む。
 
     Args:
         file_path (str): 保存先ファイルのパス
         data (Any): 書き込むデータ
+        file_format (str): 出力形式（"hjson" / "json" / "json_compact"）
     """
     dir_name = os.path.dirname(file_path) or "."
     # 同じディレクトリに一時ファイルを作成
@@ -213,7 +315,7 @@ def atomic_write_json(file_path: str, data: Any):
     ) as tf:
         temp_path = tf.name
         try:
-            hjson.dump(data, tf, ensure_ascii=False, indent=4)
+            _dump_data(data, tf, file_format)
             tf.flush()
             os.fsync(tf.fileno())
         except Exception:
@@ -230,36 +332,266 @@ def atomic_write_json(file_path: str, data: Any):
         raise
 
 
-def _cleanup_old_backups():
-    """設定された保持日数を超えた古いバックアップファイルを削除する。
+# データファイル・バックアップの出力形式
+# - hjson: インデント付きHJSON（従来形式。手編集向けだが書き込みは遅い）
+# - json: インデント付きJSON（C実装のエンコーダで高速）
+# - json_compact: 空白なしのJSON（最速・最小）
+DATA_FILE_FORMATS = ("hjson", "json", "json_compact")
+
+
+def _dump_data(data: Any, f, file_format: str):
+    """指定形式でデータをファイルオブジェクトに書き込む。"""
+    if file_format == "json_compact":
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    elif file_format == "json":
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    else:
+        hjson.dump(data, f, ensure_ascii=False, indent=4)
 
-    ファイル名のタイムスタンプ（YYYYMMDD_HHMMSS）を基準に判定する。
-    hjsonとpngの両方を対象とする。
+
+def get_data_file_format() -> str:
+    """設定 `data_file_format` の値を返す（不正な値は "hjson" とみなす）。"""
+    config_data = st.session_state.get("config_data", {})
+    file_format = str(config_data.get("data_file_format", "hjson")).strip().lower()
+    return file_format if file_format in DATA_FILE_FORMATS else "hjson"
+
+
+def read_data_file(file_path: str) -> Any:
+    """データファイルを読み込む。
+
+    JSONはHJSONのサブセットのため、まずC実装の json で高速に読み込み、
+    失敗した場合（HJSON形式のファイル）に hjson で読み込む。
     """
-    back_dir = "back"
-    if not os.path.isdir(back_dir):
-        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return hjson.loads(text)
 
-    retention_days = st.session_state.get("config_data", {}).get(
-        "backup_retention_days", 30
-    )
-    cutoff = datetime.datetime.now() - datetime.timedelta(days=retention_days)
-
-    for f in os.listdir(back_dir):
-        if not (f.endswith(".hjson") or f.endswith(".png")):
-            continue
-        # タイムスタンプをファイル名から取得（先頭15文字: YYYYMMDD_HHMMSS）
-        if len(f) < 15:
-            continue
+
+def _backup_index() -> BackupIndex:
+    """`back/` のバックアップインデックスを返す。"""
+    return get_backup_index("back")
+
+
+def _backup_content_hash(postfix: str, timestamp: str) -> Optional[str]:
+    """バックアップの内容ハッシュを返す。
+
+    インデックスに記録がなければバックアップを読み込んで計算し、記録しておく。
+    """
+    index = _backup_index()
+    content_hash = index.get_hash(postfix, timestamp)
+    if content_hash is None:
+        data = load_backup_data(f"{timestamp}_{postfix}.hjson")
+        if data is None:
+            return None
+        content_hash = compute_content_hash(data)
+        index.set_hash(postfix, timestamp, content_hash)
+    return content_hash
+
+
+def _save_options() -> Dict[str, Any]:
+    """設定から保存形式とバックアップ方式（ジャーナル方式か・スナップショット間隔）を取得する。"""
+    config_data = st.session_state.get("config_data", {})
+    return {
+        "journal_mode": config_data.get("backup_mode", "full") == "journal",
+        "snapshot_interval": config_data.get(
+            "backup_snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL
+        ),
+        "file_format": get_data_file_format(),
+    }
+
+
+def _latest_backup_hash(postfix: str) -> Optional[str]:
+    """postfix の最新バックアップの内容ハッシュを返す（バックアップがなければ None）。"""
+    if not os.path.isdir("back"):
+        return None
+    latest = _backup_index().list_timestamps(postfix)[:1]
+    return _backup_content_hash(postfix, latest[0]) if latest else None
+
+
+def _write_backup(
+    postfix: str,
+    data: Dict,
+    journal_mode: bool = False,
+    snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    file_format: str = "hjson",
+    content_hash: Optional[str] = None,
+) -> bool:
+    """バックアップを書き込む（st.session_state に依存しない）。
+
+    内容が直前のバックアップと同一（正規化ハッシュが一致）の場合は保存しない。
+
+    Returns:
+        bool: バックアップを保存した場合 True、同一内容のため省略した場合 False
+    """
+    os.makedirs("back", exist_ok=True)
+    index = _backup_index()
+    index.refresh()
+    content_hash = content_hash or compute_content_hash(data)
+    if _latest_backup_hash(postfix) == content_hash:
+        return False
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    if journal_mode:
+        # ジャーナル方式: スナップショット＋差分を追記する
+        BackupJournal("back", postfix, snapshot_interval).append(timestamp, data)
+    else:
+        filename = f"{timestamp}_{postfix}.hjson"
+        atomic_write_json(os.path.join("back", filename), data, file_format)
+    index.add(postfix, KIND_HJSON, timestamp, content_hash)
+    return True
+
+
+def save_backup_data(postfix: str, data: Dict) -> bool:
+    """データのバックアップを `back/` に保存し、インデックスに登録する。
+
+    設定 `backup_mode` が "journal" の場合はジャーナルに追記し、
+    それ以外は `<timestamp>_<postfix>.hjson` としてフルコピーを保存する。
+    内容が直前のバックアップと同一（正規化ハッシュが一致）の場合は保存しない。
+
+    Args:
+        postfix (str): ページごとのバックアップ識別子
+        data (Dict): 保存するデータ
+
+    Returns:
+        bool: バックアップを保存した場合 True、同一内容のため省略した場合 False
+    """
+    return _write_backup(postfix, data, **_save_options())
+
+
+def save_backup_png(postfix: str, png_data: bytes):
+    """図のPNG画像を `back/` に保存し、インデックスに登録する。
+
+    Args:
+        postfix (str): ページごとのバックアップ識別子
+        png_data (bytes): PNG画像のバイト列
+    """
+    os.makedirs("back", exist_ok=True)
+    index = _backup_index()
+    index.refresh()
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(os.path.join("back", f"{timestamp}_{postfix}.png"), "wb") as out:
+        out.write(png_data)
+    index.add(postfix, KIND_PNG, timestamp)
+
+
+def _open_backup_journal(postfix: str) -> BackupJournal:
+    """postfix に対応するバックアップジャーナルを返す。"""
+    return BackupJournal("back", postfix, _save_options()["snapshot_interval"])
+
+
+def _split_backup_name(backup_name: str):
+    """バックアップ名（例: "20260228_180000_ccpm.hjson"）をタイムスタンプとpostfixに分解する。"""
+    base = backup_name[: -len(".hjson")] if backup_name.endswith(".hjson") else backup_name
+    return base[:15], base[16:]
+
+
+def _list_backup_names(postfix: str) -> List[str]:
+    """postfix のバックアップ名（ファイル・ジャーナル両方）を新しい順に返す。"""
+    if not os.path.isdir("back"):
+        return []
+    return _backup_index().list_names(postfix)
+
+
+def load_backup_data(backup_name: str) -> Optional[Dict]:
+    """バックアップ名からデータを読み込む。
+
+    `back/` にファイルがあればそれを読み込み、なければジャーナルから復元する。
+
+    Args:
+        backup_name (str): バックアップ名（例: "20260228_180000_ccpm.hjson"）
+
+    Returns:
+        Optional[Dict]: 復元したデータ。見つからない場合は None。
+    """
+    backup_path = os.path.join("back", backup_name)
+    if os.path.exists(backup_path):
+        return load_source_data(backup_path)
+    timestamp, postfix = _split_backup_name(backup_name)
+    if not postfix:
+        return None
+    return _open_backup_journal(postfix).reconstruct(timestamp)
+
+
+def _restore_backup(backup_name: str, dst: str) -> bool:
+    """バックアップを dst に書き戻す。"""
+    backup_path = os.path.join("back", backup_name)
+    if os.path.exists(backup_path):
+        shutil.copy(backup_path, dst)
+        return True
+    data = load_backup_data(backup_name)
+    if data is None:
+        return False
+    atomic_write_json(dst, data, get_data_file_format())
+    return True
+
+
+def _remove_backup(backup_name: str):
+    """バックアップ（ファイル・ジャーナルの最新エントリ）を削除する。"""
+    index = _backup_index()
+    index.refresh()
+    timestamp, postfix = _split_backup_name(backup_name)
+    backup_path = os.path.join("back", backup_name)
+    if os.path.exists(backup_path):
+        os.remove(backup_path)
+    journal = _open_backup_journal(postfix)
+    if os.path.exists(journal.path):
+        timestamps = journal.timestamps()
+        if timestamps and timestamps[-1] == timestamp:
+            journal.remove_last()
+    index.remove(postfix, KIND_HJSON, [timestamp])
+
+
+def _remove_backup_png(png_path: str):
+    """PNGバックアップを削除する。"""
+    index = _backup_index()
+    index.refresh()
+    if os.path.exists(png_path):
+        os.remove(png_path)
+    timestamp, postfix = _split_backup_name(os.path.basename(png_path)[: -len(".png")])
+    index.remove(postfix, KIND_PNG, [timestamp])
+
+
+def _backup_cleanup_settings() -> tuple:
+    """設定からクリーンアップのパラメータ（保持日数, 件数上限, 実行間隔[分]）を取得する。"""
+    config_data = st.session_state.get("config_data", {})
+
+    def _number(key, default):
         try:
-            file_time = datetime.datetime.strptime(f[:15], "%Y%m%d_%H%M%S")
-        except ValueError:
-            continue
-        if file_time < cutoff:
-            try:
-                os.remove(os.path.join(back_dir, f))
-            except OSError:
-                pass
+            return float(config_data.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    return (
+        _number("backup_retention_days", 30),
+        int(_number("backup_max_count_per_postfix", 0)),
+        _number("backup_cleanup_interval_minutes", 60),
+    )
+
+
+def _cleanup_old_backups() -> CleanupReport:
+    """設定された保持日数・件数上限を超えた古いバックアップを同期的に削除する。
+
+    hjson・png・ジャーナルのエントリを対象とする。
+
+    Returns:
+        CleanupReport: 削除件数と解放したバイト数
+    """
+    retention_days, max_count, _interval = _backup_cleanup_settings()
+    return get_backup_janitor("back").run_now(retention_days, max_count)
+
+
+def _schedule_backup_cleanup() -> bool:
+    """前回から設定間隔以上経過していれば、バックグラウンドでクリーンアップを開始する。"""
+    retention_days, max_count, interval = _backup_cleanup_settings()
+    return get_backup_janitor("back").schedule(retention_days, max_count, interval)
+
+
+def get_last_backup_cleanup_report() -> Optional[CleanupReport]:
+    """直近のバックアップクリーンアップの結果を返す（未実行なら None）。"""
+    return get_backup_janitor("back").last_report
 
 
 def get_backup_files_for_current_data():
@@ -273,18 +605,13 @@ def get_backup_files_for_current_data():
     if st.session_state.pop("need_full_rerun", False):
         st.rerun(scope="app")
 
-    # 古いバックアップを自動クリーンアップ
-    _cleanup_old_backups()
+    # 古いバックアップのクリーンアップはバックグラウンドで間隔を空けて実行する
+    _schedule_backup_cleanup()
 
-    # バックアップファイルのリストを取得
-    backup_files = [
-        f
-        for f in os.listdir("back")
-        if os.path.isfile(os.path.join("back", f))
-        and f.endswith(".hjson")
-        and st.session_state.app_data[st.session_state.app_name]["postfix"] in f
-    ]
-    backup_files.sort(reverse=True)
+    # バックアップファイルのリストを取得（ジャーナルのエントリも含む）
+    backup_files = _list_backup_names(
+        st.session_state.app_data[st.session_state.app_name]["postfix"]
+    )
     backup_files.insert(0, "バックアップから読込")
     return backup_files
 
@@ -302,9 +629,9 @@ def copy_file():
     if src == "バックアップから読込":
         return
     dst = st.session_state["file_path"]
-    src = os.path.join("back", src)
-    if os.path.exists(src):
-        shutil.copy(src, dst)
+    # 未書き込みの保存が復元後に上書きしないよう、先に書き込んでおく
+    flush_pending_writes(dst)
+    if _restore_backup(src, dst):
         # @st.fragment 内からの呼び出しでもページ全体を再描画するためフラグを設定
         st.session_state["need_full_rerun"] = True
 
@@ -313,40 +640,43 @@ def undo_last_change() -> bool:
     """直前の変更を取り消し、1つ前のバックアップに戻す。
 
     最新のバックアップは現在の保存状態と同一なので、
-    2番目に新しいバックアップを現在のファイルにコピーする。
+    それより古いバックアップのうち内容が異なる最新のものを現在のファイルにコピーする。
+    間にある同一内容のバックアップは最新のものと合わせて削除する。
 
     Returns:
         True: 復元成功, False: 復元するバックアップが見つからない
     """
     postfix = st.session_state.app_data[st.session_state.app_name]["postfix"]
-    back_dir = "back"
-    if not os.path.isdir(back_dir):
-        return False
+    dst = st.session_state["file_path"]
+    # 未書き込みの保存をバックアップに反映してから1つ前の状態を探す
+    flush_pending_writes(dst)
 
-    # 現在のページ用のバックアップを新しい順に取得
-    backup_files = sorted(
-        [
-            f for f in os.listdir(back_dir)
-            if f.endswith(".hjson") and postfix in f
-        ],
-        reverse=True,
-    )
+    # 現在のページ用のバックアップを新しい順に取得（ジャーナルのエントリも含む）
+    backup_files = _list_backup_names(postfix)
 
     # 2番目に新しいバックアップ（= 1つ前の状態）を探す
     if len(backup_files) < 2:
         return False
 
-    latest_backup = os.path.join(back_dir, backup_files[0])
-    prev_backup = os.path.join(back_dir, backup_files[1])
-    dst = st.session_state["file_path"]
-    if os.path.exists(prev_backup):
-        shutil.copy(prev_backup, dst)
-        # Undoを複数回可能にするため、最新のバックアップを削除する
+    # 最新と同一内容のスナップショットは読み飛ばす
+    latest_hash = _backup_content_hash(postfix, _split_backup_name(backup_files[0])[0])
+    target = 1
+    while (
+        latest_hash is not None
+        and target < len(backup_files) - 1
+        and _backup_content_hash(postfix, _split_backup_name(backup_files[target])[0])
+        == latest_hash
+    ):
+        target += 1
+
+    if _restore_backup(backup_files[target], dst):
+        # Undoを複数回可能にするため、復元したもの以降のバックアップを新しい順に削除する
         try:
-            os.remove(latest_backup)
-            png_to_delete = _find_closest_backup_png(backup_files[0])
-            if png_to_delete and os.path.exists(png_to_delete):
-                os.remove(png_to_delete)
+            for backup_name in backup_files[:target]:
+                png_to_delete = _find_closest_backup_png(backup_name)
+                _remove_backup(backup_name)
+                if png_to_delete:
+                    _remove_backup_png(png_to_delete)
         except OSError:
             pass
         return True
@@ -365,40 +695,11 @@ def _find_closest_backup_png(hjson_filename: str) -> str:
     Returns:
         PNGファイルのパス。見つからない場合は空文字列。
     """
-    # postfix部分を抽出（例: "_ccpm" を取得）
-    base = hjson_filename.replace(".hjson", "")
-    # タイムスタンプ部分を抽出（先頭15文字: YYYYMMDD_HHMMSS）
-    if len(base) < 15:
-        return ""
-    ts_str = base[:15]
-    postfix = base[15:]  # 例: "_ccpm"
-
-    try:
-        hjson_time = datetime.datetime.strptime(ts_str, "%Y%m%d_%H%M%S")
-    except ValueError:
+    if not os.path.isdir("back"):
         return ""
-
-    # 同じpostfixのPNGファイルを検索
-    best_path = ""
-    best_diff = datetime.timedelta(seconds=6)  # 5秒超は不採用
-    back_dir = "back"
-    if not os.path.isdir(back_dir):
-        return ""
-
-    for f in os.listdir(back_dir):
-        if not f.endswith(f"{postfix}.png"):
-            continue
-        f_ts_str = f[:15]
-        try:
-            f_time = datetime.datetime.strptime(f_ts_str, "%Y%m%d_%H%M%S")
-        except ValueError:
-            continue
-        diff = abs(f_time - hjson_time)
-        if diff < best_diff:
-            best_diff = diff
-            best_path = os.path.join(back_dir, f)
-
-    return best_path
+    timestamp, postfix = _split_backup_name(hjson_filename)
+    png_name = _backup_index().closest_png(postfix, timestamp, max_diff_seconds=5)
+    return os.path.join("back", png_name) if png_name else ""
 
 
 def show_backup_diff_preview(current_data: Dict):
@@ -412,17 +713,20 @@ def show_backup_diff_preview(current_data: Dict):
         return
 
     backup_path = os.path.join("back", selected)
-    if not os.path.exists(backup_path):
-        return
 
     try:
-        backup_data = load_source_data(backup_path)
+        backup_data = load_backup_data(selected)
     except Exception:
         return
 
     if not isinstance(backup_data, dict) or not isinstance(current_data, dict):
         return
 
+    # 内容ハッシュが一致すれば個別の差分計算をせずに同一と判定する
+    timestamp, postfix = _split_backup_name(selected)
+    backup_hash = _backup_index().get_hash(postfix, timestamp) or compute_content_hash(backup_data)
+    identical = backup_hash == compute_content_hash(current_data)
+
     # エンティティ名の取得（title > text > id > unique_id の優先順でラベルを取得）
     def _node_label(node: Dict) -> str:
         return (
@@ -442,8 +746,10 @@ def show_backup_diff_preview(current_data: Dict):
     edge_diff = len(bak_edges) - len(cur_edges)
 
     # 差分サマリの構築
-    if not added_ids and not removed_ids and edge_diff == 0:
+    if identical:
         summary = "📋 現在のデータと同一です"
+    elif not added_ids and not removed_ids and edge_diff == 0:
+        summary = "📋 エンティティ・接続の増減はありません（内容の変更あり）"
     else:
         parts = []
         if added_ids:
@@ -117,11 +117,11 @@ def add_operate_buttons(
                     if edge.get("source") == selected_unique_id:
                         new_edge = copy.deepcopy(edge)
                         new_edge["source"] = new_unique_id
-                        requirement_manager.requirements["edges"].append(new_edge)
+                        requirement_manager.add_edge(new_edge)
                     elif edge.get("destination") == selected_unique_id:
                         new_edge = copy.deepcopy(edge)
                         new_edge["destination"] = new_unique_id
-                        requirement_manager.requirements["edges"].append(new_edge)
+                        requirement_manager.add_edge(new_edge)
 
                 update_source_data(file_path, requirement_manager.requirements)
                 st.query_params.selected = new_unique_id
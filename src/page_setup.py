@@ -15,7 +15,10 @@ from src.utility import (
     build_sorted_list,
     build_and_list,
     update_source_data,
+    is_config_enabled,
+    get_pending_write_revision,
 )
+from src.data_cache import load_with_sidecar
 from src.constants import AppName, EdgeType  # 追加
 from src.diagram_configs import DEFAULT_ENTITY_GETTERS  # 追加
 from src.diagram_column import draw_diagram_column, DiagramContext, DiagramOptions  # 追加
@@ -97,17 +100,17 @@ def initialize_page(app_name: str):
     return color_list, config_data, app_data
 
 
-@st.cache_data
-def load_graph_data(file_path: str, mtime: float, app_name: str) -> GraphData:
-    """データの読み込みとグラフ構築をキャッシュ付きで実行する。
+def _build_graph_payload(file_path: str, app_name: str) -> Dict[str, Any]:
+    """データを読み込み、表示ラベルやマッピングなどの前処理結果を構築する。
+
+    サイドカーキャッシュに保存できるよう、pickle可能な dict/list のみで構成する。
 
     Args:
         file_path (str): HJSONファイルパス
-        mtime (float): ファイル更新時刻（キャッシュ無効化用）
         app_name (str): アプリケーション名
 
     Returns:
-        GraphData: 構築済みのグラフデータ
+        Dict[str, Any]: 正規化済みデータとマッピング類
     """
     requirement_data = load_source_data(file_path)
     nodes = requirement_data["nodes"]
@@ -160,25 +163,63 @@ def load_graph_data(file_path: str, mtime: float, app_name: str) -> GraphData:
         else:
             node["_display_label"] = key_val
 
+    # 変数名は既存との互換性のため id_title_dict としているが、実際は _display_label を用いている
+    return {
+        "requirement_data": requirement_data,
+        "id_title_dict": build_mapping(nodes, "_display_label", "unique_id", add_empty=True, empty_key="--- 未選択 ---", empty_value="default"),
+        "unique_id_dict": build_mapping(nodes, "unique_id", "_display_label", add_empty=True, empty_key="default", empty_value="--- 未選択 ---"),
+        "id_title_list": build_sorted_list(nodes, "_display_label", prepend=["--- 未選択 ---"]),
+        "add_list": build_and_list(edges, prepend=["None", "New"]),
+    }
+
+
+@st.cache_data
+def load_graph_data(
+    file_path: str,
+    mtime: float,
+    app_name: str,
+    use_sidecar: bool = True,
+    pending_revision: int = 0,
+) -> GraphData:
+    """データの読み込みとグラフ構築をキャッシュ付きで実行する。
+
+    Args:
+        file_path (str): HJSONファイルパス
+        mtime (float): ファイル更新時刻（キャッシュ無効化用）
+        app_name (str): アプリケーション名
+        use_sidecar (bool): サイドカーキャッシュ（.rvcache）を利用するか
+        pending_revision (int): write-behind で未書き込みの保存のリビジョン（キャッシュ無効化用）
+
+    Returns:
+        GraphData: 構築済みのグラフデータ
+    """
+    # 未書き込みの保存がある場合はディスク上のファイルが古いため、サイドカーは使わない
+    if use_sidecar and not pending_revision:
+        payload = load_with_sidecar(
+            file_path, app_name, lambda: _build_graph_payload(file_path, app_name)
+        )
+    else:
+        payload = _build_graph_payload(file_path, app_name)
+
+    requirement_data = payload["requirement_data"]
     requirement_manager = RequirementManager(requirement_data)
     graph_data = RequirementGraph(requirement_data, app_name)
-    
-    # 変数名は既存との互換性のため id_title_dict としているが、実際は _display_label を用いている
-    id_title_dict = build_mapping(nodes, "_display_label", "unique_id", add_empty=True, empty_key="--- 未選択 ---", empty_value="default")
-    unique_id_dict = build_mapping(nodes, "unique_id", "_display_label", add_empty=True, empty_key="default", empty_value="--- 未選択 ---")
-    id_title_list = build_sorted_list(nodes, "_display_label", prepend=["--- 未選択 ---"])
-    add_list = build_and_list(edges, prepend=["None", "New"])
+    if app_name == AppName.CCPM:
+        # 分析結果のキャッシュを引くたびにグラフ全体をハッシュしないよう、読み込み時に1回だけ計算する
+        from src.ccpm_analysis import graph_revision
+
+        graph_data.revision = graph_revision(graph_data.graph)
 
     return GraphData(
         requirement_data=requirement_data,
-        nodes=nodes,
-        edges=edges,
+        nodes=requirement_data["nodes"],
+        edges=requirement_data["edges"],
         requirement_manager=requirement_manager,
         graph_data=graph_data,
-        id_title_dict=id_title_dict,
-        unique_id_dict=unique_id_dict,
-        id_title_list=id_title_list,
-        add_list=add_list,
+        id_title_dict=payload["id_title_dict"],
+        unique_id_dict=payload["unique_id_dict"],
+        id_title_list=payload["id_title_list"],
+        add_list=payload["add_list"],
     )
 
 
@@ -192,7 +233,13 @@ def load_and_prepare_data(file_path, app_name):
     # キャッシュされたデータをロード
     # キャッシュ済みオブジェクトを直接変更すると他のレンダリングに影響するため、
     # ディープコピーしてから使用する
-    gd = copy.deepcopy(load_graph_data(file_path, mtime, app_name))
+    use_sidecar = is_config_enabled(
+        st.session_state.get("config_data", {}), "data_cache", default=True
+    )
+    pending_revision = get_pending_write_revision(file_path)
+    gd = copy.deepcopy(
+        load_graph_data(file_path, mtime, app_name, use_sidecar, pending_revision)
+    )
 
     # キャッシュから展開
     requirement_data = gd.requirement_data
@@ -0,0 +1,551 @@
+"""CCPM ファイル群をまたいだリソース競合の検出と、ドラム・スケジューリングによる時間差投入の提案。
+
+calculate_critical_chain のリソース平準化は1つのプロジェクト内に限られる。
+`data/` 内の CCPM ファイルを読み込み、タスクのグラフを「プロジェクトID::タスクID」の名前空間で
+1つのグラフにまとめ、各プロジェクトの平準化済みの最早スケジュールを共通の時間軸（稼働日）に並べて、
+同じ担当者のタスクがプロジェクトをまたいで重なる箇所を、リソースごとの区間の走査で検出する。
+
+ドラム・スケジューリング:
+    - 複数のプロジェクトで共有され、残作業の合計日数が最も大きいリソースをドラム（制約リソース）とする
+    - 投入日の早い順に、ドラムの作業期間が前のプロジェクトのドラム作業期間
+      （＋キャパシティ・バッファ）と重ならないように、プロジェクトの投入を稼働日単位でずらす
+    - ずらした後に残る競合は、ドラム以外のリソースの競合として報告する
+
+稼働日は各プロジェクトの祝日を除いて数え、投入日・完了見込みの日付もそのプロジェクトのカレンダーで求める。
+
+計算は PortfolioScheduler がバックグラウンドのスレッドで行い、読み込んだファイル数で進捗を報告する。
+ファイルごとの読み込み結果は内容のハッシュごとに保持し、変更のないファイルは読み直さない。
+計算結果はドラムとキャパシティ・バッファの組ごとに保持する。
+"""
+import datetime
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from src.ccpm_analysis import CCPMAnalysis
+from src.ccpm_engine import _get_effective_days, _sweep_overlaps
+from src.ccpm_portfolio import (
+    CCPM_FILE_SUFFIX,
+    DATA_DIR,
+    PARALLEL_THRESHOLD,
+    file_content_hash,
+    list_ccpm_files,
+)
+from src.constants import AppName
+from src.file_io import flush_pending_writes, normalize_source_data, read_data_file
+from src.process_pool import create_process_pool
+from src.requirement_graph import RequirementGraph
+from src.workday_calendar import WorkdayCalendar, get_workday_calendar, to_date
+
+NAMESPACE_SEPARATOR = "::"
+# ドラムの作業の間に空ける稼働日数（キャパシティ・バッファ）
+DEFAULT_CAPACITY_BUFFER = 1
+# スケジューラーが保持する計算結果の数（ドラム・キャパシティ・バッファの組み合わせ分）
+RESULT_CACHE_SIZE = 8
+
+# スケジュールの設定 (ドラム, キャパシティ・バッファ)
+ScheduleKey = Tuple[Optional[str], int]
+
+
+def namespaced_id(project_id: str, node: str) -> str:
+    """プロジェクトをまたいで一意なタスク ID を返す。"""
+    return f"{project_id}{NAMESPACE_SEPARATOR}{node}"
+
+
+@dataclass
+class PortfolioProject:
+    """ポートフォリオの1プロジェクト（タスク ID は名前空間付き）。
+
+    Attributes:
+        release: 投入日（今日と開始日の遅い方。日付がなければ None）
+        holidays: プロジェクト設定の祝日（schedule・chain_length の稼働日はこれを除いて数える）
+        graph: タスクのグラフ（ノード属性 project を追加し、仮想エッジは virtual=True）
+        schedule: 投入日からの稼働日数での平準化済み最早スケジュール {タスク: (開始, 終了)}
+    """
+
+    id: str
+    name: str
+    file: str
+    release: Optional[datetime.date] = None
+    holidays: List[str] = field(default_factory=list)
+    chain_length: float = 0.0
+    graph: nx.DiGraph = field(default_factory=nx.DiGraph)
+    schedule: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def calendar(self) -> WorkdayCalendar:
+        """このプロジェクトの祝日を除いた稼働日カレンダー。"""
+        return get_workday_calendar(self.holidays)
+
+
+@dataclass
+class ResourceConflict:
+    """プロジェクトをまたいで同じリソースの作業が重なるタスクの組（task_a が開始の早い方）。"""
+
+    resource: str
+    task_a: str
+    task_b: str
+    overlap: float
+
+
+@dataclass
+class ResourceLoad:
+    """リソースの残作業（未完了タスクの実質日数の合計）。"""
+
+    resource: str
+    projects: Set[str] = field(default_factory=set)
+    days: float = 0.0
+
+
+def load_portfolio_project(file_path: str) -> PortfolioProject:
+    """CCPM ファイル1つを読み込み、名前空間付きのグラフとスケジュールを返す。
+
+    読み込みや計算に失敗した場合は error にメッセージを入れて返す（プロセスプールから呼ぶため例外を送出しない）。
+    """
+    project_id = os.path.basename(file_path)[: -len(CCPM_FILE_SUFFIX)]
+    result = PortfolioProject(id=project_id, name=project_id, file=file_path)
+    try:
+        data = normalize_source_data(read_data_file(file_path))
+        project = data.get("project", {})
+        result.name = project.get("name", project_id) or project_id
+        today, start = to_date(project.get("today", "")), to_date(project.get("start", ""))
+        result.release = max((d for d in (today, start) if d is not None), default=None)
+        result.holidays = list(project.get("holidays", []))
+
+        graph = RequirementGraph(data, AppName.CCPM).graph
+        # CCPM ページと同じく、リソース数を同時実行上限とした CC の平準化結果を使う
+        analysis = CCPMAnalysis(graph, max_concurrency=len(project.get("resources", [])))
+        if not analysis.schedule:
+            result.error = "スケジュールを計算できません（依存関係に閉路があります）"
+            return result
+        result.chain_length = analysis.active_length
+
+        # 属性（日数・担当など）はそのまま引き継ぎ、所属プロジェクトを追加して ID を付け替える
+        mapping = {node: namespaced_id(project_id, node) for node in graph.nodes}
+        for node in graph.nodes:
+            graph.nodes[node]["project"] = project_id
+        result.graph = nx.relabel_nodes(graph, mapping, copy=True)
+        for src, dst, _ in analysis.virtual_edges:
+            result.graph.add_edge(mapping[src], mapping[dst], virtual=True)
+        result.schedule = {mapping[node]: span for node, span in analysis.schedule.items()}
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def merge_project_graphs(projects: List[PortfolioProject]) -> nx.DiGraph:
+    """プロジェクトのグラフを1つにまとめる（ID は名前空間付きのため衝突しない）。"""
+    merged = nx.DiGraph()
+    for project in projects:
+        merged.update(project.graph)
+    return merged
+
+
+def _resource_intervals(
+    graph: nx.DiGraph, schedule: Dict[str, Tuple[float, float]]
+) -> Dict[str, List[Tuple[float, float, str]]]:
+    """リソースごとの未完了タスクの作業区間（実質日数 0 のタスクは除く）。"""
+    intervals: Dict[str, List[Tuple[float, float, str]]] = {}
+    for node, attrs in graph.nodes(data=True):
+        resource = attrs.get("resource", "")
+        if not resource or node not in schedule or attrs.get("finished", False):
+            continue
+        if _get_effective_days(graph, node) <= 0:
+            continue
+        start, end = schedule[node]
+        intervals.setdefault(resource, []).append((start, end, node))
+    return intervals
+
+
+def resource_loads(graph: nx.DiGraph) -> Dict[str, ResourceLoad]:
+    """リソースごとの残作業（プロジェクトと合計日数）。"""
+    loads: Dict[str, ResourceLoad] = {}
+    for node, attrs in graph.nodes(data=True):
+        resource = attrs.get("resource", "")
+        if not resource or attrs.get("finished", False):
+            continue
+        days = _get_effective_days(graph, node)
+        if days <= 0:
+            continue
+        load = loads.setdefault(resource, ResourceLoad(resource))
+        load.projects.add(attrs.get("project", ""))
+        load.days += days
+    return loads
+
+
+def detect_cross_project_conflicts(
+    graph: nx.DiGraph, schedule: Dict[str, Tuple[float, float]]
+) -> List[ResourceConflict]:
+    """プロジェクトをまたいで同じリソースの作業区間が重なるタスクの組を返す。
+
+    リソースごとに区間を開始時刻順に走査し（スイープライン）、同じプロジェクト内の組は除く
+    （プロジェクト内の競合は CC の平準化で解消済み）。
+    """
+    conflicts: List[ResourceConflict] = []
+    for resource, intervals in _resource_intervals(graph, schedule).items():
+        if len(intervals) < 2:
+            continue
+        for task, running in _sweep_overlaps(intervals):
+            project = graph.nodes[task].get("project")
+            start, end = schedule[task]
+            for other in running:
+                if graph.nodes[other].get("project") == project:
+                    continue
+                overlap = min(end, schedule[other][1]) - start
+                conflicts.append(ResourceConflict(resource, other, task, overlap))
+    return conflicts
+
+
+def select_drum(loads: Dict[str, ResourceLoad]) -> Optional[str]:
+    """複数のプロジェクトで共有され、残作業の合計が最も大きいリソース（なければ None）。"""
+    shared = [load for load in loads.values() if len(load.projects) >= 2]
+    if not shared:
+        return None
+    return max(shared, key=lambda load: (load.days, load.resource)).resource
+
+
+def _shift(
+    schedule: Dict[str, Tuple[float, float]], offset: float
+) -> Dict[str, Tuple[float, float]]:
+    return {node: (start + offset, end + offset) for node, (start, end) in schedule.items()}
+
+
+@dataclass
+class PortfolioSchedule:
+    """ポートフォリオのリソース競合とドラム・スケジューリングの提案。
+
+    Attributes:
+        base: 共通の時間軸の起点（投入日の最も早い日）
+        origins: プロジェクト ID → 起点から投入日までの稼働日数（そのプロジェクトの祝日を除いて数える）
+        offsets: プロジェクト ID → ドラム・スケジューリングで投入をずらす稼働日数
+        conflicts_before / conflicts_after: ずらす前後のプロジェクト間の競合
+        skipped: 読み込みや計算に失敗したため除外したプロジェクト
+    """
+
+    projects: List[PortfolioProject]
+    graph: nx.DiGraph
+    base: Optional[datetime.date]
+    origins: Dict[str, int]
+    loads: Dict[str, ResourceLoad]
+    drum: Optional[str]
+    capacity_buffer: int
+    offsets: Dict[str, int]
+    conflicts_before: List[ResourceConflict]
+    conflicts_after: List[ResourceConflict]
+    skipped: List[PortfolioProject] = field(default_factory=list)
+
+    def proposed_release(self, project: PortfolioProject) -> Optional[datetime.date]:
+        """提案する投入日（投入日から、プロジェクトの稼働日で ずらす日数 後）。"""
+        release = project.release or self.base
+        if release is None:
+            return None
+        return project.calendar.workday(release, self.offsets.get(project.id, 0))
+
+    def proposed_finish(self, project: PortfolioProject) -> Optional[datetime.date]:
+        """提案する投入日に始めた場合の完了見込み（プロジェクトの稼働日で CC 長の後）。"""
+        release = self.proposed_release(project)
+        if release is None:
+            return None
+        return project.calendar.workday(release, math.ceil(project.chain_length))
+
+
+def build_portfolio_schedule(
+    projects: List[PortfolioProject],
+    drum: Optional[str] = None,
+    capacity_buffer: int = DEFAULT_CAPACITY_BUFFER,
+) -> PortfolioSchedule:
+    """読み込んだプロジェクトの競合を検出し、ドラム・スケジューリングで投入をずらす日数を求める。
+
+    Args:
+        projects: load_portfolio_project の結果（error のあるプロジェクトは除外する）
+        drum: ドラムとするリソース（None なら select_drum で選ぶ）
+        capacity_buffer: ドラムの作業の間に空ける稼働日数
+    """
+    skipped = [project for project in projects if project.error]
+    projects = [project for project in projects if not project.error]
+    graph = merge_project_graphs(projects)
+
+    # 投入日の差を稼働日数に直して、共通の時間軸に並べる
+    # （各プロジェクトのスケジュールはそのプロジェクトの稼働日のため、差も同じカレンダーで数える。
+    #  祝日がプロジェクトごとに異なる場合、軸は祝日の差の分だけずれる）
+    releases = [project.release for project in projects if project.release is not None]
+    base = min(releases) if releases else None
+    origins = {
+        project.id: (
+            max(0, project.calendar.networkdays(base, project.release) - 1)
+            if base is not None and project.release is not None
+            else 0
+        )
+        for project in projects
+    }
+    schedule: Dict[str, Tuple[float, float]] = {}
+    for project in projects:
+        schedule.update(_shift(project.schedule, origins[project.id]))
+
+    loads = resource_loads(graph)
+    if drum is None:
+        drum = select_drum(loads)
+    conflicts_before = detect_cross_project_conflicts(graph, schedule)
+
+    # 投入日の早い順（同じならファイル順）に、ドラムの作業期間を重ならないように並べる
+    offsets = {project.id: 0 for project in projects}
+    drum_intervals = _resource_intervals(graph, schedule).get(drum, []) if drum else []
+    windows: Dict[str, Tuple[float, float]] = {}
+    for start, end, node in drum_intervals:
+        project_id = graph.nodes[node]["project"]
+        first, last = windows.get(project_id, (start, end))
+        windows[project_id] = (min(first, start), max(last, end))
+    previous_end: Optional[float] = None
+    for project in sorted(projects, key=lambda p: origins[p.id]):
+        if project.id not in windows:
+            continue
+        start, end = windows[project.id]
+        if previous_end is not None:
+            offsets[project.id] = max(0, math.ceil(previous_end + capacity_buffer - start - 1e-9))
+        previous_end = end + offsets[project.id]
+
+    staggered: Dict[str, Tuple[float, float]] = {}
+    for project in projects:
+        staggered.update(_shift(project.schedule, origins[project.id] + offsets[project.id]))
+    conflicts_after = detect_cross_project_conflicts(graph, staggered)
+
+    return PortfolioSchedule(
+        projects=projects,
+        graph=graph,
+        base=base,
+        origins=origins,
+        loads=loads,
+        drum=drum,
+        capacity_buffer=capacity_buffer,
+        offsets=offsets,
+        conflicts_before=conflicts_before,
+        conflicts_after=conflicts_after,
+        skipped=skipped,
+    )
+
+
+@dataclass
+class SchedulerProgress:
+    """バックグラウンド計算の進捗。"""
+
+    done: int = 0
+    total: int = 0
+    message: str = ""
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+
+class PortfolioScheduler:
+    """directory 内の CCPM ファイルのポートフォリオ・スケジュールをバックグラウンドで計算する。
+
+    スケジューラーはディレクトリごとに複数のセッションで共有するため、結果はドラムと
+    キャパシティ・バッファの組ごとに保持し（result_for）、あるセッションの設定で他のセッションの
+    結果を上書きしない。設定によらず共有するのは、ファイルの内容のハッシュごとの読み込み結果のみ。
+    計算中に別の設定で start された場合は、同じ読み込み結果からその設定のスケジュールも作る。
+
+    Args:
+        directory: CCPM ファイルを探すディレクトリ
+        max_workers: 読み込みに使うプロセスプールのワーカー数（None なら CPU 数、1 なら同じプロセス）
+    """
+
+    def __init__(self, directory: str = DATA_DIR, max_workers: Optional[int] = None):
+        self.directory = directory
+        self.max_workers = max_workers
+        # ファイルパス → (内容のハッシュ, 読み込み結果)
+        self._projects: Dict[str, Tuple[str, PortfolioProject]] = {}
+        # (ドラム, キャパシティ・バッファ) → 計算結果・エラー（最近計算したものを RESULT_CACHE_SIZE 件）
+        self._results: "OrderedDict[ScheduleKey, Tuple[Optional[PortfolioSchedule], str]]" = OrderedDict()
+        self._latest: Optional[ScheduleKey] = None
+        # 計算を依頼された設定（依頼順）
+        self._requested: Dict[ScheduleKey, None] = {}
+        self._running = False
+        self._progress = SchedulerProgress()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(drum: Optional[str], capacity_buffer: int) -> ScheduleKey:
+        return (drum, int(capacity_buffer))
+
+    def result_for(
+        self, drum: Optional[str] = None, capacity_buffer: int = DEFAULT_CAPACITY_BUFFER
+    ) -> Optional[PortfolioSchedule]:
+        """この設定で最後に計算したスケジュール（未計算なら None）。"""
+        with self._lock:
+            return self._results.get(self._key(drum, capacity_buffer), (None, ""))[0]
+
+    def error_for(
+        self, drum: Optional[str] = None, capacity_buffer: int = DEFAULT_CAPACITY_BUFFER
+    ) -> str:
+        """この設定で最後に計算した際のエラー（成功していれば空文字）。"""
+        with self._lock:
+            return self._results.get(self._key(drum, capacity_buffer), (None, ""))[1]
+
+    @property
+    def result(self) -> Optional[PortfolioSchedule]:
+        """最後に計算したスケジュール（設定はセッションごとに異なるため、画面では result_for を使う）。"""
+        with self._lock:
+            return self._results[self._latest][0] if self._latest in self._results else None
+
+    @property
+    def error(self) -> str:
+        """最後の計算のエラー（成功していれば空文字）。"""
+        with self._lock:
+            return self._results[self._latest][1] if self._latest in self._results else ""
+
+    @property
+    def progress(self) -> SchedulerProgress:
+        with self._lock:
+            return SchedulerProgress(self._progress.done, self._progress.total, self._progress.message)
+
+    def _report(self, done: int, message: str):
+        with self._lock:
+            self._progress.done = done
+            self._progress.message = message
+
+    def _store(self, path: str, content_hash: str, project: PortfolioProject):
+        with self._lock:
+            self._projects[path] = (content_hash, project)
+
+    def _load(self, paths: List[str], hashes: Dict[str, str], done: int) -> int:
+        """paths を読み込んでキャッシュに入れ、読み込み済みの件数を返す。"""
+        if len(paths) >= PARALLEL_THRESHOLD and (self.max_workers or 0) != 1:
+            try:
+                with create_process_pool(self.max_workers) as pool:
+                    futures = {pool.submit(load_portfolio_project, path): path for path in paths}
+                    for future in as_completed(futures):
+                        project = future.result()
+                        self._store(futures[future], hashes[futures[future]], project)
+                        done += 1
+                        self._report(done, f"{project.name} を読み込みました")
+                return done
+            except (BrokenProcessPool, OSError):
+                # プロセスを起動できない環境では同じプロセスで読み込む
+                pass
+        for path in paths:
+            with self._lock:
+                loaded = self._projects.get(path, ("", None))[0] == hashes[path]
+            if loaded:
+                continue
+            project = load_portfolio_project(path)
+            self._store(path, hashes[path], project)
+            done += 1
+            self._report(done, f"{project.name} を読み込みました")
+        return done
+
+    def _load_projects(self) -> Tuple[List[PortfolioProject], int]:
+        """directory の CCPM ファイルを読み込み（変更のないファイルはキャッシュを使う）、(プロジェクト, 進捗) を返す。"""
+        # 未書き込みの CCPM ファイルの編集を反映する
+        flush_pending_writes()
+        paths = list_ccpm_files(self.directory)
+        hashes = {path: file_content_hash(path) for path in paths}
+        with self._lock:
+            changed = [
+                path for path in paths
+                if self._projects.get(path, ("", None))[0] != hashes[path]
+            ]
+            # 読み込むファイル + 競合の検出
+            self._progress = SchedulerProgress(
+                len(paths) - len(changed), len(paths) + 1, "CCPM ファイルを読み込んでいます"
+            )
+        done = self._load(changed, hashes, len(paths) - len(changed))
+        with self._lock:
+            for path in list(self._projects):
+                if path not in paths:
+                    del self._projects[path]
+            return [self._projects[path][1] for path in paths], done
+
+    def _run(self):
+        projects: Optional[List[PortfolioProject]] = None
+        error = ""
+        done = 0
+        try:
+            projects, done = self._load_projects()
+        except Exception as e:  # バックグラウンド処理の失敗で画面を止めない
+            error = f"{type(e).__name__}: {e}"
+        while True:
+            with self._lock:
+                if not self._requested:
+                    # start はこのロックの下で _running を見て依頼を追加するため、取りこぼさない
+                    self._running = False
+                    if projects is not None:
+                        self._progress.done = done + 1
+                        self._progress.message = "完了"
+                    return
+                key = next(iter(self._requested))
+            result = None
+            key_error = error
+            if projects is not None:
+                self._report(done, "プロジェクト間の競合を検出しています")
+                try:
+                    result = build_portfolio_schedule(projects, *key)
+                except Exception as e:  # バックグラウンド処理の失敗で画面を止めない
+                    key_error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                del self._requested[key]
+                self._results[key] = (result, key_error)
+                self._results.move_to_end(key)
+                while len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+                self._latest = key
+
+    def start(self, drum: Optional[str] = None, capacity_buffer: int = DEFAULT_CAPACITY_BUFFER) -> bool:
+        """バックグラウンドで計算を開始する。
+
+        計算中の場合は、実行中の計算の読み込み結果からこの設定のスケジュールも作る。
+
+        Returns:
+            bool: 今回開始した場合 True（計算中の場合は False）
+        """
+        with self._lock:
+            self._requested[self._key(drum, capacity_buffer)] = None
+            if self._running:
+                return False
+            self._running = True
+            self._progress = SchedulerProgress(message="開始しています")
+            self._thread = threading.Thread(
+                target=self._run, name="portfolio-scheduler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._running
+
+    def is_pending(
+        self, drum: Optional[str] = None, capacity_buffer: int = DEFAULT_CAPACITY_BUFFER
+    ) -> bool:
+        """この設定の計算を依頼済みで、まだ結果が出ていないか。"""
+        with self._lock:
+            return self._key(drum, capacity_buffer) in self._requested
+
+    def wait(self, timeout: Optional[float] = None):
+        """実行中の計算の完了を待つ。"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+_schedulers: Dict[str, PortfolioScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_portfolio_scheduler(directory: str = DATA_DIR) -> PortfolioScheduler:
+    """ディレクトリごとに共有するスケジューラーを返す。"""
+    key = os.path.abspath(directory)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = PortfolioScheduler(directory)
+        return scheduler
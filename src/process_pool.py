@@ -0,0 +1,20 @@
+"""CPU 負荷の高い計算（ポートフォリオ集計・シミュレーションなど）に使うプロセスプール。
+
+Streamlit のサーバープロセスは tornado のイベントループ・バックアップのクリーンアップ・
+write-behind などのスレッドを持つため、Linux の既定の fork でワーカーを作ると、
+fork 時に他のスレッドが保持していたロックをワーカーが引き継いでデッドロックすることがある。
+この種のハングは BrokenProcessPool としては検出できないため、ワーカーは常に spawn で起動する。
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# ワーカーの起動方法（親プロセスのスレッド・ロックの状態を引き継がない方法に固定する）
+START_METHOD = "spawn"
+
+
+def create_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """spawn で起動するワーカーのプロセスプールを返す（max_workers が None なら CPU 数）。"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD)
+    )
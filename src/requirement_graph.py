@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import networkx as nx
 import copy
 
@@ -16,6 +16,11 @@ class RequirementGraph:
         # フィルタリングされたサブグラフ
         self.subgraph = nx.DiGraph()
 
+        # グラフの内容のリビジョン（CCPM 分析のキャッシュキー。読み込み時に1回だけ設定する）
+        self.revision: Optional[str] = None
+        # サブグラフのリビジョン（revision と抽出条件から決まる）
+        self.subgraph_revision: Optional[str] = None
+
         # グラフの構築
         self._build_graph()
 
@@ -84,6 +89,12 @@ class RequirementGraph:
             downstream_distance (int): 辿る下流ノードの距離制限 (-1で無制限)
             detail (bool): 詳細(note等)を含めるかどうか
         """
+        self.subgraph_revision = (
+            f"{self.revision}:{target_node}:{upstream_distance}:{downstream_distance}:{detail}"
+            if self.revision is not None
+            else None
+        )
+
         # Store graph itself as subgraph if target_node is None
         if target_node is None or target_node in ("None", "default", ""):
             if not detail:
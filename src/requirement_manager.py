@@ -1,10 +1,39 @@
 from typing import Dict, List
 
+from src.data_helpers import edge_key
+
+# 接続元・接続先として無効な値
+_INVALID_ENDPOINTS = ["None", None, "default"]
+
 
 class RequirementManager:
     def __init__(self, requirement_data: List[Dict]):
         self.requirements = requirement_data
-    
+        # 接続の重複を追加時に弾くため、既存接続の正規化キーを保持する
+        self._edge_keys = set()
+        if isinstance(self.requirements, dict):
+            self.sync_edge_keys()
+
+    def sync_edge_keys(self):
+        """requirements["edges"] を直接書き換えた後に、重複判定用のキーを作り直す。"""
+        self._edge_keys = {edge_key(e) for e in self.requirements.get("edges", [])}
+
+    def add_edge(self, edge: Dict) -> bool:
+        """接続を追加する（同一内容の接続が既にあれば追加しない）。
+
+        Args:
+            edge (Dict): 追加する接続
+
+        Returns:
+            bool: 追加した場合 True
+        """
+        key = edge_key(edge)
+        if key in self._edge_keys:
+            return False
+        self._edge_keys.add(key)
+        self.requirements["edges"].append(edge)
+        return True
+
     def update_edge(self, source: str, destination: str, defaults: dict = None):
         """(link_mode専用) 接続を更新（追加・削除）する
         
@@ -17,11 +46,12 @@ class RequirementManager:
         if existing_edge:
             # 該当接続を除外（pop+ループはインデックスずれのバグがあるため内包表記で除外）
             self.requirements["edges"] = [e for e in self.requirements["edges"] if not (e["source"] == source and e["destination"] == destination)]
+            self.sync_edge_keys()
         else:
             new_edge = defaults.copy()
             new_edge["source"] = source
             new_edge["destination"] = destination
-            self.requirements["edges"].append(new_edge)
+            self.add_edge(new_edge)
 
 
     def add(self, requirement: Dict, tmp_edges: List, new_edges: List) -> str:
@@ -43,10 +73,10 @@ class RequirementManager:
         if new_edges is not None:
             for new_edge in new_edges:
                 if (
-                    new_edge["source"] not in ["None", None, "default"]
-                    and new_edge["destination"] not in ["None", None, "default"]
+                    new_edge["source"] not in _INVALID_ENDPOINTS
+                    and new_edge["destination"] not in _INVALID_ENDPOINTS
                 ):
-                    self.requirements["edges"].append(new_edge)
+                    self.add_edge(new_edge)
 
         # 選択状態とするためにユニークIDを返す
         return requirement["unique_id"]
@@ -70,6 +100,7 @@ class RequirementManager:
                 for edge in self.requirements["edges"]
                 if edge["source"] != unique_id and edge["destination"] != unique_id
             ]
+            self.sync_edge_keys()
 
     def update(
         self,
@@ -111,9 +142,10 @@ class RequirementManager:
         if all_edges is not None:
             # 一旦すべての接続関係を削除
             self.requirements["edges"].clear()
+            self._edge_keys.clear()
             for edge in all_edges:
                 if (
-                    edge["source"] not in ["None", None, "default"]
-                    and edge["destination"] not in ["None", None, "default"]
+                    edge["source"] not in _INVALID_ENDPOINTS
+                    and edge["destination"] not in _INVALID_ENDPOINTS
                 ):
-                    self.requirements["edges"].append(edge)
+                    self.add_edge(edge)
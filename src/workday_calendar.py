@@ -0,0 +1,162 @@
+"""祝日セットごとの稼働日カレンダー。
+
+`workdays` ライブラリは呼び出しのたびに祝日リストを走査する純 Python 実装で、
+呼び出し側でも祝日文字列を毎回 `strptime` していた。
+祝日セットごとに NumPy の `busdaycalendar`（土日休み）を1回だけ作成して使い回し、
+稼働日数の計算（networkdays）と稼働日オフセット（workday）を C 実装で行う。
+配列をまとめて渡すベクトル版も用意し、フィーバーチャートの多数の点を一括で計算できるようにする。
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+DATE_FORMAT = "%Y/%m/%d"
+# 月〜金が稼働日（workdays ライブラリの既定と同じ）
+WEEKMASK = "1111100"
+
+
+def to_date(value: Any) -> Optional[date]:
+    """文字列 (YYYY/MM/DD)・date・datetime・numpy.datetime64 を date に変換する（失敗時は None）。"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[D]").item()
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, DATE_FORMAT).date()
+        except ValueError:
+            return None
+    if hasattr(value, "year") and hasattr(value, "month") and hasattr(value, "day"):
+        return date(value.year, value.month, value.day)
+    return None
+
+
+def _to_day(value: Any) -> np.datetime64:
+    d = to_date(value)
+    return np.datetime64(d, "D") if d is not None else np.datetime64("NaT")
+
+
+def to_day_array(values: Iterable[Any]) -> np.ndarray:
+    """日付の列を datetime64[D] 配列に変換する（変換できない値は NaT）。
+
+    同じ値は1回だけ解析する。
+    """
+    parsed: dict = {}
+    days = []
+    for value in values:
+        try:
+            day = parsed[value]
+        except KeyError:
+            day = parsed[value] = _to_day(value)
+        except TypeError:
+            # ハッシュできない値
+            day = _to_day(value)
+        days.append(day)
+    return np.array(days, dtype="datetime64[D]")
+
+
+def _as_day_array(values: Any) -> np.ndarray:
+    array = np.atleast_1d(np.asarray(values))
+    if np.issubdtype(array.dtype, np.datetime64):
+        return array.astype("datetime64[D]")
+    return to_day_array(array.astype(object))
+
+
+class WorkdayCalendar:
+    """土日と指定された祝日を休みとする稼働日カレンダー。
+
+    Args:
+        holidays: 祝日（文字列 YYYY/MM/DD・date・datetime）。変換できない値は無視する。
+    """
+
+    def __init__(self, holidays: Iterable[Any] = ()):
+        parsed = sorted({d for d in (to_date(h) for h in holidays) if d is not None})
+        self.holidays: Tuple[date, ...] = tuple(parsed)
+        self._calendar = np.busdaycalendar(
+            weekmask=WEEKMASK, holidays=np.array(parsed, dtype="datetime64[D]")
+        )
+
+    def is_workday(self, day: Any) -> bool:
+        d = to_date(day)
+        return d is not None and bool(np.is_busday(d, busdaycal=self._calendar))
+
+    def networkdays(self, start: Any, end: Any) -> int:
+        """start から end まで（両端を含む）の稼働日数を返す。
+
+        end が start より前の場合は workdays.networkdays と同じ値（0 以下、祝日は考慮しない）を返す。
+        """
+        d_start, d_end = to_date(start), to_date(end)
+        if d_start is None or d_end is None:
+            return 0
+        if d_end < d_start:
+            return int(_reversed_networkdays(np.datetime64(d_start, "D"), np.datetime64(d_end, "D")))
+        return int(
+            np.busday_count(d_start, d_end + timedelta(days=1), busdaycal=self._calendar)
+        )
+
+    def networkdays_many(self, starts: Any, ends: Any) -> np.ndarray:
+        """networkdays のベクトル版（starts / ends はスカラーまたは同じ長さの列）。
+
+        変換できない日付を含む要素は 0 になる。datetime64 配列はそのまま使う。
+        """
+        start_arr, end_arr = _as_day_array(starts), _as_day_array(ends)
+        start_arr, end_arr = np.broadcast_arrays(start_arr, end_arr)
+        valid = ~(np.isnat(start_arr) | np.isnat(end_arr))
+        reversed_ = valid & (end_arr < start_arr)
+        forward = valid & ~reversed_
+        result = np.zeros(start_arr.shape, dtype=np.int64)
+        if forward.any():
+            result[forward] = np.busday_count(
+                start_arr[forward], end_arr[forward] + np.timedelta64(1, "D"), busdaycal=self._calendar
+            )
+        if reversed_.any():
+            result[reversed_] = _reversed_networkdays(start_arr[reversed_], end_arr[reversed_])
+        return result
+
+    def workday(self, start: Any, days: int) -> Optional[date]:
+        """start から days 稼働日後の日付を返す（start 自身は数えない）。
+
+        workdays.workday と同様に、days が 0 の場合は start をそのまま返し、
+        正の場合は休日の start を直前の稼働日に寄せてから数える。
+        """
+        d_start = to_date(start)
+        if d_start is None:
+            return None
+        if days == 0:
+            return d_start
+        roll = "backward" if days > 0 else "forward"
+        result = np.busday_offset(d_start, int(days), roll=roll, busdaycal=self._calendar)
+        return result.astype("datetime64[D]").item()
+
+
+def _reversed_networkdays(start: Any, end: Any) -> Any:
+    """end が start より前の場合の workdays.networkdays と同じ計算（配列にも使える）。
+
+    workdays は (end - start + 1) 日を週単位に分けて数えるため、逆順の範囲では
+    「end の翌日から数えた端数の週」の稼働日を差し引いた値になる（祝日は範囲外とみなされ引かれない）。
+    """
+    delta = (end - start).astype(np.int64) + 1
+    full_weeks, extra = np.divmod(delta, 7)
+    after_end = end + np.timedelta64(1, "D")
+    shortened = np.busday_count(after_end, after_end + (7 - extra), weekmask=WEEKMASK)
+    return (full_weeks + 1) * WEEKMASK.count("1") - shortened
+
+
+@lru_cache(maxsize=64)
+def _cached_calendar(holidays: Tuple[Any, ...]) -> WorkdayCalendar:
+    return WorkdayCalendar(holidays)
+
+
+def get_workday_calendar(holidays: Optional[Sequence[Any]] = None) -> WorkdayCalendar:
+    """祝日セットごとに共有するカレンダーを返す。"""
+    try:
+        return _cached_calendar(tuple(holidays or ()))
+    except TypeError:
+        # ハッシュできない値が含まれる場合はキャッシュしない
+        return WorkdayCalendar(holidays or ())
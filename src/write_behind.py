@@ -0,0 +1,250 @@
+"""連続保存をまとめて書き込む write-behind ライター。
+
+リンクモードや一括入力で短時間に多数の保存が行われる場合に、
+保存のたびに `atomic_write_json`（一時ファイル・fsync・置換）とバックアップの書き込みを
+同期実行する代わりに、メモリ上の最新データを保持しておき、一定時間内の保存を
+1回の書き込みにまとめる。
+
+書き込みのタイミング:
+    - 最後の保存から `delay` 秒間、次の保存がなかったとき（アイドル時）
+    - 最初の未書き込みの保存から `max_delay` 秒が経過したとき（連続保存が続く場合の上限）
+    - `flush()` が呼ばれたとき（Undo・復元の前など）
+    - プロセスの正常終了時（atexit）
+
+クラッシュ時の挙動:
+    - ファイルは常に `atomic_write_json` で置き換えるため、ディスク上のデータは
+      直前に書き込んだ完全な状態か、新しい完全な状態のどちらかであり、途中の状態にはならない。
+    - 未書き込みの保存はメモリ上にしかないため、プロセスが強制終了
+      （SIGKILL・電源断・atexit が実行されない SIGTERM など）した場合は、
+      最大 `max_delay` 秒分の変更が失われる。
+    - バックアップは書き込み単位で作成されるため、まとめられた中間状態のバックアップは残らない。
+    - 書き込み中の保存も完了するまでは未書き込みとして参照できる（`pending_data` / `revision`）。
+      書き込み中のファイルを読んで古いデータを表示・編集しないようにするため。
+    - 書き込みに失敗した場合、データは未書き込みのまま保持され、次の機会に再試行される。
+      エラーは `pop_error()` で取得できる。
+"""
+import atexit
+import copy
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class _PendingWrite:
+    data: Any
+    context: Dict[str, Any]
+    first_submitted: float
+    last_submitted: float
+    revision: int
+    attempts: int = field(default=0)
+    # 書き込み中（_write_lock を保持したスレッドが書き込んでいる）
+    in_flight: bool = field(default=False)
+
+
+class WriteBehindWriter:
+    """キー（ファイルパス）ごとに保存をまとめて書き込むライター。
+
+    Args:
+        write_func: 実際の書き込み処理 `write_func(key, data, context)`
+        delay: アイドルとみなすまでの秒数
+        max_delay: 最初の保存から書き込みまでの最大秒数
+    """
+
+    def __init__(
+        self,
+        write_func: Callable[[str, Any, Dict[str, Any]], Any],
+        delay: float = 1.0,
+        max_delay: float = 5.0,
+    ):
+        self._write_func = write_func
+        self.delay = max(0.0, float(delay))
+        self.max_delay = max(self.delay, float(max_delay))
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._cond = threading.Condition()
+        # 書き込み自体の直列化（古いデータが新しいデータを上書きしないようにする）
+        self._write_lock = threading.Lock()
+        self._revision = 0
+        self._error: Optional[Exception] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        atexit.register(self.close)
+
+    # --- 登録・参照 ---
+
+    def submit(self, key: str, data: Any, context: Optional[Dict[str, Any]] = None) -> int:
+        """保存を登録する。
+
+        data は登録時点の内容を保持するためディープコピーする。
+
+        Returns:
+            int: 登録した保存のリビジョン番号（単調増加）
+        """
+        snapshot = copy.deepcopy(data)
+        now = time.monotonic()
+        with self._cond:
+            self._revision += 1
+            entry = self._pending.get(key)
+            # 書き込み中の保存を置き換えた場合は、新しい保存として遅延時間を数え直す
+            first = entry.first_submitted if entry and not entry.in_flight else now
+            self._pending[key] = _PendingWrite(
+                snapshot, dict(context or {}), first, now, self._revision
+            )
+            revision = self._revision
+            closed = self._closed
+            if not closed:
+                self._ensure_worker()
+                self._cond.notify_all()
+        if closed:
+            # 終了処理後の保存は即座に書き込む
+            self.flush(key)
+        return revision
+
+    def has_pending(self, key: str) -> bool:
+        with self._cond:
+            return key in self._pending
+
+    def pending_data(self, key: str) -> Optional[Any]:
+        """未書き込みのデータ（コピー）を返す。なければ None。"""
+        with self._cond:
+            entry = self._pending.get(key)
+            return copy.deepcopy(entry.data) if entry else None
+
+    def pending_context(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            entry = self._pending.get(key)
+            return dict(entry.context) if entry else None
+
+    def revision(self, key: str) -> int:
+        """未書き込みの保存のリビジョン番号を返す（なければ 0）。"""
+        with self._cond:
+            entry = self._pending.get(key)
+            return entry.revision if entry else 0
+
+    def pop_error(self) -> Optional[Exception]:
+        """直近の書き込みエラーを返し、クリアする。"""
+        with self._cond:
+            error, self._error = self._error, None
+            return error
+
+    # --- 書き込み ---
+
+    def _due_at(self, entry: _PendingWrite) -> float:
+        # 失敗した書き込みは delay 間隔で再試行する
+        retry_wait = self.delay * entry.attempts
+        return min(
+            entry.last_submitted + self.delay,
+            entry.first_submitted + self.max_delay,
+        ) + retry_wait
+
+    def _take(self, keys) -> list:
+        """書き込む保存を書き込み中にして返す（呼び出し側で _write_lock と _cond を保持すること）。
+
+        書き込みが終わるまでは _pending に残し、未書き込みのデータとして参照できるようにする。
+        """
+        entries = []
+        for key in keys:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry.in_flight = True
+                entries.append((key, entry))
+        return entries
+
+    def _write(self, key: str, entry: _PendingWrite) -> bool:
+        """1件書き込む（呼び出し側で _write_lock を保持すること）。"""
+        try:
+            self._write_func(key, entry.data, entry.context)
+        except Exception as e:
+            with self._cond:
+                self._error = e
+                # より新しい保存が登録されていなければ、再試行のために未書き込みに戻す
+                entry.in_flight = False
+                if self._pending.get(key) is entry:
+                    entry.attempts += 1
+                self._cond.notify_all()
+            return False
+        with self._cond:
+            # 書き込み中に新しい保存で置き換えられていなければ取り除く
+            if self._pending.get(key) is entry:
+                del self._pending[key]
+        return True
+
+    def flush(self, key: Optional[str] = None) -> bool:
+        """未書き込みの保存を直ちに書き込む。
+
+        Args:
+            key: 対象のキー。None の場合はすべて。
+
+        Returns:
+            bool: すべて書き込みに成功した場合 True
+        """
+        ok = True
+        with self._write_lock:
+            with self._cond:
+                entries = self._take(list(self._pending) if key is None else [key])
+            for entry_key, entry in entries:
+                ok = self._write(entry_key, entry) and ok
+        return ok
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending:
+                        next_due = min(self._due_at(e) for e in self._pending.values())
+                        wait = next_due - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            with self._write_lock:
+                with self._cond:
+                    now = time.monotonic()
+                    due = self._take(
+                        [k for k, e in self._pending.items() if self._due_at(e) <= now]
+                    )
+                for k, e in due:
+                    self._write(k, e)
+
+    def close(self):
+        """未書き込みの保存をすべて書き込み、ワーカーを停止する。"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+_writer: Optional[WriteBehindWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_write_behind_writer(
+    write_func: Callable[[str, Any, Dict[str, Any]], Any],
+    delay: float = 1.0,
+    max_delay: float = 5.0,
+) -> WriteBehindWriter:
+    """プロセス内で共有するライターを返す（遅延時間は最新の設定で更新する）。"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter(write_func, delay, max_delay)
+        else:
+            _writer.delay = max(0.0, float(delay))
+            _writer.max_delay = max(_writer.delay, float(max_delay))
+        return _writer
+
+
+def get_active_writer() -> Optional[WriteBehindWriter]:
+    """作成済みのライターを返す（write-behind を一度も使っていなければ None）。"""
+    return _writer
@@ -0,0 +1,24 @@
+"""CCPM 関連のユニットテストで共有するグラフの生成関数。"""
+import networkx as nx
+
+
+def add_task(g: nx.DiGraph, node: str, days: float, resource: str = "", **attrs):
+    """未着手・未完了のタスクを追加する（title は ID と同じ。attrs で属性を上書き・追加する）。"""
+    g.add_node(
+        node,
+        **{
+            "days": days, "title": node, "resource": resource, "start": "", "end": "",
+            "remains": 0, "finished": False, **attrs,
+        },
+    )
+
+
+def make_resource_conflict_graph() -> nx.DiGraph:
+    """A(3,田中) と B(4,田中) が C(2,鈴木) に合流する（田中が競合）。"""
+    g = nx.DiGraph()
+    add_task(g, "A", 3, "田中")
+    add_task(g, "B", 4, "田中")
+    add_task(g, "C", 2, "鈴木")
+    g.add_edge("A", "C")
+    g.add_edge("B", "C")
+    return g
@@ -0,0 +1,201 @@
+"""backup_index（バックアップの永続インデックス）のユニットテスト"""
+import os
+
+from src import backup_index
+from src.backup_index import (
+    KIND_HJSON,
+    KIND_PNG,
+    BackupIndex,
+    compute_content_hash,
+    parse_backup_filename,
+)
+from src.backup_journal import BackupJournal
+
+
+def _touch(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+
+
+class TestParseBackupFilename:
+    def test_hjsonとpng(self):
+        assert parse_backup_filename("20260228_180000_ccpm.hjson") == ("20260228_180000", "ccpm", "hjson")
+        assert parse_backup_filename("20260228_180000_multi_fever.png") == (
+            "20260228_180000", "multi_fever", "png",
+        )
+
+    def test_対象外のファイル(self):
+        assert parse_backup_filename("req.journal") is None
+        assert parse_backup_filename("notatime_xxxxxx_req.hjson") is None
+        assert parse_backup_filename("20260228_180000_req.txt") is None
+
+
+class TestBackupIndex:
+    def test_既存ファイルから再構築(self, tmp_path):
+        for name in (
+            "20260101_000000_req.hjson",
+            "20260102_000000_req.hjson",
+            "20260101_000000_ccpm.hjson",
+            "20260101_000002_req.png",
+        ):
+            _touch(tmp_path / name)
+        BackupJournal(str(tmp_path), "crt").append("20260103_000000", {"nodes": [], "edges": []})
+
+        index = BackupIndex(str(tmp_path))
+
+        assert index.list_names("req") == ["20260102_000000_req.hjson", "20260101_000000_req.hjson"]
+        assert index.list_names("crt") == ["20260103_000000_crt.hjson"]
+        assert index.list_timestamps("req", KIND_PNG) == ["20260101_000002"]
+        assert os.path.exists(index.manifest_path)
+
+    def test_postfixは完全一致で区別(self, tmp_path):
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        _touch(tmp_path / "20260101_000000_prereq.hjson")
+        assert BackupIndex(str(tmp_path)).list_names("req") == ["20260101_000000_req.hjson"]
+
+    def test_登録と解除(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000000")
+        _touch(tmp_path / "20260101_000001_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000001")
+        assert index.list_timestamps("req") == ["20260101_000001", "20260101_000000"]
+
+        os.remove(tmp_path / "20260101_000001_req.hjson")
+        index.remove("req", KIND_HJSON, ["20260101_000001"])
+        assert index.list_timestamps("req") == ["20260101_000000"]
+
+    def test_マニフェストから復元(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000000")
+
+        reloaded = BackupIndex(str(tmp_path))
+        reloaded.rebuild = None  # 再構築されないことを確認する
+        assert reloaded.list_timestamps("req") == ["20260101_000000"]
+
+    def test_外部での変更を検知して再構築(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        assert index.list_timestamps("req") == []
+
+        # アプリ外でファイルが追加された場合
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+        assert index.list_timestamps("req") == ["20260101_000000"]
+
+    def test_最も近いPNG(self, tmp_path):
+        for name in (
+            "20260101_000000_req.png",
+            "20260101_000004_req.png",
+            "20260101_000100_req.png",
+            "20260101_000003_ccpm.png",
+        ):
+            _touch(tmp_path / name)
+        index = BackupIndex(str(tmp_path))
+
+        assert index.closest_png("req", "20260101_000003") == "20260101_000004_req.png"
+        assert index.closest_png("req", "20260101_000001") == "20260101_000000_req.png"
+        assert index.closest_png("req", "20260101_000030") == ""
+
+    def test_保持期間切れの抽出(self, tmp_path):
+        for name in (
+            "20260101_000000_req.hjson",
+            "20260101_000001_req.png",
+            "20260201_000000_req.hjson",
+        ):
+            _touch(tmp_path / name)
+        index = BackupIndex(str(tmp_path))
+
+        expired = index.expired("20260115_000000")
+
+        assert sorted(expired) == [
+            ("req", KIND_HJSON, "20260101_000000"),
+            ("req", KIND_PNG, "20260101_000001"),
+        ]
+
+
+class TestContentHash:
+    def test_キー順に依存しない(self):
+        assert compute_content_hash({"a": 1, "b": [1, 2]}) == compute_content_hash({"b": [1, 2], "a": 1})
+        assert compute_content_hash({"a": 1}) != compute_content_hash({"a": 2})
+
+    def test_ハッシュの記録と削除(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000000", "h1")
+        assert index.get_hash("req", "20260101_000000") == "h1"
+
+        index.remove("req", KIND_HJSON, ["20260101_000000"])
+        assert index.get_hash("req", "20260101_000000") is None
+
+    def test_再構築してもハッシュを引き継ぐ(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000000", "h1")
+
+        index.rebuild()
+        assert index.get_hash("req", "20260101_000000") == "h1"
+
+
+class TestManifestLog:
+    def test_登録ではマニフェストを書き直さず操作ログに追記する(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        manifest_mtime = os.stat(index.manifest_path).st_mtime_ns
+        for i in range(3):
+            _touch(tmp_path / f"20260101_00000{i}_req.hjson")
+            index.add("req", KIND_HJSON, f"20260101_00000{i}", f"h{i}")
+        index.set_hash("req", "20260101_000000", "x")
+        os.remove(tmp_path / "20260101_000002_req.hjson")
+        index.remove("req", KIND_HJSON, ["20260101_000002"])
+
+        assert os.stat(index.manifest_path).st_mtime_ns == manifest_mtime
+        with open(index.log_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 5
+
+        reloaded = BackupIndex(str(tmp_path))
+        reloaded.rebuild = None  # 操作ログの再生だけで復元できることを確認する
+        assert reloaded.list_timestamps("req") == ["20260101_000001", "20260101_000000"]
+        assert reloaded.get_hash("req", "20260101_000000") == "x"
+        assert reloaded.get_hash("req", "20260101_000002") is None
+
+    def test_操作数がバックアップ数を超えたら畳み込む(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(backup_index, "LOG_COMPACT_MIN", 4)
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        for i in range(2):
+            _touch(tmp_path / f"20260101_00000{i}_req.hjson")
+            index.add("req", KIND_HJSON, f"20260101_00000{i}")
+        for i in range(2):
+            index.set_hash("req", "20260101_000000", f"h{i}")
+        assert os.path.exists(index.log_path)
+        # 5 件目の操作でマニフェストに畳み込まれ、操作ログは空になる
+        index.set_hash("req", "20260101_000001", "h")
+        assert not os.path.exists(index.log_path)
+
+        reloaded = BackupIndex(str(tmp_path))
+        reloaded.rebuild = None
+        assert len(reloaded.list_timestamps("req")) == 2
+        assert reloaded.get_hash("req", "20260101_000000") == "h1"
+
+    def test_壊れた末尾行は無視(self, tmp_path):
+        index = BackupIndex(str(tmp_path))
+        index.refresh()
+        _touch(tmp_path / "20260101_000000_req.hjson")
+        index.add("req", KIND_HJSON, "20260101_000000")
+        with open(index.log_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "postf')
+
+        reloaded = BackupIndex(str(tmp_path))
+        reloaded.rebuild = None
+        assert reloaded.list_timestamps("req") == ["20260101_000000"]
+        _touch(tmp_path / "20260101_000001_req.hjson")
+        reloaded.add("req", KIND_HJSON, "20260101_000001")
+        assert BackupIndex(str(tmp_path)).list_timestamps("req") == [
+            "20260101_000001", "20260101_000000"
+        ]
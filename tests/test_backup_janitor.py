@@ -0,0 +1,89 @@
+"""backup_janitor（バックアップのクリーンアップ）のユニットテスト"""
+import datetime
+import os
+
+from src.backup_index import BackupIndex
+from src.backup_janitor import BackupJanitor, run_cleanup
+from src.backup_journal import BackupJournal
+
+
+NOW = datetime.datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _write(path, size=10):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+class TestRunCleanup:
+    def test_保持期間切れを削除して解放量を報告(self, tmp_path):
+        _write(tmp_path / "20260101_000000_req.hjson", 100)
+        _write(tmp_path / "20260101_000001_req.png", 50)
+        _write(tmp_path / "20260228_000000_req.hjson", 100)
+
+        report = run_cleanup(str(tmp_path), retention_days=30, now=NOW)
+
+        assert report.removed_files == 2
+        assert report.reclaimed_bytes == 150
+        assert sorted(os.listdir(tmp_path)) == [".index", "20260228_000000_req.hjson"]
+        assert BackupIndex(str(tmp_path)).list_timestamps("req") == ["20260228_000000"]
+
+    def test_件数上限はpostfixごと(self, tmp_path):
+        for i in range(5):
+            _write(tmp_path / f"2026022{i}_000000_req.hjson")
+        for i in range(2):
+            _write(tmp_path / f"2026022{i}_000000_ccpm.hjson")
+
+        report = run_cleanup(str(tmp_path), retention_days=365, max_count_per_postfix=3, now=NOW)
+
+        assert report.removed_files == 2
+        index = BackupIndex(str(tmp_path))
+        assert index.list_timestamps("req") == [
+            "20260224_000000", "20260223_000000", "20260222_000000",
+        ]
+        assert len(index.list_timestamps("ccpm")) == 2
+
+    def test_ジャーナルの畳み込み(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req")
+        for i in range(4):
+            journal.append(f"2026022{i}_000000", {"nodes": [{"unique_id": f"n{j}"} for j in range(i + 1)], "edges": []})
+
+        report = run_cleanup(str(tmp_path), retention_days=365, max_count_per_postfix=2, now=NOW)
+
+        assert report.compacted_entries == 2
+        assert report.reclaimed_bytes > 0
+        assert journal.timestamps() == ["20260222_000000", "20260223_000000"]
+        assert len(journal.reconstruct("20260222_000000")["nodes"]) == 3
+
+    def test_ディレクトリがない場合(self, tmp_path):
+        report = run_cleanup(str(tmp_path / "missing"), retention_days=30, now=NOW)
+        assert report.removed_files == 0
+
+
+class TestBackupJanitor:
+    def test_間隔内は再実行しない(self, tmp_path):
+        janitor = BackupJanitor(str(tmp_path))
+
+        assert janitor.schedule(retention_days=30, interval_minutes=60) is True
+        janitor.wait(5)
+        assert janitor.last_report is not None
+        assert janitor.schedule(retention_days=30, interval_minutes=60) is False
+
+    def test_間隔経過後は再実行する(self, tmp_path):
+        janitor = BackupJanitor(str(tmp_path))
+
+        assert janitor.schedule(retention_days=30, interval_minutes=0) is True
+        janitor.wait(5)
+        assert janitor.schedule(retention_days=30, interval_minutes=0) is True
+        janitor.wait(5)
+
+    def test_失敗はレポートに記録(self, tmp_path, monkeypatch):
+        import src.backup_janitor as backup_janitor
+
+        def _fail(*_args, **_kwargs):
+            raise OSError("disk error")
+
+        monkeypatch.setattr(backup_janitor, "run_cleanup", _fail)
+        janitor = BackupJanitor(str(tmp_path))
+        report = janitor.run_now(retention_days=30)
+        assert report.error == "disk error"
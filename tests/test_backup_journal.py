@@ -0,0 +1,144 @@
+"""backup_journal（追記型バックアップジャーナル）のユニットテスト"""
+import json
+
+from src.backup_journal import BackupJournal, apply_diff, compute_diff
+
+
+def _data(nodes=None, edges=None, **extra):
+    data = {"nodes": nodes or [], "edges": edges or []}
+    data.update(extra)
+    return data
+
+
+def _node(uid, title=None):
+    return {"unique_id": uid, "title": title or uid}
+
+
+def _edge(src, dst):
+    return {"source": src, "destination": dst, "type": "arrow"}
+
+
+class TestComputeAndApplyDiff:
+    def test_ノード追加削除変更(self):
+        old = _data([_node("a"), _node("b")])
+        new = _data([_node("a", "A2"), _node("c")])
+        diff = compute_diff(old, new)
+        assert diff["nodes"]["remove"] == ["b"]
+        assert {n["unique_id"] for n in diff["nodes"]["upsert"]} == {"a", "c"}
+        assert apply_diff(old, diff) == new
+
+    def test_エッジの多重集合差分(self):
+        old = _data([_node("a"), _node("b")], [_edge("a", "b"), _edge("a", "b")])
+        new = _data([_node("a"), _node("b")], [_edge("a", "b"), _edge("b", "a")])
+        diff = compute_diff(old, new)
+        assert diff["edges"]["add"] == [_edge("b", "a")]
+        assert diff["edges"]["remove"] == [_edge("a", "b")]
+        assert apply_diff(old, diff) == new
+
+    def test_トップレベルキーの変更(self):
+        old = _data(project={"start": "2025/01/01"}, progress={"x": 1})
+        new = _data(project={"start": "2025/02/01"})
+        restored = apply_diff(old, compute_diff(old, new))
+        assert restored == new
+
+    def test_元データを変更しない(self):
+        old = _data([_node("a")])
+        new = _data([_node("a", "changed")])
+        apply_diff(old, compute_diff(old, new))
+        assert old["nodes"][0]["title"] == "a"
+
+
+class TestBackupJournal:
+    def test_各時点を復元できる(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req", snapshot_interval=3)
+        states = []
+        nodes = []
+        for i in range(7):
+            nodes = nodes + [_node(f"n{i}")]
+            state = _data(list(nodes))
+            states.append(state)
+            journal.append(f"20260101_00000{i}", state)
+
+        for i, state in enumerate(states):
+            assert journal.reconstruct(f"20260101_00000{i}") == state
+        assert journal.latest() == states[-1]
+
+    def test_スナップショット間隔(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req", snapshot_interval=3)
+        for i in range(7):
+            journal.append(f"20260101_00000{i}", _data([_node(f"n{i}")]))
+        with open(journal.path, encoding="utf-8") as f:
+            types = [json.loads(line)["type"] for line in f]
+        assert types == ["snapshot", "diff", "diff", "snapshot", "diff", "diff", "snapshot"]
+
+    def test_最新エントリの削除(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req")
+        journal.append("20260101_000000", _data([_node("a")]))
+        journal.append("20260101_000001", _data([_node("a"), _node("b")]))
+        assert journal.remove_last() is True
+        assert journal.timestamps() == ["20260101_000000"]
+        assert journal.latest() == _data([_node("a")])
+
+    def test_古いエントリの畳み込み(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req")
+        states = [_data([_node(f"n{j}") for j in range(i + 1)]) for i in range(4)]
+        for i, state in enumerate(states):
+            journal.append(f"2026010{i + 1}_000000", state)
+
+        removed = journal.compact("20260103_000000")
+
+        assert removed == 2
+        assert journal.timestamps() == ["20260103_000000", "20260104_000000"]
+        assert journal.reconstruct("20260103_000000") == states[2]
+        assert journal.reconstruct("20260104_000000") == states[3]
+
+    def test_バックアップ名(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "ccpm")
+        journal.append("20260101_000000", _data())
+        assert journal.backup_names() == ["20260101_000000_ccpm.hjson"]
+
+    def test_壊れた末尾行は無視(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req")
+        journal.append("20260101_000000", _data([_node("a")]))
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"ts": "2026')
+        assert journal.timestamps() == ["20260101_000000"]
+
+    def test_壊れた末尾行の後に追記できる(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req")
+        journal.append("20260101_000000", _data([_node("a")]))
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"ts": "2026')
+        journal.append("20260101_000001", _data([_node("b")]))
+        assert journal.timestamps() == ["20260101_000000", "20260101_000001"]
+        assert journal.reconstruct("20260101_000001") == _data([_node("b")])
+
+    def test_追記のたびにジャーナル全体を読み直さない(self, tmp_path, monkeypatch):
+        journal = BackupJournal(str(tmp_path), "req", snapshot_interval=3)
+        journal.append("20260101_000000", _data([_node("n0")]))
+        reads = []
+        original = BackupJournal._read_entries
+        monkeypatch.setattr(
+            BackupJournal, "_read_entries", lambda self: reads.append(1) or original(self)
+        )
+        for i in range(1, 5):
+            journal.append(f"20260101_00000{i}", _data([_node(f"n{i}")]))
+        assert reads == []
+        monkeypatch.undo()
+        with open(journal.path, encoding="utf-8") as f:
+            types = [json.loads(line)["type"] for line in f]
+        assert types == ["snapshot", "diff", "diff", "snapshot", "diff"]
+
+    def test_書き直し後は差分数を数え直す(self, tmp_path):
+        journal = BackupJournal(str(tmp_path), "req", snapshot_interval=3)
+        for i in range(3):
+            journal.append(f"20260101_00000{i}", _data([_node(f"n{i}")]))
+        journal.remove_last()
+        journal.append("20260101_000003", _data([_node("n3")]))
+        with open(journal.path, encoding="utf-8") as f:
+            types = [json.loads(line)["type"] for line in f]
+        assert types == ["snapshot", "diff", "diff"]
+        journal.append("20260101_000004", _data([_node("n4")]))
+        assert journal.latest() == _data([_node("n4")])
+        with open(journal.path, encoding="utf-8") as f:
+            assert json.loads(f.readlines()[-1])["type"] == "snapshot"
@@ -0,0 +1,148 @@
+"""ccpm_analysis（CCPM 分析結果の共有キャッシュ）のユニットテスト"""
+import pytest
+
+from src import ccpm_analysis
+from src.ccpm_analysis import get_ccpm_analysis, graph_revision
+from src.ccpm_engine import (
+    calculate_critical_chain,
+    calculate_critical_path,
+    calculate_priority_table,
+    get_in_out_edge_list,
+)
+from src.constants import AppName
+from src.file_io import atomic_write_json, load_source_data
+from src.requirement_graph import RequirementGraph
+from tests.ccpm_graphs import make_resource_conflict_graph
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    ccpm_analysis.clear_ccpm_analysis_cache()
+    yield
+    ccpm_analysis.clear_ccpm_analysis_cache()
+
+
+class TestGraphRevision:
+    def test_内容が同じなら同じリビジョン(self):
+        assert graph_revision(make_resource_conflict_graph()) == graph_revision(
+            make_resource_conflict_graph()
+        )
+
+    def test_属性やエッジの変更で変わる(self):
+        g = make_resource_conflict_graph()
+        before = graph_revision(g)
+        g.nodes["A"]["days"] = 5
+        assert graph_revision(g) != before
+        changed = graph_revision(g)
+        g.add_edge("A", "B")
+        assert graph_revision(g) != changed
+
+    def test_整数値のfloatはintと同じリビジョン(self):
+        g = make_resource_conflict_graph()
+        before = graph_revision(g)
+        g.nodes["A"]["remains"] = 0.0
+        assert graph_revision(g) == before
+        g.nodes["A"]["remains"] = 0.5
+        assert graph_revision(g) != before
+
+
+class TestCCPMAnalysis:
+    def test_個別の計算結果と一致(self):
+        g = make_resource_conflict_graph()
+        analysis = get_ccpm_analysis(g)
+
+        assert (analysis.cp_length, analysis.cp) == calculate_critical_path(g, *get_in_out_edge_list(g))
+        assert (analysis.cc_length, analysis.cc, analysis.virtual_edges) == calculate_critical_chain(g)
+        assert analysis.active_chain == analysis.cc
+        assert analysis.priority_table() == calculate_priority_table(g, analysis.cc, analysis.virtual_edges)
+        # 仮想エッジ B→A を含むスケジュールと残パス長
+        assert analysis.schedule["A"] == (4.0, 7.0)
+        assert analysis.remaining["B"] == 9.0
+
+    def test_同じリビジョンと設定なら再利用(self):
+        first = get_ccpm_analysis(make_resource_conflict_graph(), max_concurrency=2)
+        assert get_ccpm_analysis(make_resource_conflict_graph(), max_concurrency=2) is first
+        assert get_ccpm_analysis(make_resource_conflict_graph(), max_concurrency=1) is not first
+        assert get_ccpm_analysis(make_resource_conflict_graph(), max_concurrency=2, duration_mode="display") is not first
+
+    def test_リビジョンを渡せばグラフをハッシュしない(self, monkeypatch):
+        g = make_resource_conflict_graph()
+        revision = graph_revision(g)
+        first = get_ccpm_analysis(g, revision=revision)
+        monkeypatch.setattr(
+            ccpm_analysis, "graph_revision", lambda graph: pytest.fail("graph_revision called")
+        )
+        assert get_ccpm_analysis(g, revision=revision) is first
+        assert first.revision == revision
+
+    def test_グラフが変われば再計算(self):
+        g = make_resource_conflict_graph()
+        first = get_ccpm_analysis(g)
+        g.nodes["C"]["days"] = 10
+        second = get_ccpm_analysis(g)
+        assert second is not first
+        assert second.cc_length == first.cc_length + 8
+
+    def test_呼び出し元のグラフ変更の影響を受けない(self):
+        g = make_resource_conflict_graph()
+        analysis = get_ccpm_analysis(g)
+        g.nodes["A"]["title"] = "変更後"
+        assert {row["title"] for row in analysis.priority_table()} == {"A", "B", "C"}
+
+    def test_古い結果から破棄する(self, monkeypatch):
+        monkeypatch.setattr(ccpm_analysis, "CACHE_SIZE", 2)
+        g = make_resource_conflict_graph()
+        first = get_ccpm_analysis(g, max_concurrency=1)
+        get_ccpm_analysis(g, max_concurrency=2)
+        get_ccpm_analysis(g, max_concurrency=3)
+        assert get_ccpm_analysis(g, max_concurrency=1) is not first
+
+
+class TestSeedPriorityTable:
+    def test_チェーンが同じなら更新済みテーブルを引き継ぐ(self):
+        g = make_resource_conflict_graph()
+        table = get_ccpm_analysis(g).priority().copy()
+        table.update_task("C", finished=True)
+        g.nodes["C"]["finished"] = True
+        ccpm_analysis.seed_priority_table(g, table)
+
+        analysis = get_ccpm_analysis(g)
+        assert analysis.priority() is table
+        assert analysis.priority_table() == calculate_priority_table(g, analysis.cc, analysis.virtual_edges)
+
+    def test_保存して読み込み直したグラフでも引き継ぐ(self, tmp_path):
+        # 優先度タブの完了チェックと同じく、メモリ上のデータとグラフを更新してから保存し、次の描画で読み込み直す
+        path = str(tmp_path / "p_ccpm.hjson")
+        g = make_resource_conflict_graph()
+        data = {
+            "nodes": [{"unique_id": node, "type": "process", **attrs} for node, attrs in g.nodes(data=True)],
+            "edges": [{"source": src, "destination": dst, "type": "arrow", "comment": ""} for src, dst in g.edges],
+            "project": {},
+        }
+        atomic_write_json(path, data)
+        data = load_source_data(path)
+        g = RequirementGraph(data, AppName.CCPM).graph
+        table = get_ccpm_analysis(g, revision=graph_revision(g)).priority().copy()
+
+        attrs = {"finished": True, "end": "2025/07/01", "remains": 0.0}
+        table.update_task("C", **attrs)
+        next(node for node in data["nodes"] if node["unique_id"] == "C").update(attrs)
+        g.nodes["C"].update(attrs)
+        ccpm_analysis.seed_priority_table(g, table)
+        atomic_write_json(path, data)
+
+        reloaded = RequirementGraph(load_source_data(path), AppName.CCPM).graph
+        assert reloaded.nodes["C"]["remains"] == 0
+        analysis = get_ccpm_analysis(reloaded, revision=graph_revision(reloaded))
+        assert analysis.priority() is table
+
+    def test_チェーンが変われば計算し直す(self):
+        g = make_resource_conflict_graph()
+        table = get_ccpm_analysis(g).priority().copy()
+        table.update_task("A", finished=True)
+        g.nodes["A"]["finished"] = True
+        ccpm_analysis.seed_priority_table(g, table)
+
+        analysis = get_ccpm_analysis(g)
+        assert analysis.priority() is not table
+        assert analysis.priority_table() == calculate_priority_table(g, analysis.cc, analysis.virtual_edges)
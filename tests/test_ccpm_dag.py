@@ -0,0 +1,168 @@
+"""ccpm_dag（コンパイル済み DAG）のユニットテスト。
+
+NetworkX を直接たどる従来の実装（参照実装）と結果・同値時の選び方が一致することを確認する。
+"""
+import random
+
+import networkx as nx
+import pytest
+
+from src.ccpm_dag import CompiledDag, compile_dag
+from src import ccpm_dag
+from src.ccpm_engine import (
+    RemainingLengths,
+    _compute_earliest_schedule,
+    _delay_schedule,
+    _get_effective_days,
+    calculate_critical_path,
+    get_in_out_edge_list,
+)
+
+
+def _reference_critical_path(graph, outputs):
+    dist, pred = {}, {}
+    for node in nx.topological_sort(graph):
+        days = _get_effective_days(graph, node)
+        dist[node], pred[node] = days, None
+        max_p, max_d = None, -1.0
+        for p in graph.predecessors(node):
+            if dist[p] > max_d:
+                max_d, max_p = dist[p], p
+        if max_p is not None:
+            dist[node], pred[node] = dist[max_p] + days, max_p
+    best, best_d = None, -1.0
+    for out in outputs or list(graph.nodes):
+        if dist[out] > best_d:
+            best, best_d = out, dist[out]
+    path = []
+    while best is not None:
+        path.append(best)
+        best = pred[best]
+    return best_d, path[::-1]
+
+
+def _reference_schedule(graph):
+    schedule = {}
+    for node in nx.topological_sort(graph):
+        preds = list(graph.predecessors(node))
+        es = max(schedule[p][1] for p in preds) if preds else 0.0
+        schedule[node] = (es, es + _get_effective_days(graph, node))
+    return schedule
+
+
+def _reference_remaining(graph):
+    remaining = {}
+    for node in reversed(list(nx.topological_sort(graph))):
+        succ = [remaining[s] for s in graph.successors(node)]
+        remaining[node] = _get_effective_days(graph, node) + (max(succ) if succ else 0.0)
+    return remaining
+
+
+def _random_graph(seed, size=150):
+    """日数を小さな整数にして同値（タイ）が多く出るようにしたランダム DAG。"""
+    rng = random.Random(seed)
+    g = nx.DiGraph()
+    names = [f"N{i}" for i in range(size)]
+    rng.shuffle(names)  # ノード名の順とトポロジカル順を無関係にする
+    for name in names:
+        g.add_node(
+            name, days=rng.randint(0, 3), remains=rng.randint(0, 3),
+            start=rng.choice(["", "2025/07/01"]), end="", finished=rng.random() < 0.1,
+        )
+    for _ in range(size * 2):
+        a, b = sorted(rng.sample(range(size), 2))
+        g.add_edge(names[a], names[b])
+    return g
+
+
+@pytest.mark.parametrize("seed", range(5))
+class TestEquivalence:
+    def test_クリティカルパス(self, seed):
+        g = _random_graph(seed)
+        _, outputs = get_in_out_edge_list(g)
+        assert calculate_critical_path(g, [], outputs) == _reference_critical_path(g, outputs)
+        assert calculate_critical_path(g, [], []) == _reference_critical_path(g, [])
+        dag = CompiledDag(g)
+        assert calculate_critical_path(g, [], outputs, dag=dag) == _reference_critical_path(g, outputs)
+        assert calculate_critical_path(g, [], [], dag=dag) == _reference_critical_path(g, [])
+
+    def test_最早スケジュール(self, seed):
+        g = _random_graph(seed)
+        assert _compute_earliest_schedule(g) == _reference_schedule(g)
+        assert _compute_earliest_schedule(g, CompiledDag(g)) == _reference_schedule(g)
+
+    def test_残パス長(self, seed):
+        g = _random_graph(seed)
+        dag = CompiledDag(g)
+        durations = dag.durations("remaining", lambda n: _get_effective_days(g, n))
+        assert dag.as_dict(dag.remaining_lengths(durations)) == _reference_remaining(g)
+        assert RemainingLengths(g).as_dict() == _reference_remaining(g)
+
+    def test_エッジ追加時のスケジュールの差分更新(self, seed):
+        g = _random_graph(seed)
+        schedule = _compute_earliest_schedule(g)
+        order = list(nx.topological_sort(g))
+        rng = random.Random(seed)
+        for _ in range(20):
+            a, b = sorted(rng.sample(range(len(order)), 2))
+            g.add_edge(order[a], order[b])
+            _delay_schedule(g, schedule, order[a], order[b])
+        assert schedule == _reference_schedule(g)
+
+
+class TestWithoutDag:
+    def test_DAGを渡さなければコンパイルしない(self, monkeypatch):
+        g = _random_graph(0)
+        _, outputs = get_in_out_edge_list(g)
+
+        def _fail(graph):
+            raise AssertionError("compiled")
+
+        monkeypatch.setattr(ccpm_dag.CompiledDag, "__init__", _fail)
+        calculate_critical_path(g, [], outputs)
+        _compute_earliest_schedule(g)
+        RemainingLengths(g)
+
+
+class TestCompiledDag:
+    def test_同値の親は先行ノードの順で最初(self):
+        g = nx.DiGraph()
+        for node in ("S", "A", "B", "E"):
+            g.add_node(node, days=1)
+        g.add_edge("S", "B")
+        g.add_edge("S", "A")
+        g.add_edge("B", "E")
+        g.add_edge("A", "E")
+        dag = CompiledDag(g)
+        durations = dag.durations("d", lambda n: 1.0)
+        assert dag.critical_path(durations, ["E"]) == (3.0, ["S", "B", "E"])
+
+    def test_日数はキーごとにキャッシュ(self):
+        g = nx.DiGraph()
+        g.add_node("A")
+        dag = CompiledDag(g)
+        calls = []
+        dag.durations("k", lambda n: calls.append(n) or 1.0)
+        dag.durations("k", lambda n: calls.append(n) or 1.0)
+        assert calls == ["A"]
+
+    def test_閉路はNone(self):
+        g = nx.DiGraph([("A", "B"), ("B", "A")])
+        assert compile_dag(g) is None
+        assert _compute_earliest_schedule(g) == {}
+        assert calculate_critical_path(g, [], []) == (0.0, [])
+
+    def test_2次元の日数は列ごとに1次元と一致(self):
+        import numpy as np
+        g = _random_graph(0)
+        dag = CompiledDag(g)
+        rng = np.random.default_rng(0)
+        durations = rng.uniform(0, 5, size=(len(dag), 4))
+        start, finish = dag.earliest_schedule(durations)
+        remaining = dag.remaining_lengths(durations)
+        for k in range(durations.shape[1]):
+            column = np.ascontiguousarray(durations[:, k])
+            expected_start, expected_finish = dag.earliest_schedule(column)
+            assert np.array_equal(start[:, k], expected_start)
+            assert np.array_equal(finish[:, k], expected_finish)
+            assert np.array_equal(remaining[:, k], dag.remaining_lengths(column))
@@ -88,6 +88,29 @@ class TestMakeGanttPuml:
         assert "[A] lasts 3 days" in result
         assert "colored in pink" in result  # クリティカルパス上のタスク
 
+    def test_依存関係の矢印は重複しない(self):
+        g = _make_test_graph()
+        project = {"start": "2025/07/01", "end": "2025/08/01", "holidays": [], "today": "2025/07/01"}
+        virtual_edges = [("C", "B", "田中"), ("C", "B", "田中"), ("A", "B", "田中")]
+        lines = make_gantt_puml(g, project, ["A", "B", "D"], virtual_edges).splitlines()
+        arrows = [line for line in lines if " -> " in line]
+        assert len(arrows) == len(set(arrows)) == 5
+        # 仮想エッジの先行タスクも後続より先に出力する
+        assert arrows.index("[A] -> [C]") < arrows.index("[C] -> [B]") < arrows.index("[B] -> [D]")
+
+    def test_進捗を更新したタスクのバーのみ再生成する(self):
+        from src.ccpm_engine import _story_bar
+        g = _make_test_graph()
+        project = {"start": "2025/07/01", "end": "2025/08/01", "holidays": ["2025/07/21"], "today": "2025/07/10"}
+        make_gantt_puml(g, project, ["A", "B", "D"])
+
+        g.nodes["B"].update(start="2025/07/04", remains=2)
+        misses = _story_bar.cache_info().misses
+        result = make_gantt_puml(g, project, ["A", "B", "D"])
+
+        assert _story_bar.cache_info().misses == misses + 1
+        assert "[タスクB] as [B] starts 2025/07/04 and ends 2025/07/14" in result
+
 
 class TestCalculatePriorityTable:
     def test_優先度テーブル生成(self):
@@ -106,6 +129,64 @@ class TestCalculatePriorityTable:
         assert result == []
 
 
+class TestPriorityTable:
+    def _random_ccpm_graph(self, seed, size=40):
+        import random
+        rng = random.Random(seed)
+        g = nx.DiGraph()
+        for i in range(size):
+            g.add_node(
+                f"T{i}", days=rng.randint(1, 8), title=f"タスク{i}", resource=f"R{i % 4}",
+                start="", end="", remains=rng.choice([0, 0, 1.5]), finished=rng.random() < 0.2,
+            )
+        for _ in range(size * 2):
+            a, b = sorted(rng.sample(range(size), 2))
+            g.add_edge(f"T{a}", f"T{b}")
+        return g
+
+    def test_一括計算と一致(self):
+        from src.ccpm_engine import PriorityTable
+        g = _make_test_graph()
+        assert PriorityTable(g, ["A", "B", "D"]).rows() == calculate_priority_table(g, ["A", "B", "D"])
+
+    def test_タスク状態の更新が再計算と一致(self):
+        import random
+        from src.ccpm_engine import PriorityTable, calculate_critical_chain
+        for seed in range(5):
+            g = self._random_ccpm_graph(seed)
+            _, cc, virtual_edges = calculate_critical_chain(g, max_concurrency=2)
+            table = PriorityTable(g, cc, virtual_edges)
+            rng = random.Random(seed)
+            for _ in range(15):
+                task = rng.choice(list(g.nodes))
+                attrs = {"finished": not g.nodes[task]["finished"], "remains": rng.choice([0.0, 2.5])}
+                table.update_task(task, **attrs)
+                g.nodes[task].update(attrs)
+                assert table.rows() == calculate_priority_table(g, cc, virtual_edges)
+
+    def test_完了で後続タスクが着手可能になる(self):
+        from src.ccpm_engine import PriorityTable
+        g = _make_test_graph()
+        table = PriorityTable(g, ["A", "B", "D"])
+        table.update_task("A", finished=True)
+        rows = {row["task"]: row for row in table.rows()}
+        assert rows["A"]["status"] == "⚫ 完了"
+        assert rows["B"]["actionable"] and rows["C"]["actionable"]
+        assert calculate_priority_table(g, ["A", "B", "D"]) != table.rows()
+        g.nodes["A"]["finished"] = True
+        assert calculate_priority_table(g, ["A", "B", "D"]) == table.rows()
+
+    def test_複製は独立して更新できる(self):
+        from src.ccpm_engine import PriorityTable
+        g = _make_test_graph()
+        table = PriorityTable(g, ["A", "B", "D"])
+        before = table.rows()
+        other = table.copy()
+        other.update_task("B", finished=True)
+        assert table.rows() == before
+        assert other.rows() != before
+
+
 class TestCalculateCriticalChain:
     def test_リソース競合なしではCPと一致(self):
         """全タスクが異なるリソースなら CC == CP。"""
@@ -145,3 +226,284 @@ class TestCalculateCriticalChain:
         assert len(virtual_edges) == 1  # 1件のリソース競合解消
         assert virtual_edges[0][2] == "田中"  # 田中のリソース競合
 
+
+    def test_50件を超える競合もすべて解消(self):
+        """同一リソースの並行タスクが多数あっても反復上限なしで直列化される。"""
+        from src.ccpm_engine import calculate_critical_chain
+        g = nx.DiGraph()
+        for i in range(80):
+            g.add_node(f"T{i}", days=1, title=f"T{i}", resource="田中", start="", end="", remains=0, finished=False)
+        cc_length, cc_path, virtual_edges = calculate_critical_chain(g)
+        assert cc_length == 80
+        assert len(cc_path) == 80
+        assert all(res == "田中" for _, _, res in virtual_edges)
+
+    def test_同時実行上限(self):
+        """無名リソースの上限を超えるタスクは ConcurrencyLimit で遅らせる。"""
+        from src.ccpm_engine import calculate_critical_chain
+        g = nx.DiGraph()
+        for i in range(6):
+            g.add_node(f"T{i}", days=2, title=f"T{i}", resource="", start="", end="", remains=0, finished=False)
+        g.add_node("D", days=5, title="D", resource="", start="", end="", remains=0, finished=False, type="deliverable")
+        cc_length, _, virtual_edges = calculate_critical_chain(g, max_concurrency=2)
+        assert cc_length == 6  # 2件ずつ 3 回
+        assert virtual_edges
+        assert all(res == "ConcurrencyLimit" for _, _, res in virtual_edges)
+        assert all("D" not in (src, dst) for src, dst, _ in virtual_edges)
+
+    def test_平準化後に競合が残らない(self):
+        """ランダムなネットワークで、仮想エッジ追加後の ASAP スケジュールに競合がないこと。"""
+        import random
+        from src.ccpm_engine import (
+            _compute_earliest_schedule,
+            _detect_resource_conflicts,
+            calculate_critical_chain,
+        )
+        rng = random.Random(1)
+        g = nx.DiGraph()
+        nodes = []
+        for i in range(200):
+            node = f"T{i}"
+            g.add_node(
+                node, days=rng.randint(0, 5), title=node, resource=rng.choice(["田中", "鈴木", "佐藤", ""]),
+                start="", end="", remains=0, finished=rng.random() < 0.1,
+            )
+            for pred in rng.sample(nodes[-30:], min(len(nodes), rng.randint(0, 2))):
+                g.add_edge(pred, node)
+            nodes.append(node)
+
+        for max_concurrency in (0, 3):
+            cc_length, _, virtual_edges = calculate_critical_chain(g, max_concurrency)
+            leveled = g.copy()
+            leveled.add_edges_from((src, dst) for src, dst, _ in virtual_edges)
+            assert nx.is_directed_acyclic_graph(leveled)
+            schedule = _compute_earliest_schedule(leveled)
+            assert _detect_resource_conflicts(leveled, schedule, max_concurrency) == []
+            assert cc_length == max(end for _, end in schedule.values())
+
+    def test_残存競合の解消ではコンパイルし直さない(self, monkeypatch):
+        """平準化を通さずに競合を残しても、DAG のコンパイルは解消前後の2回だけ。"""
+        from src import ccpm_engine
+        from src.ccpm_engine import (
+            _compute_earliest_schedule,
+            _detect_resource_conflicts,
+            _level_critical_chain,
+        )
+        g = nx.DiGraph()
+        for i in range(6):
+            g.add_node(f"T{i}", days=i + 1, title=f"T{i}", resource="田中", start="", end="", remains=0, finished=False)
+        g.add_edge("T0", "T5")
+
+        compiled = []
+        original = ccpm_engine.compile_dag
+        monkeypatch.setattr(ccpm_engine, "_level_resources", lambda *args, **kwargs: [])
+        monkeypatch.setattr(
+            ccpm_engine, "compile_dag", lambda graph: compiled.append(1) or original(graph)
+        )
+        cc_length, _, virtual_edges, work_graph, dag = _level_critical_chain(g)
+
+        assert len(compiled) == 2
+        # T0 → T5 の依存に続けて残りを直列化する（冗長な仮想エッジは簡約で除く）
+        assert len(virtual_edges) == 4
+        schedule = _compute_earliest_schedule(work_graph, dag)
+        assert _detect_resource_conflicts(work_graph, schedule, 0) == []
+        assert cc_length == 21
+
+
+class TestReachabilityIndex:
+    def _random_dag(self, seed=0, size=60):
+        import random
+        rng = random.Random(seed)
+        g = nx.DiGraph()
+        g.add_nodes_from(range(size))
+        for _ in range(size * 2):
+            a, b = sorted(rng.sample(range(size), 2))
+            g.add_edge(a, b)
+        return g
+
+    def test_nxのhas_pathと一致(self):
+        from src.ccpm_engine import _ReachabilityIndex
+        g = self._random_dag()
+        index = _ReachabilityIndex(g)
+        for a in g.nodes:
+            for b in g.nodes:
+                assert index.has_path(a, b) == nx.has_path(g, a, b)
+
+    def test_エッジ追加を差分で反映(self):
+        import random
+        from src.ccpm_engine import _ReachabilityIndex
+        g = self._random_dag(seed=1)
+        index = _ReachabilityIndex(g)
+        rng = random.Random(2)
+        for _ in range(30):
+            a, b = sorted(rng.sample(list(g.nodes), 2))
+            g.add_edge(a, b)
+            index.add_edge(a, b)
+        rebuilt = _ReachabilityIndex(g)
+        for a in g.nodes:
+            for b in g.nodes:
+                assert index.has_path(a, b) == rebuilt.has_path(a, b)
+
+
+class TestReduceVirtualEdges:
+    def test_迂回ルートがある仮想エッジを除く(self):
+        from src.ccpm_engine import _ReachabilityIndex, _reduce_virtual_edges
+        g = nx.DiGraph([("A", "B"), ("B", "C"), ("A", "C"), ("C", "D")])
+        virtual = [("A", "C", "田中"), ("C", "D", "鈴木")]
+        assert _reduce_virtual_edges(g, virtual, _ReachabilityIndex(g)) == [("C", "D", "鈴木")]
+
+    def test_推移的簡約と一致する(self):
+        import random
+        from src.ccpm_engine import _ReachabilityIndex, _reduce_virtual_edges
+        rng = random.Random(0)
+        for _ in range(30):
+            g = nx.DiGraph()
+            g.add_nodes_from(range(25))
+            for a in range(25):
+                for b in range(a + 1, 25):
+                    if rng.random() < 0.15:
+                        g.add_edge(a, b)
+            virtual = [(a, b, "R") for a, b in g.edges if rng.random() < 0.5]
+            reduced = nx.transitive_reduction(g)
+
+            expected = [edge for edge in virtual if reduced.has_edge(edge[0], edge[1])]
+            assert _reduce_virtual_edges(g, virtual, _ReachabilityIndex(g)) == expected
+
+
+class TestDetectResourceConflicts:
+    def _brute_force(self, graph, schedule):
+        """全ペア比較による期待値（名前付きリソースのみ）。"""
+        pairs = set()
+        nodes = list(graph.nodes)
+        for i, a in enumerate(nodes):
+            for b in nodes[i + 1:]:
+                res = graph.nodes[a]["resource"]
+                if not res or res != graph.nodes[b]["resource"]:
+                    continue
+                (a_start, a_end), (b_start, b_end) = schedule[a], schedule[b]
+                if a_start < b_end and b_start < a_end and not (nx.has_path(graph, a, b) or nx.has_path(graph, b, a)):
+                    pairs.add(frozenset((a, b)))
+        return pairs
+
+    def test_全ペア比較と一致(self):
+        import random
+        from src.ccpm_engine import _detect_resource_conflicts
+        rng = random.Random(3)
+        g = nx.DiGraph()
+        schedule = {}
+        for i in range(120):
+            node = f"T{i}"
+            days = rng.randint(1, 5)
+            g.add_node(node, days=days, resource=rng.choice(["田中", "鈴木"]), start="", remains=0, finished=False)
+            start = float(rng.randint(0, 40))
+            schedule[node] = (start, start + days)
+        for _ in range(60):
+            a, b = sorted(rng.sample(range(120), 2))
+            g.add_edge(f"T{a}", f"T{b}")
+
+        conflicts = _detect_resource_conflicts(g, schedule)
+
+        assert {frozenset((a, b)) for a, b, _ in conflicts} == self._brute_force(g, schedule)
+        for a, b, res in conflicts:
+            assert schedule[a][0] <= schedule[b][0]
+            assert g.nodes[a]["resource"] == g.nodes[b]["resource"] == res
+
+    def test_終了と同時の開始は重ならない(self):
+        from src.ccpm_engine import _detect_resource_conflicts
+        g = nx.DiGraph()
+        for node in ("A", "B", "C"):
+            g.add_node(node, days=2, resource="田中", start="", remains=0, finished=False)
+        schedule = {"A": (0.0, 2.0), "B": (2.0, 4.0), "C": (3.0, 5.0)}
+        assert _detect_resource_conflicts(g, schedule) == [("B", "C", "田中")]
+
+    def test_同時実行上限の超過(self):
+        from src.ccpm_engine import _detect_resource_conflicts
+        g = nx.DiGraph()
+        for node in ("A", "B", "C"):
+            g.add_node(node, days=2, resource="", start="", remains=0, finished=False)
+        g.add_edge("A", "B")
+        schedule = {"A": (0.0, 2.0), "B": (2.0, 4.0), "C": (0.0, 2.0)}
+        assert _detect_resource_conflicts(g, schedule, max_concurrency=1) == [("A", "C", "ConcurrencyLimit")]
+        assert _detect_resource_conflicts(g, schedule, max_concurrency=2) == []
+
+
+class TestRemainingLengths:
+    def test_深い直列チェーンでも再帰上限に当たらない(self):
+        import sys
+        from src.ccpm_engine import RemainingLengths
+        size = sys.getrecursionlimit() * 3
+        g = nx.DiGraph()
+        nodes = [f"T{i}" for i in range(size)]
+        for i, node in enumerate(nodes):
+            g.add_node(node, days=1, title=node, resource="", start="", end="", remains=0, finished=False)
+            if i:
+                g.add_edge(nodes[i - 1], node)
+        remaining = RemainingLengths(g)
+        assert remaining["T0"] == size
+        assert remaining[nodes[-1]] == 1
+
+        table = calculate_priority_table(g, nodes)
+        assert table[0]["task"] == "T0"
+        assert table[0]["buffer"] == 0
+
+    def test_エッジ追加を差分で反映(self):
+        import random
+        from src.ccpm_engine import RemainingLengths
+        rng = random.Random(5)
+        g = nx.DiGraph()
+        for i in range(80):
+            g.add_node(i, days=rng.randint(0, 4), start="", remains=0, finished=False)
+        for _ in range(100):
+            a, b = sorted(rng.sample(range(80), 2))
+            g.add_edge(a, b)
+        remaining = RemainingLengths(g)
+        for _ in range(40):
+            a, b = sorted(rng.sample(range(80), 2))
+            g.add_edge(a, b)
+            remaining.add_edge(a, b)
+
+        assert remaining.as_dict() == RemainingLengths(g).as_dict()
+
+
+class TestCalculatePortfolioFever:
+    def test_1点ずつの計算と一致する(self):
+        import random
+        from src.ccpm_engine import calculate_fever_data_from_progress, calculate_portfolio_fever
+        rng = random.Random(0)
+
+        def day():
+            return f"2025/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}"
+
+        projects = [
+            {
+                "start": rng.choice([day(), day(), "", "不正な日付"]),
+                "end": day(),
+                "buffer_percent": rng.choice([30, 0, None, 100, 120]),
+                "holidays": rng.choice([[], ["2025/05/05"]]),
+                "progress": [
+                    {"date": rng.choice([day(), day(), ""]), "progress": rng.choice([0, 50, 100, 150, None])}
+                    for _ in range(rng.randint(0, 6))
+                ],
+            }
+            for _ in range(100)
+        ]
+        common = ["2025/01/01"]
+
+        results = calculate_portfolio_fever(projects, common)
+
+        for project, columns in zip(projects, results):
+            for i, point in enumerate(project["progress"]):
+                expected = calculate_fever_data_from_progress(
+                    project, point["progress"], point["date"], common
+                )
+                assert {key: columns[key][i] for key in expected} == pytest.approx(expected)
+
+    def test_同じ内容ならキャッシュを返す(self):
+        import copy
+        from src.ccpm_engine import calculate_portfolio_fever
+        projects = [{"start": "2025/04/01", "end": "2025/06/30", "progress": [{"date": "2025/05/01", "progress": 40}]}]
+
+        first = calculate_portfolio_fever(projects, [])
+        assert calculate_portfolio_fever(copy.deepcopy(projects), []) is first
+        projects[0]["progress"][0]["progress"] = 50
+        assert calculate_portfolio_fever(projects, [])[0]["progress"][0] == 50
@@ -0,0 +1,111 @@
+"""ccpm_portfolio（CCPM ファイル群のフィーバーデータ集計）のユニットテスト"""
+import json
+import os
+import shutil
+
+import pytest
+
+from src import write_behind
+from src.ccpm_analysis import get_ccpm_analysis
+from src.ccpm_engine import calculate_fever_data
+from src.ccpm_portfolio import CCPMPortfolio, analyze_ccpm_file, list_ccpm_files
+from src.constants import AppName
+from src.file_io import load_source_data
+from src.requirement_graph import RequirementGraph
+from src.write_behind import WriteBehindWriter
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample", "ccpm.hjson")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name in ("a_ccpm.hjson", "b_ccpm.hjson", "c_ccpm.hjson"):
+        shutil.copy(SAMPLE, tmp_path / name)
+    # CCPM 以外のファイルは対象外
+    shutil.copy(SAMPLE, tmp_path / "other.hjson")
+    return tmp_path
+
+
+class TestAnalyzeCCPMFile:
+    def test_CCPMページと同じフィーバー値(self, data_dir):
+        entry = analyze_ccpm_file(str(data_dir / "a_ccpm.hjson"))
+
+        data = load_source_data(SAMPLE)
+        project = data["project"]
+        graph = RequirementGraph(data, AppName.CCPM).graph
+        analysis = get_ccpm_analysis(graph, max_concurrency=len(project["resources"]))
+        expected = calculate_fever_data(graph, project, analysis.active_chain, analysis.active_length)
+
+        assert entry["error"] is None
+        assert entry["id"] == "a"
+        assert entry["fever"] == pytest.approx(expected)
+        # 記録済みの履歴（今日の分は現在値で置き換え）と現在値
+        assert entry["points"][-1]["date"] == project["today"]
+        assert entry["points"][-1]["fever"]["buffer_used"] == pytest.approx(expected["buffer_used"])
+        dates = [point["date"] for point in entry["points"]]
+        assert dates == sorted(dates)
+        assert len(set(dates)) == len(dates)
+
+    def test_読み込めないファイルはエラーを返す(self, tmp_path):
+        path = tmp_path / "broken_ccpm.hjson"
+        path.write_text("{ nodes: [", encoding="utf-8")
+        entry = analyze_ccpm_file(str(path))
+        assert entry["error"]
+        assert entry["points"] == []
+
+
+class TestCCPMPortfolio:
+    def test_変更されたファイルのみ再計算する(self, data_dir):
+        portfolio = CCPMPortfolio(str(data_dir), max_workers=2)
+
+        first = portfolio.refresh()
+        assert [entry["id"] for entry in first] == ["a", "b", "c"]
+        assert len(portfolio.last_recomputed) == 3
+
+        second = portfolio.refresh()
+        assert portfolio.last_recomputed == []
+        assert all(x is y for x, y in zip(first, second))
+
+        path = data_dir / "b_ccpm.hjson"
+        path.write_text(path.read_text(encoding="utf-8").replace("2025/08/05", "2025/09/01"), encoding="utf-8")
+        third = portfolio.refresh()
+        assert portfolio.last_recomputed == [str(path)]
+        assert third[0] is first[0]
+        assert third[1]["today"] == "2025/09/01"
+
+    def test_削除されたファイルは除く(self, data_dir):
+        portfolio = CCPMPortfolio(str(data_dir), max_workers=1)
+        portfolio.refresh()
+        os.remove(data_dir / "c_ccpm.hjson")
+        assert [entry["id"] for entry in portfolio.refresh()] == ["a", "b"]
+        assert list_ccpm_files(str(data_dir))[-1].endswith("b_ccpm.hjson")
+
+    def test_再計算の間はロックを保持しない(self, data_dir):
+        portfolio = CCPMPortfolio(str(data_dir), max_workers=1)
+        compute = portfolio._compute
+        held = []
+
+        def _compute(paths):
+            held.append(portfolio._lock.locked())
+            return compute(paths)
+
+        portfolio._compute = _compute
+        assert len(portfolio.refresh()) == 3
+        assert held == [False]
+
+    def test_未書き込みの編集を反映する(self, data_dir, monkeypatch):
+        path = str(data_dir / "b_ccpm.hjson")
+        data = load_source_data(path)
+        data["project"]["today"] = "2025/09/01"
+
+        def _write(key, value, context):
+            with open(key, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+
+        writer = WriteBehindWriter(_write, delay=60, max_delay=60)
+        monkeypatch.setattr(write_behind, "_writer", writer)
+        writer.submit(path, data)
+
+        entries = CCPMPortfolio(str(data_dir), max_workers=1).refresh()
+        assert entries[1]["today"] == "2025/09/01"
+        assert writer.has_pending(path) is False
@@ -0,0 +1,161 @@
+"""ccpm_scenario（What-if シナリオの比較）のユニットテスト"""
+import random
+
+import networkx as nx
+import pytest
+
+from src.ccpm_analysis import CCPMAnalysis, graph_revision
+from src.ccpm_engine import _level_resources, calculate_critical_chain
+from src.ccpm_scenario import Scenario, project_buffer
+from tests.ccpm_graphs import add_task
+
+PROJECT = {"start": "2025/07/01", "end": "2025/07/31", "today": "2025/07/01", "holidays": []}
+
+
+def _make_graph():
+    """A(3,田中)→C(2,鈴木)、B(4,田中)→D(1,鈴木)（田中・鈴木がそれぞれ競合）。"""
+    g = nx.DiGraph()
+    add_task(g, "A", 3, "田中")
+    add_task(g, "B", 4, "田中")
+    add_task(g, "C", 2, "鈴木")
+    add_task(g, "D", 1, "鈴木")
+    g.add_edge("A", "C")
+    g.add_edge("B", "D")
+    return g
+
+
+def _make_random_graph(seed, count=120):
+    rng = random.Random(seed)
+    g = nx.DiGraph()
+    for i in range(count):
+        add_task(g, f"t{i}", rng.randint(1, 5), f"r{rng.randint(0, 5)}")
+        for j in rng.sample(range(i), min(i, rng.randint(0, 2))):
+            g.add_edge(f"t{j}", f"t{i}")
+    return g
+
+
+def _apply(graph, extra_days):
+    """extra_days を日数に直接反映したグラフ（比較用）。"""
+    g = graph.copy()
+    for node, delta in extra_days.items():
+        g.nodes[node]["days"] = max(0.0, g.nodes[node]["days"] + delta)
+    return g
+
+
+class TestIncrementalScenario:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_仮想エッジを固定した全体の再計算と一致(self, seed):
+        g = _make_random_graph(seed)
+        analysis = CCPMAnalysis(g, project=PROJECT)
+        engine = analysis.scenarios(PROJECT)
+        rng = random.Random(seed)
+        extra_days = {f"t{rng.randrange(len(g))}": rng.choice([-3, -1, 2, 5]) for _ in range(3)}
+
+        result = engine.evaluate(Scenario("変更", extra_days=extra_days))
+
+        # 仮想エッジを追加したグラフで日数を変えてそのまま最長パスを求めた結果と同じ
+        expected = _apply(g, extra_days)
+        expected.add_edges_from((src, dst) for src, dst, _ in analysis.virtual_edges)
+        dist = {}
+        for node in nx.topological_sort(expected):
+            dist[node] = expected.nodes[node]["days"] + max(
+                (dist[p] for p in expected.predecessors(node)), default=0
+            )
+        assert result.chain_length == max(dist.values())
+        assert sum(expected.nodes[n]["days"] for n in result.chain) == result.chain_length
+        assert result.virtual_edges == analysis.virtual_edges
+        assert not result.releveled
+
+    def test_変更したタスクの後続だけを再計算する(self):
+        g = _make_graph()
+        engine = CCPMAnalysis(g, project=PROJECT).scenarios(PROJECT)
+        # D はどのタスクの先行でもないため、D だけを再計算する
+        result = engine.evaluate(Scenario("D+2", extra_days={"D": 2}))
+        assert result.recomputed == 1
+        assert result.chain_length == engine.base.chain_length + 2
+        assert result.delta_length == 2
+        assert result.delta_buffer == -2
+
+    def test_完了済みのタスクは変更しない(self):
+        g = _make_graph()
+        g.nodes["A"]["finished"] = True
+        engine = CCPMAnalysis(g, project=PROJECT).scenarios(PROJECT)
+        result = engine.evaluate(Scenario("A+5", extra_days={"A": 5}))
+        assert result.chain_length == engine.base.chain_length
+        assert result.recomputed == 0
+
+    def test_元のグラフと分析結果を変更しない(self):
+        g = _make_graph()
+        analysis = CCPMAnalysis(g, project=PROJECT)
+        revision = graph_revision(g)
+        engine = analysis.scenarios(PROJECT)
+        engine.compare([
+            Scenario("遅延", extra_days={"A": 3}),
+            Scenario("増員", resource_capacity={"田中": 2}),
+        ])
+        assert graph_revision(g) == revision
+        assert analysis.scenarios(PROJECT).base == engine.base
+
+
+class TestReleveledScenario:
+    def test_担当者の増員で仮想エッジが減りチェーンが短くなる(self):
+        g = _make_graph()
+        engine = CCPMAnalysis(g, project=PROJECT).scenarios(PROJECT)
+        assert engine.base.chain_length == 8
+
+        results = engine.compare([Scenario("田中を2人", resource_capacity={"田中": 2})])
+        assert [r.name for r in results] == ["基準", "田中を2人"]
+        result = results[1]
+        assert result.releveled
+        assert all(resource != "田中" for _, _, resource in result.virtual_edges)
+        assert result.chain_length == 6
+        assert result.delta_length == -2
+
+    def test_人数が1なら基準と同じ(self):
+        g = _make_random_graph(1)
+        analysis = CCPMAnalysis(g, project=PROJECT)
+        engine = analysis.scenarios(PROJECT)
+        result = engine._evaluate_releveled(Scenario("同じ"))
+        assert result.chain_length == analysis.cc_length
+        assert result.virtual_edges == analysis.virtual_edges
+
+    def test_日数の変更と増員を同時に反映する(self):
+        g = _make_graph()
+        engine = CCPMAnalysis(g, project=PROJECT).scenarios(PROJECT)
+        result = engine.evaluate(
+            Scenario("両方", extra_days={"A": 2}, resource_capacity={"田中": 2, "鈴木": 2})
+        )
+        # 競合がなくなり A(5)→C(2) が最長
+        assert result.virtual_edges == []
+        assert result.chain == ["A", "C"]
+        assert result.chain_length == 7
+
+
+class TestLevelResourcesCapacity:
+    def test_人数分までは同時に担当できる(self):
+        g = nx.DiGraph()
+        for node, days in [("A", 3), ("B", 2), ("C", 1)]:
+            add_task(g, node, days, "田中")
+        edges = _level_resources(g.copy(), resource_capacity={"田中": 2})
+        # 2人なら A と B は並行し、C は先に空く B の完了を待つ
+        assert edges == [("B", "C", "田中")]
+        assert len(_level_resources(g.copy())) == 2
+
+
+class TestProjectBuffer:
+    def test_フィーバーチャートと同じ式で求める(self):
+        # 7月の稼働日は 23 日、ベースライン CC 長 8 日 → 全バッファ 15 日
+        assert project_buffer(PROJECT, 8, 8) == (15.0, 0.0)
+        remaining, used = project_buffer(PROJECT, 11, 8)
+        assert remaining == 12.0
+        assert used == pytest.approx(20.0)
+        assert project_buffer({}, 8, 8) == (0.0, 0.0)
+
+    def test_ベースラインの登録値を優先する(self):
+        project = dict(PROJECT, baseline={"cc_length": 6, "total_buffer": 10})
+        assert project_buffer(project, 8, 8) == (8.0, 20.0)
+
+    def test_CCと同じチェーン長(self):
+        g = _make_graph()
+        cc_length, _, _ = calculate_critical_chain(g)
+        assert CCPMAnalysis(g, project=PROJECT).scenarios(PROJECT).base.chain_length == cc_length
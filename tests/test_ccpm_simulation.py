@@ -0,0 +1,73 @@
+"""ccpm_simulation（モンテカルロ・リスクシミュレーション）のユニットテスト"""
+import networkx as nx
+import numpy as np
+import pytest
+
+from src import ccpm_simulation
+from src.ccpm_engine import calculate_critical_chain
+from src.ccpm_simulation import simulate_schedule, task_duration_params
+from src.process_pool import create_process_pool
+from tests.ccpm_graphs import make_resource_conflict_graph
+
+
+class TestTaskDurationParams:
+    def test_安全見積りと倍率から分布を決める(self):
+        g = make_resource_conflict_graph()
+        g.nodes["A"]["safe_days"] = 6
+        g.nodes["B"].update(start="2025/07/01", remains=1.5)
+        g.nodes["C"]["finished"] = True
+        median, sigma = task_duration_params(g, ["A", "B", "C"], safe_ratio=1.5)
+        assert median.tolist() == [3.0, 1.5, 0.0]
+        assert sigma[0] == pytest.approx(np.log(2.0) / ccpm_simulation._Z90)
+        assert sigma[1] == pytest.approx(np.log(1.5) / ccpm_simulation._Z90)
+
+    def test_サンプルの中央値と90パーセンタイル(self):
+        g = nx.DiGraph()
+        g.add_node("A", days=10, safe_days=20, start="", remains=0, finished=False)
+        result = simulate_schedule(g, iterations=20000, seed=0, max_workers=1)
+        assert np.percentile(result.completion, 50) == pytest.approx(10, rel=0.03)
+        assert np.percentile(result.completion, 90) == pytest.approx(20, rel=0.03)
+
+
+class TestSimulateSchedule:
+    def test_ばらつきがなければCC長と一致(self):
+        g = make_resource_conflict_graph()
+        cc_length, cc, virtual_edges = calculate_critical_chain(g, max_concurrency=2)
+        result = simulate_schedule(g, virtual_edges, iterations=50, safe_ratio=1.0, max_workers=1)
+        assert set(result.percentiles.values()) == {cc_length}
+        assert result.probability_within(cc_length) == 1.0
+        assert {node for node, index in result.criticality.items() if index == 1.0} == set(cc)
+        # 仮想エッジがなければ A と B は並行できる
+        assert simulate_schedule(g, iterations=10, safe_ratio=1.0, max_workers=1).percentiles[50] == 6.0
+
+    def test_同じseedならチャンクの並列計算でも同じ結果(self, monkeypatch):
+        monkeypatch.setattr(ccpm_simulation, "CHUNK_SIZE", 64)
+        pools = []
+
+        def recording_pool(max_workers=None):
+            pool = create_process_pool(max_workers)
+            pools.append(pool)
+            return pool
+
+        monkeypatch.setattr(ccpm_simulation, "create_process_pool", recording_pool)
+        g = make_resource_conflict_graph()
+        _, _, virtual_edges = calculate_critical_chain(g, max_concurrency=2)
+        serial = simulate_schedule(g, virtual_edges, iterations=300, seed=7, max_workers=1)
+        parallel = simulate_schedule(g, virtual_edges, iterations=300, seed=7, max_workers=2)
+        # ワーカーは共通のヘルパーで spawn により起動する
+        assert [pool._mp_context.get_start_method() for pool in pools] == ["spawn"]
+        assert serial.iterations == parallel.iterations == 300
+        assert np.array_equal(serial.completion, parallel.completion)
+        assert serial.criticality == parallel.criticality
+
+    def test_クリティカル指数(self):
+        """並行する A(3) と B(4) のうち、長くなった方が最長パスに乗る。"""
+        g = make_resource_conflict_graph()
+        result = simulate_schedule(g, iterations=2000, seed=1, max_workers=1)
+        assert result.criticality["C"] == 1.0
+        assert 0 < result.criticality["A"] < result.criticality["B"] < 1
+        assert result.criticality["A"] + result.criticality["B"] == pytest.approx(1.0, abs=0.01)
+
+    def test_閉路ならNone(self):
+        g = nx.DiGraph([("A", "B"), ("B", "A")])
+        assert simulate_schedule(g, iterations=10, max_workers=1) is None
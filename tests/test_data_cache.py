@@ -0,0 +1,110 @@
+"""data_cache（サイドカーキャッシュ）のユニットテスト"""
+import os
+import pickle
+
+from src.data_cache import (
+    CACHE_SCHEMA_VERSION,
+    get_sidecar_path,
+    load_with_sidecar,
+)
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class _Builder:
+    """呼び出し回数を数えるペイロード構築関数。"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return dict(self.payload)
+
+
+class TestGetSidecarPath:
+    def test_拡張子が置き換わる(self):
+        assert get_sidecar_path(os.path.join("data", "a.hjson")) == os.path.join("data", "a.rvcache")
+
+
+class TestLoadWithSidecar:
+    def test_初回は構築してキャッシュを書き込む(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        builder = _Builder({"value": 1})
+
+        result = load_with_sidecar(str(src), "app", builder)
+
+        assert result == {"value": 1}
+        assert builder.calls == 1
+        assert os.path.exists(get_sidecar_path(str(src)))
+
+    def test_2回目はキャッシュから復元(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        builder = _Builder({"value": 1})
+
+        load_with_sidecar(str(src), "app", builder)
+        result = load_with_sidecar(str(src), "app", builder)
+
+        assert result == {"value": 1}
+        assert builder.calls == 1
+
+    def test_元ファイル変更で無効化(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        load_with_sidecar(str(src), "app", _Builder({"value": 1}))
+
+        _write(src, "{nodes: [{unique_id: n1}], edges: []}")
+        builder = _Builder({"value": 2})
+        result = load_with_sidecar(str(src), "app", builder)
+
+        assert result == {"value": 2}
+        assert builder.calls == 1
+
+    def test_キーが異なると無効化(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        load_with_sidecar(str(src), "app_a", _Builder({"value": 1}))
+
+        builder = _Builder({"value": 2})
+        result = load_with_sidecar(str(src), "app_b", builder)
+
+        assert result == {"value": 2}
+        assert builder.calls == 1
+
+    def test_スキーマバージョン不一致で無効化(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        load_with_sidecar(str(src), "app", _Builder({"value": 1}))
+
+        sidecar = get_sidecar_path(str(src))
+        with open(sidecar, "rb") as f:
+            envelope = pickle.load(f)
+        envelope["schema_version"] = CACHE_SCHEMA_VERSION + 1
+        with open(sidecar, "wb") as f:
+            pickle.dump(envelope, f)
+
+        builder = _Builder({"value": 2})
+        assert load_with_sidecar(str(src), "app", builder) == {"value": 2}
+        assert builder.calls == 1
+
+    def test_破損したキャッシュは無視(self, tmp_path):
+        src = tmp_path / "a.hjson"
+        _write(src, "{nodes: [], edges: []}")
+        with open(get_sidecar_path(str(src)), "wb") as f:
+            f.write(b"broken")
+
+        builder = _Builder({"value": 3})
+        assert load_with_sidecar(str(src), "app", builder) == {"value": 3}
+        assert builder.calls == 1
+
+    def test_元ファイルがない場合はキャッシュを作らない(self, tmp_path):
+        src = tmp_path / "missing.hjson"
+        builder = _Builder({"value": 4})
+        assert load_with_sidecar(str(src), "app", builder) == {"value": 4}
+        assert not os.path.exists(get_sidecar_path(str(src)))
@@ -123,3 +123,184 @@ def test_copy_file_restores_selected_backup(monkeypatch, tmp_path):
     assert restored["nodes"][0]["title"] == "v1"
     assert fake_st.session_state.get("need_full_rerun") is True
 
+
+
+def test_journal_mode_undo_and_restore(monkeypatch, tmp_path):
+    """ジャーナル方式でも Undo とバックアップ選択による復元ができることを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+    (tmp_path / "setting").mkdir()
+    fake_st.session_state.config_data = {
+        "backup_mode": "journal",
+        "backup_snapshot_interval": 2,
+    }
+
+    data = {"nodes": [], "edges": []}
+    manager = RequirementManager(data)
+
+    manager.add({"unique_id": "n1", "title": "v1"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+    manager.update("n1", {"unique_id": "tmp", "title": "v2"}, [], [])
+    file_io.update_source_data(str(file_path), manager.requirements)
+    manager.add({"unique_id": "n2", "title": "other"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+
+    # フルコピーのバックアップファイルは作られない
+    assert list((tmp_path / "back").glob("*_req.hjson")) == []
+    backups = file_io._list_backup_names("req")
+    assert len(backups) == 3
+
+    # Undo: n2 追加前（v2状態）へ戻る
+    assert file_io.undo_last_change() is True
+    restored = file_io.load_source_data(str(file_path))
+    assert [n["unique_id"] for n in restored["nodes"]] == ["n1"]
+    assert restored["nodes"][0]["title"] == "v2"
+    assert len(file_io._list_backup_names("req")) == 2
+
+    # 最古のバックアップ（v1状態）を選択して復元
+    fake_st.session_state["selected_backup_file"] = backups[-1]
+    file_io.copy_file()
+    restored = file_io.load_source_data(str(file_path))
+    assert restored["nodes"][0]["title"] == "v1"
+
+
+def test_cleanup_and_undo_use_backup_index(monkeypatch, tmp_path):
+    """保持期間切れのバックアップ削除とUndo時のPNG削除がインデックスに反映されることを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+    fake_st.session_state.config_data = {"backup_retention_days": 30}
+    (tmp_path / "setting").mkdir()
+    back_dir = tmp_path / "back"
+    back_dir.mkdir()
+    # アプリ外で置かれた古いバックアップ
+    (back_dir / "20200101_000000_req.hjson").write_text("{}", encoding="utf-8")
+    (back_dir / "20200101_000000_req.png").write_text("", encoding="utf-8")
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    manager.add({"unique_id": "n1", "title": "v1"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+    file_io.save_backup_png("req", b"png")
+    manager.add({"unique_id": "n2", "title": "v2"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+    file_io.save_backup_png("req", b"png")
+
+    file_io._cleanup_old_backups()
+    assert not (back_dir / "20200101_000000_req.hjson").exists()
+    assert not (back_dir / "20200101_000000_req.png").exists()
+    assert len(file_io._list_backup_names("req")) == 2
+
+    assert file_io.undo_last_change() is True
+    assert len(list(back_dir.glob("*_req.png"))) == 1
+    assert len(file_io._list_backup_names("req")) == 1
+
+
+def test_identical_save_skips_backup_and_png(monkeypatch, tmp_path):
+    """内容が変わらない保存ではバックアップもPNG保存も行わないことを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    manager.add({"unique_id": "n1", "title": "v1"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+    assert fake_st.session_state["save_png"] is True
+    fake_st.session_state["save_png"] = False
+
+    file_io.update_source_data(str(file_path), manager.requirements)
+    assert fake_st.session_state["save_png"] is False
+    assert len(file_io._list_backup_names("req")) == 1
+
+
+def test_undo_skips_identical_snapshots(monkeypatch, tmp_path):
+    """同一内容のバックアップが連続していても、Undoで内容の異なる状態に戻ることを検証。"""
+    _fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    manager.add({"unique_id": "n1", "title": "v1"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+    manager.add({"unique_id": "n2", "title": "v2"}, None, None)
+    file_io.update_source_data(str(file_path), manager.requirements)
+
+    # 重複判定の導入前に作られた同一内容のバックアップ
+    back_dir = tmp_path / "back"
+    latest = sorted(back_dir.glob("*_req.hjson"))[-1]
+    (back_dir / "20991231_000000_req.hjson").write_bytes(latest.read_bytes())
+    assert len(file_io._list_backup_names("req")) == 3
+
+    assert file_io.undo_last_change() is True
+    restored = file_io.load_source_data(str(file_path))
+    assert [n["unique_id"] for n in restored["nodes"]] == ["n1"]
+    assert len(file_io._list_backup_names("req")) == 1
+
+
+def test_config_saved_only_when_last_used_page_changes(monkeypatch, tmp_path):
+    """最後に使用したページが変わらない保存では config を書き込まないことを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+    fake_st.session_state.config_data = {}
+    saved = []
+    monkeypatch.setattr(file_io, "save_config", lambda config: saved.append(dict(config)))
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    for i in range(3):
+        manager.add({"unique_id": f"n{i}", "title": "v"}, None, None)
+        file_io.update_source_data(str(file_path), manager.requirements)
+
+    assert len(saved) == 1
+    assert saved[0]["last_used_page"] == fake_st.session_state.app_name
+
+
+def test_write_behind_coalesces_saves(monkeypatch, tmp_path):
+    """write-behind 有効時は保存がまとめられ、未書き込みの内容が読み込みに反映されることを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+    (tmp_path / "setting").mkdir()
+    fake_st.session_state.config_data = {
+        "write_behind": True,
+        "write_behind_delay_ms": 60000,
+        "write_behind_max_delay_ms": 60000,
+    }
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    try:
+        for i in range(5):
+            manager.add({"unique_id": f"n{i}", "title": "v"}, None, None)
+            file_io.update_source_data(str(file_path), manager.requirements)
+
+        # まだディスクには書き込まれていないが、読み込みには最新の内容が返る
+        assert not file_path.exists()
+        assert file_io.get_pending_write_revision(str(file_path)) > 0
+        assert len(file_io.load_source_data(str(file_path))["nodes"]) == 5
+        assert fake_st.session_state["save_png"] is True
+
+        assert file_io.flush_pending_writes(str(file_path)) is True
+        assert file_io.get_pending_write_revision(str(file_path)) == 0
+        assert len(file_io.load_source_data(str(file_path))["nodes"]) == 5
+        assert len(file_io._list_backup_names("req")) == 1
+
+        # Undo は未書き込みの保存を反映してから1つ前に戻す
+        manager.add({"unique_id": "n5", "title": "v"}, None, None)
+        file_io.update_source_data(str(file_path), manager.requirements)
+        assert file_io.undo_last_change() is True
+        assert len(file_io.load_source_data(str(file_path))["nodes"]) == 5
+    finally:
+        file_io.flush_pending_writes()
+
+
+def test_data_file_formats_roundtrip(monkeypatch, tmp_path):
+    """どの保存形式で書き込んだデータ・バックアップも読み込めることを検証。"""
+    fake_st, file_path = _prepare_runtime(monkeypatch, tmp_path)
+    (tmp_path / "setting").mkdir()
+    fake_st.session_state.config_data = {}
+
+    manager = RequirementManager({"nodes": [], "edges": []})
+    for i, file_format in enumerate(("hjson", "json", "json_compact")):
+        fake_st.session_state.config_data["data_file_format"] = file_format
+        manager.add({"unique_id": f"n{i}", "title": "複数行\nのタイトル"}, None, None)
+        file_io.update_source_data(str(file_path), manager.requirements)
+
+        restored = file_io.load_source_data(str(file_path))
+        assert [n["unique_id"] for n in restored["nodes"]] == [f"n{j}" for j in range(i + 1)]
+        assert restored["nodes"][0]["title"] == "複数行\nのタイトル"
+
+    assert file_path.read_text(encoding="utf-8").startswith('{"nodes":[')
+    for backup_name in file_io._list_backup_names("req"):
+        assert file_io.load_backup_data(backup_name)["nodes"][0]["unique_id"] == "n0"
+
+    # 不正な設定値は hjson とみなす
+    fake_st.session_state.config_data["data_file_format"] = "yaml"
+    assert file_io.get_data_file_format() == "hjson"
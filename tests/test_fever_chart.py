@@ -0,0 +1,63 @@
+"""fever_chart（複数プロジェクトフィーバーチャートの図）のユニットテスト"""
+import pytest
+
+pytest.importorskip("plotly")
+
+from src.fever_chart import (  # noqa: E402
+    LARGE_PORTFOLIO_MAX_POINTS,
+    ZONE_TRACES,
+    build_fever_figure,
+    decimate_points,
+)
+
+
+def _portfolio(project_count, point_count):
+    result = []
+    for i in range(project_count):
+        points = [
+            {
+                "date": f"2025/{1 + k // 28 % 12:02d}/{1 + k % 28:02d}",
+                "progress": k * 100.0 / point_count,
+                "memo": f"記録{k}",
+                "fever": {"progress": k * 100.0 / point_count, "buffer_used": (i + k) % 120 + 0.123},
+            }
+            for k in range(point_count)
+        ]
+        result.append(({"id": f"P{i}", "name": f"プロジェクト{i}"}, points))
+    return result
+
+
+class TestDecimatePoints:
+    def test_先頭と最新を残して間引く(self):
+        points = list(range(100))
+        decimated = decimate_points(points, 12)
+        assert len(decimated) == 12
+        assert decimated[0] == 0 and decimated[-1] == 99
+        assert decimated == sorted(decimated)
+
+    def test_上限以下ならそのまま(self):
+        assert decimate_points([1, 2, 3], 12) == [1, 2, 3]
+
+
+class TestBuildFeverFigure:
+    def test_進捗点がなければNone(self):
+        assert build_fever_figure([({"name": "A"}, [])], 10) is None
+
+    def test_少数のプロジェクトは通常表示(self):
+        fig = build_fever_figure(_portfolio(3, 20), 10)
+        project_traces = fig.data[len(ZONE_TRACES):]
+        assert [trace.type for trace in project_traces] == ["scatter"] * 3
+        assert all(len(trace.x) == 10 for trace in project_traces)
+
+    def test_500プロジェクトは大規模表示で図のサイズを抑える(self):
+        portfolio = _portfolio(500, 100)
+
+        large = build_fever_figure(portfolio, 0)
+        normal = build_fever_figure(portfolio, 0, large=False)
+
+        project_traces = large.data[len(ZONE_TRACES) + 1:]
+        assert {trace.type for trace in project_traces} == {"scattergl"}
+        assert all(len(trace.x) <= LARGE_PORTFOLIO_MAX_POINTS for trace in project_traces)
+        size = len(large.to_json())
+        assert size < 600_000
+        assert size * 10 < len(normal.to_json())
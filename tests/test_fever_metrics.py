@@ -0,0 +1,63 @@
+"""fever_metrics（プロジェクトごとの指標キャッシュ）のユニットテスト"""
+import datetime
+
+import pytest
+
+from src import fever_metrics
+from src.ccpm_engine import calculate_fever_data_from_progress, calculate_working_days
+from src.fever_metrics import get_project_metrics
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    fever_metrics.clear_project_metrics_cache()
+    yield
+    fever_metrics.clear_project_metrics_cache()
+
+
+def _project(name, progress=40):
+    return {
+        "id": name,
+        "name": name,
+        "start": "2025/04/01",
+        "end": "2025/06/30",
+        "buffer_percent": 30.0,
+        "progress": [
+            {"date": "2025/05/15", "progress": progress, "memo": "後"},
+            {"date": "2025/04/15", "progress": 10, "memo": "前"},
+        ],
+    }
+
+
+class TestGetProjectMetrics:
+    def test_稼働日数と進捗点(self):
+        project = _project("A")
+        metrics = get_project_metrics([project], ["2025/05/05"])[0]
+
+        workdays = calculate_working_days("2025/04/01", "2025/06/30", ["2025/05/05"])
+        assert metrics.workdays == round(workdays, 1)
+        assert metrics.buffer_days == round(workdays * 0.3, 1)
+        assert [p["memo"] for p in metrics.points] == ["前", "後"]
+        expected = calculate_fever_data_from_progress(project, 40, "2025/05/15", ["2025/05/05"])
+        assert metrics.points[1]["fever"] == pytest.approx(expected)
+
+    def test_変更したプロジェクトのみ再計算する(self):
+        projects = [_project("A"), _project("B")]
+        first = get_project_metrics(projects, [])
+
+        projects[1] = _project("B", progress=60)
+        second = get_project_metrics(projects, [])
+
+        assert second[0] is first[0]
+        assert second[1] is not first[1]
+        assert second[1].points[-1]["progress"] == 60
+
+    def test_共通祝日が変われば再計算する(self):
+        projects = [_project("A")]
+        first = get_project_metrics(projects, [])
+        assert get_project_metrics(projects, ["2025/05/05"])[0] is not first[0]
+
+    def test_残日数(self):
+        metrics = get_project_metrics([_project("A")], [])[0]
+        assert metrics.remaining_days(datetime.date(2025, 6, 27)) == 2
+        assert metrics.remaining_days(datetime.date(2025, 7, 10)) == 0
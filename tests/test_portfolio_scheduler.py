@@ -0,0 +1,269 @@
+"""portfolio_scheduler（CCPM ファイル間のリソース競合とドラム・スケジューリング）のユニットテスト"""
+import itertools
+import json
+import os
+import shutil
+
+import networkx as nx
+import pytest
+
+from src import portfolio_scheduler
+from src.portfolio_scheduler import (
+    PortfolioProject,
+    PortfolioScheduler,
+    build_portfolio_schedule,
+    detect_cross_project_conflicts,
+    load_portfolio_project,
+    merge_project_graphs,
+)
+from src.process_pool import create_process_pool
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample", "ccpm.hjson")
+
+
+def _write_project(path, tasks, edges=(), today="2025/07/01", holidays=()):
+    """tasks: [(ID, 日数, 担当)] の CCPM ファイルを書く。"""
+    data = {
+        "nodes": [
+            {
+                "unique_id": task, "title": task, "type": "process", "days": days, "remains": 0,
+                "resource": resource, "start": "", "end": "", "finished": False, "color": "None",
+            }
+            for task, days, resource in tasks
+        ],
+        "edges": [
+            {"source": src, "destination": dst, "type": "arrow", "comment": ""} for src, dst in edges
+        ],
+        "project": {"name": os.path.basename(str(path)), "start": today, "end": "2025/12/31",
+                    "today": today, "holidays": list(holidays), "resources": []},
+        "progress": {},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # 田中の作業（5日）の後に、佐藤の作業（3日）が続くプロジェクトを2つ
+    for name in ("a_ccpm.hjson", "b_ccpm.hjson"):
+        _write_project(tmp_path / name, [("X", 5, "田中"), ("Y", 3, "佐藤")], [("X", "Y")])
+    return tmp_path
+
+
+class TestLoadPortfolioProject:
+    def test_名前空間付きのグラフとスケジュール(self, data_dir):
+        a = load_portfolio_project(str(data_dir / "a_ccpm.hjson"))
+        b = load_portfolio_project(str(data_dir / "b_ccpm.hjson"))
+        assert a.error == ""
+        assert set(a.schedule) == {"a::X", "a::Y"}
+        assert a.schedule["a::Y"] == (5.0, 8.0)
+        assert a.chain_length == 8.0
+
+        merged = merge_project_graphs([a, b])
+        assert sorted(merged.nodes) == ["a::X", "a::Y", "b::X", "b::Y"]
+        assert merged.has_edge("b::X", "b::Y")
+        assert merged.nodes["b::X"]["project"] == "b"
+        assert merged.nodes["b::X"]["resource"] == "田中"
+
+    def test_プロジェクト内の競合は平準化済み(self, tmp_path):
+        # 並行する P と Q を同じ田中が担当する
+        _write_project(tmp_path / "s_ccpm.hjson", [("P", 2, "田中"), ("Q", 4, "田中")])
+        project = load_portfolio_project(str(tmp_path / "s_ccpm.hjson"))
+        virtual = [(u, v) for u, v, d in project.graph.edges(data=True) if d.get("virtual")]
+        assert virtual == [("s::Q", "s::P")]
+        assert project.schedule["s::P"] == (4.0, 6.0)
+        assert detect_cross_project_conflicts(project.graph, project.schedule) == []
+
+    def test_サンプルを読み込める(self, tmp_path):
+        shutil.copy(SAMPLE, tmp_path / "s_ccpm.hjson")
+        project = load_portfolio_project(str(tmp_path / "s_ccpm.hjson"))
+        assert project.error == ""
+        assert project.release.strftime("%Y/%m/%d") == "2025/08/05"
+        assert all(node.startswith("s::") for node in project.graph.nodes)
+
+    def test_読み込めないファイルはエラーを返す(self, tmp_path):
+        path = tmp_path / "broken_ccpm.hjson"
+        path.write_text("{ nodes: [", encoding="utf-8")
+        assert load_portfolio_project(str(path)).error
+
+
+class TestDetectCrossProjectConflicts:
+    def test_総当たりと一致(self):
+        import random
+        rng = random.Random(0)
+        graph = nx.DiGraph()
+        schedule = {}
+        for i in range(80):
+            node = f"n{i}"
+            start = rng.randint(0, 40)
+            graph.add_node(node, days=rng.randint(1, 6), resource=rng.choice("ABC"),
+                           project=rng.choice("pqr"), start="", remains=0, finished=False)
+            schedule[node] = (float(start), float(start + graph.nodes[node]["days"]))
+
+        found = {
+            (c.resource, frozenset((c.task_a, c.task_b))): c.overlap
+            for c in detect_cross_project_conflicts(graph, schedule)
+        }
+        expected = {}
+        for a, b in itertools.combinations(graph.nodes, 2):
+            attrs_a, attrs_b = graph.nodes[a], graph.nodes[b]
+            if attrs_a["resource"] != attrs_b["resource"] or attrs_a["project"] == attrs_b["project"]:
+                continue
+            overlap = min(schedule[a][1], schedule[b][1]) - max(schedule[a][0], schedule[b][0])
+            if overlap > 0:
+                expected[(attrs_a["resource"], frozenset((a, b)))] = overlap
+        assert found == expected
+
+
+class TestBuildPortfolioSchedule:
+    def test_ドラムの作業が重ならないように投入をずらす(self, data_dir):
+        projects = [load_portfolio_project(str(data_dir / name)) for name in ("a_ccpm.hjson", "b_ccpm.hjson")]
+        result = build_portfolio_schedule(projects, capacity_buffer=1)
+
+        assert result.drum == "田中"
+        assert len(result.conflicts_before) == 2
+        # 田中の作業 [0, 5) の後、1日空けて b を投入する
+        assert result.offsets == {"a": 0, "b": 6}
+        assert result.conflicts_after == []
+        assert result.proposed_release(projects[1]).strftime("%Y/%m/%d") == "2025/07/09"
+
+    def test_投入日の差を共通の時間軸にそろえる(self, tmp_path):
+        _write_project(tmp_path / "a_ccpm.hjson", [("X", 5, "田中")], today="2025/07/01")
+        # 3稼働日後に投入されるため、重なりは2日
+        _write_project(tmp_path / "b_ccpm.hjson", [("X", 5, "田中")], today="2025/07/04")
+        projects = [load_portfolio_project(str(tmp_path / n)) for n in ("a_ccpm.hjson", "b_ccpm.hjson")]
+        result = build_portfolio_schedule(projects, capacity_buffer=0)
+        assert result.origins == {"a": 0, "b": 3}
+        assert [c.overlap for c in result.conflicts_before] == [2.0]
+        assert result.offsets["b"] == 2
+
+    def test_日付はプロジェクトの祝日を除いて数える(self, data_dir):
+        # b のみ 7/3 と 7/7 が祝日（b のスケジュール・CC 長は b の稼働日）
+        _write_project(
+            data_dir / "b_ccpm.hjson", [("X", 5, "田中"), ("Y", 3, "佐藤")], [("X", "Y")],
+            today="2025/07/04", holidays=["2025/07/03", "2025/07/07"],
+        )
+        projects = [load_portfolio_project(str(data_dir / name)) for name in ("a_ccpm.hjson", "b_ccpm.hjson")]
+        assert projects[1].holidays == ["2025/07/03", "2025/07/07"]
+        result = build_portfolio_schedule(projects, capacity_buffer=1)
+
+        # 7/1〜7/4 のうち b の稼働日は 7/1, 7/2, 7/4
+        assert result.origins == {"a": 0, "b": 2}
+        assert result.offsets == {"a": 0, "b": 4}
+        assert result.proposed_finish(projects[0]).strftime("%Y/%m/%d") == "2025/07/11"
+        # 7/4 から祝日の 7/7 を除いて4稼働日後、そこから8稼働日後
+        assert result.proposed_release(projects[1]).strftime("%Y/%m/%d") == "2025/07/11"
+        assert result.proposed_finish(projects[1]).strftime("%Y/%m/%d") == "2025/07/23"
+
+    def test_共有リソースがなければずらさない(self, tmp_path):
+        _write_project(tmp_path / "a_ccpm.hjson", [("X", 5, "田中")])
+        _write_project(tmp_path / "b_ccpm.hjson", [("X", 5, "佐藤")])
+        projects = [load_portfolio_project(str(tmp_path / n)) for n in ("a_ccpm.hjson", "b_ccpm.hjson")]
+        result = build_portfolio_schedule(projects)
+        assert result.drum is None
+        assert result.offsets == {"a": 0, "b": 0}
+
+    def test_エラーのプロジェクトは除外する(self, data_dir):
+        projects = [
+            load_portfolio_project(str(data_dir / "a_ccpm.hjson")),
+            PortfolioProject(id="x", name="x", file="x_ccpm.hjson", error="壊れています"),
+        ]
+        result = build_portfolio_schedule(projects)
+        assert [p.id for p in result.projects] == ["a"]
+        assert [p.id for p in result.skipped] == ["x"]
+
+
+class TestPortfolioScheduler:
+    def test_バックグラウンドで計算して進捗を報告する(self, data_dir):
+        scheduler = PortfolioScheduler(str(data_dir), max_workers=1)
+        assert scheduler.start()
+        scheduler.wait(30)
+        assert not scheduler.is_running()
+        assert scheduler.error == ""
+        progress = scheduler.progress
+        assert progress.done == progress.total == 3
+        assert progress.fraction == 1.0
+        assert scheduler.result.offsets == {"a": 0, "b": 6}
+
+    def test_変更されたファイルのみ読み込み直す(self, data_dir, monkeypatch):
+        loaded = []
+        original = portfolio_scheduler.load_portfolio_project
+
+        def _load(path):
+            loaded.append(os.path.basename(path))
+            return original(path)
+
+        monkeypatch.setattr(portfolio_scheduler, "load_portfolio_project", _load)
+        scheduler = PortfolioScheduler(str(data_dir), max_workers=1)
+        scheduler.start()
+        scheduler.wait(30)
+        assert sorted(loaded) == ["a_ccpm.hjson", "b_ccpm.hjson"]
+
+        _write_project(data_dir / "b_ccpm.hjson", [("X", 2, "田中")])
+        loaded.clear()
+        scheduler.start()
+        scheduler.wait(30)
+        assert loaded == ["b_ccpm.hjson"]
+        assert scheduler.result.offsets == {"a": 0, "b": 6}
+
+    def test_設定ごとに結果を保持する(self, data_dir):
+        scheduler = PortfolioScheduler(str(data_dir), max_workers=1)
+        scheduler.start()
+        scheduler.wait(30)
+        scheduler.start("田中", 3)
+        scheduler.wait(30)
+        # 別のセッションの設定で計算しても、先に計算した設定の結果は変わらない
+        assert scheduler.result_for().offsets == {"a": 0, "b": 6}
+        assert scheduler.result_for("田中", 3).offsets == {"a": 0, "b": 8}
+        assert scheduler.result is scheduler.result_for("田中", 3)
+        assert scheduler.result_for("佐藤", 0) is None
+        assert scheduler.error_for("田中", 3) == ""
+        assert not scheduler.is_pending("田中", 3)
+
+    def test_計算中に依頼された設定も同じ読み込み結果から計算する(self, data_dir, monkeypatch):
+        import threading
+
+        release = threading.Event()
+        loaded = []
+        original = portfolio_scheduler.load_portfolio_project
+
+        def _load(path):
+            release.wait(30)
+            loaded.append(os.path.basename(path))
+            return original(path)
+
+        monkeypatch.setattr(portfolio_scheduler, "load_portfolio_project", _load)
+        scheduler = PortfolioScheduler(str(data_dir), max_workers=1)
+        assert scheduler.start()
+        assert not scheduler.start("田中", 3)
+        assert scheduler.is_running()
+        assert scheduler.is_pending() and scheduler.is_pending("田中", 3)
+        release.set()
+        scheduler.wait(30)
+
+        assert sorted(loaded) == ["a_ccpm.hjson", "b_ccpm.hjson"]
+        assert not scheduler.is_running()
+        assert scheduler.result_for().offsets == {"a": 0, "b": 6}
+        assert scheduler.result_for("田中", 3).offsets == {"a": 0, "b": 8}
+        progress = scheduler.progress
+        assert progress.done == progress.total == 3
+
+    def test_並列読み込みでも同じ結果(self, data_dir, monkeypatch):
+        pools = []
+
+        def recording_pool(max_workers=None):
+            pool = create_process_pool(max_workers)
+            pools.append(pool)
+            return pool
+
+        monkeypatch.setattr(portfolio_scheduler, "create_process_pool", recording_pool)
+        serial = PortfolioScheduler(str(data_dir), max_workers=1)
+        parallel = PortfolioScheduler(str(data_dir), max_workers=2)
+        for scheduler in (serial, parallel):
+            scheduler.start()
+            scheduler.wait(60)
+        assert parallel.error == ""
+        # ワーカーは共通のヘルパーで spawn により起動する
+        assert [pool._mp_context.get_start_method() for pool in pools] == ["spawn"]
+        assert parallel.result.offsets == serial.result.offsets
+        assert len(parallel.result.conflicts_before) == len(serial.result.conflicts_before)
@@ -0,0 +1,14 @@
+"""process_pool（spawn で起動するプロセスプール）のユニットテスト"""
+import os
+
+from src.process_pool import START_METHOD, create_process_pool
+
+
+class TestCreateProcessPool:
+    def test_spawnでワーカーを起動する(self):
+        assert START_METHOD == "spawn"
+        with create_process_pool(max_workers=1) as pool:
+            assert pool._mp_context.get_start_method() == "spawn"
+            # ワーカーは別プロセスで動き、src のモジュールを読み込める
+            assert pool.submit(os.getpid).result(timeout=60) != os.getpid()
+            assert list(pool.map(abs, [-1, -2])) == [1, 2]
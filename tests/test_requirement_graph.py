@@ -79,6 +79,16 @@ class TestExtractSubgraph:
         assert "n2" in nodes
         assert "n1" not in nodes
 
+    def test_サブグラフのリビジョンは抽出条件ごと(self, chain_graph):
+        chain_graph.extract_subgraph("n2", 0, 1)
+        assert chain_graph.subgraph_revision is None
+        chain_graph.revision = "rev"
+        chain_graph.extract_subgraph("n2", 0, 1)
+        first = chain_graph.subgraph_revision
+        chain_graph.extract_subgraph("n2", 1, 1)
+        assert first.startswith("rev:")
+        assert chain_graph.subgraph_revision != first
+
     def test_detailがfalseでnoteが除外される(self):
         data = {
             "nodes": [
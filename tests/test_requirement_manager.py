@@ -64,6 +64,29 @@ class TestAdd:
         mgr.add(node, None, None)
         assert node["title"] == ""
 
+    def test_重複エッジは追加されない(self):
+        data = _make_data(edges=[_edge("n1", "n2")])
+        mgr = RequirementManager(data)
+        mgr.add(_node("n3"), None, [_edge("n1", "n2"), _edge("n3", "n1"), _edge("n3", "n1")])
+        assert data["edges"] == [_edge("n1", "n2"), _edge("n3", "n1")]
+
+
+# --- add_edge ---
+
+class TestAddEdge:
+    def test_同一内容なら追加しない(self):
+        data = _make_data(edges=[_edge("a", "b")])
+        mgr = RequirementManager(data)
+        assert mgr.add_edge({"type": "arrow", "destination": "b", "source": "a"}) is False
+        assert mgr.add_edge(_edge("a", "b", comment="x")) is True
+        assert len(data["edges"]) == 2
+
+    def test_削除後は再追加できる(self):
+        data = _make_data([_node("a"), _node("b")], [_edge("a", "b")])
+        mgr = RequirementManager(data)
+        mgr.remove("b")
+        assert mgr.add_edge(_edge("a", "b")) is True
+
 
 # --- remove ---
 
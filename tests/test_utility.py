@@ -11,6 +11,8 @@ from src.utility import (
     unescape_newline,
     recursive_unescape,
     make_hashable,
+    edge_key,
+    dedup_edges,
     calculate_text_area_height,
     encode64,
     get_default_data_structure,
@@ -159,6 +161,27 @@ class TestMakeHashable:
         # ハッシュ可能であること
         hash(result)
 
+
+# --- edge_key / dedup_edges ---
+
+class TestEdgeKey:
+    def test_キー順に依存しない(self):
+        assert edge_key({"source": "a", "destination": "b"}) == edge_key({"destination": "b", "source": "a"})
+
+    def test_ハッシュ不可能な値を含む(self):
+        key = edge_key({"source": "a", "note": {"x": [1, 2]}})
+        hash(key)
+        assert key == make_hashable({"source": "a", "note": {"x": [1, 2]}})
+
+
+class TestDedupEdges:
+    def test_最初の出現を残す(self):
+        e1 = {"source": "a", "destination": "b"}
+        e2 = {"source": "b", "destination": "c"}
+        result = dedup_edges([e1, e2, {"destination": "b", "source": "a"}])
+        assert result == [e1, e2]
+        assert result[0] is e1
+
     def test_プリミティブはそのまま(self):
         assert make_hashable(42) == 42
         assert make_hashable("s") == "s"
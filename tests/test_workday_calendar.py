@@ -0,0 +1,93 @@
+"""workday_calendar（稼働日カレンダー）のユニットテスト"""
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+import workdays
+
+from src.workday_calendar import WorkdayCalendar, get_workday_calendar, to_date
+
+
+def _random_holidays(rng, count=15):
+    base = date(2026, 1, 1)
+    return sorted({base + timedelta(days=rng.randint(0, 365)) for _ in range(count)})
+
+
+class TestToDate:
+    def test_各種の型を変換(self):
+        assert to_date("2026/03/01") == date(2026, 3, 1)
+        assert to_date(datetime(2026, 3, 1, 12, 0)) == date(2026, 3, 1)
+        assert to_date(date(2026, 3, 1)) == date(2026, 3, 1)
+        assert to_date(np.datetime64("2026-03-01")) == date(2026, 3, 1)
+
+    def test_変換できない値はNone(self):
+        assert to_date("") is None
+        assert to_date("2026-03-01") is None
+        assert to_date(None) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+class TestWorkdaysとの一致:
+    def test_networkdays(self, seed):
+        rng = random.Random(seed)
+        holidays = _random_holidays(rng)
+        calendar = WorkdayCalendar(holidays)
+        for _ in range(200):
+            start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+            end = start + timedelta(days=rng.randint(0, 120))
+            assert calendar.networkdays(start, end) == workdays.networkdays(start, end, holidays)
+
+    def test_逆順の範囲(self, seed):
+        rng = random.Random(seed)
+        holidays = _random_holidays(rng)
+        calendar = WorkdayCalendar(holidays)
+        starts, ends, expected = [], [], []
+        for _ in range(200):
+            start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+            end = start - timedelta(days=rng.randint(1, 30))
+            starts.append(start)
+            ends.append(end)
+            expected.append(workdays.networkdays(start, end, holidays))
+            assert calendar.networkdays(start, end) == expected[-1]
+        assert calendar.networkdays_many(starts, ends).tolist() == expected
+
+    def test_workday(self, seed):
+        rng = random.Random(seed)
+        holidays = _random_holidays(rng)
+        calendar = WorkdayCalendar(holidays)
+        for _ in range(200):
+            start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+            days = rng.randint(0, 60)
+            assert calendar.workday(start, days) == workdays.workday(start, days, holidays)
+
+
+class TestWorkdayCalendar:
+    def test_逆順の範囲は全組み合わせでworkdaysと一致(self):
+        # 2025/07/05(土) → 2025/07/01 は workdays と同じ -3
+        calendar = WorkdayCalendar(["2025/07/21"])
+        assert calendar.networkdays("2025/07/05", "2025/07/01") == -3
+        july = [date(2025, 7, 1) + timedelta(days=i) for i in range(31)]
+        for start in july:
+            for end in july:
+                assert calendar.networkdays(start, end) == workdays.networkdays(
+                    start, end, [date(2025, 7, 21)]
+                )
+
+    def test_文字列の祝日と不正な値(self):
+        calendar = WorkdayCalendar(["2026/03/04", "不正な日付"])
+        # 2026/03/02(月)〜03/06(金) のうち 03/04 が祝日
+        assert calendar.networkdays("2026/03/02", "2026/03/06") == 4
+        assert calendar.is_workday("2026/03/04") is False
+
+    def test_ベクトル版(self):
+        calendar = WorkdayCalendar(["2026/03/04"])
+        starts = ["2026/03/02", "2026/03/02", ""]
+        ends = ["2026/03/06", "2026/03/13", "2026/03/06"]
+        assert calendar.networkdays_many(starts, ends).tolist() == [4, 9, 0]
+        # スカラーとの組み合わせ
+        assert calendar.networkdays_many("2026/03/02", ends[:2]).tolist() == [4, 9]
+
+    def test_祝日セットごとに共有(self):
+        assert get_workday_calendar(["2026/03/04"]) is get_workday_calendar(["2026/03/04"])
+        assert get_workday_calendar(["2026/03/04"]) is not get_workday_calendar([])
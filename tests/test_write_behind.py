@@ -0,0 +1,160 @@
+"""write_behind（連続保存のまとめ書き込み）のユニットテスト"""
+import threading
+import time
+
+from src.write_behind import WriteBehindWriter
+
+
+class _Recorder:
+    """書き込み内容を記録する write_func。"""
+
+    def __init__(self, fail_times=0):
+        self.writes = []
+        self.fail_times = fail_times
+        self.event = threading.Event()
+
+    def __call__(self, key, data, context):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise OSError("disk full")
+        self.writes.append((key, data, context))
+        self.event.set()
+
+
+def _wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestWriteBehindWriter:
+    def test_連続保存を1回にまとめる(self):
+        recorder = _Recorder()
+        writer = WriteBehindWriter(recorder, delay=0.1, max_delay=5.0)
+        for i in range(10):
+            writer.submit("a.hjson", {"value": i})
+
+        assert _wait_until(lambda: recorder.writes)
+        time.sleep(0.2)
+        assert recorder.writes == [("a.hjson", {"value": 9}, {})]
+        assert writer.has_pending("a.hjson") is False
+        writer.close()
+
+    def test_最大待ち時間で書き込む(self):
+        recorder = _Recorder()
+        writer = WriteBehindWriter(recorder, delay=0.2, max_delay=0.3)
+        start = time.monotonic()
+        # delay より短い間隔で保存を続けても max_delay で書き込まれる
+        while time.monotonic() - start < 0.8:
+            writer.submit("a.hjson", {"t": time.monotonic()})
+            time.sleep(0.05)
+
+        assert len(recorder.writes) >= 1
+        writer.close()
+
+    def test_登録時点の内容を保持する(self):
+        recorder = _Recorder()
+        writer = WriteBehindWriter(recorder, delay=60, max_delay=60)
+        data = {"nodes": [1]}
+        writer.submit("a.hjson", data)
+        data["nodes"].append(2)
+
+        assert writer.pending_data("a.hjson") == {"nodes": [1]}
+        writer.flush("a.hjson")
+        assert recorder.writes == [("a.hjson", {"nodes": [1]}, {})]
+
+    def test_リビジョンは未書き込みの間のみ(self):
+        writer = WriteBehindWriter(_Recorder(), delay=60, max_delay=60)
+        assert writer.revision("a.hjson") == 0
+        first = writer.submit("a.hjson", {})
+        second = writer.submit("a.hjson", {})
+        assert second > first
+        assert writer.revision("a.hjson") == second
+        writer.flush()
+        assert writer.revision("a.hjson") == 0
+
+    def test_失敗したら保持して再試行(self):
+        recorder = _Recorder(fail_times=1)
+        writer = WriteBehindWriter(recorder, delay=0.05, max_delay=0.05)
+        writer.submit("a.hjson", {"value": 1})
+
+        assert _wait_until(lambda: recorder.writes)
+        assert recorder.writes == [("a.hjson", {"value": 1}, {})]
+        assert isinstance(writer.pop_error(), OSError)
+        assert writer.pop_error() is None
+        writer.close()
+
+    def test_失敗後に新しい保存があれば古い内容は破棄(self):
+        recorder = _Recorder(fail_times=1)
+        writer = WriteBehindWriter(recorder, delay=60, max_delay=60)
+        writer.submit("a.hjson", {"value": 1})
+        assert writer.flush() is False
+        writer.submit("a.hjson", {"value": 2})
+        assert writer.flush() is True
+        assert recorder.writes == [("a.hjson", {"value": 2}, {})]
+
+    def test_終了時にすべて書き込む(self):
+        recorder = _Recorder()
+        writer = WriteBehindWriter(recorder, delay=60, max_delay=60)
+        writer.submit("a.hjson", {"value": 1}, {"postfix": "req"})
+        writer.submit("b.hjson", {"value": 2})
+
+        writer.close()
+
+        assert sorted(w[0] for w in recorder.writes) == ["a.hjson", "b.hjson"]
+        # 終了後の保存は即座に書き込まれる
+        writer.submit("c.hjson", {"value": 3})
+        assert recorder.writes[-1][0] == "c.hjson"
+
+    def test_書き込み中も未書き込みとして参照できる(self):
+        started, release = threading.Event(), threading.Event()
+        writes = []
+
+        def blocking_write(key, data, context):
+            started.set()
+            release.wait(3.0)
+            writes.append(data)
+
+        writer = WriteBehindWriter(blocking_write, delay=0.01, max_delay=0.01)
+        revision = writer.submit("a.hjson", {"value": 1})
+        assert started.wait(3.0)
+
+        # ワーカーが書き込んでいる間も、読み込み側はディスクではなく未書き込みのデータを使う
+        assert writer.pending_data("a.hjson") == {"value": 1}
+        assert writer.revision("a.hjson") == revision
+        assert writer.has_pending("a.hjson") is True
+
+        release.set()
+        assert _wait_until(lambda: not writer.has_pending("a.hjson"))
+        assert writes == [{"value": 1}]
+        assert writer.revision("a.hjson") == 0
+        writer.close()
+
+    def test_書き込み中の新しい保存は書き込み後も残る(self):
+        started, release = threading.Event(), threading.Event()
+        writes = []
+
+        def blocking_write(key, data, context):
+            if not writes:
+                started.set()
+                release.wait(3.0)
+            writes.append(data)
+
+        writer = WriteBehindWriter(blocking_write, delay=60, max_delay=60)
+        writer.submit("a.hjson", {"value": 1})
+        flusher = threading.Thread(target=writer.flush)
+        flusher.start()
+        assert started.wait(3.0)
+        revision = writer.submit("a.hjson", {"value": 2})
+        release.set()
+        flusher.join(3.0)
+
+        # 書き込みが終わっても、置き換えた新しい保存は取り除かない
+        assert writes == [{"value": 1}]
+        assert writer.pending_data("a.hjson") == {"value": 2}
+        assert writer.revision("a.hjson") == revision
+        writer.flush()
+        assert writes == [{"value": 1}, {"value": 2}]